@@ -156,7 +156,7 @@ async def process_text(request: ProcessRequest, engine: NLPEngine = Depends(get_
     # 2. GPT-2 Generation
     context_str = request.text
     if len(context_str.strip()) > 2:
-        generations = engine.generate_text(context_str, max_new_tokens=4)
+        generations = engine.generate_text(context_str, max_new_tokens=4, session_id=request.session_id)
         for gen in generations:
             if len(gen) > len(context_str):
                 clean_gen = gen[len(context_str):].strip()
@@ -12,6 +12,11 @@ class ProcessRequest(BaseModel):
         description="Previous context (for smart completion)",
         max_length=2000,
     )
+    session_id: Optional[str] = Field(
+        None,
+        description="Client session id (reuses the model context cache across keystrokes)",
+        max_length=128,
+    )
 
 class SuggestionItem(BaseModel):
     text: str
@@ -0,0 +1,191 @@
+"""
+Yük altında kademeli öneri kaynağı kapatma (admission control).
+
+Orchestrator her tuş vuruşunda transformer, phrase, domain, emoji ve template
+kaynaklarını çalıştırıyordu; yük artınca her şey bunların arkasında
+kuyruklanıyordu. AdmissionController üç sinyali izler:
+
+- event loop gecikmesi (periyodik uyku ne kadar geç uyanıyor, EWMA)
+- eş zamanlı işlenen istek sayısı
+- kaynak başına son gecikmeler (EWMA; ADMISSION_WINDOW_S'den eski ölçüm yok sayılır),
+  kaynağın kendi beklenen maliyetine (scheduler SOURCE_SPECS cost_ms) oranla;
+  kaynak beklenenin ADMISSION_SOURCE_SLOWDOWN katına çıkınca baskı 1 olur
+
+ve bunlardan bir baskı (pressure) değeri üretir. Seviye yükselirken anında,
+düşerken ADMISSION_COOLDOWN_S aralıkla birer kademe değişir:
+
+  0: tüm kaynaklar
+  1: transformer kapalı
+  2: + phrase kapalı
+  3: + template, emoji ve domain kapalı
+
+Trie / lexicon hızlı yolu (ALWAYS_ON) hiçbir seviyede kapatılmaz. Kapatılan
+kaynağın eski ölçümü pencereden düşünce baskı azalır ve kaynak tekrar denenir.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.scheduler import SOURCE_SPECS
+
+# Kaynak -> kapatıldığı seviye
+SHED_LEVELS: Dict[str, int] = {
+    "transformer": 1,
+    "phrase": 2,
+    "template": 3,
+    "emoji": 3,
+    "domain": 3,
+}
+ALWAYS_ON = ("lexicon", "search", "medium_dictionary", "smart_completions")
+MAX_LEVEL = 3
+# Baskı eşikleri: pressure >= THRESHOLDS[i] -> seviye i + 1
+THRESHOLDS = (1.0, 1.5, 2.0)
+EWMA_ALPHA = 0.2
+LAG_PROBE_S = 0.05
+
+
+class AdmissionController:
+    """Event loop gecikmesi, eş zamanlı istek ve kaynak gecikmesine göre degrade seviyesi"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        lag_target_ms: float = 25.0,
+        max_inflight: int = 32,
+        source_slowdown: float = 2.0,
+        window_s: float = 10.0,
+        cooldown_s: float = 1.0,
+        baselines: Optional[Dict[str, float]] = None,
+    ):
+        self.enabled = enabled
+        self.lag_target_ms = max(1.0, float(lag_target_ms))
+        self.max_inflight = max(1, int(max_inflight))
+        self.source_slowdown = max(1.0, float(source_slowdown))
+        # Kaynak başına beklenen süre (ms): gecikme buna göre değerlendirilir
+        self.baselines = dict(baselines) if baselines is not None else {
+            source: spec.cost_ms for source, spec in SOURCE_SPECS.items()
+        }
+        self.window_s = float(window_s)
+        self.cooldown_s = float(cooldown_s)
+        self.level = 0
+        self.inflight = 0
+        self.loop_lag_ms = 0.0
+        self._latency: Dict[str, float] = {}
+        self._latency_at: Dict[str, float] = {}
+        self._level_changed_at = 0.0
+        self._monitor: Optional[asyncio.Task] = None
+        self._monitor_loop = None
+        self.shed_counts: Dict[str, int] = {}
+        self.level_requests = [0] * (MAX_LEVEL + 1)
+
+    # --- sinyaller ---
+
+    def _ensure_monitor(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._monitor is not None and self._monitor_loop is loop and not self._monitor.done():
+            return
+        self._monitor_loop = loop
+        self._monitor = loop.create_task(self._measure_lag())
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_S)
+            lag_ms = max(0.0, (loop.time() - start - LAG_PROBE_S) * 1000.0)
+            self.loop_lag_ms += EWMA_ALPHA * (lag_ms - self.loop_lag_ms)
+
+    def record(self, source: str, elapsed_ms: float) -> None:
+        """Kaynağın son çalışma süresini kaydet"""
+        previous = self._latency.get(source)
+        self._latency[source] = elapsed_ms if previous is None else previous + EWMA_ALPHA * (elapsed_ms - previous)
+        self._latency_at[source] = time.monotonic()
+
+    def recent_latency(self, source: str) -> Optional[float]:
+        at = self._latency_at.get(source)
+        if at is None or time.monotonic() - at > self.window_s:
+            return None
+        return self._latency.get(source)
+
+    def source_pressure(self, source: str) -> float:
+        """Kaynağın son gecikmesi / (beklenen süresi x slowdown); ölçüm yoksa 0"""
+        latency = self.recent_latency(source)
+        if latency is None:
+            return 0.0
+        return latency / (max(1.0, self.baselines.get(source, 0.0)) * self.source_slowdown)
+
+    def pressure(self) -> float:
+        lag = self.loop_lag_ms / self.lag_target_ms
+        inflight = self.inflight / self.max_inflight
+        slowest = max((self.source_pressure(source) for source in SHED_LEVELS), default=0.0)
+        return max(lag, inflight, slowest)
+
+    def _update_level(self) -> int:
+        pressure = self.pressure()
+        target = sum(1 for threshold in THRESHOLDS if pressure >= threshold)
+        now = time.monotonic()
+        if target > self.level:
+            self.level = target
+            self._level_changed_at = now
+        elif target < self.level and now - self._level_changed_at >= self.cooldown_s:
+            self.level -= 1
+            self._level_changed_at = now
+        return self.level
+
+    # --- istek tarafı ---
+
+    @contextmanager
+    def track(self):
+        """İstek süresince in-flight say; girişte seviyeyi güncelle. Döner: seviye"""
+        if not self.enabled:
+            yield 0
+            return
+        self._ensure_monitor()
+        self.inflight += 1
+        try:
+            level = self._update_level()
+            self.level_requests[level] += 1
+            yield level
+        finally:
+            self.inflight -= 1
+
+    def allows(self, source: str, level: Optional[int] = None) -> bool:
+        """Kaynak bu seviyede çalışabilir mi (kapatıldıysa sayaç artar)"""
+        if not self.enabled or source in ALWAYS_ON:
+            return True
+        shed_at = SHED_LEVELS.get(source)
+        current = self.level if level is None else level
+        if shed_at is None or current < shed_at:
+            return True
+        self.shed_counts[source] = self.shed_counts.get(source, 0) + 1
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "level": self.level,
+            "pressure": round(self.pressure(), 3),
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
+            "inflight": self.inflight,
+            "source_latency_ms": {
+                source: round(value, 2)
+                for source, value in self._latency.items()
+                if self.recent_latency(source) is not None
+            },
+            "shed": dict(self.shed_counts),
+            "requests_by_level": list(self.level_requests),
+        }
+
+
+admission = AdmissionController(
+    enabled=settings.ADMISSION_ENABLED,
+    lag_target_ms=settings.ADMISSION_LAG_TARGET_MS,
+    max_inflight=settings.ADMISSION_MAX_INFLIGHT,
+    source_slowdown=settings.ADMISSION_SOURCE_SLOWDOWN,
+)
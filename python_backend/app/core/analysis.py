@@ -0,0 +1,102 @@
+"""
+İstek başına bir kez çözümlenen girdi (AnalyzedInput).
+
+Bir tuş vuruşunda aynı metin orchestrator, phrase / domain / emoji / template
+kaynakları, context analyzer, advanced context, n-gram ve relevance filter
+tarafından ayrı ayrı lower() / split() edilip anahtar kelime listelerinde
+taranıyordu (advanced context tam analizi tek istekte 6 kez çalışıyordu).
+Orchestrator artık isteğin başında tek bir AnalyzedInput kurar ve her kaynağa
+onu verir: normalize metin, token'lar, son token, sondaki boşluk ve
+domain / niyet / duygu tespitleri (ilk erişimde hesaplanır).
+
+Anahtar kelime tespitleri metni kendileri taramaz: keywords, paylaşılan
+otomatın (app.core.keywords) tek geçişte bulduğu kelime kümesidir. Kaynağa
+özel tespitler (ör. emoji bağlamı, advanced context analizi) memo() ile
+istek başına bir kez hesaplanır. Özellik modülleri düz str de kabul eder
+(as_analyzed), tek başına kullanımları değişmez.
+"""
+
+import re
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Set, Union
+
+from app.core.keywords import KeywordTable, first_match, keyword_matcher
+
+# Relevance filter'ın kelime tanımı (en az 2 harf)
+WORD_PATTERN = re.compile(r'\b[çğıöşüÇĞIİÖŞÜa-zA-Z]{2,}\b')
+
+# Sıra önemli: ilk eşleşen etiket döner
+DOMAIN_KEYWORDS: KeywordTable = keyword_matcher.table((
+    ('customer_service', ('sipariş', 'müşteri', 'destek', 'yardım', 'şikayet', 'memnuniyet', 'iade')),
+    ('technical', ('api', 'endpoint', 'database', 'query', 'code', 'server', 'error')),
+    ('ecommerce', ('ürün', 'sepet', 'ödeme', 'fatura', 'kampanya', 'indirim', 'kargo', 'teslimat')),
+))
+INTENT_KEYWORDS: KeywordTable = keyword_matcher.table((
+    ('question', ('nasıl', 'ne', 'neden', 'niçin', 'kim', 'nerede', 'ne zaman', 'hangi')),
+    ('request', ('istiyorum', 'istiyoruz', 'istiyorsun', 'istiyorsunuz', 'istiyor', 'lütfen')),
+    ('information', ('bilgi', 'açıkla', 'anlat', 'söyle', 'göster')),
+    ('help', ('yardım', 'destek', 'yardımcı', 'yardım et')),
+))
+SENTIMENT_KEYWORDS: KeywordTable = keyword_matcher.table((
+    ('positive', ('mutlu', 'harika', 'mükemmel', 'güzel', 'iyi', 'başarı', 'teşekkür', 'sağol')),
+    ('negative', ('üzgün', 'kötü', 'sorun', 'hata', 'problem', 'şikayet')),
+))
+
+
+class AnalyzedInput:
+    """Bir isteğin metni: bir kez normalize edilir, tespitler ilk erişimde önbelleklenir"""
+
+    __slots__ = ("text", "lower", "words", "last_word", "tokens", "last_token", "trailing_space", "prefix", "_memo")
+
+    def __init__(self, text: str):
+        self.text = text
+        # Orijinal harf büyüklüğüyle kelimeler (sözlük araması, düzeltme)
+        self.words: List[str] = text.split()
+        self.last_word = self.words[-1] if self.words else text
+        # Küçük harf, kırpılmış metin ve token'ları (anahtar kelime / n-gram eşleşmeleri)
+        self.lower = text.lower().strip()
+        self.tokens: List[str] = self.lower.split()
+        self.last_token = self.tokens[-1] if self.tokens else self.lower
+        self.trailing_space = text[-1:].isspace()
+        # Yazılmakta olan kelime; sonda boşluk varsa sonraki kelime tahmini (önek yok)
+        self.prefix = "" if self.trailing_space else self.last_word.strip()
+        self._memo: Dict[Hashable, Any] = {}
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Kaynağa özel türetilmiş değer: istek başına bir kez hesaplanır"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute()
+            return value
+
+    @property
+    def word_set(self) -> Set[str]:
+        return self.memo("word_set", lambda: set(WORD_PATTERN.findall(self.lower)))
+
+    @property
+    def keywords(self) -> FrozenSet[str]:
+        """Metinde geçen kayıtlı anahtar kelimeler (tüm tespitler için tek tarama)"""
+        return self.memo("keywords", lambda: keyword_matcher.find(self.lower))
+
+    @property
+    def domain(self) -> str:
+        """customer_service | technical | ecommerce | general"""
+        return self.memo("domain", lambda: first_match(self.keywords, DOMAIN_KEYWORDS))
+
+    @property
+    def intent(self) -> str:
+        """question | request | information | help | general"""
+        return self.memo("intent", lambda: first_match(self.keywords, INTENT_KEYWORDS))
+
+    @property
+    def sentiment(self) -> str:
+        """positive | negative | neutral"""
+        return self.memo("sentiment", lambda: first_match(self.keywords, SENTIMENT_KEYWORDS, default='neutral'))
+
+    def __repr__(self) -> str:
+        return f"AnalyzedInput({self.text!r})"
+
+
+def as_analyzed(text: Union[str, AnalyzedInput]) -> AnalyzedInput:
+    """Özellik modülleri için: hazır analiz ya da düz metin"""
+    return text if isinstance(text, AnalyzedInput) else AnalyzedInput(text or "")
@@ -0,0 +1,135 @@
+"""
+İstekler arası mikro-batch'leme (transformer çıkarımı için).
+
+Aynı anda yazan onlarca kullanıcının her biri için ayrı `model.generate(...)`
+çalıştırmak CPU'da çok sayıda küçük forward pass demektir. MicroBatcher eş
+zamanlı istekleri birkaç milisaniye toplar, tek bir batch fonksiyonu çağrısıyla
+(event loop dışında, tek worker thread'de) çalıştırır ve sonuçları bekleyen
+coroutine'lere dağıtır.
+
+Ayarlar: INFERENCE_BATCH_SIZE (batch başına en fazla istek),
+INFERENCE_BATCH_WAIT_MS (ilk istekten sonra en fazla bekleme).
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.logs import logger
+
+
+class MicroBatcher:
+    """Eş zamanlı istekleri toplayıp tek batch çağrısında çalıştırır.
+
+    run_batch(items) -> results: aynı sırada ve aynı uzunlukta sonuç listesi
+    döndüren senkron fonksiyon (model çağrısı). Tek worker thread kullanılır;
+    model aynı anda birden fazla thread'den çağrılmaz.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """İsteği sıraya ekle, kendi sonucunu bekle"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, self.run_batch, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: batch sonucu {len(results)} != {len(items)}")
+        except Exception as e:
+            logger.warning(f"{self.name} batch hatasi ({len(items)} istek): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(items)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+def generate_batch(
+    model,
+    tokenizer,
+    requests: List[Tuple[str, int]],
+    device: Optional[str] = None,
+    max_new_tokens: int = 20,
+    **generate_kwargs,
+) -> List[List[str]]:
+    """(metin, öneri sayısı) listesi için tek `generate` çağrısı; her istek için üretilen metinler.
+
+    Decoder-only modellerde batch sol padding ile yapılır; num_return_sequences
+    batch'teki en büyük öneri sayısıdır, fazlası istek başına kırpılır.
+    """
+    import torch
+
+    texts = [text for text, _ in requests]
+    num_return = max(count for _, count in requests)
+
+    padding_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"
+    try:
+        inputs = tokenizer(texts, return_tensors="pt", truncation=True, max_length=128, padding=True)
+    finally:
+        tokenizer.padding_side = padding_side
+    if device:
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_length=inputs["input_ids"].shape[1] + max_new_tokens,
+            num_return_sequences=num_return,
+            pad_token_id=tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+            **generate_kwargs,
+        )
+
+    decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    return [
+        decoded[i * num_return:i * num_return + count]
+        for i, (_, count) in enumerate(requests)
+    ]
@@ -27,6 +27,53 @@ class Settings:
     USE_TRANSFORMER: bool = os.getenv("USE_TRANSFORMER", "false").lower() == "true"
     USE_ELASTICSEARCH: bool = os.getenv("USE_ELASTICSEARCH", "false").lower() == "true"
     ENABLE_HEAVY_FEATURES: bool = os.getenv("ENABLE_HEAVY_FEATURES", "false").lower() == "true"
+    # Kurulmus index'leri (Trie, prefix index, SymSpell) diske yaz / acilista oradan yukle
+    USE_INDEX_SNAPSHOTS: bool = os.getenv("USE_INDEX_SNAPSHOTS", "true").lower() == "true"
+
+    # Transformer cikarimi: es zamanli istekler tek batch'te calistirilir
+    INFERENCE_BATCH_SIZE: int = int(os.getenv("INFERENCE_BATCH_SIZE", "8"))
+    INFERENCE_BATCH_WAIT_MS: float = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))
+    # score: tek forward pass + top-k sonraki kelime (deterministik); generate: eski ornekleme
+    TRANSFORMER_MODE: str = os.getenv("TRANSFORMER_MODE", "score").lower()
+    # Skorlama modunda sadece sozlukte (lexicon) olan kelimeleri oner
+    TRANSFORMER_DICT_FILTER: bool = os.getenv("TRANSFORMER_DICT_FILTER", "false").lower() == "true"
+    # Oturum basina KV cache: yeni metin oncekinin devamiysa sadece yeni token'lar encode edilir
+    KV_CACHE_ENABLED: bool = os.getenv("KV_CACHE_ENABLED", "true").lower() == "true"
+    KV_CACHE_MAX_SESSIONS: int = int(os.getenv("KV_CACHE_MAX_SESSIONS", "64"))
+    KV_CACHE_MAX_MB: float = float(os.getenv("KV_CACHE_MAX_MB", "256"))
+    KV_CACHE_MAX_TOKENS: int = int(os.getenv("KV_CACHE_MAX_TOKENS", "512"))
+    # Cikarim backend'i: torch (eager) veya onnx (ONNX Runtime CPU, int8; GPT-2 skorlama + BERT fill-mask)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch").lower()
+    ORT_INTRA_OP_THREADS: int = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))
+    ORT_QUANTIZE: bool = os.getenv("ORT_QUANTIZE", "true").lower() == "true"
+    # Surec disi model sunucusu (Unix socket): off | auto (gerekirse worker baslatir) | client (harici sunucu)
+    MODEL_SERVER: str = os.getenv("MODEL_SERVER", "off").lower()
+    MODEL_SERVER_SOCKET: str = os.getenv("MODEL_SERVER_SOCKET", "/tmp/texthelper-model.sock")
+    MODEL_SERVER_TIMEOUT_MS: float = float(os.getenv("MODEL_SERVER_TIMEOUT_MS", "300"))
+    MODEL_SERVER_HEALTH_INTERVAL_S: float = float(os.getenv("MODEL_SERVER_HEALTH_INTERVAL_S", "5"))
+    # Yuk altinda pahali kaynaklari kademeli kapat (transformer -> phrase -> template/emoji/domain)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_LAG_TARGET_MS: float = float(os.getenv("ADMISSION_LAG_TARGET_MS", "25"))
+    ADMISSION_MAX_INFLIGHT: int = int(os.getenv("ADMISSION_MAX_INFLIGHT", "32"))
+    # Kaynak, beklenen suresinin (scheduler cost_ms) bu katina cikinca asiri yuklu sayilir
+    ADMISSION_SOURCE_SLOWDOWN: float = float(os.getenv("ADMISSION_SOURCE_SLOWDOWN", "2"))
+    # Istek basina gecikme butcesi (ms); istemci latency_budget_ms ile degistirebilir
+    LATENCY_BUDGET_MS: float = float(os.getenv("LATENCY_BUDGET_MS", "250"))
+    MIN_LATENCY_BUDGET_MS: float = float(os.getenv("MIN_LATENCY_BUDGET_MS", "20"))
+    # Ayni anda gelen ozdes tahminler (onek + baglam + bayraklar) tek hesaplamayi paylasir
+    COALESCE_ENABLED: bool = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+    # Musterinin son mesaji (context_message) konusma basina bir kez cozumlenir; TTL (sn) ve en fazla konusma
+    CONVERSATION_CACHE_ENABLED: bool = os.getenv("CONVERSATION_CACHE_ENABLED", "true").lower() == "true"
+    CONVERSATION_CACHE_TTL_S: float = float(os.getenv("CONVERSATION_CACHE_TTL_S", "300"))
+    CONVERSATION_CACHE_MAX_ENTRIES: int = int(os.getenv("CONVERSATION_CACHE_MAX_ENTRIES", "1024"))
+    # Oneri gosterim / secim olay logu (learning-to-rank egitimi; metinler anonimlestirilir). Kullanici metnini diske
+    # yazdigi icin varsayilan kapali
+    RANKING_LOG_ENABLED: bool = os.getenv("RANKING_LOG_ENABLED", "false").lower() == "true"
+    RANKING_LOG_MAX_MB: float = float(os.getenv("RANKING_LOG_MAX_MB", "64"))
+    # Offline LambdaRank: periyot (sn; 0: sadece /train_ranker), en az sorgu grubu, secim-gosterim eslestirme penceresi (sn)
+    RANKER_RETRAIN_INTERVAL_S: float = float(os.getenv("RANKER_RETRAIN_INTERVAL_S", "0"))
+    RANKER_MIN_GROUPS: int = int(os.getenv("RANKER_MIN_GROUPS", "50"))
+    RANKER_MATCH_WINDOW_S: float = float(os.getenv("RANKER_MATCH_WINDOW_S", "120"))
 
     # External services
     ELASTICSEARCH_HOST: str = os.getenv("ELASTICSEARCH_HOST", "http://localhost:9200")
@@ -36,6 +83,14 @@ class Settings:
     # Paths
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     DATA_DIR: str = os.path.join(BASE_DIR, "data")
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots"))
+    ONNX_DIR: str = os.getenv("ONNX_DIR", os.path.join(BASE_DIR, "models", "onnx"))
+    # Opsiyonel kelime vektorleri (float16, mmap): relevance / advanced context anlamsal skoru; dosya yoksa sezgisel
+    USE_EMBEDDINGS: bool = os.getenv("USE_EMBEDDINGS", "true").lower() == "true"
+    EMBEDDINGS_PATH: str = os.getenv("EMBEDDINGS_PATH", os.path.join(DATA_DIR, "word_vectors.snap"))
+    RANKING_LOG_PATH: str = os.getenv("RANKING_LOG_PATH", os.path.join(DATA_DIR, "ranking_events.jsonl"))
+    # Derlenmis ranking modeli (lineer / agac; JSON): varsa acilista ML ranking'e yuklenir
+    RANKER_MODEL_PATH: str = os.getenv("RANKER_MODEL_PATH", os.path.join(DATA_DIR, "ranker_model.json"))
 
 
 settings = Settings()
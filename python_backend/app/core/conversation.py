@@ -0,0 +1,124 @@
+"""
+Konuşma bağlamı (context_message) önbelleği.
+
+Temsilci yanıtını yazarken müşterinin son mesajı her tuşta aynıdır; yine de
+her istekte küçük harfe çevrilip anahtar kelimelerde taranıyor ve eş zamanlı
+birleştirme anahtarı için yeniden özetleniyordu. ConversationCache mesajı
+özetine (blake2b) göre bir kez çözümler ve TTL süresince saklar: girdi,
+mesajın AnalyzedInput'udur. Türetilen her şey (anahtar kelimeler, domain /
+niyet / duygu, kelime kümesi, context analyzer sonucu, bağlamsal yanıtlar)
+onun memo()'sunda konuşma başına bir kez hesaplanır. Tuş başına iş yalnızca
+temsilcinin kendi metnini kapsar.
+
+LRU sırası OrderedDict ile tutulur; CONVERSATION_CACHE_MAX_ENTRIES aşılınca en
+eski konuşma atılır, CONVERSATION_CACHE_TTL_S dolan girdi yeniden çözümlenir.
+Paylaşılan analiz ve memo değerleri çağıranlar tarafından değiştirilmemelidir.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.analysis import AnalyzedInput
+
+
+def context_key(message: str) -> str:
+    """Bağlam mesajının özeti (önbellek ve birleştirme anahtarı)"""
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ConversationContext:
+    """Bir bağlam mesajının önbellekteki analizi"""
+
+    __slots__ = ("key", "analysis", "expires_at")
+
+    def __init__(self, key: str, message: str, expires_at: float):
+        self.key = key
+        self.analysis = AnalyzedInput(message)
+        self.expires_at = expires_at
+
+    @property
+    def message(self) -> str:
+        return self.analysis.text
+
+    def memo(self, key, compute):
+        """Konuşmaya özel türetilmiş değer: TTL boyunca bir kez hesaplanır"""
+        return self.analysis.memo(key, compute)
+
+    def __repr__(self) -> str:
+        return f"ConversationContext({self.key})"
+
+
+class ConversationCache:
+    """Mesaj özeti -> ConversationContext; TTL + LRU"""
+
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 1024, enabled: bool = True):
+        self.ttl_s = max(0.0, float(ttl_s))
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, ConversationContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, message: Optional[str]) -> Optional[ConversationContext]:
+        """Mesajın analizi (boş mesaj: None); yoksa ya da süresi dolmuşsa yeniden çözümlenir"""
+        if not message:
+            return None
+        key = context_key(message)
+        now = time.monotonic()
+        if not self.enabled:
+            return ConversationContext(key, message, now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now and entry.message == message:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self.expired += 1
+            self.misses += 1
+            entry = ConversationContext(key, message, now + self.ttl_s)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _build_cache() -> ConversationCache:
+    from app.core.config import settings
+
+    return ConversationCache(
+        ttl_s=settings.CONVERSATION_CACHE_TTL_S,
+        max_entries=settings.CONVERSATION_CACHE_MAX_ENTRIES,
+        enabled=settings.CONVERSATION_CACHE_ENABLED,
+    )
+
+
+conversation_cache = _build_cache()
@@ -0,0 +1,281 @@
+"""
+Kolonlu binary sözlük formatı (.thd) - dev JSON sözlüklerin yerine.
+
+JSON sözlükler her açılışta tamamen parse ediliyor (ijson ile kelime kelime ya da
+json.load ile tek seferde); toplayıcılar da her eklemede dosyanın tamamını yeniden
+yazıyordu. .thd dosyası bloklardan oluşur: her blok bir frekans kolonu
+(array('I')) ve satır sonu ayraçlı tek bir UTF-8 kelime blob'u taşır, isteğe
+bağlı olarak zlib/zstd ile sıkıştırılır. Okuma blok blok yapılır (blok başına
+bir read + bir decode + split), ekleme dosyanın sonuna yeni blok yazar.
+
+Dosya düzeni (little-endian):
+    header : magic(8s) format_version(H) codec(H) reserved(4x)
+    block  : count(I) raw_size(I) stored_size(I) crc32(I) + stored_size byte
+             raw = frequencies(count x uint32) + kelimeler ("\\n" ile ayrılmış UTF-8)
+"""
+
+import array
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.snapshot import pack_strings, unpack_strings
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+MAGIC = b"THDICT\x00\x01"
+FORMAT_VERSION = 1
+FILE_SUFFIX = ".thd"
+
+_HEADER = struct.Struct("<8sHH4x")
+_BLOCK = struct.Struct("<IIII")
+
+CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+_CODEC_NAMES = {value: name for name, value in CODECS.items()}
+
+# Blok başına kelime sayısı (blok = okuma ve sıkıştırma birimi)
+BLOCK_WORDS = 65536
+MAX_FREQUENCY = 0xFFFFFFFF
+
+
+class DictionaryFormatError(ValueError):
+    """Bozuk veya desteklenmeyen .thd dosyası"""
+
+
+def default_codec() -> str:
+    return "zstd" if ZSTD_AVAILABLE else "zlib"
+
+
+def _compress(codec: int, raw: bytes) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.compress(raw, 6)
+    if codec == CODECS["zstd"]:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def _decompress(codec: int, stored: bytes, raw_size: int) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(stored)
+    if codec == CODECS["zstd"]:
+        if not ZSTD_AVAILABLE:
+            raise DictionaryFormatError("zstd ile sıkıştırılmış sözlük için 'zstandard' paketi gerekli")
+        return zstandard.ZstdDecompressor().decompress(stored, max_output_size=raw_size)
+    return stored
+
+
+def _clean_entries(entries: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+    """Boş ve satır sonu içeren kelimeleri at, frekansı uint32 aralığına sıkıştır"""
+    for word, frequency in entries:
+        if not isinstance(word, str):
+            continue
+        word = word.strip()
+        if not word or "\n" in word or "\r" in word:
+            continue
+        try:
+            frequency = int(frequency)
+        except (TypeError, ValueError):
+            frequency = 1
+        yield word, min(max(frequency, 0), MAX_FREQUENCY)
+
+
+def _write_blocks(f, codec: int, entries: Iterable[Tuple[str, int]], block_words: int) -> int:
+    written = 0
+    words: List[str] = []
+    frequencies = array.array("I")
+
+    def flush():
+        raw = frequencies.tobytes() + pack_strings(words)
+        stored = _compress(codec, raw)
+        f.write(_BLOCK.pack(len(words), len(raw), len(stored), zlib.crc32(raw) & 0xFFFFFFFF))
+        f.write(stored)
+
+    for word, frequency in _clean_entries(entries):
+        words.append(word)
+        frequencies.append(frequency)
+        if len(words) >= block_words:
+            flush()
+            written += len(words)
+            words = []
+            frequencies = array.array("I")
+    if words:
+        flush()
+        written += len(words)
+    return written
+
+
+def _read_header(f, path: str) -> int:
+    header = f.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise DictionaryFormatError(f"Sözlük dosyası kısa: {path}")
+    magic, version, codec = _HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise DictionaryFormatError(f"Sözlük formatı tanınmadı: {path}")
+    if codec not in _CODEC_NAMES:
+        raise DictionaryFormatError(f"Bilinmeyen sıkıştırma: {codec} ({path})")
+    return codec
+
+
+def write_dictionary(
+    path: str,
+    entries: Iterable[Tuple[str, int]],
+    codec: Optional[str] = None,
+    block_words: int = BLOCK_WORDS,
+) -> int:
+    """(kelime, frekans) akışını .thd dosyasına yaz (tmp + atomik rename). Yazılan kelime sayısı döner."""
+    codec_id = CODECS[codec or default_codec()]
+    if codec_id == CODECS["zstd"] and not ZSTD_AVAILABLE:
+        raise DictionaryFormatError("zstd sıkıştırma için 'zstandard' paketi gerekli")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, codec_id))
+        written = _write_blocks(f, codec_id, entries, block_words)
+    os.replace(tmp_path, path)
+    return written
+
+
+def iter_blocks(path: str) -> Iterator[Tuple[List[str], array.array]]:
+    """Blokları sırayla oku: (kelimeler, frekanslar)"""
+    with open(path, "rb") as f:
+        codec = _read_header(f, path)
+        while True:
+            block_header = f.read(_BLOCK.size)
+            if not block_header:
+                return
+            if len(block_header) != _BLOCK.size:
+                raise DictionaryFormatError(f"Yarım blok başlığı: {path}")
+            count, raw_size, stored_size, crc = _BLOCK.unpack(block_header)
+            stored = f.read(stored_size)
+            if len(stored) != stored_size:
+                raise DictionaryFormatError(f"Yarım blok: {path}")
+            raw = _decompress(codec, stored, raw_size)
+            if len(raw) != raw_size or (zlib.crc32(raw) & 0xFFFFFFFF) != crc:
+                raise DictionaryFormatError(f"Blok checksum hatası: {path}")
+            split = count * 4
+            frequencies = array.array("I")
+            frequencies.frombytes(raw[:split])
+            try:
+                words = unpack_strings(memoryview(raw)[split:], count)
+            except ValueError as e:
+                raise DictionaryFormatError(f"{e} ({path})")
+            yield words, frequencies
+
+
+def iter_dictionary(path: str) -> Iterator[Tuple[str, int]]:
+    """(kelime, frekans) çiftlerini dosya sırasıyla akıt"""
+    for words, frequencies in iter_blocks(path):
+        yield from zip(words, frequencies)
+
+
+def read_dictionary(path: str, limit: Optional[int] = None) -> Tuple[List[str], array.array]:
+    """Kelime ve frekans kolonlarını oku (en fazla limit kelime)"""
+    words: List[str] = []
+    frequencies = array.array("I")
+    for block_words, block_frequencies in iter_blocks(path):
+        if limit is not None and len(words) + len(block_words) >= limit:
+            remaining = limit - len(words)
+            words.extend(block_words[:remaining])
+            frequencies.extend(block_frequencies[:remaining])
+            break
+        words.extend(block_words)
+        frequencies.extend(block_frequencies)
+    return words, frequencies
+
+
+def read_frequency_dict(path: str, limit: Optional[int] = None) -> Dict[str, int]:
+    """kelime -> frekans (tekrarlarda ilk kayıt geçerli; sonradan eklenen bloklar eskisini ezmez)"""
+    result: Dict[str, int] = {}
+    for words, frequencies in iter_blocks(path):
+        for word, frequency in zip(words, frequencies):
+            if word not in result:
+                result[word] = frequency
+                if limit is not None and len(result) >= limit:
+                    return result
+    return result
+
+
+def read_keys(path: str) -> Set[str]:
+    """Dosyadaki kelimelerin lowercase kümesi (ekleme öncesi tekrar kontrolü için)"""
+    keys: Set[str] = set()
+    for words, _ in iter_blocks(path):
+        keys.update(word.lower() for word in words)
+    return keys
+
+
+def append_dictionary(
+    path: str,
+    entries: Iterable[Tuple[str, int]],
+    skip_existing: bool = True,
+    codec: Optional[str] = None,
+    block_words: int = BLOCK_WORDS,
+) -> int:
+    """Dosyanın sonuna yeni blok(lar) ekle; dosya yoksa oluştur. Eklenen kelime sayısı döner.
+
+    skip_existing: dosyada (büyük/küçük harf duyarsız) zaten olan kelimeleri ekleme.
+    """
+    if not os.path.exists(path):
+        return write_dictionary(path, _dedupe(entries, set()), codec=codec, block_words=block_words)
+
+    with open(path, "rb") as f:
+        codec_id = _read_header(f, path)
+    existing = read_keys(path) if skip_existing else None
+    if existing is not None:
+        entries = _dedupe(entries, existing)
+    with open(path, "ab") as f:
+        return _write_blocks(f, codec_id, entries, block_words)
+
+
+def _dedupe(entries: Iterable[Tuple[str, int]], seen: Set[str]) -> Iterator[Tuple[str, int]]:
+    for word, frequency in _clean_entries(entries):
+        key = word.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        yield word, frequency
+
+
+def iter_source_entries(path: str) -> Iterator[Tuple[str, int]]:
+    """Mevcut JSON/TXT sözlüklerden (kelime, frekans) üret - dönüştürücü girdisi.
+
+    Desteklenen şekiller:
+      - TXT: satır başına bir kelime (isteğe bağlı "kelime<TAB>frekans")
+      - JSON: {"words": [...], "frequencies": {kelime: frekans}} (büyük sözlük)
+      - JSON: {kelime: frekans} (tr_frequencies.json)
+      - JSON: [{"word": ..., "frequency": ...}] veya ["kelime", ...]
+    """
+    if not path.endswith(".json"):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                word, _, frequency = line.rstrip("\n").partition("\t")
+                if word.strip():
+                    yield word, frequency or 1
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    frequencies: Dict[str, int] = {}
+    if isinstance(data, dict) and "words" in data:
+        frequencies = data.get("frequencies") or {}
+        data = data["words"]
+    if isinstance(data, dict):
+        yield from data.items()
+        return
+    for item in data or []:
+        if isinstance(item, dict):
+            if item.get("word"):
+                yield item["word"], item.get("frequency", 1)
+        elif isinstance(item, str):
+            yield item, frequencies.get(item.lower(), frequencies.get(item, 1))
+
+
+def thd_path_for(path: str) -> str:
+    """Kaynak sözlüğün yanındaki .thd dosyasının yolu (turkish_dictionary.json -> turkish_dictionary.thd)"""
+    return os.path.splitext(path)[0] + FILE_SUFFIX
@@ -0,0 +1,156 @@
+"""
+Kelime vektörleriyle anlamsal benzerlik (opsiyonel).
+
+Relevance filter ve advanced context anlamsal skoru kelime önekleri / alt
+dizgi kontrolleriyle tahmin ediyordu (bağlam x öneri kelimeleri iç içe
+döngü). Kompakt bir kelime vektörü matrisi varsa (float16, birim uzunluk)
+bağlam vektörü istek başına bir kez kurulur (bağlam kelimelerinin ortalaması)
+ve tüm adaylar tek gather + tek matris-vektör çarpımıyla skorlanır. Hiçbir
+kelimesinin vektörü olmayan adaylar için None döner; çağıran eski sezgisele
+düşer. Dosya ya da numpy yoksa scorer kapalıdır.
+
+Dosya, snapshot konteyneridir (app.core.snapshot; mmap ile kopyasız açılır,
+matris satırları ihtiyaç oldukça sayfalanır ve worker'lar arasında page
+cache paylaşılır):
+    meta     array('I') [kelime sayısı, boyut]
+    words    satır sırasında kelimeler (pack_strings, küçük harf)
+    vectors  kelime sayısı x boyut float16 (satır başına L2 normalize)
+
+Oluşturma: python -m scripts.build_embeddings <vektör dosyası (.vec)>
+"""
+
+import array
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.core.analysis import WORD_PATTERN
+from app.core.logs import logger
+from app.core.snapshot import pack_strings, read_snapshot, unpack_strings, write_snapshot
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+SNAPSHOT_KIND = "embeddings"
+SNAPSHOT_VERSION = 1
+# Vektör dosyası kendi kaynağıdır: kaynak hash'i sabit
+_SOURCE_HASH = bytes(32)
+
+
+def write_embeddings(path: str, words: Sequence[str], vectors) -> None:
+    """Kelimeleri ve vektörlerini (n x boyut) float16, birim uzunlukta yaz"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[0] != len(words):
+        raise ValueError(f"Vektör matrisi {matrix.shape}, kelime sayısı {len(words)}")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms > 0, norms, 1.0)
+    write_snapshot(path, SNAPSHOT_KIND, SNAPSHOT_VERSION, _SOURCE_HASH, {
+        "meta": array.array("I", [len(words), matrix.shape[1]]),
+        "words": pack_strings(w.lower() for w in words),
+        "vectors": matrix.astype("<f2").tobytes(),
+    })
+
+
+class EmbeddingScorer:
+    """float16 kelime vektörleri: bağlam vektörü + tüm adaylar için tek matris-vektör çarpımı"""
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self.vectors = None                # (n, boyut) float16, mmap'li dosyayı gösterir
+        self._rows: Dict[str, int] = {}    # kelime -> satır
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def available(self) -> bool:
+        if not self._loaded:
+            self.load()
+        return self.vectors is not None
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1] if self.vectors is not None else 0
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Vektör dosyasını aç (bir kez; yoksa scorer kapalı kalır)"""
+        with self._lock:
+            if path is not None:
+                self.path, self._loaded = path, False
+            if self._loaded:
+                return self.vectors is not None
+            self._loaded = True
+            self.vectors, self._rows = None, {}
+            if not self.enabled or not self.path or not os.path.exists(self.path):
+                return False
+            sections = read_snapshot(self.path, SNAPSHOT_KIND, SNAPSHOT_VERSION, _SOURCE_HASH)
+            if sections is None:
+                return False
+            try:
+                count, dim = sections["meta"]
+                words = unpack_strings(sections["words"], count)
+                vectors = np.frombuffer(sections["vectors"], dtype="<f2").reshape(count, dim)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Kelime vektörleri okunamadı ({self.path}): {e}")
+                return False
+            self._rows = {word: row for row, word in enumerate(words)}
+            self.vectors = vectors
+            logger.info(f"Kelime vektörleri yüklendi: {count} kelime x {dim} boyut")
+            return True
+
+    def row(self, word: str) -> Optional[int]:
+        return self._rows.get(word)
+
+    def context_vector(self, words: Iterable[str]):
+        """Bağlam kelimelerinin ortalama vektörü (birim uzunluk); hiçbirinin vektörü yoksa None"""
+        if not self.available:
+            return None
+        rows = [row for row in map(self._rows.get, words) if row is not None]
+        if not rows:
+            return None
+        vector = self.vectors[np.asarray(rows)].astype(np.float32).mean(axis=0)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def similarities(self, context_vector, texts: Sequence[str]) -> List[Optional[float]]:
+        """Her aday için bağlamla kosinüs benzerliği (kelime vektörlerinin ortalaması).
+
+        Vektörü olan tüm kelimeler tek gather + tek matris-vektör çarpımıyla skorlanır;
+        hiçbir kelimesinin vektörü olmayan aday için None.
+        """
+        result: List[Optional[float]] = [None] * len(texts)
+        if context_vector is None or not self.available:
+            return result
+        rows_get = self._rows.get
+        flat: List[int] = []
+        spans = []  # (aday, başlangıç, kelime sayısı)
+        for i, text in enumerate(texts):
+            start = len(flat)
+            for word in WORD_PATTERN.findall(text.lower()):
+                row = rows_get(word)
+                if row is not None:
+                    flat.append(row)
+            if len(flat) > start:
+                spans.append((i, start, len(flat) - start))
+        if not flat:
+            return result
+        sims = self.vectors[np.asarray(flat)].astype(np.float32) @ context_vector
+        starts = np.fromiter((start for _, start, _ in spans), dtype=np.intp, count=len(spans))
+        counts = np.fromiter((n for _, _, n in spans), dtype=np.float32, count=len(spans))
+        means = np.add.reduceat(sims, starts) / counts
+        for (i, _, _), value in zip(spans, means.tolist()):
+            result[i] = value
+        return result
+
+
+def _build_scorer() -> EmbeddingScorer:
+    from app.core.config import settings
+
+    return EmbeddingScorer(settings.EMBEDDINGS_PATH, enabled=settings.USE_EMBEDDINGS)
+
+
+embedding_scorer = _build_scorer()
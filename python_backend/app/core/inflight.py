@@ -0,0 +1,72 @@
+"""
+Kullanıcı / bağlantı başına "son istek kazanır" iptali.
+
+Eskiden orchestrator aynı user_id'den 50 ms içinde gelen isteği boş
+("debounced") yanıtla düşürüyordu: en son tuş vuruşu öneri alamıyor, eski
+istek ise hesaplanmaya devam ediyordu; _last_request sözlüğü de hiç
+küçülmüyordu.
+
+LatestWins her anahtar (HTTP: istemci + user_id, WebSocket: bağlantı) için
+çalışan tahmin görevini tutar. Aynı anahtarla yeni istek gelince hâlâ çalışan
+eski görev iptal edilir; iptal edilen çağrı None döner ve yanıt gönderilmez
+(ya da boş "superseded" yanıt döner). Biten görev kayıttan silinir, sözlük
+yalnızca o an çalışan istekleri tutar. user_id göndermeyen anonim HTTP
+isteklerinde anahtar yoktur (None) ve iptal uygulanmaz.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Optional, Set
+
+
+class LatestWins:
+    """Anahtar başına tek in-flight görev; yenisi eskisini iptal eder"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._superseded: Set[asyncio.Future] = set()
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    async def run(self, key: Optional[str], coro: Awaitable[Any]) -> Optional[Any]:
+        """coro'yu key için son istek olarak çalıştır; daha yenisi gelirse None döner
+
+        Çağıranın kendisi iptal edilirse (istemci koptu) görev de iptal edilir.
+        """
+        if key is None:
+            return await coro
+        previous = self._tasks.get(key)
+        if previous is not None and not previous.done():
+            self._superseded.add(previous)
+            if previous.cancel():
+                self.cancelled += 1
+
+        task = asyncio.ensure_future(coro)
+        self._tasks[key] = task
+        self.started += 1
+        try:
+            result = await task
+            self.completed += 1
+            return result
+        except asyncio.CancelledError:
+            if task in self._superseded:
+                return None
+            raise
+        finally:
+            self._superseded.discard(task)
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight(),
+            "started": self.started,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+        }
+
+
+latest_wins = LatestWins()
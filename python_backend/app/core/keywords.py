@@ -0,0 +1,126 @@
+"""
+Paylaşılan çok desenli anahtar kelime eşleyici (Aho-Corasick).
+
+Niyet / konu / domain / duygu / emoji / bağlam tespitleri her tuşta kendi
+listelerini metinde tek tek arıyordu (any(k in text ...), re.search):
+O(desen sayısı x metin). Modüller sözlüklerini kurulurken keyword_matcher'a
+kaydeder; tüm sözlüklerden tek bir otomat kurulur (ilk aramada, yeni kayıt
+gelirse yeniden) ve metin tek geçişte taranır. Sonuç, metinde alt dizgi
+olarak geçen kayıtlı anahtar kelimelerin kümesidir (örtüşenler dahil), yani
+her tespit için `keyword in text_lower` ile aynı anlam. Tespitler
+AnalyzedInput.keywords üzerinden istek başına tek taramayı paylaşır.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+KeywordTable = Sequence[Tuple[str, FrozenSet[str]]]
+
+
+class _Automaton:
+    """Aho-Corasick: trie geçişleri, hata bağları, durum başına çıktılar"""
+
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self, keywords: Iterable[str]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(keyword)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                # Hata bağının sonekleri de bu durumda biter
+                outputs[child] |= outputs[fail[child]]
+                queue.append(child)
+
+        self.goto = goto
+        self.fail = fail
+        self.out: List[Optional[Tuple[str, ...]]] = [tuple(o) if o else None for o in outputs]
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        goto, fail, out = self.goto, self.fail, self.out
+        hits = set()
+        state = 0
+        for ch in text:
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                hits.update(out[state])
+        return frozenset(hits)
+
+
+class KeywordMatcher:
+    """Tüm modüllerin anahtar kelimeleri için tek otomat"""
+
+    def __init__(self):
+        self._keywords: set = set()
+        self._automaton: Optional[_Automaton] = None
+        self._lock = threading.Lock()
+
+    def register(self, keywords: Iterable[str]) -> FrozenSet[str]:
+        """Sözlüğü ekle; eklenen kümeyi döndürür (tespitte `hits` ile kesiştirilir)"""
+        added = frozenset(k for k in keywords if k)
+        if not added <= self._keywords:
+            with self._lock:
+                self._keywords |= added
+                self._automaton = None
+        return added
+
+    def table(self, mapping: Union[Mapping[str, Iterable[str]], Iterable[Tuple[str, Iterable[str]]]]) -> KeywordTable:
+        """(etiket, anahtar kelimeler) sırasını kaydet; first_match için tablo"""
+        items = mapping.items() if isinstance(mapping, Mapping) else mapping
+        return tuple((label, self.register(keywords)) for label, keywords in items)
+
+    def build(self) -> None:
+        """Otomatı şimdi kur (yoksa ilk find kurar)"""
+        self._get()
+
+    def _get(self) -> _Automaton:
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = _Automaton(self._keywords)
+                automaton = self._automaton
+        return automaton
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Metinde (alt dizgi olarak) geçen kayıtlı anahtar kelimeler; tek geçiş"""
+        if not text:
+            return frozenset()
+        return self._get().scan(text)
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+
+def first_match(hits: FrozenSet[str], table: KeywordTable, default: Optional[str] = 'general') -> Optional[str]:
+    """Anahtar kelimesi metinde geçen ilk etiket"""
+    for label, keywords in table:
+        if not hits.isdisjoint(keywords):
+            return label
+    return default
+
+
+keyword_matcher = KeywordMatcher()
@@ -0,0 +1,177 @@
+"""
+Oturum başına transformer KV cache'i.
+
+Her tuş vuruşunda mesajın tamamı (2000 karaktere kadar) yeniden tokenize edilip
+baştan encode ediliyordu. SessionKVCache her oturum (bağlantı / kullanıcı) için
+son bağlamın token id'lerini, `past_key_values`'unu ve son pozisyonun
+logit'lerini tutar. Yeni metin önceki token'ların devamıysa sadece yeni (ve
+değişen son) token'lar modelden geçirilir; gecikme mesaj uzunluğuyla değil yeni
+yazılan karakterlerle orantılı olur.
+
+LRU sırası OrderedDict ile tutulur; oturum sayısı (KV_CACHE_MAX_SESSIONS) veya
+toplam tensör boyutu (KV_CACHE_MAX_MB) aşılınca en eski oturumlar atılır.
+Bağlam KV_CACHE_MAX_TOKENS'ı aşarsa pencere yarım pencere adımlarıyla kayar
+(pencere başlangıcı her tuşta değişmez, cache çoğu zaman yeniden kullanılır).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def legacy_past(past):
+    """Yeni transformers sürümlerindeki Cache nesnesini tuple formatına çevir"""
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    return past
+
+
+def trim_past(past, length: int):
+    """past_key_values'u ilk `length` pozisyona kırp (seq ekseni: -2)"""
+    return tuple(tuple(t[:, :, :length, :] for t in layer) for layer in past)
+
+
+def _past_nbytes(past) -> int:
+    return sum(t.element_size() * t.nelement() for layer in past for t in layer)
+
+
+def _common_prefix(a: Sequence[int], b: Sequence[int]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class _Entry:
+    __slots__ = ("ids", "past", "logits", "nbytes")
+
+    def __init__(self, ids: List[int], past, logits):
+        self.ids = ids
+        self.past = past
+        self.logits = logits
+        self.nbytes = _past_nbytes(past) + logits.element_size() * logits.nelement()
+
+
+class SessionKVCache:
+    """Oturum id -> (token id'leri, past_key_values, son logit'ler); LRU + bellek limiti"""
+
+    def __init__(self, max_sessions: int = 64, max_mb: float = 256.0, max_tokens: int = 512, name: str = "kv-cache"):
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_bytes = int(max(0.0, float(max_mb)) * 1024 * 1024)
+        self.max_tokens = max(2, int(max_tokens))
+        self.name = name
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+        self.encoded_tokens = 0
+        self.evictions = 0
+
+    def window(self, ids: List[int]) -> List[int]:
+        """Bağlam sınırı aşılırsa son token'ları al; başlangıç yarım pencere adımlarıyla ilerler"""
+        if len(ids) <= self.max_tokens:
+            return ids
+        step = self.max_tokens // 2
+        start = ((len(ids) - self.max_tokens) // step + 1) * step
+        return ids[start:]
+
+    def encode(self, model, session_id: str, ids: List[int]) -> Tuple[List[int], Any, Any]:
+        """Bağlamı encode et (cache'teki ortak önek atlanır).
+
+        Dönüş: (pencere token id'leri, past_key_values [batch=1], son pozisyonun logit'leri [vocab])
+        """
+        import torch
+
+        ids = self.window(list(ids))
+        with self._lock:
+            entry = self._pop(session_id)
+
+        keep = _common_prefix(entry.ids, ids) if entry is not None else 0
+        if entry is not None and keep == len(ids) == len(entry.ids):
+            # Metin değişmemiş: model çağrısı yok
+            self.hits += 1
+            self.reused_tokens += keep
+            self._put(session_id, entry)
+            return ids, entry.past, entry.logits
+
+        # Son token'ın logit'i gerekli -> en az bir token yeniden encode edilir
+        keep = min(keep, len(ids) - 1)
+        past = trim_past(entry.past, keep) if entry is not None and keep > 0 else None
+        if keep > 0:
+            self.hits += 1
+            self.reused_tokens += keep
+        else:
+            self.misses += 1
+        self.encoded_tokens += len(ids) - keep
+
+        device = getattr(model, "device", None)
+        with torch.no_grad():
+            out = model(
+                input_ids=torch.tensor([ids[keep:]], device=device),
+                attention_mask=torch.ones((1, len(ids)), dtype=torch.long, device=device),
+                position_ids=torch.arange(keep, len(ids), device=device).unsqueeze(0),
+                past_key_values=past,
+                use_cache=True,
+            )
+        entry = _Entry(ids, legacy_past(out.past_key_values), out.logits[0, -1, :].float())
+        self._put(session_id, entry)
+        return ids, entry.past, entry.logits
+
+    def drop(self, session_id: str) -> None:
+        """Oturum kapandığında cache'i bırak"""
+        with self._lock:
+            self._pop(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, session_id: str) -> Optional[_Entry]:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+        return entry
+
+    def _put(self, session_id: str, entry: _Entry) -> None:
+        if entry.nbytes > self.max_bytes:
+            # Tek oturum limitten büyük: saklama (bir sonraki istek tam encode eder)
+            return
+        with self._lock:
+            self._pop(session_id)
+            self._entries[session_id] = entry
+            self._bytes += entry.nbytes
+            while self._entries and (len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old.nbytes
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.reused_tokens + self.encoded_tokens
+        return {
+            "sessions": len(self._entries),
+            "memory_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_sessions": self.max_sessions,
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "token_reuse_ratio": round(self.reused_tokens / total, 3) if total else 0.0,
+        }
+
+
+def session_kv_cache(name: str) -> Optional[SessionKVCache]:
+    """Ayarlardan cache oluştur (KV_CACHE_ENABLED=false ise None)"""
+    from app.core.config import settings
+
+    if not settings.KV_CACHE_ENABLED:
+        return None
+    return SessionKVCache(
+        max_sessions=settings.KV_CACHE_MAX_SESSIONS,
+        max_mb=settings.KV_CACHE_MAX_MB,
+        max_tokens=settings.KV_CACHE_MAX_TOKENS,
+        name=name,
+    )
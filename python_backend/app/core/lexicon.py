@@ -0,0 +1,535 @@
+"""
+Ortak sözlük (lexicon) servisi.
+
+Kelimeler, frekanslar ve tek bir prefix index'i burada tutulur. Trie, yerel
+arama, büyük sözlük ve phrase completion aynı lexicon'u sorgular; böylece aynı
+kelime listesi process içinde bir kez bulunur ve her tuşta tek arama yapılır.
+
+Depolama kompakttır: kelimeler tek bir UTF-8 blob'da (offsets dizisiyle),
+frekanslar array('I') kolonunda, prefix index'i de kelime id'lerinin lowercase
+sırasına göre dizildiği array('I') kolonudur. Bir prefix'in kapsadığı kelimeler
+bu dizide ardışık bir aralıktır (ikili arama ile O(log n)). Aramalar id'lerle
+çalışır; `str` sadece istemciye dönecek ilk N sonuç için üretilir.
+
+Prefix aramasında aralık, sıralı index üzerine kurulan max-anahtar ağaçlarıyla
+(segment tree) skor sırasında gezilir; kalan adayların skor üst sınırı ilk k
+sonucu geçemediği anda durulur. Kısa prefix'lerde binlerce yerine onlarca
+kelimeye dokunulur. Ağaçlar kurulduktan sonra tek tek eklenen kelimeler
+(add: trie / kullanıcı sözlüğü) ağacı bozmaz; lowercase sırasında küçük bir
+bekleyen listeye girer ve aramada doğrudan skorlanır. Liste büyüyünce ağaçlar
+bir sonraki aramada yeniden kurulur.
+
+Snapshot'tan açılan lexicon kolonları mmap'li dosyayı doğrudan gösterir (kopyasız);
+ilk yazmada yazılabilir kopyaya geçilir.
+"""
+
+import array
+import bisect
+import heapq
+import os
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.logs import logger
+from app.core.snapshot import read_snapshot, write_snapshot
+
+SNAPSHOT_KIND = "lexicon"
+SNAPSHOT_VERSION = 2
+
+# array('I') üst sınırı - daha büyük frekanslar kırpılır
+MAX_FREQUENCY = 0xFFFFFFFF
+# Skor ağacında tek sayılı seviyeleri dolduran (hiçbir anahtardan büyük olmayan) değer
+_RANK_PAD = -(1 << 62)
+# Skor ağaçları kurulduktan sonra eklenen kelimeler bu sayıyı (ya da lexicon'un
+# 1/16'sını) geçince ağaçlar yeniden kurulur
+_PENDING_MIN = 4096
+
+
+def _clamp_frequency(frequency) -> int:
+    try:
+        frequency = int(frequency)
+    except (TypeError, ValueError):
+        return 1
+    return min(max(frequency, 0), MAX_FREQUENCY)
+
+
+class Lexicon:
+    """Kelime id'leri, frekanslar ve sıralı prefix index'i (kompakt kolonlar)"""
+
+    def __init__(self):
+        self._blob = bytearray()                  # UTF-8 kelimeler art arda
+        self._offsets = array.array("I", [0])     # id -> blob başlangıcı (n + 1 eleman)
+        self.frequencies = array.array("I")       # id -> frekans
+        self._sorted = array.array("I")           # lowercase sırasında id'ler
+        self._rank_levels: List[Optional[List[array.array]]] = [None, None]  # skor anahtarı ağaçları
+        self._ranked_ids = self._sorted           # ağaçların kurulduğu sıralı id'ler
+        self._pending_keys: List[str] = []        # ağaçlardan sonra eklenenler (lowercase sırasında)
+        self._pending_ids: List[int] = []
+        self._lengths: Optional[array.array] = None  # id -> kelime boyu (karakter)
+        self._max_len = 0
+        self._lock = threading.RLock()
+        self.words = WordList(self)
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __contains__(self, word: str) -> bool:
+        return self.get_id(word) is not None
+
+    @property
+    def word_count(self) -> int:
+        return len(self)
+
+    # --- Okuma ---
+
+    def word(self, word_id: int) -> str:
+        """id -> kelime (str burada üretilir)"""
+        offsets = self._offsets
+        return str(self._blob[offsets[word_id]:offsets[word_id + 1]], "utf-8")
+
+    def frequency(self, word_id: int) -> int:
+        return self.frequencies[word_id]
+
+    def _key(self, word_id: int) -> str:
+        return self.word(word_id).lower()
+
+    def _lower_bound(self, key: str, lo: int = 0, ids: Optional[Sequence] = None) -> int:
+        """Sıralı index'te (ya da ids'de) key'den küçük olmayan ilk pozisyon"""
+        sorted_ids = self._sorted if ids is None else ids
+        hi = len(sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(sorted_ids[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get_id(self, word: str) -> Optional[int]:
+        key = word.strip().lower()
+        if not key:
+            return None
+        pos = self._lower_bound(key)
+        if pos < len(self._sorted) and self._key(self._sorted[pos]) == key:
+            return self._sorted[pos]
+        return None
+
+    def frequency_of(self, word: str, default: int = 0) -> int:
+        word_id = self.get_id(word)
+        return self.frequencies[word_id] if word_id is not None else default
+
+    def prefix_range(self, prefix: str, ids: Optional[Sequence] = None) -> Tuple[int, int]:
+        """Prefix ile başlayan anahtarların sıralı index'teki (ya da ids'deki) [lo, hi) aralığı"""
+        prefix = prefix.lower()
+        sorted_ids = self._sorted if ids is None else ids
+        lo = self._lower_bound(prefix, ids=sorted_ids)
+        # Üst sınır: prefix ile başlamayan ilk pozisyon
+        hi = len(sorted_ids)
+        left = lo
+        while left < hi:
+            mid = (left + hi) // 2
+            if self._key(sorted_ids[mid]).startswith(prefix):
+                left = mid + 1
+            else:
+                hi = mid
+        return lo, left
+
+    def prefix_ids(self, prefix: str, limit: Optional[int] = None) -> Sequence:
+        """Prefix ile başlayan kelime id'leri (alfabetik sırada)"""
+        lo, hi = self.prefix_range(prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._sorted[lo:hi]
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        for word_id in self.prefix_ids(prefix):
+            yield self.word(word_id)
+
+    # Skor anahtarları: n<=3 formülleri tamsayı katsayılı doğrusal olduğundan
+    #   n == 1: 300 * skor = 3000 + (10f - 9L)
+    #   n == 2: 100 * skor =  950 + 2 * (f - L)
+    #   n == 3: 100 * skor =  900 + (f - L)
+    # yani skor, iki anahtardan birinin monoton fonksiyonudur (L = kelime boyu).
+    @staticmethod
+    def _rank_key(kind: int, frequency: int, word_len: int) -> int:
+        if kind == 0:
+            return 10 * frequency - 9 * word_len
+        return frequency - word_len
+
+    def _build_rank_levels(self, kind: int, ids: Sequence) -> List[array.array]:
+        """Sıralı id pozisyonları üzerinde max-anahtar ağacı: levels[0] yapraklar, her üst seviye çiftlerin max'ı"""
+        rank_key, frequencies, lengths = self._rank_key, self.frequencies, self._word_lengths()
+        level = array.array("q", (rank_key(kind, frequencies[i], lengths[i]) for i in ids))
+        levels = [level]
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(_RANK_PAD)
+            level = array.array("q", map(max, level[0::2], level[1::2]))
+            levels.append(level)
+        return levels
+
+    def _word_lengths(self) -> array.array:
+        """id -> kelime boyu (ilk ihtiyaçta bir kez hesaplanır, eklemelerde güncellenir)"""
+        lengths = self._lengths
+        if lengths is None:
+            word = self.word
+            lengths = array.array("H", (min(len(word(i)), 0xFFFF) for i in range(len(self))))
+            self._max_len = max(lengths) if lengths else 0
+            self._lengths = lengths
+        return lengths
+
+    def _rank_index(self, kind: int) -> List[array.array]:
+        levels = self._rank_levels[kind]
+        if levels is None:
+            with self._lock:
+                levels = self._rank_levels[kind]
+                if levels is None:
+                    # İki ağaç aynı id dizisi üzerinde kurulur; bekleyen eklemeler artık ağaçta
+                    ids = self._sorted
+                    self._rank_levels = [self._build_rank_levels(0, ids), self._build_rank_levels(1, ids)]
+                    self._ranked_ids = ids
+                    self._pending_keys, self._pending_ids = [], []
+                    levels = self._rank_levels[kind]
+        return levels
+
+    def prepare_search(self) -> None:
+        """Skor ağaçlarını önceden kur (yükleme sonunda; ilk tuşta gecikme olmasın)"""
+        self._rank_index(0)
+        self._rank_index(1)
+
+    def _invalidate_rank(self) -> None:
+        self._rank_levels = [None, None]
+        self._pending_keys, self._pending_ids = [], []
+
+    def _update_rank(self, word_id: int) -> None:
+        """Var olan kelimenin frekansı arttı: ağaçtaysa yaprak ve atalarını güncelle (O(log n))"""
+        if self._rank_levels[0] is None:
+            return
+        key = self._key(word_id)
+        ranked = self._ranked_ids
+        pos = self._lower_bound(key, ids=ranked)
+        if pos >= len(ranked) or ranked[pos] != word_id:
+            return  # bekleyen listede: aramada güncel frekansla skorlanır
+        word_len = len(self.word(word_id))
+        for kind, levels in enumerate(self._rank_levels):
+            if levels is None:
+                continue
+            key = self._rank_key(kind, self.frequencies[word_id], word_len)
+            index = pos
+            for level in levels:
+                if level[index] >= key:
+                    break
+                level[index] = key
+                index //= 2
+
+    def iter_ranked(self, lo: int, hi: int, kind: int) -> Iterator[Tuple[int, int]]:
+        """Sıralı index'in [lo, hi) aralığını skor anahtarı azalan sırada (pozisyon, anahtar) olarak gez.
+
+        Aralığı kapsayan ağaç düğümleri bir heap'te tutulur; her adımda en büyük
+        anahtarlı düğüm açılır. İlk m eleman için O(m log n) iş yapılır.
+        """
+        if lo >= hi:
+            return
+        levels = self._rank_index(kind)
+        heap = []
+        depth = 0
+        while lo < hi:
+            if lo & 1:
+                heap.append((-levels[depth][lo], depth, lo))
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                heap.append((-levels[depth][hi], depth, hi))
+            lo //= 2
+            hi //= 2
+            depth += 1
+        heapq.heapify(heap)
+        heappop, heappush = heapq.heappop, heapq.heappush
+        while heap:
+            neg_key, depth, index = heappop(heap)
+            if depth == 0:
+                yield index, -neg_key
+                continue
+            child_level = levels[depth - 1]
+            left = index * 2
+            heappush(heap, (-child_level[left], depth - 1, left))
+            if left + 1 < len(child_level):
+                heappush(heap, (-child_level[left + 1], depth - 1, left + 1))
+
+    @staticmethod
+    def _score(n: int, word_len: int, frequency: int) -> float:
+        """Prefix uzunluğuna göre skor (word_len >= n).
+
+        n <= 3 için 10 - 0.03L + f/30, 9.5 - 0.02L + f/50, 9 - 0.01L + f/100
+        formülleri tamsayı biçiminde hesaplanır; böylece skor ile _score_bound
+        aynı anahtar için bit düzeyinde aynı değeri verir.
+        """
+        if n == 1:
+            return (3000 + 10 * frequency - 9 * word_len) / 300
+        if n == 2:
+            return (950 + 2 * (frequency - word_len)) / 100
+        if n == 3:
+            return (900 + frequency - word_len) / 100
+        return (n / word_len) * 10.0 + (frequency / 100)
+
+    def _score_bound(self, n: int, key: int) -> float:
+        """Anahtarı key'den büyük olmayan bir kelimenin alabileceği en yüksek skor"""
+        if n == 1:
+            return (3000 + key) / 300
+        if n == 2:
+            return (950 + 2 * key) / 100
+        if n == 3:
+            return (900 + key) / 100
+        # n >= 4: skor = 10n/L + (key + L)/100, L in [n, en uzun kelime]; konveks -> uçlardan biri
+        max_len = max(self._max_word_len(), n)
+        return max(10.0 + (key + n) / 100, 10.0 * n / max_len + (key + max_len) / 100)
+
+    def _max_word_len(self) -> int:
+        self._word_lengths()
+        return self._max_len
+
+    def search_ids(self, prefix: str, max_results: int = 200) -> List[Tuple[int, float]]:
+        """Prefix araması id düzeyinde: [(id, skor)] - prefix'in kendisi hariç.
+
+        Adaylar skor anahtarı azalan sırada gelir; sıradaki adayın anahtarı kalan
+        tüm adayların skoru için bir üst sınırdır. k. en iyi skor bu sınıra
+        ulaşınca kalan adaylar ilk k'ya giremez ve gezinti biter (threshold
+        algoritması). Kısa prefix'lerde aralığın tamamı yerine ~k aday gezilir.
+        """
+        prefix_lower = prefix.lower().strip() if prefix else ""
+        if not prefix_lower or max_results <= 0:
+            return []
+
+        n = len(prefix_lower)
+        kind = 0 if n == 1 else 1
+        self._rank_index(kind)
+        ranked_ids, pending_keys, pending_ids = self._ranked_ids, self._pending_keys, self._pending_ids
+        lo, hi = self.prefix_range(prefix_lower, ranked_ids)
+        score, score_bound = self._score, self._score_bound
+        frequencies = self.frequencies
+        scored = []
+        top_scores: List[float] = []  # ilk k skorun min-heap'i
+
+        def consider(word_id: int) -> None:
+            word = self.word(word_id)
+            if word.lower() == prefix_lower:
+                return
+            word_score = score(n, max(len(word), n), frequencies[word_id])
+            scored.append((word_id, word_score))
+            if len(top_scores) < max_results:
+                heapq.heappush(top_scores, word_score)
+            elif word_score > top_scores[0]:
+                heapq.heapreplace(top_scores, word_score)
+
+        # Ağaçtan sonra eklenenler önce skorlanır; eşik ağaçtaki kalan adaylar için geçerli kalır
+        i = bisect.bisect_left(pending_keys, prefix_lower)
+        while i < len(pending_keys) and pending_keys[i].startswith(prefix_lower):
+            consider(pending_ids[i])
+            i += 1
+        for pos, key in self.iter_ranked(lo, hi, kind):
+            if len(top_scores) == max_results and top_scores[0] >= score_bound(n, key):
+                break
+            consider(ranked_ids[pos])
+
+        scored.sort(key=lambda item: -item[1])
+        return scored[:max_results]
+
+    def search(self, prefix: str, max_results: int = 200) -> List[Dict]:
+        """Prefix araması - frekansı en yüksek adaylar skorlanır (prefix'in kendisi hariç)"""
+        return [
+            {
+                'word': self.word(word_id),
+                'score': score,
+                'frequency': self.frequencies[word_id],
+            }
+            for word_id, score in self.search_ids(prefix, max_results)
+        ]
+
+    def frequency_view(self) -> "FrequencyView":
+        return FrequencyView(self)
+
+    # --- Yazma ---
+
+    def _make_writable(self) -> None:
+        """Snapshot'tan (mmap) açılmış kolonları yazılabilir kopyaya çevir"""
+        if isinstance(self._blob, bytearray):
+            return
+        self._blob = bytearray(self._blob)
+        self._offsets = array.array("I", self._offsets)
+        self.frequencies = array.array("I", self.frequencies)
+        self._sorted = array.array("I", self._sorted)
+
+    def _append(self, word: str, frequency: int) -> int:
+        word_id = len(self)
+        self._blob += word.encode("utf-8")
+        self._offsets.append(len(self._blob))
+        self.frequencies.append(frequency)
+        if self._lengths is not None:
+            word_len = min(len(word), 0xFFFF)
+            self._lengths.append(word_len)
+            self._max_len = max(self._max_len, word_len)
+        return word_id
+
+    def add(self, word: str, frequency: int = 1) -> Optional[int]:
+        """Kelime ekle (varsa frekansı max ile birleştir), id döndür"""
+        word = word.strip()
+        if not word:
+            return None
+        frequency = _clamp_frequency(frequency)
+        key = word.lower()
+        with self._lock:
+            self._make_writable()
+            pos = self._lower_bound(key)
+            if pos < len(self._sorted) and self._key(self._sorted[pos]) == key:
+                word_id = self._sorted[pos]
+                if frequency > self.frequencies[word_id]:
+                    self.frequencies[word_id] = frequency
+                    self._update_rank(word_id)
+                return word_id
+            word_id = self._append(word, frequency)
+            if self._rank_levels[0] is not None and self._sorted is self._ranked_ids:
+                self._sorted = array.array("I", self._sorted)  # ağaçların dizisi değişmez
+            self._sorted.insert(pos, word_id)
+            if self._rank_levels[0] is not None:
+                if len(self._pending_ids) >= max(_PENDING_MIN, len(self) // 16):
+                    self._invalidate_rank()
+                else:
+                    index = bisect.bisect_left(self._pending_keys, key)
+                    self._pending_keys.insert(index, key)
+                    self._pending_ids.insert(index, word_id)
+            return word_id
+
+    def add_words(
+        self,
+        words: Iterable[str],
+        frequencies: Optional[Dict[str, int]] = None,
+        default_frequency: int = 1,
+    ) -> int:
+        """Toplu ekleme; frequencies lowercase anahtarlıdır. Yeni eklenen kelime sayısını döndürür.
+
+        Tekrar kontrolü için geçici bir lowercase -> id dict'i kurulur, sonunda
+        index bir kez sıralanır ve dict bırakılır.
+        """
+        frequencies = frequencies or {}
+        with self._lock:
+            self._make_writable()
+            before = len(self)
+            lookup = {self._key(word_id): word_id for word_id in range(before)}
+            for word in words:
+                word = word.strip() if word else ""
+                if not word:
+                    continue
+                key = word.lower()
+                frequency = _clamp_frequency(frequencies.get(key, default_frequency))
+                word_id = lookup.get(key)
+                if word_id is None:
+                    lookup[key] = self._append(word, frequency)
+                elif frequency > self.frequencies[word_id]:
+                    self.frequencies[word_id] = frequency
+            if len(self) != before:
+                self._sorted = array.array("I", (word_id for _, word_id in sorted(lookup.items())))
+            self._invalidate_rank()
+            return len(self) - before
+
+    # --- Snapshot ---
+
+    def save_snapshot(self, path: str, source_hash: bytes) -> None:
+        """Kolonları olduğu gibi snapshot'a yaz (dönüşüm yok)"""
+        with self._lock:
+            write_snapshot(path, SNAPSHOT_KIND, SNAPSHOT_VERSION, source_hash, {
+                "blob": bytes(self._blob),
+                "offsets": array.array("I", self._offsets),
+                "frequencies": array.array("I", self.frequencies),
+                "sorted_ids": array.array("I", self._sorted),
+            })
+
+    def load_snapshot(self, path: str, source_hash: bytes) -> bool:
+        """Snapshot geçerliyse kolonları mmap üzerinden kullan; değilse False (yeniden kurulmalı)"""
+        sections = read_snapshot(path, SNAPSHOT_KIND, SNAPSHOT_VERSION, source_hash)
+        if sections is None:
+            return False
+        offsets = sections["offsets"]
+        if (
+            len(offsets) == 0
+            or offsets[-1] != len(sections["blob"])
+            or len(sections["frequencies"]) != len(offsets) - 1
+            or len(sections["sorted_ids"]) != len(offsets) - 1
+        ):
+            logger.warning(f"Lexicon snapshot bozuk, yeniden kurulacak: {path}")
+            return False
+        with self._lock:
+            self._blob = sections["blob"]
+            self._offsets = offsets
+            self.frequencies = sections["frequencies"]
+            self._sorted = sections["sorted_ids"]
+            self._lengths = None
+            self._invalidate_rank()
+        return True
+
+
+class WordList(Sequence):
+    """id -> kelime dizisi görünümü; eski `words` listesinin yerine (str talep anında üretilir)"""
+
+    def __init__(self, lexicon: Lexicon):
+        self._lexicon = lexicon
+
+    def __len__(self) -> int:
+        return len(self._lexicon)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._lexicon.word(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("lexicon index out of range")
+        return self._lexicon.word(index)
+
+    def __iter__(self) -> Iterator[str]:
+        word = self._lexicon.word
+        for i in range(len(self)):
+            yield word(i)
+
+
+class FrequencyView(Mapping):
+    """lowercase kelime -> frekans; eski word_frequencies dict'inin kopyasız karşılığı"""
+
+    def __init__(self, lexicon: Lexicon):
+        self._lexicon = lexicon
+
+    def __getitem__(self, key: str) -> int:
+        word_id = self._lexicon.get_id(key)
+        if word_id is None:
+            raise KeyError(key)
+        return self._lexicon.frequencies[word_id]
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._lexicon.get_id(key) is not None
+
+    def __iter__(self):
+        for word_id in self._lexicon._sorted:
+            yield self._lexicon._key(word_id)
+
+    def __len__(self) -> int:
+        return len(self._lexicon)
+
+
+def read_word_list(path: str, limit: int = 500000) -> List[str]:
+    """Satır başına bir kelime olan TXT sözlüğü oku (boş satırlar atlanır)"""
+    words = []
+    if not os.path.exists(path):
+        return words
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                words.append(line)
+                if len(words) >= limit:
+                    break
+    return words
+
+
+# Global instance - ana uygulamanın ortak sözlüğü (large_dictionary tarafından doldurulur)
+lexicon = Lexicon()
@@ -0,0 +1,278 @@
+"""
+Tek forward pass ile sonraki kelime tahmini (skorlama modu).
+
+Örneklemeli üretim (`generate(do_sample=True, num_return_sequences=k)`) k adet
+~20 token'lık devam üretip sadece bir kelimesini kullanıyordu; sonuç her
+çağrıda farklıydı. Skorlama modunda bağlam üzerinde bir forward pass yapılır,
+sonraki token'ın en olası top-k parçası alınır ve her aday yalnızca kelime
+sınırına kadar (greedy, KV cache ile) uzatılır. Sonuç deterministik ve
+olasılığa göre sıralıdır. Oturum id'si verilen isteklerde bağlam SessionKVCache
+üzerinden encode edilir (sadece yeni yazılan token'lar).
+
+Aday sayısı istek başına MAX_CANDIDATES ile sınırlıdır. Uzatmada bağlamın KV
+cache'i aday başına kopyalanmaz: tek isteğin adayları aynı past'ı genişletilmiş
+(expand, stride 0) görünümle paylaşır ve adaylar, uzatmanın ara KV'si
+EXTEND_KV_BUDGET_BYTES'ı geçmeyecek büyüklükte parçalar halinde işlenir.
+
+GPT-2 tarzı (byte-level BPE) tokenizer'lar varsayılır: yeni kelime başlatan
+parçalar boşlukla başlar.
+"""
+
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import torch
+
+from app.core.kv_cache import SessionKVCache, legacy_past
+
+# Aday başına kelime sınırına kadar en fazla ek parça
+MAX_WORD_PIECES = 4
+# İstek başına ilk parça adayı üst sınırı (top_k verilse de)
+MAX_CANDIDATES = 32
+# Aday uzatmanın anlık KV tensörleri için üst sınır (parça başına)
+EXTEND_KV_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def split_partial(text: str) -> Tuple[str, str]:
+    """Metni (bağlam, yarım kelime) olarak ayır: 'merhaba na' -> ('merhaba', 'na'); 'merhaba ' -> ('merhaba', '')"""
+    if not text or text[-1].isspace():
+        return text.rstrip(), ""
+    head, _, partial = text.rpartition(" ")
+    return head.rstrip(), partial
+
+
+def _starts_word(piece: str) -> bool:
+    return bool(piece) and piece[0].isspace()
+
+
+def _is_boundary(piece: str) -> bool:
+    """Parça mevcut kelimeyi bitiriyor mu (boşluk, noktalama, boş)"""
+    if not piece:
+        return True
+    first = piece[0]
+    return first.isspace() or not (first.isalnum() or first == "�")
+
+
+def _position_ids(attention_mask: torch.Tensor) -> torch.Tensor:
+    # Sol padding'de pozisyonlar gerçek token'lardan başlamalı
+    positions = attention_mask.long().cumsum(-1) - 1
+    return positions.clamp(min=0)
+
+
+def _expand_past(past, index: torch.Tensor):
+    return tuple(tuple(t.index_select(0, index) for t in layer) for layer in past)
+
+
+def _shared_past(past, row: int, n: int):
+    """Bir isteğin bağlam past'ı n aday için: kopyasız expand (stride 0) görünümü"""
+    return tuple(tuple(t[row:row + 1].expand(n, *t.shape[1:]) for t in layer) for layer in past)
+
+
+def _extend_chunks(rows: List[int], past, max_pieces: int) -> List[Tuple[int, int]]:
+    """Adayları [start, end) parçalarına böl: parça başına uzatma KV'si bütçeyi aşmasın, parça tek isteğe ait olsun"""
+    key = past[0][0]
+    per_candidate = sum(t[0].numel() // t.shape[2] for layer in past for t in layer) * key.element_size()
+    per_candidate *= key.shape[2] + max_pieces
+    size = max(1, EXTEND_KV_BUDGET_BYTES // max(per_candidate, 1))
+    chunks = []
+    start = 0
+    while start < len(rows):
+        end = start + 1
+        while end < len(rows) and end - start < size and rows[end] == rows[start]:
+            end += 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def _left_pad(past, mask: torch.Tensor, length: int):
+    """past/mask'i soldan sıfırla `length` pozisyona doldur (maskede 0: dikkat edilmez)"""
+    pad = length - mask.shape[1]
+    if pad <= 0:
+        return past, mask
+    padded = tuple(
+        tuple(torch.cat([t.new_zeros(t.shape[:2] + (pad,) + t.shape[3:]), t], dim=2) for t in layer)
+        for layer in past
+    )
+    return padded, torch.cat([mask.new_zeros((mask.shape[0], pad)), mask], dim=1)
+
+
+def _encode_contexts(model, tokenizer, contexts: List[str], sessions: List[Optional[str]], device, kv_cache):
+    """Bağlamları encode et -> (son pozisyon log-olasılıkları, past_key_values, attention_mask).
+
+    Oturumu olan istekler kv_cache üzerinden (sadece yeni token'lar), diğerleri
+    tek sol padding'li batch'te encode edilir; sonuçlar ortak uzunluğa
+    doldurulup istek sırasıyla birleştirilir.
+    """
+    use_cache = kv_cache is not None
+    cached = [row for row, session in enumerate(sessions) if use_cache and session]
+    fresh = [row for row, session in enumerate(sessions) if not (use_cache and session)]
+    groups = []  # (satırlar, past, mask, logits)
+
+    if fresh:
+        # Sol padding ve soldan kırpma: uzun bağlamda da son token'lar (oturum yolu gibi) skorlanır
+        padding_side, truncation_side = tokenizer.padding_side, tokenizer.truncation_side
+        tokenizer.padding_side = tokenizer.truncation_side = "left"
+        try:
+            inputs = tokenizer([contexts[row] for row in fresh], return_tensors="pt", truncation=True, max_length=128, padding=True)
+        finally:
+            tokenizer.padding_side, tokenizer.truncation_side = padding_side, truncation_side
+        if device:
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+        mask = inputs["attention_mask"]
+        out = model(
+            input_ids=inputs["input_ids"],
+            attention_mask=mask,
+            position_ids=_position_ids(mask),
+            use_cache=True,
+        )
+        groups.append((fresh, legacy_past(out.past_key_values), mask, out.logits[:, -1, :].float()))
+
+    for row in cached:
+        ids = tokenizer(contexts[row])["input_ids"]
+        ids, past, logits = kv_cache.encode(model, sessions[row], ids)
+        mask = torch.ones((1, len(ids)), dtype=torch.long, device=logits.device)
+        groups.append(([row], past, mask, logits.unsqueeze(0)))
+
+    if len(groups) == 1:
+        _, past, mask, logits = groups[0]
+        return torch.log_softmax(logits, dim=-1), past, mask
+
+    length = max(mask.shape[1] for _, _, mask, _ in groups)
+    padded = [_left_pad(past, mask, length) for _, past, mask, _ in groups]
+    past = tuple(
+        tuple(torch.cat([p[layer][j] for p, _ in padded], dim=0) for j in range(len(padded[0][0][layer])))
+        for layer in range(len(padded[0][0]))
+    )
+    mask = torch.cat([m for _, m in padded], dim=0)
+    logits = torch.cat([logits for _, _, _, logits in groups], dim=0)
+    # Grupları istek sırasına geri diz
+    order = [row for rows, _, _, _ in groups for row in rows]
+    index = torch.tensor(sorted(range(len(order)), key=order.__getitem__), device=mask.device)
+    return (
+        torch.log_softmax(logits.index_select(0, index), dim=-1),
+        _expand_past(past, index),
+        mask.index_select(0, index),
+    )
+
+
+def _extend(model, tokenizer, eos_id, max_pieces: int, past, mask, first_ids: List[int],
+            pieces: List[List[int]], scores: List[float], offset: int) -> None:
+    """Bir aday parçasını greedy uzat; pieces (parçanın listeleri) ve scores[offset:] yerinde güncellenir"""
+    positions = _position_ids(mask)[:, -1:]
+    done = [False] * len(first_ids)
+    current = torch.tensor(first_ids, device=mask.device).unsqueeze(-1)
+    for _ in range(max_pieces):
+        mask = torch.cat([mask, mask.new_ones((mask.shape[0], 1))], dim=-1)
+        positions = positions + 1
+        step = model(
+            input_ids=current,
+            attention_mask=mask,
+            position_ids=positions,
+            past_key_values=past,
+            use_cache=True,
+        )
+        past = legacy_past(step.past_key_values)
+        step_log_probs = torch.log_softmax(step.logits[:, -1, :].float(), dim=-1)
+        best_scores, best_ids = step_log_probs.max(dim=-1)
+        next_ids = best_ids.tolist()
+        for i, token_id in enumerate(next_ids):
+            if done[i]:
+                continue
+            if token_id == eos_id or _is_boundary(tokenizer.decode([token_id])):
+                done[i] = True
+                continue
+            pieces[i].append(token_id)
+            scores[offset + i] += float(best_scores[i])
+        if all(done):
+            break
+        current = best_ids.unsqueeze(-1)
+
+
+def score_next_words(
+    model,
+    tokenizer,
+    requests: Sequence[tuple],
+    device: Optional[str] = None,
+    top_k: int = 0,
+    max_pieces: int = MAX_WORD_PIECES,
+    is_word: Optional[Callable[[str], bool]] = None,
+    kv_cache: Optional[SessionKVCache] = None,
+) -> List[List[Tuple[str, float]]]:
+    """[(metin, öneri sayısı[, oturum id])] -> her istek için [(kelime, olasılık)] (olasılığa göre azalan).
+
+    Metin yarım kelimeyle bitiyorsa adaylar o kelimenin devamıdır ('merhaba na'
+    -> 'nasılsınız'); boşlukla bitiyorsa yeni kelime önerilir. is_word verilirse
+    sadece sözlükte olan kelimeler döner. kv_cache ve oturum id verilen
+    isteklerde bağlamın önceki istekle ortak kısmı yeniden encode edilmez.
+    """
+    splits = [split_partial(text) for text, *_ in requests]
+    sessions = [request[2] if len(request) > 2 else None for request in requests]
+    # Yarım kelimede bağlam kelimenin kendisini de içerir (devam parçaları aranır)
+    contexts = [
+        (f"{context} {partial}".strip() if partial else context) or (tokenizer.bos_token or tokenizer.eos_token or "")
+        for context, partial in splits
+    ]
+    eos_id = tokenizer.eos_token_id
+
+    with torch.no_grad():
+        log_probs, context_past, attention_mask = _encode_contexts(model, tokenizer, contexts, sessions, device, kv_cache)
+
+        # 1) İlk parça adayları: yeni kelimede boşlukla başlayanlar, yarım kelimede devam parçaları
+        rows: List[int] = []
+        first_ids: List[int] = []
+        first_scores: List[float] = []
+        for row, (_, count, *_) in enumerate(requests):
+            partial = splits[row][1]
+            k = min(top_k or max(count * 2, 8), MAX_CANDIDATES)
+            values, ids = torch.topk(log_probs[row], min(k * 2, log_probs.shape[-1]))
+            taken = 0
+            for value, token_id in zip(values.tolist(), ids.tolist()):
+                if token_id == eos_id:
+                    continue
+                piece = tokenizer.decode([token_id])
+                if partial:
+                    if _is_boundary(piece):
+                        continue
+                elif not _starts_word(piece) or not piece.strip():
+                    continue
+                rows.append(row)
+                first_ids.append(token_id)
+                first_scores.append(value)
+                taken += 1
+                if taken >= k:
+                    break
+
+        if not rows:
+            return [[] for _ in requests]
+
+        # 2) Adayları kelime sınırına kadar greedy uzat (istek başına, KV bütçeli parçalar halinde)
+        pieces = [[token_id] for token_id in first_ids]
+        scores = list(first_scores)
+        for start, end in _extend_chunks(rows, context_past, max_pieces):
+            _extend(
+                model, tokenizer, eos_id, max_pieces,
+                _shared_past(context_past, rows[start], end - start),
+                attention_mask[rows[start]:rows[start] + 1].expand(end - start, -1),
+                first_ids[start:end], pieces[start:end], scores, start,
+            )
+
+    # 3) İstek başına kelimeleri topla (aynı kelime tekrar ederse en yüksek olasılık)
+    results: List[dict] = [{} for _ in requests]
+    for i, row in enumerate(rows):
+        partial = splits[row][1]
+        word = (partial + tokenizer.decode(pieces[i])).strip()
+        # Boş, yarım kelimenin kendisi veya yarım kalmış UTF-8 baytı (sınıra ulaşmadan kesilmiş) -> at
+        if not word or "\ufffd" in word or (partial and word.lower() == partial.lower()):
+            continue
+        if is_word is not None and not is_word(word):
+            continue
+        probability = math.exp(scores[i])
+        best = results[row]
+        if probability > best.get(word, 0.0):
+            best[word] = probability
+
+    return [
+        sorted(found.items(), key=lambda item: -item[1])[:count]
+        for found, (_, count, *_) in zip(results, requests)
+    ]
@@ -1,5 +1,7 @@
 import os
+import array
 import asyncio
+from collections import defaultdict
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import time
@@ -7,16 +9,43 @@ import time
 # Helper imports
 import torch
 from transformers import AutoTokenizer, AutoModelForMaskedLM, pipeline
+import symspellpy
 from symspellpy import SymSpell, Verbosity
 import zeyrek
 
 from app.core.user_dict import UserDictionary
 from app.core.ngram_engine import NgramEngine
 from app.core.trie_engine import TrieEngine
+from app.core.lexicon import Lexicon
+from app.core.dictfile import DictionaryFormatError, read_frequency_dict, thd_path_for
+from app.core.config import settings
+from app.core.kv_cache import session_kv_cache, trim_past
+from app.core.onnx_backend import load_fill_mask, onnx_enabled
+from app.core.snapshot import (
+    source_digest, read_snapshot, write_snapshot, pack_strings, unpack_strings, paused_gc,
+)
 from app.core.privacy import anonymize_text
 from app.core.shortcuts import shortcuts_manager
 from logger_config import logger
 
+# SymSpell'e yuklenen kelime sayisi (delete index'i buyuk; tum sozluk degil)
+SYMSPELL_MAX_WORDS = 200000
+# Spell snapshot'i symspellpy'nin private alanlarini (_words, _deletes, _max_length) okuyup yazar;
+# format requirements.txt'deki symspellpy==6.7.7 ile eslesir. Surum kaynak hash'ine girer:
+# yukseltmede snapshot eski haliyle yuklenmez, yeniden kurulur.
+SPELL_SNAPSHOT_KIND = "nlp_spell"
+SPELL_SNAPSHOT_VERSION = 1
+SYMSPELL_VERSION = getattr(symspellpy, "__version__", "unknown")
+
+
+def _as_count(value) -> int:
+    """Sozluk dosyalarindaki frekans degerini tamsayiya cevir (gecersizse 1)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
 class NLPEngine:
     _instance = None
     
@@ -40,11 +69,14 @@ class NLPEngine:
         self.fill_mask = None # BERT
         self.gpt_model = None # GPT-2
         self.gpt_tokenizer = None
+        # Oturum basina GPT-2 baglam cache'i (generate_text session_id ile cagrilirsa)
+        self.gpt_kv_cache = session_kv_cache("gpt2-kv")
         self.morph_analyzer = None # Zeyrek
         
         self.tokenizer = None
         self.model = None
-        self.frequency_dict = {}
+        # Kelime + frekans tek yerde: Trie araması ve SymSpell kurulumu bunu kullanır
+        self.lexicon = Lexicon()
         self.trie_engine: Optional[TrieEngine] = None
         
         # Personalization
@@ -93,83 +125,44 @@ class NLPEngine:
         if use_symspell:
             print("Loading SymSpell...")
             self.sym_spell = SymSpell(max_dictionary_edit_distance=1, prefix_length=3)
-            self.frequency_dict = {}  # Store raw dict for prefix completion
-            
-            # Load Frequency Dictionary: tr_frequencies.json or fallback to turkish_dictionary.json
-            import json
-            freq_path = self.data_dir / "tr_frequencies.json"
-            fallback_path = self.base_dir / "turkish_dictionary.json"
-            data = None
-
-            if freq_path.exists():
-                try:
-                    with open(freq_path, 'r', encoding='utf-8') as f:
-                        raw = json.load(f)
-                    data = raw if isinstance(raw, dict) else {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
-                except Exception as e:
-                    print(f"Dictionary Loading Error (tr_frequencies): {e}")
-            if not data and fallback_path.exists():
-                try:
-                    with open(fallback_path, 'r', encoding='utf-8') as f:
-                        raw = json.load(f)
-                    data = {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
-                    print(f"Using fallback: turkish_dictionary.json ({len(data)} words)")
-                except Exception as e:
-                    print(f"Fallback dictionary error: {e}")
+            self.lexicon = Lexicon()
 
-            if data:
-                self.frequency_dict = dict(data)
-            else:
-                data = {}
-
-            # Large dictionary: merge ek kaynaklar (1M+ hedef, pipeline'a bağlı)
             max_words = int(os.getenv("MAX_DICT_WORDS", "500000"))
-            large_paths = [
+            source_paths = [
+                self.data_dir / "tr_frequencies.json",
+                self.base_dir / "turkish_dictionary.json",
                 self.data_dir / "turkish_large.json",
                 self.base_dir / "improvements" / "turkish_dictionary.json",
             ]
-            for large_path in large_paths:
-                if large_path.exists() and len(self.frequency_dict) < max_words:
-                    try:
-                        with open(large_path, "r", encoding="utf-8") as f:
-                            raw = json.load(f)
-                        if isinstance(raw, dict) and "words" in raw:
-                            raw = raw["words"]
-                        if isinstance(raw, dict) and not any(isinstance(v, (list, dict)) for v in (list(raw.values())[:3] or [])):
-                            extra = raw
-                        else:
-                            extra = {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
-                        for w, c in extra.items():
-                            if w and w.strip() and w not in self.frequency_dict:
-                                self.frequency_dict[w.strip()] = c
-                                if len(self.frequency_dict) >= max_words:
-                                    break
-                        if extra:
-                            print(f"Large dict merged: {large_path.name} -> total {len(self.frequency_dict):,} words")
-                    except Exception as e:
-                        logger.debug(f"Large dict skip {large_path}: {e}")
+            source_paths += [Path(thd_path_for(str(p))) for p in source_paths]
+            source_hash = source_digest(*[str(p) for p in source_paths], salt=f"max_words={max_words};symspellpy={SYMSPELL_VERSION}")
+            snapshot_dir = Path(settings.SNAPSHOT_DIR)
+
+            if settings.USE_INDEX_SNAPSHOTS and self._load_index_snapshots(snapshot_dir, source_hash):
+                print(f"Loaded {len(self.lexicon)} words into SymSpell (snapshot)")
+            else:
+                frequency_dict = self._load_frequency_dict(max_words)
+                if frequency_dict:
+                    # Trie yapisi (lexicon'u doldurur)
+                    self.trie_engine = TrieEngine(self.lexicon)
+                    self.trie_engine.build_from_frequency_dict(frequency_dict)
+                    del frequency_dict
 
-            if data or self.frequency_dict:
-                temp_dict = self.data_dir / "symspell_freq.txt"
-                try:
-                    with open(temp_dict, 'w', encoding='utf-8') as tf:
-                        for word, count in list(self.frequency_dict.items())[:200000]:
-                            tf.write(f"{word} {count}\n")
                     try:
-                        self.sym_spell.load_dictionary(str(temp_dict), term_index=0, count_index=1, separator=" ")
-                        print(f"Loaded {len(self.frequency_dict)} words into SymSpell")
+                        self._build_spell_index()
+                        print(f"Loaded {len(self.lexicon)} words into SymSpell")
                     except MemoryError:
                         print("WARNING: System Low on Memory. Skipping SymSpell Dictionary Load.")
                     except Exception as e:
                         print(f"SymSpell Load Error: {e}")
-                except Exception as e:
-                    print(f"SymSpell dict write error: {e}")
 
-                # Trie yapisi
-                self.trie_engine = TrieEngine()
-                self.trie_engine.build_from_frequency_dict(self.frequency_dict)
-            else:
-                print("Warning: No frequency dictionary found (data/tr_frequencies.json or turkish_dictionary.json).")
+                    if settings.USE_INDEX_SNAPSHOTS:
+                        try:
+                            self._save_index_snapshots(snapshot_dir, source_hash)
+                        except Exception as e:
+                            logger.warning(f"Index snapshot write error: {e}")
+                else:
+                    print("Warning: No frequency dictionary found (data/tr_frequencies.json or turkish_dictionary.json).")
             
             # CLEANUP
             gc.collect() 
@@ -190,7 +183,15 @@ class NLPEngine:
                 self.model = AutoModelForMaskedLM.from_pretrained(model_name)
                 
                 device = 0 if torch.cuda.is_available() else -1
-                self.fill_mask = pipeline("fill-mask", model=self.model, tokenizer=self.tokenizer, device=device)
+                if device < 0 and onnx_enabled():
+                    # ONNX Runtime (int8) - export ilk acilista bir kez
+                    try:
+                        self.fill_mask = load_fill_mask(self.model.eval(), self.tokenizer, model_name)
+                        print("  -> BERT: ONNX Runtime")
+                    except Exception as e:
+                        print(f"  -> ONNX BERT hazirlanamadi, pipeline kullaniliyor: {e}")
+                if self.fill_mask is None:
+                    self.fill_mask = pipeline("fill-mask", model=self.model, tokenizer=self.tokenizer, device=device)
                 
                 # CLEANUP
                 gc.collect()
@@ -228,6 +229,164 @@ class NLPEngine:
 
         print("NLP Engine Ready!")
 
+    def _load_frequency_dict(self, max_words: int) -> Dict[str, int]:
+        """tr_frequencies.json (veya turkish_dictionary.json) + buyuk sozlukleri oku (word -> count)
+
+        Her kaynagin yaninda .thd (binary) surumu varsa JSON yerine o okunur.
+        """
+        import json
+        freq_path = self.data_dir / "tr_frequencies.json"
+        fallback_path = self.base_dir / "turkish_dictionary.json"
+        data = self._read_binary_frequencies(freq_path)
+        frequency_dict: Dict[str, int] = {}
+
+        if not data and freq_path.exists():
+            try:
+                with open(freq_path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+                data = raw if isinstance(raw, dict) else {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
+            except Exception as e:
+                print(f"Dictionary Loading Error (tr_frequencies): {e}")
+        if not data:
+            data = self._read_binary_frequencies(fallback_path)
+        if not data and fallback_path.exists():
+            try:
+                with open(fallback_path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+                data = {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
+                print(f"Using fallback: turkish_dictionary.json ({len(data)} words)")
+            except Exception as e:
+                print(f"Fallback dictionary error: {e}")
+
+        if data:
+            frequency_dict = dict(data)
+
+        # Large dictionary: merge ek kaynaklar (1M+ hedef, pipeline'a bağlı)
+        large_paths = [
+            self.data_dir / "turkish_large.json",
+            self.base_dir / "improvements" / "turkish_dictionary.json",
+        ]
+        for large_path in large_paths:
+            if len(frequency_dict) >= max_words:
+                break
+            extra = self._read_binary_frequencies(large_path, max_words)
+            if extra:
+                for w, c in extra.items():
+                    if w not in frequency_dict:
+                        frequency_dict[w] = c
+                        if len(frequency_dict) >= max_words:
+                            break
+                print(f"Large dict merged: {thd_path_for(large_path.name)} -> total {len(frequency_dict):,} words")
+            elif large_path.exists():
+                try:
+                    with open(large_path, "r", encoding="utf-8") as f:
+                        raw = json.load(f)
+                    if isinstance(raw, dict) and "words" in raw:
+                        raw = raw["words"]
+                    if isinstance(raw, dict) and not any(isinstance(v, (list, dict)) for v in (list(raw.values())[:3] or [])):
+                        extra = raw
+                    else:
+                        extra = {x["word"]: x.get("frequency", 1) for x in (raw or []) if isinstance(x, dict) and x.get("word")}
+                    for w, c in extra.items():
+                        if w and w.strip() and w not in frequency_dict:
+                            frequency_dict[w.strip()] = c
+                            if len(frequency_dict) >= max_words:
+                                break
+                    if extra:
+                        print(f"Large dict merged: {large_path.name} -> total {len(frequency_dict):,} words")
+                except Exception as e:
+                    logger.debug(f"Large dict skip {large_path}: {e}")
+
+        return {w: _as_count(c) for w, c in frequency_dict.items()}
+
+    def _read_binary_frequencies(self, json_path: Path, limit: Optional[int] = None) -> Dict[str, int]:
+        """JSON kaynaginin yanindaki .thd dosyasini oku (yoksa veya bozuksa bos dict)"""
+        thd_path = thd_path_for(str(json_path))
+        if not os.path.exists(thd_path):
+            return {}
+        try:
+            return read_frequency_dict(thd_path, limit)
+        except (OSError, DictionaryFormatError) as e:
+            logger.warning(f"Binary dictionary skip {thd_path}: {e}")
+            return {}
+
+    def _build_spell_index(self) -> None:
+        """SymSpell'i lexicon'un ilk 200k kelimesinden kur.
+
+        Eskiden her acilista data/symspell_freq.txt yazilip tekrar okunuyordu; ayni
+        kural (tek kelimelik anahtar) dogrudan uygulanir.
+        """
+        words = self.lexicon.words[:SYMSPELL_MAX_WORDS]
+        for word, count in zip(words, self.lexicon.frequencies):
+            if " " in word:
+                continue
+            self.sym_spell.create_dictionary_entry(word, count)
+
+    def _snapshot_paths(self, snapshot_dir: Path) -> Tuple[Path, Path]:
+        return snapshot_dir / "nlp_lexicon.snap", snapshot_dir / "nlp_spell.snap"
+
+    def _save_index_snapshots(self, snapshot_dir: Path, source_hash: bytes) -> None:
+        """Lexicon + SymSpell (kelimeler ve delete index'i) snapshot'a yaz"""
+        lexicon_path, spell_path = self._snapshot_paths(snapshot_dir)
+        self.lexicon.save_snapshot(str(lexicon_path), source_hash)
+
+        spell_words = list(self.sym_spell.words.keys())
+        spell_ids = {w: i for i, w in enumerate(spell_words)}
+        delete_keys = []
+        delete_start = array.array("I", [0])
+        delete_ids = array.array("I")
+        for key, suggestions in self.sym_spell.deletes.items():
+            delete_keys.append(key)
+            delete_ids.extend(spell_ids[w] for w in suggestions)
+            delete_start.append(len(delete_ids))
+
+        write_snapshot(
+            str(spell_path),
+            SPELL_SNAPSHOT_KIND,
+            SPELL_SNAPSHOT_VERSION,
+            source_hash,
+            {
+                "spell_words": pack_strings(spell_words),
+                "spell_counts": array.array("q", self.sym_spell.words.values()),
+                "delete_keys": pack_strings(delete_keys),
+                "delete_start": delete_start,
+                "delete_ids": delete_ids,
+                "meta": array.array("Q", [len(spell_words), len(delete_keys), self.sym_spell._max_length]),
+            },
+        )
+        print(f"Index snapshot written: {lexicon_path.parent}")
+
+    def _load_index_snapshots(self, snapshot_dir: Path, source_hash: bytes) -> bool:
+        """Snapshot gecerliyse lexicon, SymSpell ve Trie'yi dosyadan yukle"""
+        lexicon_path, spell_path = self._snapshot_paths(snapshot_dir)
+        sections = read_snapshot(str(spell_path), SPELL_SNAPSHOT_KIND, SPELL_SNAPSHOT_VERSION, source_hash)
+        if sections is None:
+            return False
+        lexicon = Lexicon()
+        if not lexicon.load_snapshot(str(lexicon_path), source_hash):
+            return False
+        try:
+            n_spell, n_deletes, max_length = sections["meta"]
+            spell_words = unpack_strings(sections["spell_words"], n_spell)
+            delete_keys = unpack_strings(sections["delete_keys"], n_deletes)
+        except ValueError as e:
+            logger.warning(f"Index snapshot corrupt, rebuilding: {e}")
+            return False
+
+        # symspellpy 6.7.7 private alanlari (bkz. SPELL_SNAPSHOT_KIND)
+        self.sym_spell._words = dict(zip(spell_words, sections["spell_counts"].tolist()))
+        delete_start = sections["delete_start"].tolist()
+        delete_ids = sections["delete_ids"].tolist()
+        deletes = defaultdict(list)
+        with paused_gc():
+            for i, key in enumerate(delete_keys):
+                deletes[key] = [spell_words[j] for j in delete_ids[delete_start[i]:delete_start[i + 1]]]
+        self.sym_spell._deletes = deletes
+        self.sym_spell._max_length = max_length
+        self.lexicon = lexicon
+        self.trie_engine = TrieEngine(lexicon)
+        return True
+
     def learn(self, text: str):
         """
         Learns from user input to improve future suggestions.
@@ -251,24 +410,40 @@ class NLPEngine:
         except Exception as e:
             logger.warning(f"Error learning from text: {e}")
 
-    def generate_text(self, context: str, max_new_tokens=5) -> List[str]:
+    def generate_text(self, context: str, max_new_tokens=5, session_id: Optional[str] = None) -> List[str]:
         """
         Generates continuation using GPT-2.
         Input: "Yarın" -> Output: "Yarın [müsait misin?]"
+        session_id verilirse baglamin onceki istekle ortak kismi KV cache'ten gelir
+        (sadece yeni yazilan token'lar encode edilir).
         """
         if not self.gpt_model or not self.gpt_tokenizer:
             return []
             
         try:
-            inputs = self.gpt_tokenizer(context, return_tensors="pt")
-            outputs = self.gpt_model.generate(
-                **inputs, 
-                max_new_tokens=max_new_tokens, 
-                do_sample=True, 
-                top_k=50, 
+            generate_kwargs = dict(
+                max_new_tokens=max_new_tokens,
+                do_sample=True,
+                top_k=50,
                 top_p=0.95,
                 pad_token_id=self.gpt_tokenizer.eos_token_id
             )
+            if session_id and self.gpt_kv_cache is not None:
+                ids = self.gpt_tokenizer(context)["input_ids"]
+                if ids:
+                    ids, past, _ = self.gpt_kv_cache.encode(self.gpt_model, session_id, ids)
+                    # generate son token'i kendisi besler: past bir eksik verilir
+                    outputs = self.gpt_model.generate(
+                        input_ids=torch.tensor([ids]),
+                        attention_mask=torch.ones((1, len(ids)), dtype=torch.long),
+                        past_key_values=trim_past(past, len(ids) - 1) if len(ids) > 1 else None,
+                        **generate_kwargs
+                    )
+                    continuation = self.gpt_tokenizer.decode(outputs[0][len(ids):], skip_special_tokens=True)
+                    return [context + continuation]
+
+            inputs = self.gpt_tokenizer(context, return_tensors="pt")
+            outputs = self.gpt_model.generate(**inputs, **generate_kwargs)
             generated_text = self.gpt_tokenizer.decode(outputs[0], skip_special_tokens=True)
             # Return full text
             return [generated_text]
@@ -0,0 +1,300 @@
+"""
+ONNX Runtime CPU çıkarım backend'i (INFERENCE_BACKEND=onnx).
+
+Yapılandırılmış GPT-2 (skorlama modu, KV cache'li) ve BERT (fill-mask)
+modelleri ilk açılışta bir kez ONNX'e export edilir, isteğe bağlı int8 dinamik
+quantization uygulanır (ORT_QUANTIZE) ve ONNX_DIR altında saklanır; sonraki
+açılışlarda dosyadan yüklenir. Oturumlar CPUExecutionProvider ile, tüm graf
+optimizasyonları açık ve ORT_INTRA_OP_THREADS kadar intra-op thread ile çalışır.
+
+OrtCausalLM, HF modelinin score_next_words / SessionKVCache tarafından
+kullanılan çağrı arayüzünü (input_ids, attention_mask, position_ids,
+past_key_values -> logits, past_key_values) taklit eder; bu yüzden skorlama ve
+KV cache kodu iki backend'de aynıdır. `generate` desteklenmez (generate modu
+torch'ta kalır). OrtFillMask, transformers `pipeline("fill-mask")` çıktısının
+kullanılan alanlarını döndürür.
+
+onnxruntime kurulu değilse ORT_AVAILABLE=False olur ve torch yolu kullanılır.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+from app.core.logs import logger
+
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ort = None
+    ORT_AVAILABLE = False
+
+OPSET = 14
+
+
+def onnx_enabled() -> bool:
+    """INFERENCE_BACKEND=onnx seçili ve onnxruntime kurulu mu"""
+    if settings.INFERENCE_BACKEND != "onnx":
+        return False
+    if not ORT_AVAILABLE:
+        logger.warning("INFERENCE_BACKEND=onnx ama onnxruntime kurulu degil (pip install onnxruntime) - torch kullaniliyor")
+        return False
+    return True
+
+
+def intra_op_threads() -> int:
+    """ORT_INTRA_OP_THREADS (0: en fazla 4 çekirdek; birden çok worker'da aşırı abonelik olmasın)"""
+    if settings.ORT_INTRA_OP_THREADS > 0:
+        return settings.ORT_INTRA_OP_THREADS
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def model_dir(model_name: str) -> Path:
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name.strip("/\\"))
+    return Path(settings.ONNX_DIR) / safe
+
+
+def _layer_shape(config):
+    n_layer = getattr(config, "n_layer", None) or config.num_hidden_layers
+    n_head = getattr(config, "n_head", None) or config.num_attention_heads
+    hidden = getattr(config, "n_embd", None) or config.hidden_size
+    return n_layer, n_head, hidden // n_head
+
+
+class _CausalLMWithPast(torch.nn.Module):
+    """Export için düz giriş/çıkış: past_key_values katman başına key/value tensörleri"""
+
+    def __init__(self, model, n_layer: int):
+        super().__init__()
+        self.model = model
+        self.n_layer = n_layer
+
+    def forward(self, input_ids, attention_mask, position_ids, *past_flat):
+        past = tuple((past_flat[2 * i], past_flat[2 * i + 1]) for i in range(self.n_layer))
+        out = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past,
+            use_cache=True,
+            return_dict=True,
+        )
+        present = out.past_key_values
+        if hasattr(present, "to_legacy_cache"):
+            present = present.to_legacy_cache()
+        return (out.logits,) + tuple(t for layer in present for t in layer)
+
+
+def export_causal_lm(model, path: Path) -> None:
+    """Decoder-only LM'i KV cache girdileriyle ONNX'e export et (batch, seq, past uzunluğu dinamik)"""
+    n_layer, n_head, head_dim = _layer_shape(model.config)
+    batch, seq, past_len = 2, 3, 2
+    input_ids = torch.ones((batch, seq), dtype=torch.long)
+    attention_mask = torch.ones((batch, past_len + seq), dtype=torch.long)
+    position_ids = torch.arange(past_len, past_len + seq).unsqueeze(0).expand(batch, -1).contiguous()
+    past = [torch.zeros((batch, n_head, past_len, head_dim)) for _ in range(2 * n_layer)]
+
+    past_names = [f"past.{i}.{kind}" for i in range(n_layer) for kind in ("key", "value")]
+    present_names = [f"present.{i}.{kind}" for i in range(n_layer) for kind in ("key", "value")]
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "seq"},
+        "attention_mask": {0: "batch", 1: "total"},
+        "position_ids": {0: "batch", 1: "seq"},
+        "logits": {0: "batch", 1: "seq"},
+    }
+    dynamic_axes.update({name: {0: "batch", 2: "past"} for name in past_names})
+    dynamic_axes.update({name: {0: "batch", 2: "total"} for name in present_names})
+
+    _export(
+        _CausalLMWithPast(model, n_layer).eval(),
+        (input_ids, attention_mask, position_ids, *past),
+        path,
+        ["input_ids", "attention_mask", "position_ids"] + past_names,
+        ["logits"] + present_names,
+        dynamic_axes,
+    )
+
+
+def export_masked_lm(model, tokenizer, path: Path) -> None:
+    """Masked LM'i (BERT) input_ids + attention_mask girdileriyle export et"""
+
+    class _MaskedLM(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask, return_dict=True).logits
+
+    encoded = tokenizer(["merhaba dünya", "nasılsın"], return_tensors="pt", padding=True)
+    _export(
+        _MaskedLM(model).eval(),
+        (encoded["input_ids"], encoded["attention_mask"]),
+        path,
+        ["input_ids", "attention_mask"],
+        ["logits"],
+        {"input_ids": {0: "batch", 1: "seq"}, "attention_mask": {0: "batch", 1: "seq"}, "logits": {0: "batch", 1: "seq"}},
+    )
+
+
+def _export(module, args, path: Path, input_names, output_names, dynamic_axes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            args,
+            str(tmp_path),
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            do_constant_folding=True,
+        )
+    os.replace(tmp_path, path)
+
+
+def quantize_int8(src: Path, dst: Path) -> None:
+    """Ağırlıkları int8'e dinamik quantize et (aktivasyonlar çalışma anında)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp_path = dst.with_suffix(".onnx.tmp")
+    quantize_dynamic(str(src), str(tmp_path), weight_type=QuantType.QInt8)
+    os.replace(tmp_path, dst)
+
+
+def ensure_model(model, model_name: str, kind: str, tokenizer=None) -> Path:
+    """ONNX dosyasını döndür; yoksa bir kez export (+ int8) et. kind: 'causal' | 'masked'"""
+    directory = model_dir(model_name)
+    fp32_path = directory / f"{kind}.onnx"
+    target = directory / f"{kind}.int8.onnx" if settings.ORT_QUANTIZE else fp32_path
+    if target.exists():
+        return target
+    if not fp32_path.exists():
+        logger.info(f"ONNX export: {model_name} ({kind}) -> {fp32_path}")
+        if kind == "causal":
+            export_causal_lm(model, fp32_path)
+        else:
+            export_masked_lm(model, tokenizer, fp32_path)
+    if settings.ORT_QUANTIZE:
+        logger.info(f"ONNX int8 quantization: {target}")
+        quantize_int8(fp32_path, target)
+    return target
+
+
+def create_session(path: Path, threads: Optional[int] = None):
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or intra_op_threads()
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+
+class _Output:
+    __slots__ = ("logits", "past_key_values")
+
+    def __init__(self, logits, past_key_values):
+        self.logits = logits
+        self.past_key_values = past_key_values
+
+
+def _numpy(tensor) -> np.ndarray:
+    return tensor.detach().cpu().numpy()
+
+
+class OrtCausalLM:
+    """ONNX Runtime oturumu üzerinde HF causal LM çağrı arayüzü (score_next_words / SessionKVCache için)"""
+
+    def __init__(self, session, config):
+        self.session = session
+        self.config = config
+        self.device = torch.device("cpu")
+        self.n_layer, self.n_head, self.head_dim = _layer_shape(config)
+        self._outputs = [o.name for o in session.get_outputs()]
+
+    def eval(self):
+        return self
+
+    def __call__(self, input_ids, attention_mask=None, position_ids=None, past_key_values=None, use_cache=True, **_):
+        batch, seq = input_ids.shape
+        if past_key_values is None:
+            empty = np.zeros((batch, self.n_head, 0, self.head_dim), dtype=np.float32)
+            past = [empty] * (2 * self.n_layer)
+            past_len = 0
+        else:
+            past = [_numpy(t).astype(np.float32, copy=False) for layer in past_key_values for t in layer]
+            past_len = past[0].shape[2]
+        if attention_mask is None:
+            attention_mask = torch.ones((batch, past_len + seq), dtype=torch.long)
+        if position_ids is None:
+            position_ids = torch.arange(past_len, past_len + seq).unsqueeze(0).expand(batch, -1)
+
+        feeds = {
+            "input_ids": _numpy(input_ids).astype(np.int64, copy=False),
+            "attention_mask": _numpy(attention_mask).astype(np.int64, copy=False),
+            "position_ids": _numpy(position_ids).astype(np.int64, copy=False),
+        }
+        for i in range(self.n_layer):
+            feeds[f"past.{i}.key"] = past[2 * i]
+            feeds[f"past.{i}.value"] = past[2 * i + 1]
+
+        outputs = self.session.run(self._outputs, feeds)
+        logits = torch.from_numpy(outputs[0])
+        present = tuple(
+            (torch.from_numpy(outputs[1 + 2 * i]), torch.from_numpy(outputs[2 + 2 * i]))
+            for i in range(self.n_layer)
+        )
+        return _Output(logits, present if use_cache else None)
+
+
+class OrtFillMask:
+    """pipeline('fill-mask') yerine: [{'token', 'token_str', 'score', 'sequence'}] (skora göre azalan)"""
+
+    def __init__(self, session, tokenizer, top_k: int = 5):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.top_k = top_k
+
+    def __call__(self, text: str, top_k: Optional[int] = None) -> List[Dict]:
+        top_k = top_k or self.top_k
+        encoded = self.tokenizer(text, return_tensors="np")
+        input_ids = encoded["input_ids"].astype(np.int64)
+        (logits,) = self.session.run(
+            ["logits"],
+            {"input_ids": input_ids, "attention_mask": encoded["attention_mask"].astype(np.int64)},
+        )
+        positions = np.nonzero(input_ids[0] == self.tokenizer.mask_token_id)[0]
+        if len(positions) == 0:
+            return []
+        row = logits[0, positions[0]].astype(np.float64)
+        probs = np.exp(row - row.max())
+        probs /= probs.sum()
+        best = np.argsort(-probs)[:top_k]
+
+        results = []
+        for token_id in best.tolist():
+            filled = input_ids[0].copy()
+            filled[positions[0]] = token_id
+            results.append({
+                "score": float(probs[token_id]),
+                "token": token_id,
+                "token_str": self.tokenizer.decode([token_id]).strip(),
+                "sequence": self.tokenizer.decode(filled, skip_special_tokens=True),
+            })
+        return results
+
+
+def load_causal_lm(model, model_name: str) -> OrtCausalLM:
+    """Torch modelinden (export gerekirse) ONNX Runtime causal LM'i oluştur"""
+    return OrtCausalLM(create_session(ensure_model(model, model_name, "causal")), model.config)
+
+
+def load_fill_mask(model, tokenizer, model_name: str, top_k: int = 5) -> OrtFillMask:
+    return OrtFillMask(create_session(ensure_model(model, model_name, "masked", tokenizer)), tokenizer, top_k)
@@ -0,0 +1,223 @@
+"""
+Öneri gösterim (impression) / seçim (accept) olay logu.
+
+ML ranking modeli elle hazırlanmış training_data ile ve tek sorgu grubuyla
+eğitiliyordu; gösterimler hiç kaydedilmediği için CTR da hesaplanamıyordu.
+Bu log, kullanıcıya gösterilen her son listeyi (sıralamada kullanılan ML
+feature satırlarıyla birlikte) ve /learn ile gelen seçimleri satır başına bir
+JSON olay olarak biriktirir; offline trainer (app.services.ranker_training)
+dosyayı akış halinde okuyup sorgu başına grup kurar.
+
+Olaylar (orjson, satır başına bir olay):
+    {"e": "i", "ts", "u": kullanıcı, "q": metin, "c": [öneri metinleri], "x": [[8 feature], ...]}
+    {"e": "a", "ts", "u": kullanıcı, "q": metin, "s": seçilen öneri}
+
+Metin alanları app.core.privacy.anonymize_text ile maskelenir. Yazma tamponludur
+(flush_every olay ya da flush_interval_s saniye); her flush tek append
+yazımıdır, dosya RANKING_LOG_MAX_MB'yi aşınca bir yedeğe (.1) döndürülür.
+
+Eşleştirme (build_groups): olaylar zaman sırasına konur (in_time_order;
+worker'lar ayrı flush ettiğinden dosya sırası kesin değildir). Bir seçim, aynı
+kullanıcının son seçimden beri pencere (window_s) içinde gördüğü ve seçilen
+metni içeren her gösterime bağlanır; seçilen aday 1, diğerleri 0 etiketlidir.
+Seçimle sonuçlanmayan gösterimler LambdaRank için bilgi taşımaz ve atılır.
+"""
+
+import heapq
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.core.logs import logger
+from app.core.privacy import anonymize_text
+
+# Feature değerleri log boyutu için yuvarlanır (sıralama açısından fark yaratmaz)
+FEATURE_DECIMALS = 6
+
+
+class RankingEventLog:
+    """Tamponlu, döndürülen JSON Lines olay logu"""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        enabled: bool = True,
+        max_bytes: int = 64 * 1024 * 1024,
+        flush_every: int = 64,
+        flush_interval_s: float = 5.0,
+    ):
+        self.path = path
+        self.enabled = enabled and bool(path)
+        self.max_bytes = max(1024, int(max_bytes))
+        self.flush_every = max(1, int(flush_every))
+        self.flush_interval_s = flush_interval_s
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.impressions = 0
+        self.accepts = 0
+        self.write_errors = 0
+
+    def log_impression(self, user_id: str, text: str, suggestions: Sequence[str], features) -> None:
+        """Gösterilen son liste ve sıralamadaki feature satırları (n x 8)"""
+        if not self.enabled or not suggestions:
+            return
+        rows = [[round(value, FEATURE_DECIMALS) for value in row] for row in features.tolist()] \
+            if hasattr(features, "tolist") else [list(row) for row in features]
+        self._append({
+            "e": "i",
+            "ts": round(time.time(), 3),
+            "u": user_id,
+            "q": anonymize_text(text),
+            "c": [anonymize_text(s) for s in suggestions],
+            "x": rows,
+        })
+        self.impressions += 1
+
+    def log_accept(self, user_id: str, text: str, selected: str) -> None:
+        """Kullanıcının seçtiği öneri (/learn)"""
+        if not self.enabled or not selected:
+            return
+        self._append({
+            "e": "a",
+            "ts": round(time.time(), 3),
+            "u": user_id,
+            "q": anonymize_text(text),
+            "s": anonymize_text(selected),
+        })
+        self.accepts += 1
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        line = orjson.dumps(event) + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval_s:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            # Tek append yazımı: birden fazla worker aynı dosyaya satır bölmeden ekler
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning(f"Ranking olay logu yazılamadı ({self.path}): {e}")
+
+    def paths(self) -> List[str]:
+        """Okuma sırasıyla (eskiden yeniye) mevcut log dosyaları"""
+        if not self.path:
+            return []
+        return [p for p in (self.path + ".1", self.path) if os.path.exists(p)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "impressions": self.impressions,
+            "accepts": self.accepts,
+            "buffered": len(self._buffer),
+            "write_errors": self.write_errors,
+        }
+
+
+def read_events(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Log dosyalarını satır satır oku (yarım / bozuk satırlar atlanır)"""
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        event = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+                    if isinstance(event, dict):
+                        yield event
+        except OSError as e:
+            logger.warning(f"Ranking olay logu okunamadı ({path}): {e}")
+
+
+def in_time_order(events: Iterable[Dict[str, Any]], slack_s: float = 60.0) -> Iterator[Dict[str, Any]]:
+    """Olayları zaman sırasına koy (en fazla slack_s geç yazılmış olaylar için).
+
+    Her worker kendi tamponunu flush ettiğinden, bir worker'daki seçim başka
+    worker'daki gösterimden önce dosyaya yazılabilir; yığın sadece son slack_s
+    saniyenin olaylarını tutar.
+    """
+    heap: List[Tuple[float, int, Dict[str, Any]]] = []
+    newest = float("-inf")
+    for seq, event in enumerate(events):
+        ts = event.get("ts", 0.0)
+        newest = max(newest, ts)
+        heapq.heappush(heap, (ts, seq, event))
+        while heap and heap[0][0] < newest - slack_s:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def build_groups(
+    events: Iterable[Dict[str, Any]],
+    window_s: float = 120.0,
+    max_pending: int = 64,
+) -> Iterator[Tuple[List[List[float]], List[int]]]:
+    """Seçimleri gösterimlerle eşleştirip sorgu grupları üret: (feature satırları, etiketler)"""
+    pending: Dict[str, Deque[Tuple[float, List[str], List[List[float]]]]] = {}
+    last_sweep = 0.0
+    for event in in_time_order(events):
+        kind, user, ts = event.get("e"), event.get("u"), event.get("ts", 0.0)
+        if kind == "i":
+            texts, rows = event.get("c") or [], event.get("x") or []
+            if len(texts) < 2 or len(texts) != len(rows):
+                continue
+            queue = pending.get(user)
+            if queue is None:
+                queue = pending[user] = deque(maxlen=max_pending)
+            lowered = [t.strip().lower() for t in texts]
+            if queue and queue[-1][1] == lowered:
+                queue.pop()  # aynı liste tekrar gösterildi: en sonuncusu yeterli
+            queue.append((ts, lowered, rows))
+        elif kind == "a":
+            queue = pending.pop(user, None)
+            selected = (event.get("s") or "").strip().lower()
+            if not queue or not selected:
+                continue
+            for shown_at, lowered, rows in queue:
+                if ts - shown_at > window_s or selected not in lowered:
+                    continue
+                yield rows, [1 if t == selected else 0 for t in lowered]
+        # Uzun süredir seçim yapmayan kullanıcıların bekleyen gösterimleri bırakılır
+        if ts - last_sweep > window_s:
+            last_sweep = ts
+            for stale in [u for u, q in pending.items() if not q or ts - q[-1][0] > window_s]:
+                del pending[stale]
+
+
+def _build_log() -> RankingEventLog:
+    from app.core.config import settings
+
+    return RankingEventLog(
+        settings.RANKING_LOG_PATH,
+        enabled=settings.RANKING_LOG_ENABLED,
+        max_bytes=int(settings.RANKING_LOG_MAX_MB * 1024 * 1024),
+    )
+
+
+ranking_log = _build_log()
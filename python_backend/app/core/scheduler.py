@@ -0,0 +1,214 @@
+"""
+Zaman bütçeli (deadline-aware) öneri kaynağı zamanlayıcısı.
+
+Orchestrator kaynakları sabit iki aşamada (0.1 s hızlı + 0.5 s akıllı gather)
+çalıştırıyordu; toplam süre zaman aşımlarının toplamıyla belirleniyordu.
+DeadlineScheduler'da her kaynak beklenen maliyetini (ms) ve değerini bildirir
+(SOURCE_SPECS). Kaynak ve girdi uzunluğu kovası başına çevrimiçi EWMA gecikme
+tahmini tutulur; ilk ölçüme kadar bildirilen maliyet kullanılır.
+
+İstek başına bütçe (ms) verildiğinde:
+- kaynaklar değer / tahmini maliyet oranına göre sıralanır,
+- event loop'u bloklayan (senkron çalışan) kaynakların tahminleri toplanır,
+  gerçekten asenkron olanlar (transformer: executor / model sunucusu) paralel
+  sayılır; bütçeye sığmayanlar hiç başlatılmaz (required olanlar hariç),
+- seçilenler bu sırayla aynı anda başlatılır ve bütçe dolunca bekleyenler
+  iptal edilir. Yanıt süresi istemcinin bütçesiyle sınırlıdır.
+
+İptal edilen kaynağın geçen süresi (bütçe dolana kadar) ölçüm olarak işlenir;
+bir sonraki istekte o kaynak bütçeye sığmıyorsa atlanır. Atlanan kaynak
+ölçülmediği için tahmini her atlamada bildirilen maliyete (cost_ms) doğru
+çekilir; böylece geçici bir yavaşlama kaynağı kalıcı olarak devre dışı
+bırakmaz, tahmin bütçeye inince kaynak tekrar denenir.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+EWMA_ALPHA = 0.2
+# Tek ölçüm mevcut tahminin en fazla bu katı kadar sayılır (soğuk başlangıç / lazy
+# yükleme gibi tek seferlik gecikmeler tahmini uzun süre şişirmesin)
+OUTLIER_FACTOR = 4.0
+# Atlanan (ölçülemeyen) kaynağın tahmini her atlamada bildirilen maliyete bu oranla yaklaşır
+SKIP_DECAY_ALPHA = 0.2
+# Girdi uzunluğu kovaları (karakter): 0-8, 9-32, 33-128, 129+
+LENGTH_BUCKETS = (8, 32, 128)
+
+
+class SourceSpec(NamedTuple):
+    cost_ms: float  # ilk tahmin (ölçüm gelene kadar)
+    value: float  # göreli fayda
+    blocking: bool = True  # event loop'ta senkron çalışıyor mu (maliyetler toplanır)
+    required: bool = False  # bütçeden bağımsız her zaman başlat (hızlı yol)
+
+
+SOURCE_SPECS: Dict[str, SourceSpec] = {
+    "lexicon": SourceSpec(cost_ms=5, value=10, required=True),
+    "search": SourceSpec(cost_ms=10, value=8, required=True),
+    "medium_dictionary": SourceSpec(cost_ms=5, value=4),
+    "ngram": SourceSpec(cost_ms=15, value=5),
+    "transformer": SourceSpec(cost_ms=150, value=6, blocking=False),
+    "phrase": SourceSpec(cost_ms=30, value=4),
+    "domain": SourceSpec(cost_ms=10, value=3),
+    "template": SourceSpec(cost_ms=20, value=2),
+    "emoji": SourceSpec(cost_ms=5, value=1),
+}
+DEFAULT_SPEC = SourceSpec(cost_ms=20, value=1)
+
+
+def length_bucket(length: int) -> int:
+    for i, limit in enumerate(LENGTH_BUCKETS):
+        if length <= limit:
+            return i
+    return len(LENGTH_BUCKETS)
+
+
+class CostModel:
+    """(kaynak, uzunluk kovası) -> EWMA gecikme (ms)"""
+
+    def __init__(self, specs: Dict[str, SourceSpec]):
+        self.specs = specs
+        self._ewma: Dict[Tuple[str, int], float] = {}
+
+    def spec(self, source: str) -> SourceSpec:
+        return self.specs.get(source, DEFAULT_SPEC)
+
+    def estimate(self, source: str, length: int) -> float:
+        key = (source, length_bucket(length))
+        if key in self._ewma:
+            return self._ewma[key]
+        # Aynı kaynağın komşu kovasında ölçüm varsa onu, yoksa bildirilen maliyeti kullan
+        for bucket in range(len(LENGTH_BUCKETS) + 1):
+            if (source, bucket) in self._ewma:
+                return self._ewma[(source, bucket)]
+        return self.spec(source).cost_ms
+
+    def observe(self, source: str, length: int, elapsed_ms: float) -> None:
+        key = (source, length_bucket(length))
+        previous = self._ewma.get(key)
+        elapsed_ms = min(elapsed_ms, OUTLIER_FACTOR * max(1.0, self.estimate(source, length)))
+        self._ewma[key] = elapsed_ms if previous is None else previous + EWMA_ALPHA * (elapsed_ms - previous)
+
+    def decay(self, source: str, length: int) -> None:
+        """Ölçülmeyen (atlanan) kaynağın tahminini bildirilen maliyete doğru çek"""
+        current = self.estimate(source, length)
+        self._ewma[(source, length_bucket(length))] = current + SKIP_DECAY_ALPHA * (self.spec(source).cost_ms - current)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result: Dict[str, Dict[str, float]] = {}
+        for (source, bucket), value in sorted(self._ewma.items()):
+            result.setdefault(source, {})[str(bucket)] = round(value, 2)
+        return result
+
+
+class DeadlineScheduler:
+    """Bütçeye göre kaynak seçer, sırayla başlatır, bütçe dolunca döner"""
+
+    def __init__(
+        self,
+        specs: Optional[Dict[str, SourceSpec]] = None,
+        observers: Sequence[Callable[[str, float], None]] = (),
+    ):
+        self.cost_model = CostModel(specs if specs is not None else SOURCE_SPECS)
+        self.observers = list(observers)
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, source: str, key: str) -> None:
+        counts = self.stats.setdefault(source, {"run": 0, "skipped": 0, "timed_out": 0})
+        counts[key] += 1
+
+    def plan(self, sources: Sequence[str], length: int, budget_ms: float) -> List[str]:
+        """Çalıştırılacak kaynaklar, başlatma sırasıyla (bütçeye sığmayanların tahmini gevşetilir)"""
+        estimates = {source: max(0.1, self.cost_model.estimate(source, length)) for source in sources}
+        ordered = sorted(
+            sources,
+            key=lambda s: (not self.cost_model.spec(s).required, -self.cost_model.spec(s).value / estimates[s]),
+        )
+        chosen = []
+        blocking_total = 0.0
+        for source in ordered:
+            spec = self.cost_model.spec(source)
+            cost = estimates[source]
+            if spec.required:
+                chosen.append(source)
+                blocking_total += cost if spec.blocking else 0.0
+            elif spec.blocking:
+                if blocking_total + cost <= budget_ms:
+                    chosen.append(source)
+                    blocking_total += cost
+                else:
+                    self.cost_model.decay(source, length)
+            elif cost <= budget_ms:
+                chosen.append(source)
+            else:
+                self.cost_model.decay(source, length)
+        return chosen
+
+    async def run(self, jobs: Sequence[Tuple[str, Any]], budget_ms: float, length: int = 0) -> Dict[str, Any]:
+        """jobs: [(kaynak, coroutine)] -> {kaynak: sonuç} (bütçe içinde bitenler)
+
+        Seçilmeyen coroutine'ler kapatılır, bütçe dolunca bekleyenler iptal edilir.
+        """
+        results: Dict[str, Any] = {}
+        async for source, result, _left in self.stream(jobs, budget_ms, length):
+            results[source] = result
+        # Sonuçlar jobs sırasıyla (tamamlanma sırası birleştirmeyi etkilemesin)
+        return {source: results[source] for source, _ in jobs if source in results}
+
+    async def stream(self, jobs: Sequence[Tuple[str, Any]], budget_ms: float, length: int = 0) -> AsyncIterator[Tuple[str, Any, int]]:
+        """run ile aynı seçim; biten kaynakları tamamlanma sırasıyla üretir
+
+        Her öğe (kaynak, sonuç, kalan): kalan, hâlâ beklenen kaynak sayısıdır (0: son sonuç).
+        """
+        coroutines = dict(jobs)
+        chosen = self.plan(list(coroutines), length, budget_ms)
+        for source, coro in coroutines.items():
+            if source not in chosen:
+                coro.close()
+                self._count(source, "skipped")
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + max(0.0, budget_ms) / 1000.0
+        tasks = {loop.create_task(self._timed(source, coroutines[source], length)): source for source in chosen}
+        order = {source: i for i, source in enumerate(chosen)}
+        pending = set(tasks)
+        expired = False
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    expired = True
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finished = sorted(done, key=lambda t: order[tasks[t]])
+                for i, task in enumerate(finished):
+                    source = tasks[task]
+                    self._count(source, "run")
+                    if not task.cancelled() and task.exception() is None:
+                        yield source, task.result(), len(pending) + len(finished) - i - 1
+        finally:
+            # Bütçe doldu ya da istek iptal edildi (daha yeni istek geldi): kalan kaynaklar durdurulur
+            elapsed_ms = (loop.time() - start) * 1000.0
+            for task in pending:
+                task.cancel()
+                if expired:
+                    source = tasks[task]
+                    self._count(source, "timed_out")
+                    # Bütçe dolana kadar geçen süre ölçüm olarak işlenir
+                    self._observe(source, length, elapsed_ms)
+
+    async def _timed(self, source: str, coro, length: int):
+        start = time.perf_counter()
+        result = await coro
+        self._observe(source, length, (time.perf_counter() - start) * 1000.0)
+        return result
+
+    def _observe(self, source: str, length: int, elapsed_ms: float) -> None:
+        self.cost_model.observe(source, length, elapsed_ms)
+        for observer in self.observers:
+            observer(source, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"sources": {k: dict(v) for k, v in self.stats.items()}, "latency_ms": self.cost_model.snapshot()}
@@ -0,0 +1,44 @@
+"""
+orjson ile hızlı yanıt serileştirme (HTTP + WebSocket).
+
+/predict yanıtı FastAPI'nin varsayılan yolunda response_model ile yeniden
+doğrulanıp jsonable_encoder + stdlib json'dan geçiyordu; /ws her tuşta
+model_dump() + send_json yapıyordu (80 öneriye kadar). Burada her şey tek
+orjson.dumps çağrısıyla bytes'a yazılır: Pydantic modelleri model_dump (Rust)
+ile, Candidate'ler doğrudan as_dict ile (Suggestion doğrulaması olmadan).
+"""
+
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+
+from app.models.candidate import Candidate
+
+# numpy skorları (ML ranking) da doğrudan yazılsın
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+loads = orjson.loads
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Candidate):
+        return obj.as_dict()
+    if isinstance(obj, float):  # float alt sınıfları
+        return float(obj)
+    raise TypeError(f"{type(obj).__name__} JSON'a çevrilemiyor")
+
+
+def dumps(obj: Any) -> bytes:
+    """Model / Candidate / dict -> JSON bytes"""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def phase_message(phase: str, response: BaseModel, final: bool) -> bytes:
+    """Aşamalı yanıt mesajı: yanıt alanları + phase + final"""
+    message = response.model_dump()
+    message["phase"] = phase
+    message["final"] = final
+    return dumps(message)
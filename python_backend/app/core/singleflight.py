@@ -0,0 +1,82 @@
+"""
+Aynı anda gelen özdeş hesaplamaları tek çalıştırmada birleştirme (single-flight).
+
+Çok sayıda temsilci aynı anda aynı selamlama önekini yazdığında her istek
+aynı kaynak fan-out'unu (lexicon, n-gram, phrase, transformer...) baştan
+çalıştırıyordu. SingleFlight aynı anahtarla eş zamanlı gelen çağrıları tek
+bir görevde toplar: ilk çağrı (leader) hesaplamayı başlatır, sonrakiler aynı
+sonucu bekler. Görev bitince anahtar silinir; sonuç önbelleğe alınmaz.
+
+Bekleyen her çağrı görevi asyncio.shield ile bekler: bir bekleyicinin iptal
+edilmesi (son istek kazanır) diğerlerini etkilemez; bekleyen kalmazsa görev
+iptal edilir. Paylaşılan sonuç çağıranlar tarafından değiştirilmemelidir.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters", "joined", "started")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+        self.joined = 0
+        self.started = time.perf_counter()
+
+
+class SingleFlight:
+    """Anahtar başına tek in-flight hesaplama"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.saved_ms = 0.0  # birleştirilen çağrıların çalıştırmadığı hesaplama süresi
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """key için çalışan hesaplama varsa onu bekle, yoksa factory() ile başlat"""
+        if not self.enabled:
+            return await factory()
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._finish(key, call))
+            self.leaders += 1
+        else:
+            call.joined += 1
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Kimse beklemiyor: hesaplamayı durdur, yeni çağrılar yeniden başlatır
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        self._forget(key, call)
+        if call.joined and not call.task.cancelled():
+            self.saved_ms += call.joined * (time.perf_counter() - call.started) * 1000.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.coalesced / total, 4) if total else 0.0,
+            "saved_ms": round(self.saved_ms, 2),
+        }
@@ -0,0 +1,191 @@
+"""
+Index snapshot formatı - pickle kullanmayan, versiyonlu ve checksum'lı binary dosya.
+
+Her restart'ta Trie, prefix index ve SymSpell yeniden kurulmasın diye kurulmuş
+index'ler ham kolonlar halinde diske yazılır. Açılışta dosya mmap ile okunur,
+kolonlar memoryview olarak (kopyasız) döner; kaynak sözlüğün hash'i değişmişse
+snapshot geçersiz sayılır ve index yeniden kurulur.
+
+Dosya düzeni (little-endian):
+    header   : magic(8s) format_version(H) kind(16s) kind_version(H)
+               section_count(H) source_hash(32s) payload_crc32(I) payload_size(Q)
+    sections : section_count x [name(16s) typecode(1s) offset(Q) length(Q)]
+    payload  : 8 byte hizalı ham kolonlar (array / bytes)
+"""
+
+import array
+import contextlib
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Union
+
+from app.core.logs import logger
+
+MAGIC = b"THSNAP\x00\x01"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sH16sHH32sIQ")
+_SECTION = struct.Struct("<16scQQ")
+_ALIGN = 8
+
+# array typecode'ları; 'B' ham bytes kolonları için de kullanılır
+_TYPECODES = {"B", "b", "H", "I", "i", "Q", "q", "f", "d"}
+
+Column = Union[bytes, bytearray, array.array]
+
+
+def source_digest(*paths: str, salt: str = "") -> bytes:
+    """Kaynak dosyaların içerik hash'i (sha256). Olmayan dosyalar da hash'e girer.
+
+    salt: index'i etkileyen ayarlar (ör. MAX_DICT_WORDS) - değişince snapshot geçersiz olur.
+    """
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        if not path or not os.path.exists(path):
+            digest.update(b"\x00missing")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_snapshot(
+    path: str,
+    kind: str,
+    kind_version: int,
+    source_hash: bytes,
+    sections: Dict[str, Column],
+) -> None:
+    """Kolonları snapshot dosyasına yaz (tmp + atomik rename)."""
+    entries = []
+    payload = bytearray()
+    for name, column in sections.items():
+        if isinstance(column, array.array):
+            typecode = column.typecode
+            raw = column.tobytes()
+        else:
+            typecode = "B"
+            raw = bytes(column)
+        if typecode not in _TYPECODES:
+            raise ValueError(f"Desteklenmeyen kolon tipi: {name} ({typecode})")
+        offset = len(payload)
+        payload += raw
+        payload += b"\x00" * (_align(len(payload)) - len(payload))
+        entries.append((name, typecode, offset, len(raw)))
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        kind.encode("ascii"),
+        kind_version,
+        len(entries),
+        source_hash,
+        zlib.crc32(payload) & 0xFFFFFFFF,
+        len(payload),
+    )
+    table = b"".join(
+        _SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), offset, length)
+        for name, typecode, offset, length in entries
+    )
+    prefix = header + table
+    padding = b"\x00" * (_align(len(prefix)) - len(prefix))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        f.write(padding)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(
+    path: str,
+    kind: str,
+    kind_version: int,
+    source_hash: bytes,
+) -> Optional[Dict[str, memoryview]]:
+    """Snapshot'ı mmap ile aç ve kolonları memoryview olarak döndür.
+
+    Dosya yoksa, versiyon/kaynak hash'i uyuşmuyorsa veya checksum bozuksa None döner.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Snapshot acilamadi ({path}): {e}")
+        return None
+
+    view = memoryview(buf)
+    if len(view) < _HEADER.size:
+        logger.warning(f"Snapshot bozuk (kisa dosya): {path}")
+        return None
+    magic, fmt_version, file_kind, file_kind_version, count, file_hash, crc, size = _HEADER.unpack_from(view)
+    if magic != MAGIC or fmt_version != FORMAT_VERSION:
+        logger.info(f"Snapshot formati farkli, yeniden kurulacak: {path}")
+        return None
+    if file_kind.rstrip(b"\x00").decode("ascii") != kind or file_kind_version != kind_version:
+        logger.info(f"Snapshot versiyonu farkli, yeniden kurulacak: {path}")
+        return None
+    if file_hash != source_hash:
+        logger.info(f"Kaynak sozluk degismis, snapshot yeniden kurulacak: {path}")
+        return None
+
+    table_end = _HEADER.size + count * _SECTION.size
+    payload_start = _align(table_end)
+    payload = view[payload_start:payload_start + size]
+    if len(payload) != size or (zlib.crc32(payload) & 0xFFFFFFFF) != crc:
+        logger.warning(f"Snapshot checksum hatasi, yeniden kurulacak: {path}")
+        return None
+
+    sections: Dict[str, memoryview] = {}
+    for i in range(count):
+        name, typecode, offset, length = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+        column = payload[offset:offset + length]
+        typecode = typecode.decode("ascii")
+        if typecode != "B":
+            column = column.cast(typecode)
+        sections[name.rstrip(b"\x00").decode("ascii")] = column
+    return sections
+
+
+@contextlib.contextmanager
+def paused_gc():
+    """Yüz binlerce node/list üretilirken döngüsel GC taramalarını beklet.
+
+    Snapshot'tan açılan yapılar döngü içermez; GC burada sadece süre harcar.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def pack_strings(strings: Iterable[str]) -> bytes:
+    """String listesini tek UTF-8 blob'a çevir (satır sonu ayraçlı)."""
+    return "\n".join(strings).encode("utf-8")
+
+
+def unpack_strings(blob: Union[bytes, memoryview], count: int) -> List[str]:
+    """pack_strings tersi - tek decode + split, kelime başına kopya yok."""
+    if count == 0:
+        return []
+    strings = str(blob, "utf-8").split("\n")
+    if len(strings) != count:
+        raise ValueError(f"String kolonu bozuk: {len(strings)} != {count}")
+    return strings
@@ -0,0 +1,169 @@
+"""
+/ws için pazarlıklı (negotiated) mesaj protokolleri.
+
+Varsayılan (alt protokol istenmezse) her aşamada tam JSON yanıt gönderilir.
+İstemci WebSocket alt protokolü (Sec-WebSocket-Protocol) olarak delta
+protokolünü isterse, bağlantı başına son gönderilen listeye göre fark
+gönderilir; ardışık tuşlarda 80 önerinin çoğu aynı kaldığından mesajların
+büyük kısmı küçük tamsayılardan oluşur:
+
+  texthelper.delta.msgpack  msgpack (binary frame, skorlar float32); msgpack kuruluysa
+  texthelper.delta.json     aynı mesajlar JSON text frame olarak
+
+Bağlantı açılınca {"v", "types", "sources"} (hello) gelir: type / source
+kodları bu listelerdeki sıradır. Her yanıt mesajı:
+
+  seq    mesaj sırası
+  phase  "fast" | "enhanced"      final  son mesaj mı
+  l      yeni liste; her öğe:
+           i                      önceki listenin i. öğesi (değişmedi)
+           [i, skor]              önceki i. öğe, yeni skor
+           [text, type, skor, description, source]   yeni öğe (type/source: kod ya da bilinmiyorsa metin)
+         Önceki listede olup l'de referans verilmeyenler silinmiştir; sıra l'nin sırasıdır.
+  t      processing_time_ms       src  sources_used
+  c      corrected_text (varsa)   lvl  degradation_level (0 değilse)
+
+Hata / rate limit mesajları fark içermez ({"error": ...}) ve listeyi değiştirmez.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.serialization import dumps, loads, phase_message
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+DELTA_MSGPACK = "texthelper.delta.msgpack"
+DELTA_JSON = "texthelper.delta.json"
+PROTOCOL_VERSION = 1
+
+# Sadece sona eklenir (kodlar istemcide hello ile eşlenir, ama sıra sabit kalsın)
+TYPES = [
+    "dictionary", "ai_prediction", "smart_reply", "smart_completion", "phrase", "ngram",
+    "domain", "emoji", "template", "completion", "next_word", "keyword", "fuzzy", "history",
+]
+SOURCES = [
+    "lexicon", "elasticsearch", "local_dictionary", "large_dictionary", "default_dictionary",
+    "medium_dictionary", "transformer", "bert", "contextual_reply", "smart_completions",
+    "advanced_context", "advanced_ngram", "phrase_completion", "domain_dict", "emoji",
+    "smart_templates", "user_history", "user", "trie", "shortcut", "fallback", "dict",
+]
+_TYPE_CODES = {name: i for i, name in enumerate(TYPES)}
+_SOURCE_CODES = {name: i for i, name in enumerate(SOURCES)}
+
+Frame = Union[str, bytes]  # str -> text frame, bytes -> binary frame
+_Item = Tuple[str, str, float, str, str]
+
+
+class JSONProtocol:
+    """Varsayılan: her aşamada tam yanıt (text frame)"""
+
+    subprotocol: Optional[str] = None
+
+    def hello(self) -> Optional[Frame]:
+        return None
+
+    def response(self, phase: str, response: Any, final: bool) -> Frame:
+        return phase_message(phase, response, final).decode()
+
+    def message(self, payload: Dict[str, Any]) -> Frame:
+        return dumps(payload).decode()
+
+    def parse(self, data: Frame) -> Dict[str, Any]:
+        return loads(data)
+
+
+class DeltaProtocol(JSONProtocol):
+    """Bağlantı başına durum: son gönderilen liste, fark mesajları"""
+
+    def __init__(self, binary: bool):
+        self.binary = binary
+        self.subprotocol = DELTA_MSGPACK if binary else DELTA_JSON
+        self.seq = 0
+        self._previous: List[_Item] = []
+        self._index: Dict[str, int] = {}
+
+    def _encode(self, payload: Dict[str, Any]) -> Frame:
+        if self.binary:
+            return msgpack.packb(payload, use_bin_type=True, use_single_float=True)
+        return dumps(payload).decode()
+
+    def hello(self) -> Frame:
+        return self._encode({"v": PROTOCOL_VERSION, "types": TYPES, "sources": SOURCES})
+
+    def message(self, payload: Dict[str, Any]) -> Frame:
+        return self._encode(payload)
+
+    def parse(self, data: Frame) -> Dict[str, Any]:
+        if isinstance(data, bytes) and self.binary:
+            return msgpack.unpackb(data, raw=False)
+        return loads(data)
+
+    def response(self, phase: str, response: Any, final: bool) -> Frame:
+        items: List[_Item] = []
+        entries: List[Any] = []
+        for s in response.suggestions:
+            item = (s.text, s.type, round(float(s.score), 3), s.description, s.source)
+            items.append(item)
+            i = self._index.get(item[0])
+            previous = self._previous[i] if i is not None else None
+            if previous == item:
+                entries.append(i)
+            elif previous is not None and previous[1:2] + previous[3:] == item[1:2] + item[3:]:
+                entries.append([i, item[2]])
+            else:
+                entries.append([
+                    item[0], _TYPE_CODES.get(item[1], item[1]), item[2], item[3], _SOURCE_CODES.get(item[4], item[4]),
+                ])
+
+        self.seq += 1
+        payload: Dict[str, Any] = {
+            "seq": self.seq,
+            "phase": phase,
+            "final": final,
+            "l": entries,
+            "t": round(response.processing_time_ms, 2),
+            "src": response.sources_used,
+        }
+        if response.corrected_text is not None:
+            payload["c"] = response.corrected_text
+        if response.degradation_level:
+            payload["lvl"] = response.degradation_level
+        # Durum mesaj kodlanınca güncellenir; gönderim iptal edilmemeli (bkz. websocket.py)
+        self._previous = items
+        self._index = {item[0]: i for i, item in enumerate(items)}
+        return self._encode(payload)
+
+
+def negotiate(offered: Sequence[str]) -> JSONProtocol:
+    """İstemcinin tercih sırasıyla ilk desteklenen alt protokol; yoksa varsayılan JSON"""
+    for name in offered:
+        if name == DELTA_MSGPACK and MSGPACK_AVAILABLE:
+            return DeltaProtocol(binary=True)
+        if name == DELTA_JSON:
+            return DeltaProtocol(binary=False)
+    return JSONProtocol()
+
+
+def apply_delta(previous: List[Dict[str, Any]], message: Dict[str, Any], types: Sequence[str] = TYPES, sources: Sequence[str] = SOURCES) -> List[Dict[str, Any]]:
+    """İstemci tarafı referans çözücü: önceki liste + fark -> yeni liste (öneri dict'leri)"""
+    result = []
+    for entry in message["l"]:
+        if isinstance(entry, int):
+            result.append(previous[entry])
+        elif len(entry) == 2:
+            result.append(dict(previous[entry[0]], score=entry[1]))
+        else:
+            text, type_, score, description, source = entry
+            result.append({
+                "text": text,
+                "type": types[type_] if isinstance(type_, int) else type_,
+                "score": score,
+                "description": description,
+                "source": sources[source] if isinstance(source, int) else source,
+            })
+    return result
@@ -3,10 +3,20 @@ Advanced Context-Aware Completion System
 Context analizi ve tamamlama sistemi
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import re
 from collections import defaultdict
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
+try:
+    from app.core.embeddings import embedding_scorer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    embedding_scorer = None
+    EMBEDDINGS_AVAILABLE = False
+
 class AdvancedContextCompleter:
     """Context analizi ve tamamlama"""
     
@@ -39,35 +49,39 @@ class AdvancedContextCompleter:
             'noun_endings': ['lık', 'lik', 'luk', 'lük', 'cı', 'ci', 'cu', 'cü'],
             'adjective_endings': ['lı', 'li', 'lu', 'lü', 'sız', 'siz', 'suz', 'süz']
         }
+        
+        # Tespitler paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        self._domain_table = keyword_matcher.table(self.domain_keywords)
+        self._response_triggers = keyword_matcher.table((
+            ('greeting', ['merhaba', 'selam', 'günaydın', 'iyi günler']),
+            ('help', ['yardım', 'destek', 'yapabilirim']),
+            ('thanks', ['teşekkür', 'sağol']),
+            ('order', ['sipariş', 'kargo', 'teslimat']),
+        ))
     
-    def analyze_full_context(self, text: str) -> Dict[str, any]:
-        # Cumle baglami analizi
-        words = text.lower().split()
+    def analyze_full_context(self, text: Union[str, AnalyzedInput]) -> Dict[str, any]:
+        # Cumle baglami analizi (AnalyzedInput ile istek basina bir kez)
+        analyzed = as_analyzed(text)
+        return analyzed.memo("advanced_context", lambda: self._analyze_full_context(analyzed))
+    
+    def _analyze_full_context(self, analyzed: AnalyzedInput) -> Dict[str, any]:
+        words = analyzed.tokens
         
         analysis = {
-            'domain': self._detect_domain(text),
+            'domain': self._detect_domain(analyzed),
             'last_words': words[-3:] if len(words) >= 3 else words,
             'word_count': len(words),
             'grammar_structure': self._analyze_grammar_structure(words),
-            'intent': self._detect_intent(text),
+            'intent': self._detect_intent(analyzed),
             'last_word': words[-1] if words else '',
             'previous_words': ' '.join(words[:-1]) if len(words) > 1 else ''
         }
         
         return analysis
     
-    def _detect_domain(self, text: str) -> str:
+    def _detect_domain(self, text: Union[str, AnalyzedInput]) -> str:
         # Domain tespiti
-        text_lower = text.lower()
-        
-        for domain, keywords in self.domain_keywords.items():
-            if domain == 'general':
-                continue
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return domain
-        
-        return 'general'
+        return first_match(as_analyzed(text).keywords, self._domain_table)
     
     def _analyze_grammar_structure(self, words: List[str]) -> Dict[str, any]:
         """Gramer yapısını analiz et"""
@@ -141,29 +155,11 @@ class AdvancedContextCompleter:
         
         return False
     
-    def _detect_intent(self, text: str) -> str:
-        """Kullanıcı intent (niyet) tespit et"""
-        text_lower = text.lower()
-        
-        # Soru intent
-        if any(word in text_lower for word in ['nasıl', 'ne', 'neden', 'niçin', 'kim', 'nerede', 'ne zaman', 'hangi']):
-            return 'question'
-        
-        # İstek intent
-        if any(word in text_lower for word in ['istiyorum', 'istiyoruz', 'istiyorsun', 'istiyorsunuz', 'istiyor', 'lütfen']):
-            return 'request'
-        
-        # Bilgi intent
-        if any(word in text_lower for word in ['bilgi', 'açıkla', 'anlat', 'söyle', 'göster']):
-            return 'information'
-        
-        # Yardım intent
-        if any(word in text_lower for word in ['yardım', 'destek', 'yardımcı', 'yardım et']):
-            return 'help'
-        
-        return 'general'
+    def _detect_intent(self, text: Union[str, AnalyzedInput]) -> str:
+        """Kullanıcı intent (niyet) tespit et (anahtar kelimeler: app.core.analysis.INTENT_KEYWORDS)"""
+        return as_analyzed(text).intent
     
-    def suggest_with_grammar_check(self, text: str, suggestions: List[Dict]) -> List[Dict]:
+    def suggest_with_grammar_check(self, text: Union[str, AnalyzedInput], suggestions: List[Dict]) -> List[Dict]:
         """Gramer uyumlu öneriler"""
         analysis = self.analyze_full_context(text)
         grammar_structure = analysis.get('grammar_structure', {})
@@ -205,36 +201,42 @@ class AdvancedContextCompleter:
         
         return scored_suggestions
     
-    def suggest_with_semantic_similarity(self, text: str, suggestions: List[Dict]) -> List[Dict]:
-        """Anlamsal benzerlik ile öneri"""
-        analysis = self.analyze_full_context(text)
+    def suggest_with_semantic_similarity(self, text: Union[str, AnalyzedInput], suggestions: List[Dict]) -> List[Dict]:
+        """Anlamsal benzerlik ile öneri (kelime vektörleri varsa; yoksa domain / intent sezgiseli)"""
+        analyzed = as_analyzed(text)
+        analysis = self.analyze_full_context(analyzed)
         domain = analysis.get('domain', 'general')
         intent = analysis.get('intent', 'general')
         last_word = analysis.get('last_word', '')
+        similarities = self._embedding_similarities(analyzed, suggestions)
         
         scored_suggestions = []
         
-        for suggestion in suggestions:
+        for suggestion, similarity in zip(suggestions, similarities):
             suggestion_text = suggestion.get('text', '') or suggestion.get('word', '')
             if not suggestion_text:
                 continue
             
             score = suggestion.get('score', 0.0)
             semantic_bonus = 0.0
-            
-            # Domain uyumu
             suggestion_lower = suggestion_text.lower()
-            domain_keywords = self.domain_keywords.get(domain, [])
-            if any(keyword in suggestion_lower for keyword in domain_keywords):
-                semantic_bonus += 1.5
             
-            # Intent uyumu
-            if intent == 'question' and any(qw in suggestion_lower for qw in ['nasıl', 'ne', 'neden']):
-                semantic_bonus += 1.0
-            elif intent == 'request' and any(rw in suggestion_lower for rw in ['istiyorum', 'lütfen', 'yapabilir']):
-                semantic_bonus += 1.0
-            elif intent == 'help' and any(hw in suggestion_lower for hw in ['yardım', 'destek', 'yardımcı']):
-                semantic_bonus += 1.0
+            if similarity is not None:
+                # Bağlamla kosinüs benzerliği (domain + intent bonuslarının toplamı kadar)
+                semantic_bonus += 2.5 * max(similarity, 0.0)
+            else:
+                # Domain uyumu
+                domain_keywords = self.domain_keywords.get(domain, [])
+                if any(keyword in suggestion_lower for keyword in domain_keywords):
+                    semantic_bonus += 1.5
+                
+                # Intent uyumu
+                if intent == 'question' and any(qw in suggestion_lower for qw in ['nasıl', 'ne', 'neden']):
+                    semantic_bonus += 1.0
+                elif intent == 'request' and any(rw in suggestion_lower for rw in ['istiyorum', 'lütfen', 'yapabilir']):
+                    semantic_bonus += 1.0
+                elif intent == 'help' and any(hw in suggestion_lower for hw in ['yardım', 'destek', 'yardımcı']):
+                    semantic_bonus += 1.0
             
             # Son kelime ile benzerlik (basit - Levenshtein distance için hazır)
             if last_word and suggestion_lower.startswith(last_word):
@@ -251,8 +253,20 @@ class AdvancedContextCompleter:
         
         return scored_suggestions
     
-    def complete_with_full_context(self, text: str, max_results: int = 50) -> List[Dict]:
-        """Tam context analizi ile tamamlama"""
+    def _embedding_similarities(self, analyzed: AnalyzedInput, suggestions: List[Dict]) -> List[Optional[float]]:
+        """Tüm öneriler için bağlam benzerliği tek matris-vektör çarpımıyla; vektör yoksa None"""
+        if not (EMBEDDINGS_AVAILABLE and embedding_scorer and embedding_scorer.available):
+            return [None] * len(suggestions)
+        context_vector = analyzed.memo("embedding_context", lambda: embedding_scorer.context_vector(analyzed.word_set))
+        texts = [s.get('text', '') or s.get('word', '') for s in suggestions]
+        return embedding_scorer.similarities(context_vector, texts)
+    
+    def complete_with_full_context(self, text: Union[str, AnalyzedInput], max_results: int = 50) -> List[Dict]:
+        """Tam context analizi ile tamamlama (aynı istekte tekrar çağrılırsa önbellekten)"""
+        analyzed = as_analyzed(text)
+        return analyzed.memo(("advanced_context.complete", max_results), lambda: self._complete_with_full_context(analyzed, max_results))
+    
+    def _complete_with_full_context(self, text: AnalyzedInput, max_results: int) -> List[Dict]:
         analysis = self.analyze_full_context(text)
         last_word = analysis.get('last_word', '')
         previous_words = analysis.get('previous_words', '')
@@ -314,13 +328,14 @@ class AdvancedContextCompleter:
         return results[:max_results]
 
     # Eklenen Regex Pattern Özellikleri (ContextAnalyzer'dan aktarıldı)
-    def generate_smart_responses(self, text: str) -> List[Dict]:
+    def generate_smart_responses(self, text: Union[str, AnalyzedInput]) -> List[Dict]:
         """Hazır, akıllı yanıtlar üret"""
-        text_lower = text.lower()
+        hits = as_analyzed(text).keywords
+        triggered = {label for label, keywords in self._response_triggers if not hits.isdisjoint(keywords)}
         responses = []
         
         # 1. Selamlaşma
-        if any(x in text_lower for x in ['merhaba', 'selam', 'günaydın', 'iyi günler']):
+        if 'greeting' in triggered:
             responses.extend([
                 "Merhabalar, size nasıl yardımcı olabilirim?",
                 "Selamlar, hoş geldiniz!",
@@ -328,7 +343,7 @@ class AdvancedContextCompleter:
             ])
             
         # 2. Yardım
-        if any(x in text_lower for x in ['yardım', 'destek', 'yapabilirim']):
+        if 'help' in triggered:
             responses.extend([
                 "Hangi konuda desteğe ihtiyacınız var?",
                 "Size nasıl yardımcı olabilirim?",
@@ -336,14 +351,14 @@ class AdvancedContextCompleter:
             ])
             
         # 3. Teşekkür
-        if any(x in text_lower for x in ['teşekkür', 'sağol']):
+        if 'thanks' in triggered:
             responses.extend([
                 "Rica ederim, iyi günler dilerim.",
                 "Ne demek, her zaman bekleriz."
             ])
             
         # 4. Sipariş/Kargo
-        if any(x in text_lower for x in ['sipariş', 'kargo', 'teslimat']):
+        if 'order' in triggered:
             responses.extend([
                 "Sipariş numaranızı alabilir miyim?",
                 "Kargo takibi için takip numaranız nedir?",
@@ -3,12 +3,14 @@ Gelişmiş N-Gram Modeli
 2-gram, 3-gram, 4-gram tabanlı tahminler
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
 from collections import defaultdict
 import json
 import os
 from datetime import datetime
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+
 class AdvancedNGramModel:
     """Gelişmiş N-gram modeli - cümle tamamlama için"""
     
@@ -126,9 +128,9 @@ class AdvancedNGramModel:
             completion = " ".join(words[i:])
             self.phrase_completions[prefix][completion] += 1
     
-    def predict_next_word(self, context: str, max_results: int = 10) -> List[Dict]:
+    def predict_next_word(self, context: Union[str, AnalyzedInput], max_results: int = 10) -> List[Dict]:
         """Bağlamdan sonraki kelimeyi tahmin et"""
-        words = context.lower().strip().split()
+        words = as_analyzed(context).tokens
         if not words:
             return []
         
@@ -4,6 +4,7 @@ Machine Learning tabanlı sıralama
 """
 
 from typing import List, Dict
+from collections import OrderedDict
 from datetime import datetime
 import math
 import sys
@@ -19,6 +20,9 @@ except ImportError:
     is_support_term = lambda x: False
     is_brand_name = lambda x: False
 
+# CTR tutulan en fazla öneri metni (LRU: en uzun süredir gösterilmeyen atılır)
+MAX_CTR_ENTRIES = 50000
+
 class AdvancedRanking:
     """Gelişmiş ranking algoritması"""
     
@@ -34,7 +38,7 @@ class AdvancedRanking:
         }
         
         # Click-through tracking
-        self.ctr_data = {}  # {suggestion_text: {clicks, impressions}}
+        self.ctr_data = OrderedDict()  # {suggestion_text: {clicks, impressions}} (LRU, MAX_CTR_ENTRIES)
     
     def rank_suggestions(
         self,
@@ -200,6 +204,7 @@ class AdvancedRanking:
             'phrase_completion': 0.95,
             'ngram': 0.9,
             'advanced_ngram': 0.9,
+            'lexicon': 0.88,
             'trie_index': 0.88,
             'elasticsearch': 0.82,
             'large_dictionary_direct': 0.8,
@@ -224,19 +229,24 @@ class AdvancedRanking:
         
         return clicks / impressions
     
+    def _ctr_entry(self, suggestion_text: str) -> Dict:
+        """CTR kaydını al / oluştur ve en yeni yap; sınır aşılırsa en eskisini at"""
+        entry = self.ctr_data.get(suggestion_text)
+        if entry is None:
+            entry = self.ctr_data[suggestion_text] = {'clicks': 0, 'impressions': 0}
+            if len(self.ctr_data) > MAX_CTR_ENTRIES:
+                self.ctr_data.popitem(last=False)
+        else:
+            self.ctr_data.move_to_end(suggestion_text)
+        return entry
+    
     def record_click(self, suggestion_text: str):
         """Tıklamayı kaydet (real-time learning)"""
-        if suggestion_text not in self.ctr_data:
-            self.ctr_data[suggestion_text] = {'clicks': 0, 'impressions': 0}
-        
-        self.ctr_data[suggestion_text]['clicks'] += 1
+        self._ctr_entry(suggestion_text)['clicks'] += 1
     
     def record_impression(self, suggestion_text: str):
         """Gösterimi kaydet"""
-        if suggestion_text not in self.ctr_data:
-            self.ctr_data[suggestion_text] = {'clicks': 0, 'impressions': 0}
-        
-        self.ctr_data[suggestion_text]['impressions'] += 1
+        self._ctr_entry(suggestion_text)['impressions'] += 1
     
     def update_weights(self, new_weights: Dict):
         """Ağırlıkları güncelle (ML öğrenme ile)"""
@@ -15,6 +15,12 @@ from urllib.parse import quote
 import sys
 import io
 
+try:
+    from app.core.dictfile import append_dictionary, thd_path_for
+    DICTFILE_AVAILABLE = True
+except ImportError:
+    DICTFILE_AVAILABLE = False
+
 # UTF-8 encoding için
 if sys.stdout.encoding != 'utf-8':
     try:
@@ -270,6 +276,14 @@ class AutoWordCollector:
         """Kelimeleri sözlüğe kaydet"""
         # Mevcut sözlüğü yükle
         dict_file = os.path.join(os.path.dirname(__file__), output_file)
+
+        # Binary sözlük (.thd) varsa sadece yeni kelimeleri sonuna ekle; JSON'un tamamı yeniden yazılmaz
+        thd_file = thd_path_for(dict_file) if DICTFILE_AVAILABLE else ""
+        if thd_file and os.path.exists(thd_file):
+            added = append_dictionary(thd_file, ((word, 1) for word in words))
+            print(f"[OK] Binary sözlüğe eklendi: +{added:,} kelime -> {thd_file}")
+            return thd_file
+
         existing_words = []
         existing_frequencies = {}
         existing_categories = {}
@@ -0,0 +1,218 @@
+"""
+Derlenmiş ranking modelleri (ML ranking çıkarımı).
+
+Offline trainer'ın ürettiği model, xgboost / lightgbm nesnesi olarak değil
+kompakt bir değerlendiriciye derlenmiş JSON spesifikasyonu olarak saklanır;
+çıkarım kütüphane gerektirmez, sadece numpy:
+
+    LinearRanker        X @ w + b
+    TreeEnsembleRanker  tüm ağaçların düğümleri tek düz dizide (feature,
+                        threshold, left, right, value); tüm satırlar x tüm
+                        ağaçlar için düğüm indeksleri derinlik kadar adımda
+                        birlikte ilerletilir (ağaç başına Python döngüsü yok)
+
+İkisi de MLRankingSystem'in beklediği predict(X) arayüzünü sağlar. Çıktı,
+eğitim verisindeki skor aralığı [0, 1]'e gelecek şekilde kalibre edilir
+(scale / offset) ki kaynak skoruyla 0.4 / 0.6 birleştirme heuristik modeldeki
+ölçeği korusun.
+
+Spesifikasyon:
+    {"kind": "linear", "n_features", "weights": [...], "bias"}
+    {"kind": "trees", "n_features", "strict": bool, "scale", "offset",
+     "trees": [{"feature": [...], "threshold": [...], "left": [...],
+                "right": [...], "value": [...]}, ...]}
+Ağaç düğümlerinde yaprak feature -1'dir; strict=True ise koşul x < t
+(xgboost), değilse x <= t (lightgbm) ve doğruysa sola gidilir.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SPEC_VERSION = 1
+
+
+class LinearRanker:
+    """Lineer skor: X @ w + b"""
+
+    kind = "linear"
+
+    def __init__(self, weights, bias: float = 0.0):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.weights)
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.weights + self.bias
+
+    def calibrated(self, scale: float, offset: float) -> "LinearRanker":
+        return LinearRanker(self.weights * scale, self.bias * scale + offset)
+
+    def to_spec(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "n_features": self.n_features, "weights": self.weights.tolist(), "bias": self.bias}
+
+
+class TreeEnsembleRanker:
+    """Ağaç topluluğu: düz düğüm dizileri, tüm satır x ağaç için derinlik kadar vektörel adım"""
+
+    kind = "trees"
+
+    def __init__(self, trees: List[Dict[str, List]], n_features: int, strict: bool = False,
+                 scale: float = 1.0, offset: float = 0.0):
+        self.trees = trees
+        self._n_features = int(n_features)
+        self.strict = bool(strict)
+        self.scale = float(scale)
+        self.offset = float(offset)
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        depth = 0
+        for tree in trees:
+            base = len(feature)
+            roots.append(base)
+            for i, f in enumerate(tree["feature"]):
+                leaf = f < 0
+                feature.append(0 if leaf else f)
+                threshold.append(0.0 if leaf else tree["threshold"][i])
+                # Yaprak kendisine döner: fazladan adımlar sonucu değiştirmez
+                left.append(base + i if leaf else base + tree["left"][i])
+                right.append(base + i if leaf else base + tree["right"][i])
+                value.append(tree["value"][i] if leaf else 0.0)
+            depth = max(depth, _tree_depth(tree))
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    @property
+    def n_features(self) -> int:
+        return self._n_features
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if not len(self.roots):
+            return np.full(X.shape[0], self.offset)
+        node = np.tile(self.roots, (X.shape[0], 1))
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x < threshold if self.strict else x <= threshold
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1) * self.scale + self.offset
+
+    def calibrated(self, scale: float, offset: float) -> "TreeEnsembleRanker":
+        return TreeEnsembleRanker(self.trees, self._n_features, self.strict,
+                                  self.scale * scale, self.offset * scale + offset)
+
+    def to_spec(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "n_features": self._n_features, "strict": self.strict,
+                "scale": self.scale, "offset": self.offset, "trees": self.trees}
+
+
+def _tree_depth(tree: Dict[str, List]) -> int:
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [c for i in frontier if tree["feature"][i] >= 0 for c in (tree["left"][i], tree["right"][i])]
+        depth += 1 if frontier else 0
+    return depth
+
+
+def calibrate(ranker, X) -> Any:
+    """Eğitim verisindeki skor aralığını [0, 1]'e taşı (sıra değişmez)"""
+    scores = ranker.predict(X)
+    lo, hi = float(np.min(scores)), float(np.max(scores))
+    if hi - lo <= 1e-12:
+        return ranker.calibrated(0.0, 0.5)
+    return ranker.calibrated(1.0 / (hi - lo), -lo / (hi - lo))
+
+
+def compile_ranker(spec: Dict[str, Any], n_features: Optional[int] = None):
+    """Spesifikasyondan değerlendirici kur (feature sayısı uyuşmazsa ValueError)"""
+    kind = spec.get("kind")
+    if kind == "linear":
+        ranker = LinearRanker(spec["weights"], spec.get("bias", 0.0))
+    elif kind == "trees":
+        ranker = TreeEnsembleRanker(spec["trees"], spec["n_features"], spec.get("strict", False),
+                                    spec.get("scale", 1.0), spec.get("offset", 0.0))
+    else:
+        raise ValueError(f"Bilinmeyen ranking modeli: {kind}")
+    if n_features is not None and ranker.n_features != n_features:
+        raise ValueError(f"Model {ranker.n_features} feature bekliyor, sistem {n_features}")
+    return ranker
+
+
+def save_ranker(path: str, ranker, **meta) -> None:
+    """Spesifikasyonu atomik yaz (tmp + os.replace): okuyan worker yarım dosya görmez"""
+    spec = {"version": SPEC_VERSION, **meta, **ranker.to_spec()}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_ranker(path: str, n_features: Optional[int] = None):
+    """Kayıtlı modeli yükle; (değerlendirici, spesifikasyon)"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    if spec.get("version") != SPEC_VERSION:
+        raise ValueError(f"Ranking modeli sürümü {spec.get('version')}, beklenen {SPEC_VERSION}")
+    return compile_ranker(spec, n_features), spec
+
+
+def from_lightgbm(booster, n_features: int) -> TreeEnsembleRanker:
+    """lightgbm Booster.dump_model() -> düz ağaçlar (x <= threshold sola)"""
+    trees = []
+    for info in booster.dump_model()["tree_info"]:
+        tree = {"feature": [], "threshold": [], "left": [], "right": [], "value": []}
+
+        def add(node) -> int:
+            index = len(tree["feature"])
+            for key in tree:
+                tree[key].append(-1 if key in ("feature", "left", "right") else 0.0)
+            if "leaf_value" in node or "split_feature" not in node:
+                tree["value"][index] = float(node.get("leaf_value", 0.0))
+                return index
+            tree["feature"][index] = int(node["split_feature"])
+            tree["threshold"][index] = float(node["threshold"])
+            tree["left"][index] = add(node["left_child"])
+            tree["right"][index] = add(node["right_child"])
+            return index
+
+        add(info["tree_structure"])
+        trees.append(tree)
+    return TreeEnsembleRanker(trees, n_features, strict=False)
+
+
+def from_xgboost(booster, n_features: int) -> TreeEnsembleRanker:
+    """xgboost Booster.get_dump(json) -> düz ağaçlar (x < split_condition sola / yes)"""
+    trees = []
+    for dump in booster.get_dump(dump_format="json"):
+        tree = {"feature": [], "threshold": [], "left": [], "right": [], "value": []}
+
+        def add(node) -> int:
+            index = len(tree["feature"])
+            for key in tree:
+                tree[key].append(-1 if key in ("feature", "left", "right") else 0.0)
+            if "leaf" in node:
+                tree["value"][index] = float(node["leaf"])
+                return index
+            children = {child["nodeid"]: child for child in node["children"]}
+            tree["feature"][index] = int(str(node["split"]).lstrip("f"))
+            tree["threshold"][index] = float(node["split_condition"])
+            tree["left"][index] = add(children[node["yes"]])
+            tree["right"][index] = add(children[node["no"]])
+            return index
+
+        add(json.loads(dump))
+        trees.append(tree)
+    return TreeEnsembleRanker(trees, n_features, strict=True)
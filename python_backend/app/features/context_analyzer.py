@@ -3,9 +3,18 @@ Context-Aware Suggestions
 Cümle bağlamını analiz eder ve bağlama göre öneriler sunar
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, FrozenSet, Optional, Union
 import re
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
+
+def _literal(pattern: str) -> str:
+    """Niyet desenleri düz metin (yalnızca '?' kaçışlı): otomata anahtar kelime olarak"""
+    return re.sub(r'\\(.)', r'\1', pattern)
+
+
 class ContextAnalyzer:
     """Cümle bağlamını analiz eder ve akıllı öneriler sunar"""
     
@@ -88,23 +97,38 @@ class ContextAnalyzer:
             'fatura', 'kampanya', 'müşteri', 'temsilci', 'şikayet', 'teşekkür', 'rica',
             'bilgi', 'sorgulama', 'takip', 'durum', 'talep', 'çözüm', 'iptal', 'onay'
         ]
+        
+        # Tespitler paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        self._intent_table = keyword_matcher.table(
+            (intent, [_literal(p) for p in patterns]) for intent, patterns in self.intent_patterns.items()
+        )
+        self._topic_table = keyword_matcher.table(self.topic_keywords)
+        self._sentence_type_table = keyword_matcher.table((
+            ('question', ['?', 'mi', 'mı', 'mu', 'mü', 'mısın', 'misin']),
+            ('command', ['lütfen', 'yap', 'et', 'ver', 'getir']),
+            ('thanks', ['teşekkür', 'sağol', 'thanks', 'eyvallah']),
+            ('negative', ['hayır', 'yok', 'değil', 'olmaz']),
+        ))
     
-    def analyze(self, text: str) -> Dict:
-        """Cümleyi analiz et ve detaylı bağlam bilgisi döndür"""
-        if not text:
+    def analyze(self, text: Union[str, AnalyzedInput]) -> Dict:
+        """Cümleyi analiz et ve detaylı bağlam bilgisi döndür (AnalyzedInput ile istek başına bir kez)"""
+        analysis = as_analyzed(text)
+        if not analysis.text:
             return {}
-            
-        text_lower = text.lower().strip()
-        words = text_lower.split()
+        return analysis.memo("context_analyzer", lambda: self._analyze(analysis))
+    
+    def _analyze(self, analysis: AnalyzedInput) -> Dict:
+        hits = analysis.keywords
+        words = analysis.tokens
         
         # Intent detection
-        intents = self._detect_intents(text_lower)
+        intents = self._detect_intents(hits)
         
         # Topic detection
-        topics = self._detect_topics(text_lower)
+        topics = self._detect_topics(hits)
         
         # Sentence type
-        sentence_type = self._detect_sentence_type(text_lower)
+        sentence_type = self._detect_sentence_type(hits)
         
         # Context summary
         context = {
@@ -123,40 +147,17 @@ class ContextAnalyzer:
         
         return context
     
-    def _detect_intents(self, text: str) -> List[str]:
+    def _detect_intents(self, hits: FrozenSet[str]) -> List[str]:
         """Intent'leri tespit et"""
-        detected = []
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    detected.append(intent)
-                    break 
-        return detected
+        return [intent for intent, keywords in self._intent_table if not hits.isdisjoint(keywords)]
     
-    def _detect_topics(self, text: str) -> List[str]:
+    def _detect_topics(self, hits: FrozenSet[str]) -> List[str]:
         """Konuları tespit et"""
-        detected = []
-        for topic, keywords in self.topic_keywords.items():
-            count = 0
-            for keyword in keywords:
-                if keyword in text:
-                    count += 1
-            if count > 0:
-                detected.append(topic)
-        return detected
+        return [topic for topic, keywords in self._topic_table if not hits.isdisjoint(keywords)]
     
-    def _detect_sentence_type(self, text: str) -> str:
+    def _detect_sentence_type(self, hits: FrozenSet[str]) -> str:
         """Cümle tipini tespit et"""
-        if any(char in text for char in ['?', 'mi', 'mı', 'mu', 'mü', 'mısın', 'misin']):
-            return 'question'
-        elif any(word in text for word in ['lütfen', 'yap', 'et', 'ver', 'getir']):
-            return 'command'
-        elif any(word in text for word in ['teşekkür', 'sağol', 'thanks', 'eyvallah']):
-            return 'thanks'
-        elif any(word in text for word in ['hayır', 'yok', 'değil', 'olmaz']):
-            return 'negative'
-        else:
-            return 'statement'
+        return first_match(hits, self._sentence_type_table, default='statement')
     
     def generate_smart_responses(self, context: Dict) -> List[Dict]:
         """Bağlama göre AKILLI hazır cevaplar/tamamlamalar üretir"""
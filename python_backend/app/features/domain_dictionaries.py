@@ -6,10 +6,12 @@ Domain-Specific Dictionaries
 - Dynamic loading
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import os
 import json
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+
 class DomainDictionaryManager:
     """Domain-specific sözlük yöneticisi"""
     
@@ -18,7 +20,7 @@ class DomainDictionaryManager:
             'customer_service': self._get_customer_service_dict(),
             'technical': self._get_technical_dict(),
             'ecommerce': self._get_ecommerce_dict(),
-            'general': []
+            'general': {}
         }
     
     def _get_customer_service_dict(self) -> Dict[str, List[str]]:
@@ -141,26 +143,9 @@ class DomainDictionaryManager:
             ]
         }
     
-    def detect_domain(self, text: str) -> str:
-        """Domain tespit et"""
-        text_lower = text.lower()
-        
-        # Customer service keywords
-        cs_keywords = ['sipariş', 'müşteri', 'destek', 'yardım', 'şikayet', 'memnuniyet', 'iade']
-        if any(keyword in text_lower for keyword in cs_keywords):
-            return 'customer_service'
-        
-        # Technical keywords
-        tech_keywords = ['api', 'endpoint', 'database', 'query', 'code', 'server', 'error']
-        if any(keyword in text_lower for keyword in tech_keywords):
-            return 'technical'
-        
-        # E-commerce keywords
-        ecom_keywords = ['ürün', 'sepet', 'ödeme', 'fatura', 'kampanya', 'indirim', 'kargo', 'teslimat']
-        if any(keyword in text_lower for keyword in ecom_keywords):
-            return 'ecommerce'
-        
-        return 'general'
+    def detect_domain(self, text: Union[str, AnalyzedInput]) -> str:
+        """Domain tespit et (anahtar kelimeler: app.core.analysis.DOMAIN_KEYWORDS)"""
+        return as_analyzed(text).domain
     
     def get_domain_dict(self, domain: str) -> Dict[str, List[str]]:
         """Domain sözlüğünü al"""
@@ -5,9 +5,12 @@ Emoji Suggestions
 - Smart emoji selection
 """
 
-from typing import List, Dict
+from typing import List, Dict, Union
 import re
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
 class EmojiSuggester:
     """Emoji önerileri"""
     
@@ -49,69 +52,44 @@ class EmojiSuggester:
             'hata': ['❌', '⚠️'],
             'başarı': ['✅', '🎯']
         }
-    
-    def detect_sentiment(self, text: str) -> str:
-        """Basit sentiment tespiti"""
-        text_lower = text.lower()
-        
-        # Positive keywords
-        positive = ['mutlu', 'harika', 'mükemmel', 'güzel', 'iyi', 'başarı', 'teşekkür', 'sağol']
-        if any(word in text_lower for word in positive):
-            return 'positive'
-        
-        # Negative keywords
-        negative = ['üzgün', 'kötü', 'sorun', 'hata', 'problem', 'şikayet']
-        if any(word in text_lower for word in negative):
-            return 'negative'
         
-        # Neutral
-        return 'neutral'
+        # Tespitler paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        self._emoji_words = keyword_matcher.register(self.word_emoji_map)
+        self._emoji_order = {word: i for i, word in enumerate(self.word_emoji_map)}
+        self._context_table = keyword_matcher.table((
+            ('greeting', ['merhaba', 'selam', 'günaydın']),
+            ('thanks', ['teşekkür', 'sağol', 'minnettar']),
+            ('customer_service', ['sipariş', 'müşteri', 'destek']),
+            ('technical', ['api', 'endpoint', 'database']),
+            ('ecommerce', ['ürün', 'sepet', 'kargo']),
+        ))
     
-    def detect_context(self, text: str) -> str:
-        """Context tespit et"""
-        text_lower = text.lower()
-        
-        # Greeting
-        if any(word in text_lower for word in ['merhaba', 'selam', 'günaydın']):
-            return 'greeting'
-        
-        # Thanks
-        if any(word in text_lower for word in ['teşekkür', 'sağol', 'minnettar']):
-            return 'thanks'
-        
-        # Customer service
-        if any(word in text_lower for word in ['sipariş', 'müşteri', 'destek']):
-            return 'customer_service'
-        
-        # Technical
-        if any(word in text_lower for word in ['api', 'endpoint', 'database']):
-            return 'technical'
-        
-        # E-commerce
-        if any(word in text_lower for word in ['ürün', 'sepet', 'kargo']):
-            return 'ecommerce'
-        
-        return 'general'
+    def detect_sentiment(self, text: Union[str, AnalyzedInput]) -> str:
+        """Basit sentiment tespiti (anahtar kelimeler: app.core.analysis.SENTIMENT_KEYWORDS)"""
+        return as_analyzed(text).sentiment
     
-    def suggest_emojis(self, text: str, max_results: int = 5) -> List[Dict]:
+    def detect_context(self, text: Union[str, AnalyzedInput]) -> str:
+        """Context tespit et (greeting > thanks > customer_service > technical > ecommerce)"""
+        return first_match(as_analyzed(text).keywords, self._context_table)
+    
+    def suggest_emojis(self, text: Union[str, AnalyzedInput], max_results: int = 5) -> List[Dict]:
         """Emoji önerileri"""
         results = []
-        text_lower = text.lower()
+        analysis = as_analyzed(text)
         
-        # 1. Word-based emoji
-        for word, emojis in self.word_emoji_map.items():
-            if word in text_lower:
-                for emoji in emojis[:2]:
-                    results.append({
-                        'text': emoji,
-                        'type': 'emoji',
-                        'score': 9.0,
-                        'description': f'Emoji ({word})',
-                        'source': 'emoji_suggestions'
-                    })
+        # 1. Word-based emoji (metinde geçen kelimeler, map sırasıyla)
+        for word in sorted(analysis.keywords & self._emoji_words, key=self._emoji_order.__getitem__):
+            for emoji in self.word_emoji_map[word][:2]:
+                results.append({
+                    'text': emoji,
+                    'type': 'emoji',
+                    'score': 9.0,
+                    'description': f'Emoji ({word})',
+                    'source': 'emoji_suggestions'
+                })
         
         # 2. Context-based emoji
-        context = self.detect_context(text)
+        context = self.detect_context(analysis)
         if context in self.emoji_categories:
             for emoji in self.emoji_categories[context][:3]:
                 results.append({
@@ -123,7 +101,7 @@ class EmojiSuggester:
                 })
         
         # 3. Sentiment-based emoji
-        sentiment = self.detect_sentiment(text)
+        sentiment = self.detect_sentiment(analysis)
         if sentiment == 'positive':
             for emoji in self.emoji_categories['happy'][:2]:
                 results.append({
@@ -1,5 +1,10 @@
 """
 Büyük Türkçe Sözlük - 50,000+ Kelime
+
+Kelimeler ortak lexicon'da (app.core.lexicon) tutulur; bu sınıf büyük sözlüğü
+(varsa binary turkish_dictionary.thd, yoksa JSON) ve turkish_dictionary.txt'yi
+lexicon'a yükler ve eski API'yi (words, word_frequencies, search) lexicon
+üzerinden sunar.
 """
 
 import json
@@ -7,62 +12,139 @@ import os
 import re
 from typing import List, Dict
 
+from app.core.config import settings
+from app.core.lexicon import lexicon, read_word_list
+
+try:
+    from app.core.dictfile import DictionaryFormatError, read_dictionary, thd_path_for
+    DICTFILE_AVAILABLE = True
+except ImportError:
+    DICTFILE_AVAILABLE = False
+
+try:
+    from app.core.snapshot import source_digest
+    SNAPSHOT_AVAILABLE = True
+except ImportError:
+    SNAPSHOT_AVAILABLE = False
+
+try:
+    from app.features.common_words import is_common
+    _common_available = True
+except ImportError:
+    _common_available = False
+    is_common = lambda w: False
+
+# Yerel TXT sözlükten RAM'e alınacak en fazla kelime
+TXT_DICT_LIMIT = 500000
+# Büyük sözlükten RAM'e alınacak en fazla kelime
+LARGE_DICT_LIMIT = 600000
+
 class LargeTurkishDictionary:
-    """Büyük Türkçe sözlük yöneticisi"""
+    """Büyük Türkçe sözlük yöneticisi (ortak lexicon üzerinde)"""
     
     def __init__(self):
-        self.words = []
-        self.word_frequencies = {}
+        self.lexicon = lexicon
         self.categories = {}
-        self.prefix_index = {}  # ilk harf -> o harfle baslayan kelimeler (1-char arama icin)
         self.load_dictionary()
+
+    @property
+    def words(self) -> List[str]:
+        return self.lexicon.words
+
+    @property
+    def word_frequencies(self):
+        return self.lexicon.frequency_view()
     
     def load_dictionary(self):
-        """Sözlüğü yükle (Streaming ile)"""
+        """Sözlüğü lexicon'a yükle (önce snapshot, yoksa .thd / Streaming JSON + TXT)"""
+        if self.lexicon.loaded:
+            return
+
         # JSON dosyasından yükle
         dict_file = os.path.join(os.path.dirname(__file__), "turkish_dictionary.json")
-        
-        # Streaming Loader kullan
+        thd_file = thd_path_for(dict_file) if DICTFILE_AVAILABLE else ""
+        txt_file = os.path.join(settings.BASE_DIR, "turkish_dictionary.txt")
+
+        # Önce snapshot: kaynak sözlükler değişmediyse parse + index kurma atlanır
+        use_snapshot = SNAPSHOT_AVAILABLE and settings.USE_INDEX_SNAPSHOTS
+        if use_snapshot:
+            snapshot_path = os.path.join(settings.SNAPSHOT_DIR, "lexicon.snap")
+            source_hash = source_digest(dict_file, thd_file, txt_file, salt=f"txt_limit={TXT_DICT_LIMIT}")
+            if self.lexicon.load_snapshot(snapshot_path, source_hash):
+                self.lexicon.prepare_search()
+                self.lexicon.loaded = True
+                print(f"[OK] Buyuk sozluk snapshot'tan yuklendi: {len(self.lexicon)} kelime (RAM)")
+                return
+
+        # Önce binary sözlük (.thd): blok blok okunur, JSON parse yok
+        words = self._load_binary_dictionary(thd_file) if thd_file else []
+        # .thd yoksa Streaming Loader (JSON) kullan
         try:
-            # sys.path hack to import from parent/sibling if needed
-            import sys
-            sys.path.append(os.path.dirname(os.path.dirname(__file__))) 
-            from streaming_loader import StreamingDictionaryLoader
-            
-            if os.path.exists(dict_file):
+            if words:
+                print(f"[OK] Buyuk sozluk (.thd) yuklendi: {len(words)} kelime (RAM)")
+            elif os.path.exists(dict_file):
+                # sys.path hack to import from parent/sibling if needed
+                import sys
+                sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+                from streaming_loader import StreamingDictionaryLoader
+
                 loader = StreamingDictionaryLoader(dict_file)
                 # Sadece en popüler 500k kelimeyi RAM'e al (kalanı diskte veya search ile bul)
-                self.words = loader.load(max_memory_words=600000)
+                words = loader.load(max_memory_words=LARGE_DICT_LIMIT)
                 
-                if not self.words:
+                if not words:
                      # Fallback
-                     self.words = self._get_default_words()
+                     words = self._get_default_words()
+                     use_snapshot = False
                      
-                self._calculate_frequencies()
-                print(f"[OK] Buyuk sozluk (Stream) yuklendi: {len(self.words)} kelime (RAM)")
+                print(f"[OK] Buyuk sozluk (Stream) yuklendi: {len(words)} kelime (RAM)")
             else:
                  # Varsayılan sözlük
-                self.words = self._get_default_words()
-                self._calculate_frequencies()
-                print(f"[OK] Varsayilan sozluk yuklendi: {len(self.words)} kelime")
+                words = self._get_default_words()
+                use_snapshot = False
+                print(f"[OK] Varsayilan sozluk yuklendi: {len(words)} kelime")
                 
         except Exception as e:
             print(f"Sözlük yükleme hatası (Stream): {e}, varsayılan kullanılıyor")
-            self.words = self._get_default_words()
-            self._calculate_frequencies()
-            
-        self._build_prefix_index()
-    
-    def _build_prefix_index(self):
-        """1 karakter arama icin: ilk harfe gore kelime indexi"""
-        self.prefix_index = {}
-        for w in self.words:
-            if not w or len(w) < 2:
-                continue
-            c = w[0].lower()
-            if c not in self.prefix_index:
-                self.prefix_index[c] = []
-            self.prefix_index[c].append(w)
+            words = self._get_default_words()
+            use_snapshot = False
+
+        self._add_ranked_words(words)
+
+        # Yerel TXT sözlük (önceden ElasticsearchPredictor + TrieIndex ayrı ayrı tutuyordu)
+        try:
+            added = self.lexicon.add_words(read_word_list(txt_file, TXT_DICT_LIMIT))
+            if added:
+                print(f"[OK] Yerel sozluk lexicon'a eklendi: +{added} kelime")
+        except Exception as e:
+            print(f"Yerel sozluk yukleme hatasi: {e}")
+        self.lexicon.prepare_search()
+        self.lexicon.loaded = True
+
+        # Varsayılan listeye düşüldüyse snapshot yazma (kaynak okunamamış demektir)
+        if use_snapshot:
+            try:
+                self.lexicon.save_snapshot(snapshot_path, source_hash)
+            except Exception as e:
+                print(f"[WARNING] Sozluk snapshot yazilamadi: {e}")
+
+    def _load_binary_dictionary(self, thd_file: str) -> List[str]:
+        """turkish_dictionary.thd varsa kelimeleri dosya sırasıyla oku (yoksa/bozuksa boş liste)"""
+        if not os.path.exists(thd_file):
+            return []
+        try:
+            words, _ = read_dictionary(thd_file, limit=LARGE_DICT_LIMIT)
+            return words
+        except (OSError, DictionaryFormatError) as e:
+            print(f"[WARNING] Binary sozluk okunamadi ({thd_file}): {e}")
+            return []
+
+    def _add_ranked_words(self, words: List[str]):
+        """Sözlük sırasına göre frekans ver: ilk kelimeler daha yüksek frekans (tek toplu ekleme)"""
+        frequencies: Dict[str, int] = {}
+        for i, word in enumerate(words):
+            frequencies.setdefault(word.strip().lower(), max(100 - i, 1))
+        self.lexicon.add_words(words, frequencies)
     
     def _get_default_words(self) -> List[str]:
         """Varsayılan kelime listesi (genişletilmiş)"""
@@ -380,84 +462,25 @@ class LargeTurkishDictionary:
             'zur', 'zus', 'zut', 'zuu', 'zuv', 'zuw', 'zux', 'zuy', 'zuz',
         ]
     
-    def _calculate_frequencies(self):
-        """Frekansları hesapla"""
-        for i, word in enumerate(self.words):
-            # İlk kelimeler daha yüksek frekans
-            self.word_frequencies[word.lower()] = max(100 - i, 1)
-    
     def search(self, prefix: str, max_results: int = 200) -> List[Dict]:
         """Prefix ile arama - WHATSAPP BENZERİ (her karakter için anlık öneri)"""
-        if not prefix or len(prefix.strip()) == 0:
-            return []
-        
-        prefix_lower = prefix.lower().strip()
-        results = []
-        
-        # 1 karakter: prefix index kullan (tum "m", "n" vb. kelimeler - hizli ve eksiksiz)
-        if len(prefix_lower) == 1:
-            iter_words = self.prefix_index.get(prefix_lower[0], [])
-            search_limit = len(iter_words)
-        elif len(prefix_lower) == 2:
-            search_limit = min(60000, len(self.words))
-            iter_words = self.words[:search_limit]
-        elif len(prefix_lower) == 3:
-            search_limit = min(40000, len(self.words))
-            iter_words = self.words[:search_limit]
-        else:
-            search_limit = min(20000, len(self.words))
-            iter_words = self.words[:search_limit]
-        
-        found_count = 0
-        for word in iter_words:
-            word_lower = word.lower()
-            
-            # WHATSAPP BENZERİ: Prefix match - tam eşleşme öncelikli
-            if len(prefix_lower) >= 1 and word_lower.startswith(prefix_lower) and word_lower != prefix_lower:
-                frequency = self.word_frequencies.get(word_lower, 1)
-                
-                # WHATSAPP BENZERİ: Skorlama - prefix uzunluğu ve frekans önemli
-                if len(prefix_lower) == 1:
-                    # Tek harf: Kısa kelimeler öncelikli (WhatsApp gibi)
-                    score = 10.0 - (len(word_lower) * 0.03) + (frequency / 30)
-                elif len(prefix_lower) == 2:
-                    # İki harf: Prefix match önemli
-                    score = 9.5 - (len(word_lower) * 0.02) + (frequency / 50)
-                elif len(prefix_lower) == 3:
-                    # Üç harf: Daha spesifik
-                    score = 9.0 - (len(word_lower) * 0.01) + (frequency / 100)
-                else:
-                    # Çok harf: Prefix uzunluğu çok önemli
-                    prefix_ratio = len(prefix_lower) / len(word_lower)
-                    score = prefix_ratio * 10.0 + (frequency / 100)
-                
-                results.append({
-                    'word': word,
-                    'score': score,
-                    'frequency': frequency
-                })
-                found_count += 1
-                
-                if found_count >= max_results * 2:
-                    break
-        
+        results = self.lexicon.search(prefix, max_results)
+
         # iPhone benzeri: önce yaygın kelimeler, sonra skora göre sırala
         def _sort_key(r):
             w = (r.get('word') or '').strip()
             common_first = 0 if (_common_available and w and ' ' not in w and is_common(w)) else 1
             return (common_first, -r.get('score', 0))
         results.sort(key=_sort_key)
-        return results[:max_results]
+        return results
     
     def get_word_count(self) -> int:
         """Toplam kelime sayısı"""
-        return len(self.words)
+        return len(self.lexicon)
     
     def add_word(self, word: str, frequency: int = 1):
         """Yeni kelime ekle"""
-        if word.lower() not in [w.lower() for w in self.words]:
-            self.words.append(word)
-            self.word_frequencies[word.lower()] = frequency
+        self.lexicon.add(word, frequency)
 
 # Lazy Singleton Pattern - Load only when first accessed
 _large_dictionary_instance = None
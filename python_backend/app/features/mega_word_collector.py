@@ -17,6 +17,12 @@ from bs4 import BeautifulSoup
 import concurrent.futures
 from collections import Counter
 
+try:
+    from app.core.dictfile import append_dictionary, thd_path_for
+    DICTFILE_AVAILABLE = True
+except ImportError:
+    DICTFILE_AVAILABLE = False
+
 # UTF-8 encoding için
 if sys.stdout.encoding != 'utf-8':
     try:
@@ -821,6 +827,13 @@ class MegaWordCollector:
     def save_to_dictionary(self, words: List[str], output_file: str = "turkish_dictionary.json"):
         """Kelimeleri sözlüğe kaydet"""
         dict_file = os.path.join(os.path.dirname(__file__), output_file)
+
+        # Binary sözlük (.thd) varsa sadece yeni kelimeleri sonuna ekle; JSON'un tamamı yeniden yazılmaz
+        thd_file = thd_path_for(dict_file) if DICTFILE_AVAILABLE else ""
+        if thd_file and os.path.exists(thd_file):
+            added = append_dictionary(thd_file, ((word, self.word_frequencies.get(word.lower(), 1)) for word in words))
+            print(f"[OK] Binary sözlüğe eklendi: +{added:,} kelime -> {thd_file}")
+            return thd_file
         
         # Mevcut sözlüğü yükle
         existing_words = []
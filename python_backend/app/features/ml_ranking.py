@@ -13,6 +13,7 @@ import numpy as np
 try:
     import xgboost as xgb
     XGBOOST_AVAILABLE = True
+    LIGHTGBM_AVAILABLE = False
 except ImportError:
     XGBOOST_AVAILABLE = False
     try:
@@ -24,6 +25,10 @@ except ImportError:
 class MLRankingSystem:
     """ML tabanlı ranking sistemi"""
     
+    # Heuristik ağırlıklı toplam (kullanıcı tercihi ve bağlama agresif öncelik ver)
+    # [frequency, context_match, user_preference, domain_match, grammar_match, semantic_similarity, length_score, recency_score]
+    HEURISTIC_WEIGHTS = (0.10, 0.20, 0.30, 0.10, 0.05, 0.10, 0.10, 0.05)
+    
     def __init__(self):
         self.model = None
         self.model_trained = False
@@ -80,6 +85,23 @@ class MLRankingSystem:
         
         return features
     
+    def extract_feature_matrix(self, suggestions: List[Dict], context: Dict, user_id: str = "default") -> np.ndarray:
+        """Tüm öneriler için feature matrisi (n x 8); satırlar extract_features ile birebir aynı"""
+        n = len(suggestions)
+        selections = self.user_selections[user_id]
+        texts = [s.get('text', '') or s.get('word', '') for s in suggestions]
+        
+        X = np.empty((n, len(self.feature_names)), dtype=np.float64)
+        X[:, 0] = np.minimum(np.array([s.get('frequency', 1) for s in suggestions], dtype=np.float64) / 100.0, 1.0)
+        X[:, 1] = [1.0 if s.get('context_match', False) else 0.0 for s in suggestions]
+        X[:, 2] = np.minimum(np.array([selections.get(t.lower(), 0) for t in texts], dtype=np.float64) / 10.0, 1.0)
+        X[:, 3] = [1.0 if s.get('domain_match', False) else 0.0 for s in suggestions]
+        X[:, 4] = [1.0 if s.get('grammar_match', False) else 0.0 for s in suggestions]
+        X[:, 5] = np.minimum(np.array([s.get('semantic_score', 0.0) for s in suggestions], dtype=np.float64) / 10.0, 1.0)
+        X[:, 6] = 1.0 - np.minimum(np.array([len(t) for t in texts], dtype=np.float64) / 20.0, 1.0)
+        X[:, 7] = 0.5
+        return X
+    
     def train_ranking_model(self, training_data: Optional[List[Dict]] = None):
         """Ranking modeli eğit"""
         if not XGBOOST_AVAILABLE and not LIGHTGBM_AVAILABLE:
@@ -139,6 +161,11 @@ class MLRankingSystem:
             self.model_trained = True  # Basit model kullan
             return False
     
+    def install_model(self, model) -> None:
+        """Derlenmiş modeli sıcak değiştir (offline trainer); tek atama, sıralama sürerken güvenli"""
+        self.model = model
+        self.model_trained = model is not None
+    
     def rank_suggestions(
         self,
         suggestions: List[Dict],
@@ -149,37 +176,38 @@ class MLRankingSystem:
         if not suggestions:
             return []
         
-        # Feature extraction
-        scored_suggestions = []
+        # Tüm adaylar için tek feature matrisi, tek predict çağrısı
+        X = self.extract_feature_matrix(suggestions, context, user_id)
         
-        for suggestion in suggestions:
-            features = self.extract_features(suggestion, context, user_id)
-            
-            # ML model ile skorla (varsa)
-            if self.model_trained and self.model is not None:
-                try:
-                    if XGBOOST_AVAILABLE:
-                        ml_score = self.model.predict([features])[0]
-                    elif LIGHTGBM_AVAILABLE:
-                        ml_score = self.model.predict([features])[0]
-                    else:
-                        ml_score = 0.0
-                except:
-                    ml_score = 0.0
-            else:
-                # Basit heuristik skorlama (ML model yoksa)
-                ml_score = self._heuristic_score(features)
-            
-            # Orijinal skor ile ML skorunu birleştir
-            original_score = suggestion.get('score', 0.0)
-            combined_score = (original_score * 0.4) + (ml_score * 10.0 * 0.6)
-            
-            scored_suggestions.append({
+        # ML model ile skorla (varsa); model istek boyunca sabit (install_model ile değişebilir)
+        model = self.model
+        if self.model_trained and model is not None:
+            try:
+                ml_scores = np.asarray(model.predict(X)).reshape(len(suggestions))
+                # Öneri başına yolda skaler float32 tahmin * 10.0 hangi dtype'a yükseliyorsa
+                # (NumPy sürümüne göre) birleştirme o precision'da yapılır: sonuç bit düzeyinde aynı
+                ml_scores = ml_scores.astype((ml_scores.dtype.type(0) * 10.0).dtype, copy=False)
+            except Exception:
+                ml_scores = np.zeros(len(suggestions))
+        else:
+            # Basit heuristik skorlama (ML model yoksa)
+            ml_scores = self._heuristic_scores(X)
+        
+        # Orijinal skor ile ML skorunu birleştir
+        original_scores = np.array([s.get('score', 0.0) for s in suggestions], dtype=np.float64)
+        combined_scores = (original_scores * 0.4) + (ml_scores * 10.0 * 0.6)
+        
+        scored_suggestions = [
+            {
                 **suggestion,
                 'score': combined_score,
                 'ml_score': ml_score,
                 'features': features
-            })
+            }
+            for suggestion, combined_score, ml_score, features in zip(
+                suggestions, combined_scores.tolist(), ml_scores.tolist(), X.tolist()
+            )
+        ]
         
         # Skora göre sırala
         scored_suggestions.sort(key=lambda x: x.get('score', 0), reverse=True)
@@ -191,13 +219,16 @@ class MLRankingSystem:
         if len(features) != len(self.feature_names):
             return 0.0
         
-        # Ağırlıklı toplam (kullanıcı tercihi ve bağlama agresif öncelik ver)
-        # [frequency, context_match, user_preference, domain_match, grammar_match, semantic_similarity, length_score, recency_score]
-        weights = [0.10, 0.20, 0.30, 0.10, 0.05, 0.10, 0.10, 0.05]
-        
-        score = sum(f * w for f, w in zip(features, weights))
+        score = sum(f * w for f, w in zip(features, self.HEURISTIC_WEIGHTS))
         return score
     
+    def _heuristic_scores(self, X: np.ndarray) -> np.ndarray:
+        """_heuristic_score'un matris hali: kolonlar soldan sağa toplanır (tek tek yolla bit düzeyinde aynı)"""
+        scores = np.zeros(X.shape[0], dtype=np.float64)
+        for column, weight in enumerate(self.HEURISTIC_WEIGHTS):
+            scores += X[:, column] * weight
+        return scores
+    
     def learn_from_selection(
         self,
         user_id: str,
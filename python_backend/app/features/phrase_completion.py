@@ -5,9 +5,12 @@ Multi-Word Suggestions - Phrase Completion
 - Context-aware phrases
 """
 
-from typing import List, Dict
+from typing import List, Dict, Union
 import re
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
 class PhraseCompleter:
     """Cümle/ifade tamamlama"""
     
@@ -119,6 +122,14 @@ class PhraseCompleter:
             'teşekkürler', 'rica ederim', 'özür dilerim', 'kusura bakmayın',
         ]
         self._load_musteri_phrases()
+        
+        # Bağlam tespiti paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        self._context_table = keyword_matcher.table((
+            ('greeting', ['merhaba', 'selam', 'günaydın', 'iyi günler']),
+            ('customer_service', ['sipariş', 'müşteri', 'ürün', 'kargo', 'teslimat']),
+            ('technical', ['api', 'endpoint', 'database', 'query', 'code']),
+            ('problem', ['sorun', 'hata', 'problem', 'çözüm']),
+        ))
     
     def _load_musteri_phrases(self):
         """musteri_hizmetleri_sozluk.txt'den 2+ kelimelik ifadeleri common_phrases'e ekle"""
@@ -136,35 +147,18 @@ class PhraseCompleter:
                     self.common_phrases.append(line)
                     seen.add(line.lower())
     
-    def detect_context(self, text: str) -> str:
-        """Context tespit et"""
-        text_lower = text.lower()
-        
-        # Greeting
-        if any(word in text_lower for word in ['merhaba', 'selam', 'günaydın', 'iyi günler']):
-            return 'greeting'
-        
-        # Customer service
-        if any(word in text_lower for word in ['sipariş', 'müşteri', 'ürün', 'kargo', 'teslimat']):
-            return 'customer_service'
-        
-        # Technical
-        if any(word in text_lower for word in ['api', 'endpoint', 'database', 'query', 'code']):
-            return 'technical'
-        
-        # Problem
-        if any(word in text_lower for word in ['sorun', 'hata', 'problem', 'çözüm']):
-            return 'problem'
-        
-        return 'general'
+    def detect_context(self, text: Union[str, AnalyzedInput]) -> str:
+        """Context tespit et (greeting > customer_service > technical > problem)"""
+        return first_match(as_analyzed(text).keywords, self._context_table)
     
-    def complete_phrase(self, text: str, max_results: int = 10) -> List[Dict]:
+    def complete_phrase(self, text: Union[str, AnalyzedInput], max_results: int = 10) -> List[Dict]:
         """Cümle tamamla - SON KELİME İÇİN ÖNERİ VER!"""
         results = []
-        text_lower = text.lower().strip()
-        words = text_lower.split()
-        last_word = words[-1] if words else text_lower
-        context = self.detect_context(text)
+        analysis = as_analyzed(text)
+        text_lower = analysis.lower
+        words = analysis.tokens
+        last_word = analysis.last_token
+        context = self.detect_context(analysis)
         
         # ÖNEMLİ: Eğer birden fazla kelime varsa, SON KELİME için öneriler ver!
         if len(words) > 1:
@@ -268,7 +262,7 @@ class PhraseCompleter:
                     if text_lower.endswith(key) or (key in text_lower and len(words) == 1):
                         for phrase in phrases:
                             # Eğer text zaten phrase'in başlangıcını içeriyorsa, devamını öner
-                            if phrase.startswith(text_lower.split()[-1] if text_lower.split() else ''):
+                            if phrase.startswith(last_word):
                                 full_phrase = phrase
                             else:
                                 full_phrase = phrase
@@ -284,7 +278,7 @@ class PhraseCompleter:
             
             # 2. Common phrases
             for phrase in self.common_phrases:
-                if phrase.startswith(text_lower.split()[-1] if text_lower.split() else ''):
+                if phrase.startswith(last_word):
                     results.append({
                         'text': phrase,
                         'type': 'phrase',
@@ -4,9 +4,17 @@ Kalite iyileştirme için ilgisiz önerileri çıkar.
 iPhone benzeri: yaygın kelimeler (hangi, merhaba, nasıl vb.) asla filtrelenmez.
 """
 
-from typing import List, Dict, Set
-import re
-from collections import Counter
+from typing import List, Dict, FrozenSet, Optional, Set, Union
+
+from app.core.analysis import WORD_PATTERN, AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
+try:
+    from app.core.embeddings import embedding_scorer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    embedding_scorer = None
+    EMBEDDINGS_AVAILABLE = False
 
 try:
     from common_words import is_common, first_word_common
@@ -20,6 +28,20 @@ except ImportError:
 class RelevanceFilter:
     """İlgisiz önerileri filtrele"""
     
+    # Domain uyumu – müşteri hizmetleri tabanı: CS geniş ve öncelikli
+    DOMAIN_KEYWORDS = {
+        'customer_service': [
+            'müşteri', 'hizmet', 'destek', 'yardım', 'sipariş', 'ürün', 'kargo', 'iade',
+            'fatura', 'kampanya', 'abonelik', 'paket', 'tarife', 'şikayet', 'temsilci',
+            'çağrı', 'talep', 'bilgi', 'sorgulama', 'iptal', 'onay', 'rica', 'teşekkür',
+            'özür', 'olabilirim', 'olabiliriz', 'takip', 'durum', 'çözüm', 'memnuniyet'
+        ],
+        'technical': ['api', 'endpoint', 'database', 'code', 'yazılım', 'sistem'],
+        'sales': ['satış', 'fiyat', 'indirim', 'kampanya', 'sepet', 'alışveriş']
+    }
+    # Bağlam domain'i paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+    _DOMAIN_TABLE = keyword_matcher.table(DOMAIN_KEYWORDS)
+    
     def __init__(self):
         # ALKALI ÖNERİLER İÇİN: Minimum relevance score artırıldı (daha alakalı öneriler)
         self.min_relevance_score = 0.3  # Minimum relevance score (artırıldı - alakasız önerileri filtrele)
@@ -27,19 +49,25 @@ class RelevanceFilter:
     def filter_irrelevant(
         self,
         suggestions: List[Dict],
-        context: str,
+        context: Union[str, AnalyzedInput],
         max_results: int = 50
     ) -> List[Dict]:
         """İlgisiz önerileri çıkar"""
         if not suggestions:
             return []
         
-        context_lower = context.lower()
-        context_words = set(re.findall(r'\b[çğıöşüÇĞIİÖŞÜa-zA-Z]{2,}\b', context_lower))
+        # Bağlama ait değerler öneri başına değil, bir kez hesaplanır
+        analysis = as_analyzed(context)
+        context_lower = analysis.lower
+        context_words = analysis.word_set
+        context_last_word = analysis.last_token
+        context_domain = analysis.memo("relevance_domain", lambda: self._context_domain(analysis.keywords))
+        # Kelime vektörleri varsa tüm adayların anlamsal skoru tek matris-vektör çarpımıyla
+        semantic_scores = self._semantic_scores(analysis, suggestions)
         
         scored_suggestions = []
         
-        for suggestion in suggestions:
+        for index, suggestion in enumerate(suggestions):
             # WhatsApp/iPhone: öncelikli önerileri (smart_completions) asla filtreleme
             if suggestion.get('source') == 'smart_completions':
                 scored_suggestions.append({**suggestion, 'relevance_score': 1.0})
@@ -55,14 +83,17 @@ class RelevanceFilter:
                 continue
             
             suggestion_lower = suggestion_text.lower()
-            suggestion_words = set(re.findall(r'\b[çğıöşüÇĞIİÖŞÜa-zA-Z]{2,}\b', suggestion_lower))
+            suggestion_words = set(WORD_PATTERN.findall(suggestion_lower))
             
             # Relevance score hesapla
             relevance_score = self._calculate_relevance(
                 context_words,
                 suggestion_words,
                 context_lower,
-                suggestion_lower
+                suggestion_lower,
+                context_last_word,
+                context_domain,
+                semantic_scores[index]
             )
             
             # ALKALI ÖNERİLER İÇİN: Minimum relevance kontrolü (daha katı)
@@ -90,7 +121,10 @@ class RelevanceFilter:
         context_words: Set[str],
         suggestion_words: Set[str],
         context_lower: str,
-        suggestion_lower: str
+        suggestion_lower: str,
+        context_last_word: str,
+        context_domain: Optional[str],
+        semantic_score: Optional[float] = None
     ) -> float:
         """Relevance score hesapla (0-1) - ALKALI ÖNERİLER İÇİN İYİLEŞTİRİLDİ"""
         # Tek harf için prefix match kontrolü
@@ -103,9 +137,7 @@ class RelevanceFilter:
         if not context_words or not suggestion_words:
             return 0.3  # Düşük relevance (önceden: 0.5)
         
-        # ALKALI ÖNERİLER İÇİN: Son kelimeye odaklan (en önemli!)
-        context_words_list = context_lower.split()
-        context_last_word = context_words_list[-1] if context_words_list else ''
+        # ALKALI ÖNERİLER İÇİN: Son kelimeye odaklan (en önemli!) – context_last_word
         
         # 1. SON KELİME PREFIX MATCH (EN ÖNEMLİ - 40% ağırlık)
         # "ürün al" yazınca "al" ile başlayan öneriler öncelikli
@@ -123,11 +155,12 @@ class RelevanceFilter:
         overlap = len(context_words & suggestion_words)
         overlap_score = overlap / max(len(context_words), len(suggestion_words), 1)
         
-        # 3. SEMANTIC SIMILARITY (20% ağırlık)
-        semantic_score = self._simple_semantic_similarity(context_words, suggestion_words)
+        # 3. SEMANTIC SIMILARITY (20% ağırlık) – vektör yoksa sezgisel
+        if semantic_score is None:
+            semantic_score = self._simple_semantic_similarity(context_words, suggestion_words)
         
         # 4. DOMAIN UYUMU (10% ağırlık)
-        domain_score = self._domain_match_score(context_lower, suggestion_lower)
+        domain_score = self._domain_match_score(context_domain, suggestion_lower)
         
         # ALKALI ÖNERİLER İÇİN: Ağırlıklı toplam (prefix match öncelikli)
         relevance = (
@@ -139,6 +172,17 @@ class RelevanceFilter:
         
         return min(relevance, 1.0)
     
+    def _semantic_scores(self, analysis: AnalyzedInput, suggestions: List[Dict]) -> List[Optional[float]]:
+        """Kelime vektörleriyle anlamsal skor (0.2-1.0, sezgiselle aynı aralık); vektörü olmayan aday için None"""
+        if not (EMBEDDINGS_AVAILABLE and embedding_scorer and embedding_scorer.available):
+            return [None] * len(suggestions)
+        context_vector = analysis.memo("embedding_context", lambda: embedding_scorer.context_vector(analysis.word_set))
+        texts = [s.get('text', '') or s.get('word', '') for s in suggestions]
+        return [
+            None if sim is None else 0.2 + 0.8 * max(sim, 0.0)
+            for sim in embedding_scorer.similarities(context_vector, texts)
+        ]
+    
     def _simple_semantic_similarity(self, context_words: Set[str], suggestion_words: Set[str]) -> float:
         """Basit semantic similarity (kelime benzerliği) - ALKALI ÖNERİLER İÇİN İYİLEŞTİRİLDİ"""
         if not context_words or not suggestion_words:
@@ -163,32 +207,16 @@ class RelevanceFilter:
         
         return min(similarity, 1.0)
     
-    def _domain_match_score(self, context: str, suggestion: str) -> float:
+    def _context_domain(self, hits: FrozenSet[str]) -> Optional[str]:
+        """Bağlamın domain'i (DOMAIN_KEYWORDS sırasıyla ilk eşleşen)"""
+        return first_match(hits, self._DOMAIN_TABLE, default=None)
+    
+    def _domain_match_score(self, context_domain: Optional[str], suggestion_lower: str) -> float:
         """Domain uyumu skoru – müşteri hizmetleri tabanı: CS geniş ve öncelikli"""
-        domain_keywords = {
-            'customer_service': [
-                'müşteri', 'hizmet', 'destek', 'yardım', 'sipariş', 'ürün', 'kargo', 'iade',
-                'fatura', 'kampanya', 'abonelik', 'paket', 'tarife', 'şikayet', 'temsilci',
-                'çağrı', 'talep', 'bilgi', 'sorgulama', 'iptal', 'onay', 'rica', 'teşekkür',
-                'özür', 'olabilirim', 'olabiliriz', 'takip', 'durum', 'çözüm', 'memnuniyet'
-            ],
-            'technical': ['api', 'endpoint', 'database', 'code', 'yazılım', 'sistem'],
-            'sales': ['satış', 'fiyat', 'indirim', 'kampanya', 'sepet', 'alışveriş']
-        }
-        
-        context_lower = context.lower()
-        suggestion_lower = suggestion.lower()
-        
-        context_domain = None
-        for domain, keywords in domain_keywords.items():
-            if any(kw in context_lower for kw in keywords):
-                context_domain = domain
-                break
-        
         if not context_domain:
             return 0.5
         
-        suggestion_keywords = domain_keywords.get(context_domain, [])
+        suggestion_keywords = self.DOMAIN_KEYWORDS.get(context_domain, [])
         if any(kw in suggestion_lower for kw in suggestion_keywords):
             return 1.0
         return 0.3
@@ -5,9 +5,12 @@ Sentiment Analysis
 - Sentiment-based suggestions
 """
 
-from typing import Dict, List
+from typing import Dict, List, Union
 import re
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import keyword_matcher
+
 class SentimentAnalyzer:
     """Sentiment analiz"""
     
@@ -35,16 +38,21 @@ class SentimentAnalyzer:
             'grateful': ['teşekkür', 'minnettar', 'sağol'],
             'worried': ['endişe', 'kaygı', 'merak']
         }
+        
+        # Tespitler paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        keyword_matcher.register(self.positive_keywords)
+        keyword_matcher.register(self.negative_keywords)
+        self._emotion_table = keyword_matcher.table(self.emotion_keywords)
     
-    def analyze(self, text: str) -> Dict:
+    def analyze(self, text: Union[str, AnalyzedInput]) -> Dict:
         """Sentiment analiz yap"""
-        text_lower = text.lower()
+        hits = as_analyzed(text).keywords
         
         # Positive score
-        positive_score = sum(1 for word in self.positive_keywords if word in text_lower)
+        positive_score = sum(1 for word in self.positive_keywords if word in hits)
         
         # Negative score
-        negative_score = sum(1 for word in self.negative_keywords if word in text_lower)
+        negative_score = sum(1 for word in self.negative_keywords if word in hits)
         
         # Determine sentiment
         if positive_score > negative_score:
@@ -58,10 +66,7 @@ class SentimentAnalyzer:
             confidence = 0.5
         
         # Detect emotion
-        detected_emotions = []
-        for emotion, keywords in self.emotion_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_emotions.append(emotion)
+        detected_emotions = [emotion for emotion, keywords in self._emotion_table if not hits.isdisjoint(keywords)]
         
         return {
             'sentiment': sentiment,
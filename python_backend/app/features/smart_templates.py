@@ -5,9 +5,12 @@ Smart Templates
 - Template suggestions
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import re
 
+from app.core.analysis import AnalyzedInput, as_analyzed
+from app.core.keywords import first_match, keyword_matcher
+
 class SmartTemplateManager:
     """Akıllı şablon yöneticisi"""
     
@@ -68,19 +71,19 @@ class SmartTemplateManager:
             'action': ['takip', 'iptal', 'güncelleme'],
             'name': ['Değerli', 'Sayın']
         }
+        
+        # Tespitler paylaşılan otomatın tek taramasından okunur (AnalyzedInput.keywords)
+        self._context_table = keyword_matcher.table((
+            ('customer_service', ['sipariş', 'müşteri', 'ürün']),
+            ('technical', ['api', 'database', 'error']),
+            ('greeting', ['merhaba', 'selam']),
+        ))
+        for context_templates in self.templates.values():
+            keyword_matcher.register(context_templates)
     
-    def detect_context(self, text: str) -> str:
+    def detect_context(self, text: Union[str, AnalyzedInput]) -> str:
         """Context tespit et"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['sipariş', 'müşteri', 'ürün']):
-            return 'customer_service'
-        elif any(word in text_lower for word in ['api', 'database', 'error']):
-            return 'technical'
-        elif any(word in text_lower for word in ['merhaba', 'selam']):
-            return 'greeting'
-        
-        return 'general'
+        return first_match(as_analyzed(text).keywords, self._context_table)
     
     def fill_template(self, template: str) -> str:
         """Template'i doldur"""
@@ -96,18 +99,19 @@ class SmartTemplateManager:
         
         return result
     
-    def get_templates(self, text: str, max_results: int = 5) -> List[Dict]:
+    def get_templates(self, text: Union[str, AnalyzedInput], max_results: int = 5) -> List[Dict]:
         """Template önerileri al"""
         results = []
-        text_lower = text.lower()
-        context = self.detect_context(text)
+        analysis = as_analyzed(text)
+        hits = analysis.keywords
+        context = self.detect_context(analysis)
         
         if context in self.templates:
             templates = self.templates[context]
             
             # Kelime bazlı template
             for key, template_list in templates.items():
-                if key in text_lower:
+                if key in hits:
                     for i, template in enumerate(template_list[:max_results]):
                         filled = self.fill_template(template)
                         results.append({
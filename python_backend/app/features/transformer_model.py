@@ -9,6 +9,28 @@ import torch
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
+from app.core.batching import MicroBatcher, generate_batch
+from app.core.config import settings
+from app.core.kv_cache import session_kv_cache
+from app.core.lexicon import lexicon
+from app.core.next_word import score_next_words
+from app.core.onnx_backend import load_causal_lm, onnx_enabled
+
+_dict_filter_warned = False
+
+def _dictionary_filter():
+    """TRANSFORMER_DICT_FILTER açıksa ve ortak sözlük yüklüyse sadece sözlük kelimelerini kabul et"""
+    global _dict_filter_warned
+    if not settings.TRANSFORMER_DICT_FILTER:
+        return None
+    if not lexicon.loaded:
+        if not _dict_filter_warned:
+            _dict_filter_warned = True
+            print("[WARNING] TRANSFORMER_DICT_FILTER acik ama sozluk bu surecte yuklu degil - filtre uygulanmiyor")
+        return None
+    return lexicon.__contains__
+
+
 class RealTransformerModel:
     """Gerçek Transformer modeli"""
     
@@ -26,6 +48,19 @@ class RealTransformerModel:
             "gorkemgoknar/gpt2-turkish-writer"
         ]
         self.use_gpu = torch.cuda.is_available() and os.getenv("USE_GPU", "false").lower() == "true"
+        # score: tek forward pass ile sıralı sonraki kelime; generate: örneklemeli üretim
+        self.mode = settings.TRANSFORMER_MODE
+        # torch veya onnx (INFERENCE_BACKEND=onnx, sadece CPU + skorlama modu)
+        self.backend = "torch"
+        # Eş zamanlı istekler tek model çağrısında toplanır
+        self.batcher = MicroBatcher(
+            self._generate_batch,
+            max_batch_size=settings.INFERENCE_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_BATCH_WAIT_MS,
+            name="transformer-batch",
+        )
+        # Oturum başına bağlam cache'i (skorlama modu): sadece yeni yazılan token'lar encode edilir
+        self.kv_cache = session_kv_cache("transformer-kv")
         
     async def load_model(self, timeout_seconds: int = 60):
         """Transformer modelini yükle (timeout ile - takılmayı önler)"""
@@ -85,6 +120,10 @@ class RealTransformerModel:
             device_map="auto" if self.use_gpu else None
         )
         
+        # ONNX Runtime (export + int8 bir kez, sonra dosyadan)
+        if self._use_onnx():
+            return
+        
         # INT8 Dynamic Quantization (CPU only - ~75% memory reduction)
         if not self.use_gpu:
             try:
@@ -160,6 +199,8 @@ class RealTransformerModel:
             low_cpu_mem_usage=True,
             device_map="auto" if self.use_gpu else None
         )
+        if self._use_onnx():
+            return
         if self.use_gpu:
             self.model = self.model.cuda()
         self.model.eval()
@@ -167,45 +208,50 @@ class RealTransformerModel:
             self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model_loaded = True
     
-    async def predict(self, text: str, max_suggestions: int = 5) -> List[dict]:
-        """AI ile tahmin yap"""
+    def _use_onnx(self) -> bool:
+        """INFERENCE_BACKEND=onnx ise torch modelini ONNX Runtime oturumuyla değiştir"""
+        if self.use_gpu or not onnx_enabled():
+            return False
+        if self.mode != "score":
+            print("[WARNING] ONNX backend sadece skorlama modunu destekler (TRANSFORMER_MODE=score) - torch kullaniliyor")
+            return False
+        try:
+            self.model = load_causal_lm(self.model.eval(), self.model_name)
+        except Exception as e:
+            print(f"[WARNING] ONNX backend hazirlanamadi (torch kullaniliyor): {e}")
+            return False
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.backend = "onnx"
+        self.model_loaded = True
+        print(f"[OK] Transformer modeli hazir (ONNX Runtime): {self.model_name}")
+        return True
+    
+    async def predict(self, text: str, max_suggestions: int = 5, session_id: Optional[str] = None) -> List[dict]:
+        """AI ile tahmin yap (session_id: bağlantı / kullanıcı, KV cache anahtarı)"""
         if not self.model_loaded:
             return []
         
         try:
-            # Tokenize
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=128,
-                padding=True
-            )
-            
-            if self.use_gpu:
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-            
-            # Generate
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=inputs['input_ids'].shape[1] + 20,
-                    num_return_sequences=max_suggestions,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9,
-                    top_k=50,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
-                )
+            # Batch'e katıl (event loop dışında, diğer isteklerle aynı forward pass'te)
+            if self.mode == "score":
+                outputs = await self.batcher.submit((text, max_suggestions, session_id))
+                return [
+                    {
+                        'text': word,
+                        'score': 9.5 - i * 0.05,
+                        'type': 'ai_prediction',
+                        'description': 'AI tahmini (Transformer)',
+                        'source': 'transformer'
+                    }
+                    for i, (word, _) in enumerate(outputs)
+                ]
             
+            outputs = await self.batcher.submit((text, max_suggestions))
             suggestions = []
             seen = set()
             
-            for output in outputs:
-                # Decode
-                generated_text = self.tokenizer.decode(output, skip_special_tokens=True)
-                
+            for generated_text in outputs:
                 # Orijinal metni çıkar
                 if generated_text.startswith(text):
                     continuation = generated_text[len(text):].strip()
@@ -232,13 +278,49 @@ class RealTransformerModel:
             print(f"Transformer tahmin hatası: {e}")
             return []
     
+    def _generate_batch(self, requests: List[tuple]) -> List[List[str]]:
+        """MicroBatcher batch fonksiyonu: [(metin, öneri sayısı)] -> her istek için sonuç listesi
+
+        score modunda [(kelime, olasılık)], generate modunda üretilen metinler.
+        """
+        device = "cuda" if self.use_gpu else None
+        if self.mode == "score":
+            return score_next_words(
+                self.model,
+                self.tokenizer,
+                requests,
+                device=device,
+                is_word=_dictionary_filter(),
+                kv_cache=self.kv_cache,
+            )
+        return generate_batch(
+            self.model,
+            self.tokenizer,
+            requests,
+            device=device,
+            do_sample=True,
+            temperature=0.7,
+            top_p=0.9,
+            top_k=50,
+            eos_token_id=self.tokenizer.eos_token_id,
+        )
+    
+    def end_session(self, session_id: str):
+        """Bağlantı kapandı: oturumun KV cache'ini bırak"""
+        if self.kv_cache is not None:
+            self.kv_cache.drop(session_id)
+    
     def get_model_info(self):
         """Model bilgileri"""
         return {
             "loaded": self.model_loaded,
             "model_name": self.model_name,
             "gpu_available": self.use_gpu,
-            "parameters": sum(p.numel() for p in self.model.parameters()) if self.model else 0
+            "mode": self.mode,
+            "backend": self.backend,
+            "batching": self.batcher.get_stats(),
+            "kv_cache": self.kv_cache.get_stats() if self.kv_cache is not None else None,
+            "parameters": sum(p.numel() for p in self.model.parameters()) if hasattr(self.model, "parameters") else 0
         }
 
 # Lazy Singleton Pattern - Load model only when first accessed
@@ -5,7 +5,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import uvicorn
 
 # Path setup to support legacy modules
@@ -22,13 +22,8 @@ from app.core.exceptions import global_exception_handler
 from app.core.rate_limit import rate_limit_middleware
 from app.routers import prediction, learning, websocket, system
 from app.services.ai import transformer_predictor
-from app.services.search import elasticsearch_predictor
-try:
-    from app.features.trie_index import trie_index
-    TRIE_AVAILABLE = True
-except ImportError:
-    TRIE_AVAILABLE = False
-    trie_index = None
+from app.services.search import elasticsearch_predictor, large_dictionary, LARGE_DICT_AVAILABLE
+from app.services.ranker_training import ranker_trainer
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -37,7 +32,10 @@ async def lifespan(app: FastAPI):
     
     # 1. ML Modeli (Arka planda)
     try:
-        if settings.USE_TRANSFORMER:
+        if settings.USE_TRANSFORMER and settings.MODEL_SERVER != "off":
+            # Tek model kopyasi: worker'lar Unix socket uzerinden model sunucusuna baglanir
+            await transformer_predictor.connect_model_server()
+        elif settings.USE_TRANSFORMER:
             logger.info("Model yukleniyor...")
             asyncio.create_task(transformer_predictor.load_model())
     except Exception as e:
@@ -46,21 +44,20 @@ async def lifespan(app: FastAPI):
     # 2. Arama Motoru
     try:
         await elasticsearch_predictor.connect_elasticsearch()
-        # Sozlugu yukle
-        elasticsearch_predictor._load_dictionary()
+        # Sozlugu yukle (ortak lexicon - snapshot varsa dosyadan)
+        elasticsearch_predictor.local_dictionary = await asyncio.to_thread(elasticsearch_predictor._load_dictionary)
     except Exception as e:
         logger.warning(f"ES hatasi: {e}")
         
-    # 3. Hizli Index (Trie)
-    if TRIE_AVAILABLE and trie_index:
-        try:
-            logger.info("Index olusturuluyor...")
-            dict_source = elasticsearch_predictor.local_dictionary
-            if dict_source:
-                await asyncio.to_thread(trie_index.build_index, dict_source)
-                logger.info(f"Index hazir ({trie_index.word_count} kelime)")
-        except Exception as e:
-            logger.warning(f"Index hatasi: {e}")
+    # 3. Hizli Index: Trie / yerel arama / buyuk sozluk ayni lexicon'u kullanir
+    if LARGE_DICT_AVAILABLE and large_dictionary:
+        logger.info(f"Index hazir ({large_dictionary.get_word_count()} kelime)")
+
+    # 4. Ranking modeli (kayitli derlenmis model + istege bagli periyodik egitim)
+    try:
+        ranker_trainer.start()
+    except Exception as e:
+        logger.warning(f"Ranking modeli hatasi: {e}")
 
     logger.info("Sistem hazir!")
     
@@ -68,6 +65,8 @@ async def lifespan(app: FastAPI):
     
     # --- SHUTDOWN ---
     logger.info("Sistem kapatiliyor...")
+    await ranker_trainer.stop()
+    await transformer_predictor.close_model_server()
     if elasticsearch_predictor.es_client:
         try:
             close_res = elasticsearch_predictor.es_client.close()
@@ -81,7 +80,9 @@ app = FastAPI(
     title="TextHelper ULTIMATE API",
     version="2.1.0",
     description="Hybrid AI Text Completion API",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Tüm JSON yanıtları orjson ile (stdlib json yerine)
+    default_response_class=ORJSONResponse
 )
 
 # CORS – configurable allowed origins
@@ -0,0 +1,73 @@
+"""
+Öneri adayı: orchestrator içindeki hafif temsil.
+
+Bir predict çağrısında adaylar kaynaklar, filtreler ve sıralayıcılar arasında
+defalarca Suggestion -> dict -> Suggestion dönüşüyordu; her Suggestion(...)
+Pydantic doğrulaması demek. Kaynaklar ve sıralayıcılar artık __slots__'lu
+Candidate kullanır; Pydantic Suggestion yalnızca yanıt sınırında, son top-N
+için bir kez oluşturulur (to_suggestion).
+"""
+
+from typing import Any, Dict, Optional
+
+from app.models.schemas import Suggestion
+
+
+class Candidate:
+    """Suggestion ile aynı alanlar, doğrulamasız ve dict'siz"""
+
+    __slots__ = ("text", "type", "score", "description", "source")
+
+    def __init__(self, text: str, type: str, score: float, description: str = "", source: str = "unknown"):
+        self.text = text
+        self.type = type
+        self.score = score
+        self.description = description
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Candidate":
+        """Özellik modüllerinin döndürdüğü dict'ten (text zorunlu)"""
+        return cls(
+            data["text"],
+            data.get("type", "unknown"),
+            data.get("score", 0.0),
+            data.get("description", ""),
+            data.get("source", "unknown"),
+        )
+
+    @classmethod
+    def from_any(cls, item: Any) -> Optional["Candidate"]:
+        """Candidate / Suggestion / dict -> Candidate (geçersizse None)"""
+        if isinstance(item, Candidate):
+            return item
+        if isinstance(item, dict):
+            return cls.from_dict(item) if item.get("text") else None
+        if isinstance(item, Suggestion):
+            return cls(item.text, item.type, item.score, item.description, item.source)
+        return None
+
+    def copy(self) -> "Candidate":
+        return Candidate(self.text, self.type, self.score, self.description, self.source)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "type": self.type,
+            "score": self.score,
+            "description": self.description,
+            "source": self.source,
+        }
+
+    def to_suggestion(self) -> Suggestion:
+        """Yanıt sınırı: tek Pydantic doğrulaması"""
+        return Suggestion(
+            text=self.text,
+            type=self.type,
+            score=self.score,
+            description=self.description,
+            source=self.source,
+        )
+
+    def __repr__(self) -> str:
+        return f"Candidate({self.text!r}, {self.type!r}, {self.score!r}, source={self.source!r})"
@@ -16,6 +16,7 @@ class PredictionRequest(BaseModel):
     use_ai: Optional[bool] = True
     use_search: Optional[bool] = True
     user_id: Optional[str] = "default"
+    latency_budget_ms: Optional[float] = Field(None, gt=0, le=5000)  # yoksa LATENCY_BUDGET_MS
 
 class Suggestion(BaseModel):
     text: str
@@ -29,6 +30,7 @@ class PredictionResponse(BaseModel):
     corrected_text: Optional[str] = None
     processing_time_ms: float
     sources_used: List[str]
+    degradation_level: int = 0  # 0: tum kaynaklar, 3: sadece hizli yol (yuk altinda)
 
 class FeedbackRequest(BaseModel):
     text: str
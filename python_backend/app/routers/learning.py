@@ -2,6 +2,8 @@ from fastapi import APIRouter, BackgroundTasks
 from app.models.schemas import FeedbackRequest
 from app.core.logs import logger
 from app.core.telemetry import telemetry
+from app.core.ranking_log import ranking_log
+from app.services.ranker_training import ranker_trainer
 
 # Optional Learning Modules
 try:
@@ -84,6 +86,12 @@ def background_learn(user_id: str, text: str, selected_suggestion: str):
     except Exception:
         pass
 
+    # 6. Learning-to-rank olay logu (gösterimlerle eşleştirilip offline eğitimde kullanılır)
+    try:
+        ranking_log.log_accept(user_id, text, selected_suggestion)
+    except Exception as e:
+        logger.error(f"Ranking olay logu hatası: {e}")
+
 
 @router.post("/learn")
 async def learn_interaction(feedback: FeedbackRequest, background_tasks: BackgroundTasks):
@@ -95,3 +103,9 @@ async def learn_interaction(feedback: FeedbackRequest, background_tasks: Backgro
         feedback.selected_suggestion,
     )
     return {"status": "queued"}
+
+
+@router.post("/train_ranker")
+async def train_ranker():
+    """Gösterim / seçim logundan ranking modelini yeniden eğit (ayrı süreç) ve sıcak tak."""
+    return await ranker_trainer.retrain()
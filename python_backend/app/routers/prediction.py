@@ -1,4 +1,7 @@
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import Response, StreamingResponse
 from app.models.schemas import (
     PredictionResponse,
     PredictionRequest,
@@ -6,6 +9,9 @@ from app.models.schemas import (
     UndoAutoCorrectRequest,
 )
 from app.services.orchestrator import orchestrator
+from app.core.inflight import latest_wins
+from app.core.serialization import dumps, phase_message
+from app.core.logs import logger
 from app.services.search import elasticsearch_predictor
 # We need advanced_fuzzy for correction if available.
 # Orchestrator handles dependencies, but /correct endpoint used explicit advanced_fuzzy check in main.py.
@@ -48,6 +54,42 @@ def _check_rate_limit(user_id: str) -> bool:
     _rate_limit_cache[user_id].append(current_time)
     return True
 
+def _guard_request(request: PredictionRequest, req: Request, user_id: str) -> None:
+    """Rate limit + input güvenlik kontrolü (HTTPException fırlatır)"""
+    # Rate limit
+    if not _check_rate_limit(user_id):
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit aşıldı. Maksimum {_rate_limit_max_requests} istek/{_rate_limit_window} saniye"
+        )
+    
+    # Security check
+    if SECURITY_AVAILABLE and security_manager:
+        try:
+            # Security logging
+            client_ip = req.client.host if req.client else "unknown"
+            # Fix: Don't block localhost
+            if client_ip not in ["127.0.0.1", "localhost", "::1"]:
+                 if not security_manager.check_rate_limit(client_ip):
+                     raise HTTPException(status_code=429, detail="Too many requests (IP)")
+            
+            is_valid, error_msg = security_manager.validate_input(request.text)
+            if not is_valid:
+                raise HTTPException(status_code=400, detail=error_msg or "Invalid input")
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Security modülü hatası prediction'ı engellememeli
+            print(f"Security check ignored error: {e}")
+
+def _latest_wins_key(req: Request, user_id: str) -> Optional[str]:
+    """Son istek kazanır anahtarı; user_id yoksa (anonim, "default") None: aynı proxy / NAT
+    arkasındaki farklı istemciler birbirinin isteğini iptal etmesin"""
+    if not user_id or user_id == "default":
+        return None
+    client_host = req.client.host if req.client else "unknown"
+    return f"http:{client_host}:{user_id}"
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict(request: PredictionRequest, req: Request, user_id: str = "default"):
     """
@@ -55,41 +97,25 @@ async def predict(request: PredictionRequest, req: Request, user_id: str = "defa
     Transformer + Elasticsearch sonuçlarını birleştirir
     """
     try:
-        # Rate limit
-        if not _check_rate_limit(user_id):
-            raise HTTPException(
-                status_code=429,
-                detail=f"Rate limit aşıldı. Maksimum {_rate_limit_max_requests} istek/{_rate_limit_window} saniye"
+        _guard_request(request, req, user_id)
+
+        # Aynı istemci + kullanıcıdan yeni istek gelirse bu hesaplama iptal edilir (son istek kazanır)
+        response = await latest_wins.run(
+            _latest_wins_key(req, user_id),
+            orchestrator.predict(
+                text=request.text,
+                context_message=request.context_message,
+                max_suggestions=request.max_suggestions,
+                use_ai=request.use_ai,
+                use_search=request.use_search,
+                user_id=user_id,
+                latency_budget_ms=request.latency_budget_ms
             )
-        
-        # Security check
-        if SECURITY_AVAILABLE and security_manager:
-            try:
-                # Security logging
-                client_ip = req.client.host if req.client else "unknown"
-                # Fix: Don't block localhost
-                if client_ip not in ["127.0.0.1", "localhost", "::1"]:
-                     if not security_manager.check_rate_limit(client_ip):
-                         raise HTTPException(status_code=429, detail="Too many requests (IP)")
-                
-                is_valid, error_msg = security_manager.validate_input(request.text)
-                if not is_valid:
-                    raise HTTPException(status_code=400, detail=error_msg or "Invalid input")
-            except HTTPException:
-                raise
-            except Exception as e:
-                # Security modülü hatası prediction'ı engellememeli
-                print(f"Security check ignored error: {e}")
-
-        response = await orchestrator.predict(
-            text=request.text,
-            context_message=request.context_message,
-            max_suggestions=request.max_suggestions,
-            use_ai=request.use_ai,
-            use_search=request.use_search,
-            user_id=user_id
         )
-        return response
+        if response is None:
+            response = PredictionResponse(suggestions=[], processing_time_ms=0, sources_used=["superseded"])
+        # Yanıt zaten doğrulanmış model: response_model ile yeniden doğrulama yerine doğrudan orjson bytes
+        return Response(dumps(response), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -102,6 +128,70 @@ async def process_legacy(request: PredictionRequest, req: Request, user_id: str
     """Legacy alias for /predict"""
     return await predict(request, req, user_id)
 
+async def _phased_responses(request: PredictionRequest, key: Optional[str], user_id: str):
+    """predict_stream çıktısını (phase, yanıt, final) sırayla üretir; son istek kazanır
+
+    Üretici ayrı görevde latest_wins altında çalışır: aynı anahtarla yeni istek
+    gelirse akış kesilir, istemci bağlantıyı kapatırsa üretici iptal edilir.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        async for item in orchestrator.predict_stream(
+            text=request.text,
+            context_message=request.context_message,
+            max_suggestions=request.max_suggestions,
+            use_ai=request.use_ai,
+            use_search=request.use_search,
+            user_id=user_id,
+            latency_budget_ms=request.latency_budget_ms
+        ):
+            await queue.put(item)
+
+    async def run():
+        try:
+            await latest_wins.run(key, produce())
+        except Exception as e:
+            logger.error(f"Prediction stream hatasi: {e}")
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        producer.cancel()
+
+@router.post("/predict/stream")
+async def predict_stream(request: PredictionRequest, req: Request, user_id: str = "default", format: str = "sse"):
+    """
+    Aşamalı tahmin (WebSocket kullanamayan istemciler için)
+    Önce hızlı yol ("fast"), sonra zenginleştirmeler ("enhanced"); son mesajda final=true.
+    format=sse: Server-Sent Events (event: fast|enhanced), format=ndjson: satır başına bir JSON
+    """
+    _guard_request(request, req, user_id)
+    ndjson = format == "ndjson" or "application/x-ndjson" in req.headers.get("accept", "")
+    key = _latest_wins_key(req, user_id)
+
+    async def body():
+        async for phase, response, final in _phased_responses(request, key, user_id):
+            data = phase_message(phase, response, final)
+            if ndjson:
+                yield data + b"\n"
+            else:
+                yield b"event: " + phase.encode() + b"\ndata: " + data + b"\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+        # Proxy (nginx) tamponlamasın: her aşama anında istemciye gitsin
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/correct")
 async def autocorrect_text(request: CorrectionRequest):
     """
@@ -5,6 +5,11 @@ from app.services.search import elasticsearch_predictor, large_dictionary, LARGE
 from app.core.config import settings
 from app.core.observability import get_metrics_snapshot
 from app.core.telemetry import telemetry
+from app.core.admission import admission
+from app.core.conversation import conversation_cache
+from app.core.inflight import latest_wins
+from app.services.orchestrator import orchestrator
+from app.services.ranker_training import ranker_trainer
 
 router = APIRouter()
 
@@ -52,6 +57,14 @@ async def health():
     else:
         health_status["components"]["transformer"] = {"status": "disabled"}
     
+    # Model sunucusu (MODEL_SERVER=auto|client)
+    if transformer_predictor.model_server is not None:
+        stats = transformer_predictor.model_server.get_stats()
+        health_status["components"]["model_server"] = {
+            "status": "active" if stats["healthy"] else "fallback",
+            "details": stats
+        }
+    
     # Elasticsearch
     if elasticsearch_predictor.es_client:
          health_status["components"]["elasticsearch"] = {"status": "connected"}
@@ -67,6 +80,12 @@ async def metrics():
     return {
         "observability": get_metrics_snapshot(),
         "telemetry": telemetry.snapshot(),
+        "admission": admission.snapshot(),
+        "scheduler": orchestrator.scheduler.snapshot(),
+        "latest_wins": latest_wins.snapshot(),
+        "coalescing": orchestrator.coalescer.snapshot(),
+        "conversation_cache": conversation_cache.snapshot(),
+        "ranker": ranker_trainer.snapshot(),
     }
 
 @router.post("/index_words")
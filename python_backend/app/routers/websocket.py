@@ -1,5 +1,8 @@
+import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.orchestrator import orchestrator
+from app.core.inflight import latest_wins
+from app.core.ws_protocol import negotiate
 from app.core.logs import logger
 
 router = APIRouter()
@@ -25,44 +28,68 @@ def _check_ws_rate_limit(user_id: str) -> bool:
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Real-time oneriler"""
-    await websocket.accept()
+    # Alt protokol pazarlığı: varsayılan tam JSON, istenirse delta (msgpack / JSON)
+    protocol = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=protocol.subprotocol)
+    # Bağlantı başına oturum: transformer KV cache bu anahtarla tutulur
+    session_id = f"ws:{id(websocket)}"
+    # Mesajlar beklenmeden okunur; yeni mesaj hâlâ çalışan eski akışı iptal eder
+    pending = None
+    
+    async def send(frame) -> None:
+        # str -> text frame (tarayıcı JSON.parse(event.data)), bytes -> binary frame (msgpack)
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+    
+    async def stream(**kwargs):
+        # Önce hızlı yol ("fast"), sonra her zenginleştirme ("enhanced"); son mesajda final=True
+        async for phase, response, final in orchestrator.predict_stream(session_id=session_id, **kwargs):
+            # Kodlanan mesaj iptalde de gönderilir: delta durumu istemciyle aynı kalsın
+            await asyncio.shield(send(protocol.response(phase, response, final)))
+    
+    async def respond(**kwargs):
+        try:
+            # logger.debug(f"WS Request: text='{text}'") 
+            # Avoid excessive logging in production loop
+            
+            # Daha yeni mesaj gelirse akış iptal edilir, eski metin için mesaj gönderilmez
+            await latest_wins.run(session_id, stream(**kwargs))
+            
+        except Exception as e:
+            logger.error(f"Prediction loop hatasi: {e}")
+            try:
+                await send(protocol.message({"suggestions": [], "error": str(e)}))
+            except Exception:
+                pass
     
     try:
+        hello = protocol.hello()
+        if hello is not None:
+            await send(hello)
         while True:
-            data = await websocket.receive_json()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = protocol.parse(message.get("bytes") or message.get("text"))
             user_id = data.get("user_id", "default")
             
             if not _check_ws_rate_limit(user_id):
-                await websocket.send_json({
+                await send(protocol.message({
                     "error": f"Rate limit aşıldı."
-                })
+                }))
                 continue
             
-            text = data.get("text", "").strip()
-            context_message = data.get("context_message", None)
-            max_suggestions = data.get("max_suggestions", 80)
-            use_ai = data.get("use_ai", True)
-            use_search = data.get("use_search", True)
-            
-            try:
-                # logger.debug(f"WS Request: text='{text}'") 
-                # Avoid excessive logging in production loop
-                
-                response = await orchestrator.predict(
-                    text=text,
-                    context_message=context_message,
-                    max_suggestions=max_suggestions,
-                    use_ai=use_ai,
-                    use_search=use_search,
-                    user_id=user_id
-                )
-                
-                response_dict = response.model_dump() if hasattr(response, 'model_dump') else response.dict()
-                await websocket.send_json(response_dict)
-                
-            except Exception as e:
-                logger.error(f"Prediction loop hatasi: {e}")
-                await websocket.send_json({"suggestions": [], "error": str(e)})
+            pending = asyncio.create_task(respond(
+                text=data.get("text", "").strip(),
+                context_message=data.get("context_message", None),
+                max_suggestions=data.get("max_suggestions", 80),
+                use_ai=data.get("use_ai", True),
+                use_search=data.get("use_search", True),
+                user_id=user_id,
+                latency_budget_ms=data.get("latency_budget_ms")
+            ))
                 
     except WebSocketDisconnect:
         logger.info("WS connection closed (normal)")
@@ -76,3 +103,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 await websocket.close()
             except:
                 pass
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+        orchestrator.end_session(session_id)
@@ -1,8 +1,12 @@
 import os
-from typing import List
-from app.models.schemas import Suggestion
+from typing import List, Optional
+from app.models.candidate import Candidate
 from app.core.config import settings
 from app.core.logs import logger
+from app.core.batching import MicroBatcher, generate_batch
+from app.core.kv_cache import session_kv_cache
+from app.core.lexicon import lexicon
+from app.core.next_word import score_next_words
 
 # Global import for optional dependencies
 try:
@@ -20,7 +24,49 @@ class TransformerPredictor:
         self.model = None
         self.tokenizer = None
         self.use_transformer = settings.USE_TRANSFORMER
+        # score: tek forward pass ile sıralı sonraki kelime; generate: örneklemeli üretim
+        self.mode = settings.TRANSFORMER_MODE
+        # Eş zamanlı istekler tek model çağrısında toplanır
+        self.batcher = MicroBatcher(
+            self._generate_batch,
+            max_batch_size=settings.INFERENCE_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_BATCH_WAIT_MS,
+            name="predictor-batch",
+        )
+        # Oturum başına bağlam cache'i (skorlama modu)
+        self.kv_cache = session_kv_cache("predictor-kv")
+        # MODEL_SERVER açıksa model bu süreçte yüklenmez, istekler model sunucusuna gider
+        self.model_server = None
+        self._dict_filter_warned = False
         
+    async def connect_model_server(self):
+        """Modeli yüklemek yerine Unix socket üzerinden model sunucusunu kullan (MODEL_SERVER=auto|client)"""
+        from app.services.model_server import ModelServerClient, unix_sockets_supported
+        
+        if not unix_sockets_supported():
+            logger.warning("Model sunucusu icin Unix socket desteklenmiyor - model bu surecte yuklenecek")
+            await self.load_model()
+            return
+        self.model_server = ModelServerClient(
+            settings.MODEL_SERVER_SOCKET,
+            timeout_ms=settings.MODEL_SERVER_TIMEOUT_MS,
+            health_interval_s=settings.MODEL_SERVER_HEALTH_INTERVAL_S,
+            spawn=settings.MODEL_SERVER == "auto",
+        )
+        await self.model_server.start()
+        logger.info(f"Model sunucusu: {settings.MODEL_SERVER_SOCKET} ({'hazir' if self.model_server.healthy else 'bekleniyor'})")
+    
+    @property
+    def active_batcher(self) -> MicroBatcher:
+        """predict'e gelen isteklerin gerçekten girdiği batcher (gerçek model yüklüyse onunki)"""
+        if REAL_TRANSFORMER_AVAILABLE and transformer_model and transformer_model.model_loaded:
+            return transformer_model.batcher
+        return self.batcher
+    
+    async def close_model_server(self):
+        if self.model_server is not None:
+            await self.model_server.close()
+    
     async def load_model(self):
         """Transformer modelini yükle"""
         # Model varsa kullan
@@ -57,6 +103,8 @@ class TransformerPredictor:
             self.tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=os.path.exists(local_model_path))
             self.model = AutoModelForCausalLM.from_pretrained(model_name, local_files_only=os.path.exists(local_model_path))
             self.model.eval()  # Evaluation mode
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
             
             self.model_loaded = True
             logger.info("Model hazir")
@@ -67,39 +115,46 @@ class TransformerPredictor:
             logger.warning(f"Model yuklenemedi: {e}")
             self.model_loaded = False
     
-    async def predict(self, text: str, max_suggestions: int = 5) -> List[Suggestion]:
-        """AI ile tahmin yap"""
+    async def predict(self, text: str, max_suggestions: int = 5, session_id: Optional[str] = None) -> List[Candidate]:
+        """AI ile tahmin yap (session_id: bağlantı / kullanıcı, KV cache anahtarı)"""
+        # Süreç dışı model sunucusu (erişilemez / timeout -> kural tabanlı fallback)
+        if self.model_server is not None:
+            results = await self.model_server.predict(text, max_suggestions, session_id)
+            if results is None:
+                return self._fallback_predictions(text, max_suggestions)
+            return [Candidate.from_dict(r) for r in results]
+        
         # Model varsa kullan
         if REAL_TRANSFORMER_AVAILABLE and transformer_model and transformer_model.model_loaded:
-            results = await transformer_model.predict(text, max_suggestions)
-            return [Suggestion(**r) for r in results]
+            results = await transformer_model.predict(text, max_suggestions, session_id=session_id)
+            return [Candidate.from_dict(r) for r in results]
         
         if not self.model_loaded:
             return self._fallback_predictions(text, max_suggestions)
         
         try:
-            import torch
-            # Gerçek transformer tahmini
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
-            
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=inputs['input_ids'].shape[1] + 20,
-                    num_return_sequences=max_suggestions,
-                    do_sample=True,
-                    temperature=0.7,
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
+            # Gerçek transformer tahmini (diğer isteklerle aynı batch'te, event loop dışında)
+            if self.mode == "score":
+                outputs = await self.batcher.submit((text, max_suggestions, session_id))
+                return [
+                    Candidate(
+                        text=word,
+                        type="ai_prediction",
+                        score=9.5 - i * 0.05,
+                        description="AI tahmini (Transformer)",
+                        source="transformer"
+                    )
+                    for i, (word, _) in enumerate(outputs)
+                ]
             
+            outputs = await self.batcher.submit((text, max_suggestions))
             suggestions = []
-            for output in outputs:
-                generated_text = self.tokenizer.decode(output, skip_special_tokens=True)
+            for generated_text in outputs:
                 # Son kelimeyi al
                 last_word = generated_text.split()[-1] if generated_text.split() else ""
                 
                 if last_word and last_word not in [s.text for s in suggestions]:
-                    suggestions.append(Suggestion(
+                    suggestions.append(Candidate(
                         text=last_word,
                         type="ai_prediction",
                         score=9.5,
@@ -112,7 +167,36 @@ class TransformerPredictor:
             logger.error(f"Tahmin hatası: {e}")
             return self._fallback_predictions(text, max_suggestions)
     
-    def _fallback_predictions(self, text: str, max_suggestions: int) -> List[Suggestion]:
+    def _generate_batch(self, requests: List[tuple]) -> List[List[str]]:
+        """MicroBatcher batch fonksiyonu: [(metin, öneri sayısı)] -> her istek için sonuç listesi"""
+        if self.mode == "score":
+            is_word = None
+            if settings.TRANSFORMER_DICT_FILTER:
+                if lexicon.loaded:
+                    is_word = lexicon.__contains__
+                elif not self._dict_filter_warned:
+                    self._dict_filter_warned = True
+                    logger.warning("TRANSFORMER_DICT_FILTER acik ama sozluk bu surecte yuklu degil - filtre uygulanmiyor")
+            return score_next_words(self.model, self.tokenizer, requests, is_word=is_word, kv_cache=self.kv_cache)
+        return generate_batch(
+            self.model,
+            self.tokenizer,
+            requests,
+            do_sample=True,
+            temperature=0.7,
+        )
+    
+    def end_session(self, session_id: str):
+        """Bağlantı kapandı: oturumun KV cache'lerini bırak"""
+        if self.model_server is not None:
+            self.model_server.end_session(session_id)
+            return
+        if self.kv_cache is not None:
+            self.kv_cache.drop(session_id)
+        if REAL_TRANSFORMER_AVAILABLE and transformer_model:
+            transformer_model.end_session(session_id)
+    
+    def _fallback_predictions(self, text: str, max_suggestions: int) -> List[Candidate]:
         """Fallback: Basit kurallar"""
         suggestions = []
         words = text.split()
@@ -134,7 +218,7 @@ class TransformerPredictor:
         prefix = last_word[:3] if len(last_word) >= 3 else last_word
         if prefix in patterns:
             for word in patterns[prefix][:max_suggestions]:
-                suggestions.append(Suggestion(
+                suggestions.append(Candidate(
                     text=word,
                     type="ai_prediction",
                     score=9.0,
@@ -0,0 +1,436 @@
+"""
+Süreç dışı model sunucusu (tüm uvicorn worker'ları için tek model kopyası).
+
+USE_TRANSFORMER açık her worker lifespan'da modelin kendi kopyasını yüklüyordu
+(4 worker = 4x RAM, 4x yükleme süresi). MODEL_SERVER=auto|client ile model
+ağırlıkları ayrı bir süreçte tutulur; worker'lar Unix socket üzerinden istek
+gönderir. Sunucu tarafında istekler TransformerPredictor'ın MicroBatcher'ına
+girer, yani farklı worker'lardan gelen eş zamanlı istekler aynı batch'te
+çalışır.
+
+Protokol: 4 bayt big-endian uzunluk + JSON. İstekler {"id", "op", ...};
+op: predict | health | end_session. Tek bağlantı üzerinde istekler id ile
+çoklanır (sunucu her isteği ayrı task'ta işler, cevaplar sırasız dönebilir).
+
+Worker tarafı (ModelServerClient): bağlanamazsa veya cevap
+MODEL_SERVER_TIMEOUT_MS içinde gelmezse None döner ve çağıran
+`_fallback_predictions`'a düşer. Arka plan sağlık kontrolü
+MODEL_SERVER_HEALTH_INTERVAL_S aralıkla çalışır; MODEL_SERVER=auto ise sunucu
+ayakta değilken bir worker onu başlatır (sunucu lock dosyası ile tek kopya
+kalır). TRANSFORMER_DICT_FILTER açıksa sunucu modelden önce ortak sözlüğü
+(snapshot) kendi sürecine yükler; filtre sunucu tarafında uygulanır.
+
+Bağımsız çalıştırma:
+  cd python_backend
+  python -m app.services.model_server --socket /tmp/texthelper-model.sock
+"""
+
+import argparse
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+from app.core.config import settings
+from app.core.lexicon import lexicon
+from app.core.logs import logger
+from app.core.serialization import dumps, loads
+from app.models.candidate import Candidate
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def unix_sockets_supported() -> bool:
+    return hasattr(asyncio, "start_unix_server")
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """Bir mesaj oku; bağlantı kapandıysa None"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"mesaj cok buyuk: {size} bayt")
+    body = await reader.readexactly(size)
+    return loads(body)
+
+
+def write_message(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    body = dumps(message)
+    writer.write(_HEADER.pack(len(body)) + body)
+
+
+class ModelServer:
+    """Modeli tutan süreç: Unix socket üzerinden predict / health / end_session"""
+
+    def __init__(self, socket_path: str, predictor):
+        self.socket_path = socket_path
+        self.predictor = predictor
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers = set()
+        self._lock_fd: Optional[int] = None
+
+    def _acquire_lock(self) -> bool:
+        """Aynı socket için ikinci sunucu başlamasın (lock süreç yaşadıkça tutulur)"""
+        if not FCNTL_AVAILABLE:
+            return True
+        fd = os.open(self.socket_path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def start(self) -> bool:
+        if not self._acquire_lock():
+            logger.info(f"Model sunucusu zaten calisiyor: {self.socket_path}")
+            return False
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Önceki sürecin kalıntısı (lock bizde)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Model sunucusu dinliyor: {self.socket_path} (pid {os.getpid()})")
+        return True
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Açık bağlantılar da kapanır (istemciler fallback'e düşer)
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                task = asyncio.ensure_future(self._dispatch(message, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except asyncio.CancelledError:
+            pass  # Sunucu kapanıyor
+        except Exception as e:
+            logger.warning(f"Model sunucusu baglanti hatasi: {e}")
+        finally:
+            self.connections -= 1
+            self._writers.discard(writer)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _dispatch(self, message: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        self.requests += 1
+        reply: Dict[str, Any] = {"id": message.get("id")}
+        try:
+            op = message.get("op")
+            if op == "predict":
+                suggestions = await self.predictor.predict(
+                    message.get("text", ""),
+                    int(message.get("max_suggestions", 5)),
+                    session_id=message.get("session_id"),
+                )
+                # Candidate'ler ara dict kurulmadan doğrudan bytes'a yazılır (write_message)
+                reply["result"] = [Candidate.from_any(s) for s in suggestions]
+            elif op == "health":
+                reply["result"] = self.health()
+            elif op == "end_session":
+                self.predictor.end_session(message.get("session_id"))
+                reply["result"] = True
+            else:
+                raise ValueError(f"bilinmeyen op: {op}")
+            reply["ok"] = True
+        except Exception as e:
+            self.errors += 1
+            reply.update(ok=False, error=str(e))
+        async with write_lock:
+            try:
+                write_message(writer, reply)
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "model_loaded": bool(self.predictor.model_loaded),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections": self.connections,
+            "dictionary_loaded": bool(lexicon.loaded),
+            "batching": self.predictor.active_batcher.get_stats(),
+        }
+
+
+def spawn_server(socket_path: str) -> subprocess.Popen:
+    """Sunucuyu alt süreç olarak başlat (başlatan süreç kapanınca sunucu da kapanır)"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.services.model_server", "--socket", socket_path, "--exit-with-parent"],
+        cwd=BACKEND_DIR,
+    )
+
+
+class ModelServerClient:
+    """Worker tarafı: tek bağlantı üzerinde id ile çoklanan istekler, timeout ve sağlık kontrolü"""
+
+    def __init__(
+        self,
+        socket_path: str,
+        timeout_ms: float = 300.0,
+        health_interval_s: float = 5.0,
+        spawn: bool = False,
+    ):
+        self.socket_path = socket_path
+        self.timeout = max(0.001, float(timeout_ms) / 1000.0)
+        self.health_interval = max(0.1, float(health_interval_s))
+        self.spawn = spawn
+        self.healthy = False
+        self.last_health: Optional[Dict[str, Any]] = None
+        self.requests = 0
+        self.timeouts = 0
+        self.failures = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    async def start(self) -> None:
+        """Bağlan (gerekirse sunucuyu başlat) ve sağlık kontrolünü arka planda çalıştır"""
+        await self.check_health()
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.ensure_future(self._monitor())
+
+    async def close(self) -> None:
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        self._disconnect(ConnectionError("istemci kapatildi"))
+
+    async def _connect(self) -> bool:
+        if self._writer is not None:
+            return True
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None:
+                return True
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.socket_path), timeout=self.timeout
+                )
+            except (OSError, asyncio.TimeoutError):
+                self._reader = self._writer = None
+                return False
+            self._read_task = asyncio.ensure_future(self._read_loop(self._reader))
+            return True
+
+    def _disconnect(self, error: Exception) -> None:
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        self.healthy = False
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue  # Timeout'a düşmüş istek
+                if message.get("ok"):
+                    future.set_result(message.get("result"))
+                else:
+                    future.set_exception(RuntimeError(message.get("error", "model sunucusu hatasi")))
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.warning(f"Model sunucusu okuma hatasi: {e}")
+        self._disconnect(ConnectionError("model sunucusu baglantisi kapandi"))
+
+    async def call(self, op: str, timeout: Optional[float] = None, **params) -> Any:
+        if not await self._connect():
+            raise ConnectionError(f"model sunucusuna baglanilamadi: {self.socket_path}")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            write_message(self._writer, {"id": request_id, "op": op, **params})
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def predict(self, text: str, max_suggestions: int, session_id: Optional[str] = None) -> Optional[List[Dict]]:
+        """Öneriler (dict listesi); sunucu sağlıksız, hata veya timeout -> None (fallback)"""
+        if not self.healthy:
+            return None
+        self.requests += 1
+        try:
+            return await self.call("predict", text=text, max_suggestions=max_suggestions, session_id=session_id)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return None
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Model sunucusu tahmin hatasi: {e}")
+            return None
+
+    def end_session(self, session_id: str) -> None:
+        if self.healthy:
+            asyncio.ensure_future(self._end_session(session_id))
+
+    async def _end_session(self, session_id: str) -> None:
+        try:
+            await self.call("end_session", session_id=session_id)
+        except Exception:
+            pass
+
+    async def check_health(self) -> bool:
+        """Sağlık kontrolü; sunucu yoksa ve spawn açıksa başlat. Model yüklenene kadar sağlıksız sayılır."""
+        try:
+            self.last_health = await self.call("health", timeout=max(self.timeout, 1.0))
+            self.healthy = bool(self.last_health.get("model_loaded"))
+        except Exception:
+            self._disconnect(ConnectionError("saglik kontrolu basarisiz"))
+            self.last_health = None
+            if self.spawn and (self._process is None or self._process.poll() is not None):
+                logger.info(f"Model sunucusu baslatiliyor: {self.socket_path}")
+                self._process = spawn_server(self.socket_path)
+        return self.healthy
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            was_healthy = self.healthy
+            healthy = await self.check_health()
+            if healthy != was_healthy:
+                logger.info(f"Model sunucusu {'hazir' if healthy else 'erisilemiyor (fallback)'}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "socket": self.socket_path,
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "timeout_ms": self.timeout * 1000.0,
+            "server": self.last_health,
+        }
+
+
+async def _watch_parent(parent_pid: int, stop: asyncio.Event) -> None:
+    while True:
+        await asyncio.sleep(2.0)
+        if os.getppid() != parent_pid:
+            logger.info("Model sunucusu: baslatan surec kapandi, cikiliyor")
+            stop.set()
+            return
+
+
+def _load_lexicon() -> None:
+    """TRANSFORMER_DICT_FILTER için ortak sözlüğü bu süreçte yükle (önce snapshot; worker'ların lexicon'u buraya gelmez)"""
+    try:
+        from app.features.large_dictionary import get_large_dictionary
+
+        get_large_dictionary()
+    except ImportError as e:
+        logger.warning(f"Model sunucusu: sozluk modulu yok ({e})")
+    if not lexicon.loaded:
+        logger.warning("Model sunucusu: sozluk yuklenemedi - TRANSFORMER_DICT_FILTER uygulanmayacak")
+
+
+async def _load(predictor) -> None:
+    """Sözlük (filtre açıksa, executor'da) sonra model; model_loaded en son true olur"""
+    if settings.TRANSFORMER_DICT_FILTER:
+        await asyncio.get_running_loop().run_in_executor(None, _load_lexicon)
+    await predictor.load_model()
+
+
+async def serve(socket_path: str, exit_with_parent: bool = False) -> None:
+    from app.services.ai import transformer_predictor
+
+    server = ModelServer(socket_path, transformer_predictor)
+    if not await server.start():
+        return
+    stop = asyncio.Event()
+    try:
+        import signal
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+    except (ImportError, NotImplementedError, RuntimeError):
+        pass
+    if exit_with_parent:
+        asyncio.ensure_future(_watch_parent(os.getppid(), stop))
+
+    # Socket önce açılır: yükleme (filtre açıksa önce sözlük, sonra model) sürerken health model_loaded=false
+    # döner. Yükleme sunucunun kendi loop'unda çalışır (ağır kısımlar executor'da), asyncio nesneleri bu loop'a bağlı kalır
+    transformer_predictor.use_transformer = True
+    load_task = asyncio.ensure_future(_load(transformer_predictor))
+    try:
+        await stop.wait()
+    finally:
+        if not load_task.done():
+            load_task.cancel()
+        await server.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="TextHelper model sunucusu (Unix socket)")
+    parser.add_argument("--socket", default=settings.MODEL_SERVER_SOCKET)
+    parser.add_argument("--exit-with-parent", action="store_true", help="Başlatan süreç kapanınca çık")
+    args = parser.parse_args(argv)
+    if not unix_sockets_supported():
+        print("Unix socket bu platformda desteklenmiyor")
+        return
+    asyncio.run(serve(args.socket, args.exit_with_parent))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,21 @@ import os
 import asyncio
 import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Tuple
 from functools import lru_cache
 
-from app.models.schemas import Suggestion, PredictionResponse
+from app.models.schemas import PredictionResponse
+from app.models.candidate import Candidate
 from app.core.config import settings
 from app.core.logs import logger
 from app.core.telemetry import telemetry
+from app.core.admission import admission
+from app.core.analysis import AnalyzedInput
+from app.core.conversation import ConversationContext, conversation_cache
+from app.core.keywords import first_match, keyword_matcher
+from app.core.ranking_log import ranking_log
+from app.core.scheduler import DeadlineScheduler
+from app.core.singleflight import SingleFlight
 
 # Services
 from app.services.ai import transformer_predictor, REAL_TRANSFORMER_AVAILABLE
@@ -96,13 +104,6 @@ except ImportError:
     ML_RANKING_AVAILABLE = False
     ml_ranking = None
 
-try:
-    from app.features.trie_index import trie_index
-    TRIE_AVAILABLE = True
-except ImportError:
-    TRIE_AVAILABLE = False
-    trie_index = None
-
 try:
     from app.features.relevance_filter import relevance_filter
     RELEVANCE_FILTER_AVAILABLE = True
@@ -132,13 +133,74 @@ except ImportError:
     MEDIUM_DICT_AVAILABLE = False
     medium_dictionary = None
 
+# Şablon kaynağını tetikleyen kelimeler; tüm modüller sözlüklerini kaydettikten
+# sonra anahtar kelime otomatı ilk tuştan önce kurulur
+_TEMPLATE_TRIGGERS = keyword_matcher.register(['sipariş', 'müşteri', 'api', 'database'])
+# Müşterinin son mesajına göre hazır yanıtlar (sıra önemli: ilk eşleşen)
+_REPLY_TRIGGERS = keyword_matcher.table((
+    ('how_are_you', ['nasılsın', 'naber']),
+    ('help', ['yardım']),
+    ('order', ['sipariş']),
+    ('greeting', ['merhaba', 'selam']),
+))
+_CONTEXTUAL_REPLIES = {
+    'how_are_you': ["İyiyim, teşekkürler", "Teşekkürler, siz nasılsınız?", "Her şey yolunda"],
+    'help': ["Nasıl yardımcı olabilirim?", "Sorun nedir?", "Buyurun, dinliyorum"],
+    'order': ["Sipariş numaranız nedir?", "Hemen kontrol ediyorum"],
+    'greeting': ["Merhabalar", "Selamlar", "Hoş geldiniz"],
+}
+keyword_matcher.build()
+
+
+def _ml_ranking_input(candidates) -> List[dict]:
+    """ML ranking feature girdisi (sıralama ve gösterim logu aynı feature'ları kullanır)"""
+    return [
+        {
+            'text': s.text,
+            'score': s.score,
+            'type': s.type,
+            'source': s.source,
+            'frequency': getattr(s, 'frequency', 1),
+            'context_match': True,
+            'domain_match': True,
+            'grammar_match': False,
+            'semantic_score': 0.5
+        }
+        for s in candidates
+    ]
+
+
+class _Collected(NamedTuple):
+    """Kaynaklardan toplanan, henüz kişiye göre sıralanmamış öneriler"""
+    suggestions: List[Candidate]
+    corrected_text: Optional[str]
+    sources_used: List[str]
+    context: Optional[dict]
+    final: bool = False  # contextual reply: sıralama yapılmadan döner
+
 
 class HybridOrchestrator:
     """Transformer ve Elasticsearch sonuçlarını birleştir"""
     
-    # Backend-side debouncing (50ms cooldown per user)
-    _last_request = {}
-    _DEBOUNCE_MS = 50  # 50ms
+    def __init__(self):
+        # Kaynak seçimi istek bütçesine göre; ölçülen süreler admission controller ile paylaşılır
+        self.scheduler = DeadlineScheduler(observers=[admission.record])
+        self.coalescer = SingleFlight(enabled=settings.COALESCE_ENABLED)
+    
+    @staticmethod
+    def _coalesce_key(text, conversation, max_suggestions, use_ai, use_search, level, session_key=None, budget_ms=None):
+        """Eş zamanlı birleştirme anahtarı: normalize önek + bağlam özeti + bayraklar + bütçe
+
+        Transformer çalışacaksa oturum anahtarı da eklenir: paylaşılan hesaplama
+        liderin KV cache oturumunu ilerletir, diğer oturumlar kendi hesaplamasını yapar.
+        Bütçe (ms) anahtardadır: daha büyük bütçe isteyen, liderin daha erken
+        kesilmiş sonucunu almaz.
+        """
+        normalized = " ".join(text.split()) + (" " if text[-1:].isspace() else "")
+        context_hash = conversation.key if conversation is not None else ""
+        session = session_key if use_ai and settings.USE_TRANSFORMER else None
+        budget = round(budget_ms) if budget_ms is not None else None
+        return (normalized, context_hash, max_suggestions, bool(use_ai), bool(use_search), level, session, budget)
     
     async def predict(
         self,
@@ -147,41 +209,166 @@ class HybridOrchestrator:
         max_suggestions: int = 50,
         use_ai: bool = True,
         use_search: bool = True,
-        user_id: str = "default"
+        user_id: str = "default",
+        session_id: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
     ) -> PredictionResponse:
-        """Hybrid tahmin yap"""
-        
-        # Backend Debouncing
-        now = time.time() * 1000
-        last = self._last_request.get(user_id, 0)
-        if now - last < self._DEBOUNCE_MS:
-             return PredictionResponse(
-                suggestions=[],
-                processing_time_ms=0,
-                sources_used=["debounced"]
+        """Hybrid tahmin yap (session_id: bağlantı id'si; yoksa user_id transformer KV cache anahtarıdır)
+
+        latency_budget_ms: kaynakların toplam süre bütçesi (yoksa LATENCY_BUDGET_MS)
+        """
+        budget_ms = max(settings.MIN_LATENCY_BUDGET_MS, float(latency_budget_ms or settings.LATENCY_BUDGET_MS))
+        # Yük durumuna göre degrade seviyesi (pahalı kaynaklar kademeli kapanır)
+        with admission.track() as level:
+            response = await self._predict(
+                text, context_message, max_suggestions, use_ai, use_search, user_id, session_id, level, budget_ms
             )
-        self._last_request[user_id] = now
-        
+        response.degradation_level = level
+        self._record_impression(response, text, user_id)
+        return response
+
+    async def predict_stream(
+        self,
+        text: str,
+        context_message: str = None,
+        max_suggestions: int = 50,
+        use_ai: bool = True,
+        use_search: bool = True,
+        user_id: str = "default",
+        session_id: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, PredictionResponse, bool]]:
+        """Aşamalı tahmin: (phase, yanıt, final) üretir
+
+        "fast": hızlı yol (lexicon / search) biter bitmez; "enhanced": sonraki her
+        kaynak sonucuyla güncel liste. Her ara liste predict ile aynı filtre ve
+        sıralamadan geçer; advanced context yalnızca son (final=True) yanıtta.
+        Akış bağlantıya özel olduğundan eş zamanlı birleştirme uygulanmaz.
+        """
+        budget_ms = max(settings.MIN_LATENCY_BUDGET_MS, float(latency_budget_ms or settings.LATENCY_BUDGET_MS))
+        with admission.track() as level:
+            start_time = datetime.now()
+            session_key = session_id or (user_id if user_id and user_id != "default" else None)
+            # Metin bir kez çözümlenir; tüm aşamalar ve kaynaklar aynı analizi kullanır
+            analysis = AnalyzedInput(text)
+            conversation = conversation_cache.get(context_message)
+            seed, tasks = self._prepare(analysis, conversation, max_suggestions, use_ai, use_search, session_key, level)
+
+            async def snapshot(raw: List[Candidate], final: bool) -> PredictionResponse:
+                collected = seed if seed.final else await self._refine(
+                    analysis, max_suggestions, use_search, list(raw), list(seed.sources_used), seed.context, start_time, budget_ms, final
+                )
+                response = await self._personalize(collected, analysis, max_suggestions, user_id, start_time)
+                response.degradation_level = level
+                return response
+
+            raw = list(seed.suggestions)
+            fast_pending = {source for source, _ in tasks if self.scheduler.cost_model.spec(source).required}
+            phase = "fast"
+            if seed.final or not tasks:
+                tasks = []
+            elif not fast_pending:
+                # Önek yok (sonraki kelime): hızlı yol beklenmez
+                yield phase, await snapshot(raw, final=False), False
+                phase = "enhanced"
+
+            elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+            remaining_ms = max(settings.MIN_LATENCY_BUDGET_MS, budget_ms - elapsed_ms)
+            results = self.scheduler.stream(tasks, remaining_ms, length=len(text))
+            try:
+                async for source, result, left in results:
+                    before = len(raw)
+                    self._extend_results(raw, [result])
+                    fast_pending.discard(source)
+                    if left == 0 or fast_pending or (phase == "enhanced" and len(raw) == before):
+                        continue  # son sonuç aşağıda final olarak gönderilir; yeni öneri yoksa güncelleme yok
+                    yield phase, await snapshot(raw, final=False), False
+                    phase = "enhanced"
+            finally:
+                # Tüketici akışı erken bıraktıysa kalan kaynak görevleri hemen iptal edilir
+                await results.aclose()
+
+            response = await snapshot(raw, final=True)
+            self._record_impression(response, text, user_id)
+            yield phase, response, True
+
+    async def _predict(
+        self,
+        text: str,
+        context_message: Optional[str],
+        max_suggestions: int,
+        use_ai: bool,
+        use_search: bool,
+        user_id: str,
+        session_id: Optional[str],
+        level: int,
+        budget_ms: float
+    ) -> PredictionResponse:
+        start_time = datetime.now()
+        session_key = session_id or (user_id if user_id and user_id != "default" else None)
+        # Metin bir kez çözümlenir (token'lar, önek, domain / niyet / duygu); her kaynağa bu verilir
+        analysis = AnalyzedInput(text)
+        # Müşterinin mesajı konuşma başına bir kez çözümlenir (TTL önbelleği)
+        conversation = conversation_cache.get(context_message)
+        
+        # Kişiye özel olmayan kısım: aynı anda gelen özdeş istekler tek hesaplamayı bekler
+        shared = await self.coalescer.do(
+            self._coalesce_key(text, conversation, max_suggestions, use_ai, use_search, level, session_key, budget_ms),
+            lambda: self._collect(analysis, conversation, max_suggestions, use_ai, use_search, session_key, level, budget_ms)
+        )
+        return await self._personalize(shared, analysis, max_suggestions, user_id, start_time)
+    
+    async def _collect(
+        self,
+        analysis: AnalyzedInput,
+        conversation: Optional[ConversationContext],
+        max_suggestions: int,
+        use_ai: bool,
+        use_search: bool,
+        session_key: Optional[str],
+        level: int,
+        budget_ms: float
+    ) -> _Collected:
+        """Kaynak fan-out'u ve kişiye özel olmayan filtreler (eş zamanlı özdeş isteklerce paylaşılır)"""
         start_time = datetime.now()
+        seed, tasks = self._prepare(analysis, conversation, max_suggestions, use_ai, use_search, session_key, level)
+        if seed.final:
+            return seed
+        
+        # Bütçe zamanlayıcısı: değer/maliyet sırasıyla başlat, bütçe dolunca bekleyenleri iptal et
+        elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+        remaining_ms = max(settings.MIN_LATENCY_BUDGET_MS, budget_ms - elapsed_ms)
+        scheduled = await self.scheduler.run(tasks, remaining_ms, length=len(analysis.text))
+        
+        all_suggestions = list(seed.suggestions)
+        self._extend_results(all_suggestions, scheduled.values())
+        return await self._refine(analysis, max_suggestions, use_search, all_suggestions, seed.sources_used, seed.context, start_time, budget_ms)
+    
+    def _prepare(
+        self,
+        analysis: AnalyzedInput,
+        conversation: Optional[ConversationContext],
+        max_suggestions: int,
+        use_ai: bool,
+        use_search: bool,
+        session_key: Optional[str],
+        level: int
+    ) -> Tuple[_Collected, List[Tuple[str, Any]]]:
+        """Bağlamsal yanıtlar ve çalıştırılacak kaynaklar: (başlangıç önerileri, [(kaynak, coroutine)])"""
+        text = analysis.text
         sources_used = []
         all_suggestions = []
         
         # 0. CONTEXTUAL REPLIES
-        if context_message and (not text or len(text) < 3):
-            replies = []
-            cm_lower = context_message.lower()
-            if "nasılsın" in cm_lower or "naber" in cm_lower:
-                replies = ["İyiyim, teşekkürler", "Teşekkürler, siz nasılsınız?", "Her şey yolunda"]
-            elif "yardım" in cm_lower:
-                replies = ["Nasıl yardımcı olabilirim?", "Sorun nedir?", "Buyurun, dinliyorum"]
-            elif "sipariş" in cm_lower:
-                replies = ["Sipariş numaranız nedir?", "Hemen kontrol ediyorum"]
-            elif "merhaba" in cm_lower or "selam" in cm_lower:
-                replies = ["Merhabalar", "Selamlar", "Hoş geldiniz"]
-                
+        if conversation is not None and (not text or len(text) < 3):
+            # Konuşma başına bir kez: mesajın anahtar kelimeleri önbellekteki analizden
+            replies = conversation.memo(
+                "contextual_replies",
+                lambda: _CONTEXTUAL_REPLIES.get(first_match(conversation.analysis.keywords, _REPLY_TRIGGERS), [])
+            )
             if replies:
                 for reply in replies:
-                    all_suggestions.append(Suggestion(
+                    all_suggestions.append(Candidate(
                         text=reply,
                         type="smart_reply",
                         score=50.0,
@@ -189,26 +376,20 @@ class HybridOrchestrator:
                         source="contextual_reply"
                     ))
                 if not text and all_suggestions:
-                     end_time = datetime.now()
-                     processing_time = (end_time - start_time).total_seconds() * 1000
-                     return PredictionResponse(
-                        suggestions=all_suggestions,
-                        processing_time_ms=processing_time,
-                        sources_used=["contextual_reply"]
-                    )
+                     return _Collected(all_suggestions, None, ["contextual_reply"], None, final=True), []
         
         context = None
         if ADVANCED_CONTEXT_AVAILABLE and advanced_context_completer:
              try:
-                 smart_responses = advanced_context_completer.generate_smart_responses(text)
+                 smart_responses = advanced_context_completer.generate_smart_responses(analysis)
                  if smart_responses:
-                     # Normalize: Dict -> Suggestion
-                     all_suggestions.extend([Suggestion(**s) for s in smart_responses if isinstance(s, dict)])
+                     # Normalize: Dict -> Candidate
+                     all_suggestions.extend([Candidate.from_dict(s) for s in smart_responses if isinstance(s, dict)])
                  
-                 context_suggestions = advanced_context_completer.complete_with_full_context(text, max_suggestions)
+                 context_suggestions = advanced_context_completer.complete_with_full_context(analysis, max_suggestions)
                  if context_suggestions:
-                     # Normalize: Dict -> Suggestion
-                     all_suggestions.extend([Suggestion(**s) for s in context_suggestions if isinstance(s, dict)])
+                     # Normalize: Dict -> Candidate
+                     all_suggestions.extend([Candidate.from_dict(s) for s in context_suggestions if isinstance(s, dict)])
              except Exception as e:
                  logger.warning(f"Advanced Context hatasi: {e}")
         
@@ -224,28 +405,22 @@ class HybridOrchestrator:
         
         extra_features = settings.ENABLE_HEAVY_FEATURES
         
-        if use_ai and settings.USE_TRANSFORMER and extra_features:
-            tasks.append(self._get_ai_predictions(text, max_suggestions, sources_used))
+        if use_ai and settings.USE_TRANSFORMER and extra_features and admission.allows("transformer", level):
+            tasks.append(("transformer", self._get_ai_predictions(text, max_suggestions, sources_used, session_key)))
         
         if use_search:
-            # FIX: Trailing space handling for "Next Word Prediction"
-            if text.endswith(" "):
-                current_prefix = ""
-            else:
-                words = text.split()
-                current_prefix = words[-1] if words else text
-            
-            current_prefix = current_prefix.strip()
+            # FIX: Trailing space handling for "Next Word Prediction" (sonda boşluk: önek yok)
+            current_prefix = analysis.prefix
             
             # Sadece prefix varsa sözlük araması yap
             if len(current_prefix) >= 1:
-                if TRIE_AVAILABLE and trie_index and hasattr(trie_index, 'word_count') and trie_index.word_count > 0:
-                    tasks.append(self._get_trie_predictions(current_prefix, max_suggestions * 6, sources_used))
-                
-                tasks.append(self._get_search_predictions(current_prefix, max_suggestions * 6, sources_used))
-                
+                # Tek lexicon araması: Trie, yerel sözlük ve büyük sözlük aynı index'i paylaşır
                 if LARGE_DICT_AVAILABLE and large_dictionary:
-                    tasks.append(self._get_direct_large_dict_predictions(current_prefix, max_suggestions * 5, sources_used))
+                    tasks.append(("lexicon", self._get_lexicon_predictions(current_prefix, max_suggestions * 6, sources_used)))
+                
+                # Elasticsearch sadece bağlıysa (bağlı değilse yerel arama yine lexicon olurdu)
+                if elasticsearch_predictor.es_client or not (LARGE_DICT_AVAILABLE and large_dictionary):
+                    tasks.append(("search", self._get_search_predictions(current_prefix, max_suggestions * 6, sources_used)))
                 
                 if MEDIUM_DICT_AVAILABLE and medium_dictionary:
                     try:
@@ -255,7 +430,7 @@ class HybridOrchestrator:
                             try:
                                 md_results = medium_dictionary.search(current_prefix, max_suggestions)
                                 if md_results:
-                                    return [Suggestion(
+                                    return [Candidate(
                                         text=res['word'],
                                         type='dictionary',
                                         score=res['score'],
@@ -265,86 +440,71 @@ class HybridOrchestrator:
                             except:
                                 return []
                             return []
-                        tasks.append(medium_lookup())
+                        tasks.append(("medium_dictionary", medium_lookup()))
                     except Exception as e:
                         logger.warning(f"Medium dictionary hatasi: {e}")
         
         if ADVANCED_NGRAM_AVAILABLE and advanced_ngram:
-            tasks.append(self._get_ngram_predictions(text, max_suggestions * 2, sources_used))
-        
-        if PHRASE_COMPLETION_AVAILABLE and phrase_completer:
-            tasks.append(self._get_phrase_predictions(text, max_suggestions * 2, sources_used))
-        
-        if DOMAIN_DICT_AVAILABLE and domain_manager:
-            tasks.append(self._get_domain_predictions(text, max_suggestions * 2, sources_used))
-        
-        if EMOJI_AVAILABLE and emoji_suggester:
-            tasks.append(self._get_emoji_predictions(text, max_suggestions * 2, sources_used))
-        
-        if extra_features and SMART_TEMPLATES_AVAILABLE and smart_template_manager:
-            tasks.append(self._get_template_predictions(text, max_suggestions * 2, sources_used))
-        
-        # Task Ayrıştırma
-        fast_tasks = []
-        smart_tasks = []
-        
-        for task in tasks:
-            task_str = str(task)
-            if 'trie' in task_str.lower() or 'large_dict' in task_str.lower() or 'direct_large_dict' in task_str.lower() or 'search' in task_str.lower():
-                fast_tasks.append(task)
-            else:
-                smart_tasks.append(task)
-        
-        # AŞAMA 1: Hızlı öneriler
-        async def with_fast_timeout(task):
-            try:
-                return await asyncio.wait_for(task, timeout=0.1)
-            except (asyncio.TimeoutError, Exception):
-                return []
+            tasks.append(("ngram", self._get_ngram_predictions(analysis, max_suggestions * 2, sources_used)))
         
-        fast_results = []
-        if fast_tasks:
-            fast_results = await asyncio.gather(*[with_fast_timeout(task) for task in fast_tasks], return_exceptions=True)
+        if PHRASE_COMPLETION_AVAILABLE and phrase_completer and admission.allows("phrase", level):
+            tasks.append(("phrase", self._get_phrase_predictions(analysis, max_suggestions * 2, sources_used)))
         
-        # AŞAMA 2: Akıllı öneriler
-        async def with_smart_timeout(task):
-            try:
-                return await asyncio.wait_for(task, timeout=0.5)
-            except (asyncio.TimeoutError, Exception):
-                return []
+        if DOMAIN_DICT_AVAILABLE and domain_manager and admission.allows("domain", level):
+            tasks.append(("domain", self._get_domain_predictions(analysis, max_suggestions * 2, sources_used)))
         
-        smart_results = []
-        if smart_tasks:
-            smart_results = await asyncio.gather(*[with_smart_timeout(task) for task in smart_tasks], return_exceptions=True)
+        if EMOJI_AVAILABLE and emoji_suggester and admission.allows("emoji", level):
+            tasks.append(("emoji", self._get_emoji_predictions(analysis, max_suggestions * 2, sources_used)))
         
-        results = fast_results + smart_results
+        if extra_features and SMART_TEMPLATES_AVAILABLE and smart_template_manager and admission.allows("template", level):
+            tasks.append(("template", self._get_template_predictions(analysis, max_suggestions * 2, sources_used)))
         
+        return _Collected(all_suggestions, None, sources_used, context), tasks
+    
+    @staticmethod
+    def _extend_results(all_suggestions: List[Candidate], results) -> None:
+        """Kaynak sonuçlarını Candidate'e çevirip listeye ekle"""
         for result in results:
             if isinstance(result, Exception):
                 continue
             if isinstance(result, list):
-                # Robust Normalization: Ensure all items are Suggestion objects
+                # Robust Normalization: Ensure all items are Candidate objects
                 clean_result = []
                 for item in result:
-                    if isinstance(item, Suggestion):
+                    if isinstance(item, Candidate):
                          clean_result.append(item)
-                    elif isinstance(item, dict):
+                    else:
                         try:
-                            # Convert dict to Suggestion
-                            clean_result.append(Suggestion(**item))
+                            # Convert Suggestion / dict to Candidate
+                            candidate = Candidate.from_any(item)
                         except Exception:
                             # Skip invalid items
                             continue
+                        if candidate is not None:
+                            clean_result.append(candidate)
                 all_suggestions.extend(clean_result)
-        
+    
+    async def _refine(
+        self,
+        analysis: AnalyzedInput,
+        max_suggestions: int,
+        use_search: bool,
+        all_suggestions: List[Candidate],
+        sources_used: List[str],
+        context: Optional[dict],
+        start_time: datetime,
+        budget_ms: float,
+        final: bool = True
+    ) -> _Collected:
+        """Kaynak sonrası filtreler (final=False: ara sonuç, advanced context atlanır)"""
+        text = analysis.text
         # Smart Completions (m -> merhaba)
         if SMART_COMPLETIONS_AVAILABLE and get_smart_completions and use_search and text:
-            _words = text.split()
-            _lw = (_words[-1] if _words else text).strip()
+            _lw = analysis.last_word.strip()
             if 1 <= len(_lw) <= 4:
                 comps = get_smart_completions(_lw, max_suggestions * 3)
                 for d in comps:
-                    all_suggestions.insert(0, Suggestion(
+                    all_suggestions.insert(0, Candidate(
                         text=d["word"],
                         type=d.get("type", "smart_completion"),
                         score=d.get("score", 14.0),
@@ -367,7 +527,7 @@ class HybridOrchestrator:
                 all_suggestions_dict = [{'text': s.text, 'score': s.score, 'type': s.type, 'source': s.source, 'description': s.description} for s in all_suggestions]
                 filtered = context_analyzer.filter_suggestions_by_context(all_suggestions_dict, context)
                 if filtered and isinstance(filtered, list) and len(filtered) > 0:
-                    context_suggestions = [Suggestion(**s) for s in filtered if isinstance(s, dict)]
+                    context_suggestions = [Candidate.from_dict(s) for s in filtered if isinstance(s, dict)]
                     for ctx_sug in context_suggestions:
                         ctx_sug.score += 2.0
                     all_suggestions = context_suggestions + [s for s in all_suggestions if s not in context_suggestions]
@@ -376,7 +536,7 @@ class HybridOrchestrator:
         
         # Fuzzy Matching
         if text:
-            words = text.split()
+            words = analysis.words
             if words:
                 last_word = words[-1]
                 if len(last_word) > 4 and ADVANCED_FUZZY_AVAILABLE and advanced_fuzzy and LARGE_DICT_AVAILABLE and large_dictionary:
@@ -390,16 +550,18 @@ class HybridOrchestrator:
                         pass
         
         # Advanced Context
-        if ADVANCED_CONTEXT_AVAILABLE and advanced_context_completer and all_suggestions:
+        remaining_s = min(0.3, (budget_ms - (datetime.now() - start_time).total_seconds() * 1000) / 1000)
+        if final and ADVANCED_CONTEXT_AVAILABLE and advanced_context_completer and all_suggestions and remaining_s > 0:
             try:
                 context_suggestions = await asyncio.wait_for(
-                    asyncio.to_thread(advanced_context_completer.complete_with_full_context, text, max_suggestions),
-                    timeout=0.3
+                    # _prepare'daki çağrıyla aynı analiz: sonuç çoğunlukla önbellekten gelir
+                    asyncio.to_thread(advanced_context_completer.complete_with_full_context, analysis, max_suggestions),
+                    timeout=remaining_s
                 )
                 if context_suggestions:
                     for ctx_sug in context_suggestions[:5]:
                         if isinstance(ctx_sug, dict):
-                            all_suggestions.append(Suggestion(
+                            all_suggestions.append(Candidate(
                                 text=ctx_sug.get('text', ''),
                                 type=ctx_sug.get('type', 'phrase'),
                                 score=ctx_sug.get('score', 0.0),
@@ -410,8 +572,7 @@ class HybridOrchestrator:
                 pass
 
         # Relevance Filter
-        words = text.split()
-        last_word = words[-1] if words else text
+        last_word = analysis.last_word
         should_filter = len(all_suggestions) > 5 and len(last_word) >= 2
         
         if RELEVANCE_FILTER_AVAILABLE and relevance_filter and all_suggestions and should_filter:
@@ -427,41 +588,55 @@ class HybridOrchestrator:
                     }
                     for s in all_suggestions
                 ]
-                filtered = relevance_filter.filter_irrelevant(suggestions_dict, text, max_suggestions * 5)
+                filtered = relevance_filter.filter_irrelevant(suggestions_dict, analysis, max_suggestions * 5)
                 filtered = relevance_filter.remove_duplicates(filtered)
                 
                 if filtered and isinstance(filtered, list) and len(filtered) > 0:
-                    all_suggestions = [Suggestion(**s) for s in filtered if isinstance(s, dict)]
+                    all_suggestions = [Candidate.from_dict(s) for s in filtered if isinstance(s, dict)]
             except Exception:
                 pass
         
+        return _Collected(all_suggestions, corrected_text, sources_used, context)
+    
+    async def _personalize(
+        self,
+        shared: _Collected,
+        analysis: AnalyzedInput,
+        max_suggestions: int,
+        user_id: str,
+        start_time: datetime
+    ) -> PredictionResponse:
+        """Kullanıcıya özel sıralama, birleştirme ve fallback"""
+        text = analysis.text
+        # Paylaşılan sonuç değiştirilmez; kullanıcı bazlı sıralama kopyalar üzerinde yapılır
+        all_suggestions = [s.copy() for s in shared.suggestions]
+        sources_used = list(shared.sources_used)
+        corrected_text = shared.corrected_text
+        context = shared.context
+        
+        if shared.final:
+            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            return PredictionResponse(
+                suggestions=[s.to_suggestion() for s in all_suggestions],
+                processing_time_ms=processing_time,
+                sources_used=sources_used
+            )
+        
+        extra_features = settings.ENABLE_HEAVY_FEATURES
+        
         # ML Ranking
         if extra_features and ML_RANKING_AVAILABLE and ml_ranking and all_suggestions:
             try:
-                context_dict = {'text': text, 'domain': 'general'}
-                suggestions_dict = [
-                    {
-                        'text': s.text,
-                        'score': s.score,
-                        'type': s.type,
-                        'source': s.source,
-                        'frequency': getattr(s, 'frequency', 1),
-                        'context_match': True,
-                        'domain_match': True,
-                        'grammar_match': False,
-                        'semantic_score': 0.5
-                    }
-                    for s in all_suggestions
-                ]
+                context_dict = {'text': text, 'domain': analysis.domain}
+                suggestions_dict = _ml_ranking_input(all_suggestions)
                 ranked = ml_ranking.rank_suggestions(suggestions_dict, context_dict, user_id)
                 if ranked and isinstance(ranked, list):
-                    all_suggestions = [Suggestion(**s) for s in ranked if isinstance(s, dict)]
+                    all_suggestions = [Candidate.from_dict(s) for s in ranked if isinstance(s, dict)]
             except Exception as e:
                 logger.warning(f"ML ranking hatasi: {e}")
         
         # Prefix'in kendisini filtrele
-        _parts = text.split()
-        _lw = (_parts[-1] if _parts else text).strip().lower()
+        _lw = analysis.last_word.strip().lower()
         if _lw:
             # FIX: Handle dicts (AttributeError crash fix)
             all_suggestions = [
@@ -479,34 +654,17 @@ class HybridOrchestrator:
         
         # Fallback (Garantili Öneri)
         if not unique_suggestions and len(text.strip()) >= 1:
-             words = text.split()
-             last_word = words[-1] if words else text
-             last_word = last_word.strip()
+             last_word = analysis.last_word.strip()
              
              if len(last_word) >= 1:
                 try:
                     fallback_suggestions = await elasticsearch_predictor._local_search(last_word, max_suggestions * 5)
                     
-                    if not fallback_suggestions and LARGE_DICT_AVAILABLE and large_dictionary:
-                        try:
-                            results = large_dictionary.search(last_word.lower(), max_suggestions * 5)
-                            if results:
-                                for result in results:
-                                    fallback_suggestions.append(Suggestion(
-                                        text=result['word'],
-                                        type="dictionary",
-                                        score=result.get('score', 8.0),
-                                        description=f"Sözlük (frekans: {result.get('frequency', 0)})",
-                                        source="large_dictionary_fallback"
-                                    ))
-                        except Exception:
-                            pass
-                    
                     if not fallback_suggestions:
                         for word in elasticsearch_predictor.local_dictionary[:max_suggestions * 5]:
                             word_lower = word.lower()
                             if word_lower.startswith(last_word.lower()) and word_lower != last_word.lower():
-                                fallback_suggestions.append(Suggestion(
+                                fallback_suggestions.append(Candidate(
                                     text=word,
                                     type="dictionary",
                                     score=8.0,
@@ -556,22 +714,42 @@ class HybridOrchestrator:
                             continue
                 ranked = advanced_ranking.rank_suggestions(suggestions_dict, context, user_id, text)
                 if ranked and isinstance(ranked, list):
-                    unique_suggestions = [Suggestion(**s) for s in ranked[:max_suggestions] if isinstance(s, dict)]
+                    unique_suggestions = [Candidate.from_dict(s) for s in ranked[:max_suggestions] if isinstance(s, dict)]
             except Exception as e:
                 logger.warning(f"Advanced ranking hatasi: {e}")
 
         processing_time = (datetime.now() - start_time).total_seconds() * 1000
         
+        # Pydantic yalnızca yanıt sınırında: son liste bir kez Suggestion'a çevrilir
         return PredictionResponse(
-            suggestions=unique_suggestions,
+            suggestions=[s.to_suggestion() for s in unique_suggestions],
             corrected_text=corrected_text,
             processing_time_ms=round(processing_time, 2),
             sources_used=sources_used
         )
     
-    async def _get_ai_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    def _record_impression(self, response: PredictionResponse, text: str, user_id: str) -> None:
+        """Kullanıcıya gösterilen son liste: CTR gösterimi + learning-to-rank olay logu"""
+        shown = response.suggestions
+        if not shown:
+            return
         try:
-            suggestions = await transformer_predictor.predict(text, max_suggestions)
+            if ADVANCED_RANKING_AVAILABLE and advanced_ranking:
+                for s in shown:
+                    advanced_ranking.record_impression(s.text)
+            if ranking_log.enabled and ML_RANKING_AVAILABLE and ml_ranking:
+                features = ml_ranking.extract_feature_matrix(_ml_ranking_input(shown), {'text': text}, user_id)
+                ranking_log.log_impression(user_id, text, [s.text for s in shown], features)
+        except Exception as e:
+            logger.warning(f"Gösterim kaydı hatası: {e}")
+    
+    def end_session(self, session_id: str):
+        """Bağlantı kapandı: oturuma ait model cache'lerini bırak"""
+        transformer_predictor.end_session(session_id)
+    
+    async def _get_ai_predictions(self, text: str, max_suggestions: int, sources_used: List[str], session_id: Optional[str] = None):
+        try:
+            suggestions = await transformer_predictor.predict(text, max_suggestions, session_id=session_id)
             if suggestions:
                 sources_used.append("transformer")
             return suggestions
@@ -579,24 +757,22 @@ class HybridOrchestrator:
             logger.error(f"AI tahmin hatası: {e}")
             return []
     
-    async def _get_trie_predictions(self, prefix: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_lexicon_predictions(self, prefix: str, max_suggestions: int, sources_used: List[str]):
         suggestions = []
-        if TRIE_AVAILABLE and trie_index and hasattr(trie_index, 'word_count') and trie_index.word_count > 0:
-            try:
-                results = trie_index.search(prefix, max_suggestions)
-                for result in results:
-                    if isinstance(result, dict):
-                        suggestions.append(Suggestion(
-                            text=result.get('word', ''),
-                            type=result.get('type', 'dictionary'),
-                            score=result.get('score', 8.0),
-                            description=result.get('description', 'Sözlük (Trie)'),
-                            source=result.get('source', 'trie_index')
-                        ))
-                if suggestions:
-                    sources_used.append('trie_index')
-            except Exception as e:
-                logger.warning(f"Trie search hatasi: {e}")
+        try:
+            results = large_dictionary.search(prefix.lower(), max_suggestions)
+            for result in results:
+                suggestions.append(Candidate(
+                    text=result['word'],
+                    type="dictionary",
+                    score=result.get('score', 9.0),
+                    description=f"Sözlük (frekans: {result.get('frequency', 0)})",
+                    source="lexicon"
+                ))
+            if suggestions and 'lexicon' not in sources_used:
+                sources_used.append('lexicon')
+        except Exception as e:
+            logger.warning(f"Lexicon search hatasi: {e}")
         return suggestions
     
     async def _get_search_predictions(self, prefix: str, max_suggestions: int, sources_used: List[str]):
@@ -605,23 +781,9 @@ class HybridOrchestrator:
             if not prefix:
                 return []
             
+            # ES boş dönerse lexicon görevi zaten aynı prefix'i kapsıyor
             suggestions = await elasticsearch_predictor.search(prefix, max_suggestions)
             
-            if not suggestions and LARGE_DICT_AVAILABLE and large_dictionary:
-                try:
-                    results = large_dictionary.search(prefix.lower(), max_suggestions)
-                    if results:
-                        for result in results:
-                            suggestions.append(Suggestion(
-                                text=result['word'],
-                                type="dictionary",
-                                score=result.get('score', 8.0),
-                                description=f"Sözlük (frekans: {result.get('frequency', 0)})",
-                                source="large_dictionary"
-                            ))
-                except Exception:
-                    pass
-            
             if suggestions:
                 source_name = "elasticsearch" if elasticsearch_predictor.es_client else "local_dictionary"
                 if source_name not in sources_used:
@@ -632,30 +794,10 @@ class HybridOrchestrator:
             logger.error(f"Sözlük arama hatası: {e}")
             return []
 
-    async def _get_direct_large_dict_predictions(self, prefix: str, max_suggestions: int, sources_used: List[str]):
-        suggestions = []
-        try:
-            if LARGE_DICT_AVAILABLE and large_dictionary:
-                results = large_dictionary.search(prefix.lower(), max_suggestions)
-                if results:
-                    for result in results:
-                        suggestions.append(Suggestion(
-                            text=result['word'],
-                            type="dictionary",
-                            score=result.get('score', 9.0),
-                            description=f"Sözlük (frekans: {result.get('frequency', 0)})",
-                            source="large_dictionary_direct"
-                        ))
-                    if suggestions and 'large_dictionary_direct' not in sources_used:
-                        sources_used.append('large_dictionary_direct')
-        except Exception as e:
-            logger.warning(f"Direct large dict search hatasi: {e}")
-        return suggestions
-
-    async def _get_ngram_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_ngram_predictions(self, analysis: AnalyzedInput, max_suggestions: int, sources_used: List[str]):
         try:
             if ADVANCED_NGRAM_AVAILABLE and advanced_ngram and hasattr(advanced_ngram, 'predict_next_word'):
-                results = advanced_ngram.predict_next_word(text, max_suggestions)
+                results = advanced_ngram.predict_next_word(analysis, max_suggestions)
                 suggestions = []
                 if results and isinstance(results, list):
                     for result in results:
@@ -664,7 +806,7 @@ class HybridOrchestrator:
                         txt = result.get('text') or result.get('word', '')
                         if not txt:
                             continue
-                        suggestions.append(Suggestion(
+                        suggestions.append(Candidate(
                             text=txt,
                             type=result.get('type', 'ngram'),
                             score=result.get('score', 8.5),
@@ -679,15 +821,15 @@ class HybridOrchestrator:
             logger.warning(f"N-gram prediction hatasi: {e}")
             return []
 
-    async def _get_phrase_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_phrase_predictions(self, analysis: AnalyzedInput, max_suggestions: int, sources_used: List[str]):
         try:
             if PHRASE_COMPLETION_AVAILABLE and phrase_completer and hasattr(phrase_completer, 'complete_phrase'):
-                results = phrase_completer.complete_phrase(text, max_suggestions)
+                results = phrase_completer.complete_phrase(analysis, max_suggestions)
                 suggestions = []
                 if results and isinstance(results, list):
                     for result in results:
                         if isinstance(result, dict) and 'text' in result:
-                            suggestions.append(Suggestion(
+                            suggestions.append(Candidate(
                                 text=result['text'],
                                 type=result.get('type', 'phrase'),
                                 score=result.get('score', 8.0),
@@ -702,27 +844,16 @@ class HybridOrchestrator:
             logger.warning(f"Phrase completion hatasi: {e}")
             return []
     
-    async def _get_domain_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_domain_predictions(self, analysis: AnalyzedInput, max_suggestions: int, sources_used: List[str]):
         try:
             if DOMAIN_DICT_AVAILABLE and domain_manager and hasattr(domain_manager, 'get_suggestions'):
-                words = text.split()
-                last_word = words[-1] if words else text
-                context = None
-                if CONTEXT_ANALYZER_AVAILABLE and context_analyzer and hasattr(context_analyzer, 'analyze'):
-                    try:
-                        context_analysis = context_analyzer.analyze(text)
-                        if context_analysis and isinstance(context_analysis, dict):
-                            if context_analysis.get('topic') in ['customer_service', 'technical', 'ecommerce']:
-                                context = context_analysis.get('topic')
-                    except Exception:
-                        pass
-                
-                results = domain_manager.get_suggestions(last_word, context, max_suggestions)
+                # Domain tüm metinden bir kez tespit edilir (AnalyzedInput.domain)
+                results = domain_manager.get_suggestions(analysis.last_word, analysis.domain, max_suggestions)
                 suggestions = []
                 if results and isinstance(results, list):
                     for result in results:
                         if isinstance(result, dict) and 'text' in result:
-                            suggestions.append(Suggestion(
+                            suggestions.append(Candidate(
                                 text=result['text'],
                                 type=result.get('type', 'domain'),
                                 score=result.get('score', 8.5),
@@ -737,15 +868,15 @@ class HybridOrchestrator:
             logger.warning(f"Domain dictionary hatasi: {e}")
             return []
     
-    async def _get_emoji_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_emoji_predictions(self, analysis: AnalyzedInput, max_suggestions: int, sources_used: List[str]):
         try:
             if EMOJI_AVAILABLE and emoji_suggester and hasattr(emoji_suggester, 'suggest_emojis'):
-                results = emoji_suggester.suggest_emojis(text, max_suggestions)
+                results = emoji_suggester.suggest_emojis(analysis, max_suggestions)
                 suggestions = []
                 if results and isinstance(results, list):
                     for result in results:
                         if isinstance(result, dict) and 'text' in result:
-                            suggestions.append(Suggestion(
+                            suggestions.append(Candidate(
                                 text=result['text'],
                                 type=result.get('type', 'emoji'),
                                 score=result.get('score', 8.0),
@@ -760,16 +891,16 @@ class HybridOrchestrator:
             logger.warning(f"Emoji suggestion hatasi: {e}")
             return []
     
-    async def _get_template_predictions(self, text: str, max_suggestions: int, sources_used: List[str]):
+    async def _get_template_predictions(self, analysis: AnalyzedInput, max_suggestions: int, sources_used: List[str]):
         try:
             if SMART_TEMPLATES_AVAILABLE and smart_template_manager and hasattr(smart_template_manager, 'get_templates'):
-                if text.startswith('/') or any(word in text.lower() for word in ['sipariş', 'müşteri', 'api', 'database']):
-                    results = smart_template_manager.get_templates(text, max_suggestions)
+                if analysis.text.startswith('/') or not analysis.keywords.isdisjoint(_TEMPLATE_TRIGGERS):
+                    results = smart_template_manager.get_templates(analysis, max_suggestions)
                     suggestions = []
                     if results and isinstance(results, list):
                         for result in results:
                             if isinstance(result, dict) and 'text' in result:
-                                suggestions.append(Suggestion(
+                                suggestions.append(Candidate(
                                     text=result['text'],
                                     type=result.get('type', 'template'),
                                     score=result.get('score', 9.0),
@@ -784,11 +915,11 @@ class HybridOrchestrator:
             logger.warning(f"Smart template hatasi: {e}")
             return []
 
-    def _merge_and_rank(self, suggestions: List[Suggestion], max_suggestions: int) -> List[Suggestion]:
+    def _merge_and_rank(self, suggestions: List[Candidate], max_suggestions: int) -> List[Candidate]:
         if not suggestions:
             return []
         
-        seen = set()
+        seen = {}
         unique_suggestions = []
         
         for sug in suggestions:
@@ -797,13 +928,12 @@ class HybridOrchestrator:
             key = sug.text.lower().strip()
             if not key:
                 continue
-            if key not in seen:
-                seen.add(key)
+            existing = seen.get(key)
+            if existing is None:
+                seen[key] = sug
                 unique_suggestions.append(sug)
             else:
-                existing = next((s for s in unique_suggestions if s.text.lower() == key), None)
-                if existing:
-                    existing.score = max(existing.score, sug.score) + 0.5
+                existing.score = max(existing.score, sug.score) + 0.5
         
         if COMMON_WORDS_AVAILABLE and is_common and first_word_common:
             for s in unique_suggestions:
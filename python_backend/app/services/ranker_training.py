@@ -0,0 +1,348 @@
+"""
+Offline learning-to-rank: gösterim / seçim logundan LambdaRank eğitimi.
+
+app.core.ranking_log'un biriktirdiği olaylar akış halinde okunur, her seçim
+ilgili gösterimlere bağlanarak sorgu grupları kurulur (seçilen aday 1, diğerleri
+0) ve LambdaRank modeli eğitilir:
+
+    lightgbm kuruluysa   LGBMRanker(objective="lambdarank")
+    xgboost kuruluysa    XGBRanker(objective="rank:ndcg")
+    hiçbiri yoksa        numpy lineer LambdaRank (|ΔNDCG| ağırlıklı çift
+                         gradyanları, gruplar dolgulu matrislerle toplu)
+
+Eğitim ayrı bir süreçte (spawn) çalışır; event loop ve sıralama etkilenmez.
+Sonuç kompakt değerlendiriciye derlenir (app.features.compiled_ranker: lineer
+ya da düz ağaç dizileri), skor aralığı [0, 1]'e kalibre edilir ve eğitimde
+kullanılmayan en yeni grupların (HOLDOUT_FRACTION) NDCG'si mevcut heuristikten
+kötü değilse RANKER_MODEL_PATH'e atomik yazılıp ml_ranking'e sıcak takılır
+(install_model).
+
+Birden fazla worker: model dosyası ortak kaynaktır. Periyodik görev
+(RANKER_RETRAIN_INTERVAL_S > 0) dosya periyottan eskiyse eğitir, değilse
+başka worker'ın yazdığı yeni modeli yükler. Elle tetikleme: POST /train_ranker.
+
+Bağımsız çalıştırma (log -> model dosyası; çalışan worker'lar sonraki
+periyotta ya da /train_ranker ile yükler):
+  cd python_backend
+  python -m app.services.ranker_training --backend auto
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.logs import logger
+from app.core.ranking_log import RankingEventLog, build_groups, ranking_log, read_events
+from app.features.compiled_ranker import (
+    LinearRanker, calibrate, from_lightgbm, from_xgboost, load_ranker, save_ranker,
+)
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    lgb = None
+    LIGHTGBM_AVAILABLE = False
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    xgb = None
+    XGBOOST_AVAILABLE = False
+
+# Kabul kontrolü için eğitimden ayrılan en yeni grupların oranı
+HOLDOUT_FRACTION = 0.2
+
+
+def _padded(group_sizes: np.ndarray):
+    """Grupları (grup x en büyük grup) matrislere açan indeks + maske"""
+    offsets = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    columns = np.arange(int(group_sizes.max()))
+    mask = columns[None, :] < group_sizes[:, None]
+    index = np.where(mask, offsets[:, None] + columns[None, :], 0)
+    return index, mask
+
+
+def _dcg_terms(scores: np.ndarray, labels: np.ndarray, mask: np.ndarray):
+    """Kazançlar, skora göre iskontolar ve ideal DCG (dolgulu satırlar)"""
+    gains = np.where(mask, np.power(2.0, labels) - 1.0, 0.0)
+    order = np.argsort(np.where(mask, -scores, np.inf), axis=1, kind="stable")
+    ranks = np.argsort(order, axis=1)
+    discounts = np.where(mask, 1.0 / np.log2(ranks + 2.0), 0.0)
+    ideal = -np.sort(-gains, axis=1) @ (1.0 / np.log2(np.arange(gains.shape[1]) + 2.0))
+    return gains, discounts, ideal
+
+
+def mean_ndcg(scores: np.ndarray, labels: np.ndarray, group_sizes: np.ndarray) -> float:
+    """Gruplar üzerinde ortalama NDCG (pozitifi olmayan gruplar hariç)"""
+    index, mask = _padded(group_sizes)
+    gains, discounts, ideal = _dcg_terms(scores[index], labels[index], mask)
+    valid = ideal > 0
+    if not valid.any():
+        return 0.0
+    return float(((gains * discounts).sum(axis=1)[valid] / ideal[valid]).mean())
+
+
+def fit_linear_lambdarank(
+    X: np.ndarray,
+    labels: np.ndarray,
+    group_sizes: np.ndarray,
+    init_weights: Optional[Sequence[float]] = None,
+    epochs: int = 60,
+    learning_rate: float = 0.5,
+    l2: float = 1e-3,
+    sigma: float = 1.0,
+    chunk: int = 2048,
+) -> LinearRanker:
+    """Lineer LambdaRank: her çift (i seçildi, j seçilmedi) için σ·ρ·|ΔNDCG| gradyanı"""
+    index, mask = _padded(group_sizes)
+    weights = np.zeros(X.shape[1]) if init_weights is None else np.asarray(init_weights, dtype=np.float64).copy()
+    n_groups = len(group_sizes)
+    for _ in range(epochs):
+        scores = X @ weights
+        grad = np.zeros_like(weights)
+        for start in range(0, n_groups, chunk):
+            idx, m = index[start:start + chunk], mask[start:start + chunk]
+            S, Y, Xg = scores[idx], labels[idx], X[idx]
+            gains, discounts, ideal = _dcg_terms(S, Y, m)
+            pair = (Y[:, :, None] > Y[:, None, :]) & m[:, :, None] & m[:, None, :] & (ideal > 0)[:, None, None]
+            delta = np.abs((gains[:, :, None] - gains[:, None, :]) * (discounts[:, :, None] - discounts[:, None, :]))
+            delta /= np.where(ideal > 0, ideal, 1.0)[:, None, None]
+            # ρ = 1 / (1 + exp(σ (s_i - s_j))), taşmasız
+            rho = 0.5 * (1.0 - np.tanh(0.5 * sigma * (S[:, :, None] - S[:, None, :])))
+            lam = np.where(pair, sigma * rho * delta, 0.0)
+            lambdas = lam.sum(axis=2) - lam.sum(axis=1)
+            grad += np.einsum("cg,cgd->d", lambdas, Xg)
+        weights += learning_rate * (grad / n_groups - l2 * weights)
+    return LinearRanker(weights)
+
+
+def _fit(X: np.ndarray, labels: np.ndarray, group_sizes: np.ndarray, baseline: Sequence[float], backend: str):
+    if backend in ("auto", "lightgbm") and LIGHTGBM_AVAILABLE:
+        model = lgb.LGBMRanker(objective="lambdarank", n_estimators=100, num_leaves=15,
+                               learning_rate=0.1, min_child_samples=5, verbose=-1)
+        model.fit(X, labels, group=group_sizes)
+        return from_lightgbm(model.booster_, X.shape[1])
+    if backend in ("auto", "xgboost") and XGBOOST_AVAILABLE:
+        model = xgb.XGBRanker(objective="rank:ndcg", n_estimators=100, max_depth=4, learning_rate=0.1)
+        model.fit(X, labels, group=group_sizes)
+        return from_xgboost(model.get_booster(), X.shape[1])
+    return fit_linear_lambdarank(X, labels, group_sizes, init_weights=baseline)
+
+
+def _stack(groups: Sequence) -> tuple:
+    """[(satırlar, etiketler)] -> (X, etiketler, grup boyutları)"""
+    X = np.asarray([row for rows, _ in groups for row in rows], dtype=np.float64)
+    labels = np.asarray([label for _, group_labels in groups for label in group_labels], dtype=np.float64)
+    group_sizes = np.asarray([len(group_labels) for _, group_labels in groups], dtype=np.intp)
+    return X, labels, group_sizes
+
+
+def train_from_log(
+    paths: List[str],
+    model_path: str,
+    n_features: int,
+    baseline_weights: Sequence[float],
+    window_s: float = 120.0,
+    min_groups: int = 50,
+    max_groups: int = 200000,
+    backend: str = "auto",
+) -> Dict[str, Any]:
+    """Log -> gruplar -> LambdaRank -> derlenmiş model dosyası (worker sürecinde çalışır)"""
+    started = time.perf_counter()
+    # En yeni max_groups grup (eski davranış unutulur)
+    groups = deque(
+        ((rows, labels) for rows, labels in build_groups(read_events(paths), window_s)
+         if all(len(row) == n_features for row in rows)),
+        maxlen=max_groups,
+    )
+    result: Dict[str, Any] = {"groups": len(groups), "rows": sum(len(labels) for _, labels in groups)}
+    if len(groups) < min_groups:
+        return {**result, "status": "skipped", "reason": f"en az {min_groups} grup gerekli"}
+
+    # En yeni grupların bir kısmı eğitime girmez: kabul kontrolü görülmemiş veride yapılır
+    groups = list(groups)
+    holdout = max(1, int(len(groups) * HOLDOUT_FRACTION))
+    X, labels, group_sizes = _stack(groups[:-holdout])
+    X_test, labels_test, sizes_test = _stack(groups[-holdout:])
+
+    ranker = calibrate(_fit(X, labels, group_sizes, baseline_weights, backend), X)
+    ndcg = mean_ndcg(ranker.predict(X_test), labels_test, sizes_test)
+    baseline_ndcg = mean_ndcg(X_test @ np.asarray(baseline_weights, dtype=np.float64), labels_test, sizes_test)
+    result.update(kind=ranker.kind, holdout_groups=holdout, ndcg=round(ndcg, 4), baseline_ndcg=round(baseline_ndcg, 4),
+                  train_ms=round((time.perf_counter() - started) * 1000, 1))
+    if ndcg < baseline_ndcg:
+        return {**result, "status": "rejected"}
+    save_ranker(model_path, ranker, trained_at=datetime.now().isoformat(timespec="seconds"),
+                groups=result["groups"], ndcg=result["ndcg"], baseline_ndcg=result["baseline_ndcg"])
+    return {**result, "status": "trained"}
+
+
+def _ml_ranking():
+    try:
+        from app.features.ml_ranking import ml_ranking
+        return ml_ranking
+    except ImportError:
+        return None
+
+
+class RankerTrainer:
+    """Log'dan periyodik / elle eğitim (ayrı süreç) ve modelin ml_ranking'e sıcak takılması"""
+
+    def __init__(
+        self,
+        log: RankingEventLog,
+        model_path: str,
+        interval_s: float = 0.0,
+        min_groups: int = 50,
+        window_s: float = 120.0,
+    ):
+        self.log = log
+        self.model_path = model_path
+        self.interval_s = interval_s
+        self.min_groups = min_groups
+        self.window_s = window_s
+        self.last_result: Dict[str, Any] = {}
+        self.model_info: Dict[str, Any] = {}
+        self.trainings = 0
+        self.swaps = 0
+        self._model_mtime: Optional[float] = None
+        self._running = False  # tek event loop: kontrol + atama arasında başka görev çalışmaz
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> bool:
+        """Model dosyası değiştiyse yükleyip ml_ranking'e tak"""
+        target = _ml_ranking()
+        if target is None or not self.model_path or not os.path.exists(self.model_path):
+            return False
+        mtime = os.path.getmtime(self.model_path)
+        if mtime == self._model_mtime:
+            return False
+        try:
+            ranker, spec = load_ranker(self.model_path, n_features=len(target.feature_names))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ranking modeli yüklenemedi ({self.model_path}): {e}")
+            return False
+        self._model_mtime = mtime
+        target.install_model(ranker)
+        self.swaps += 1
+        self.model_info = {k: spec.get(k) for k in ("kind", "trained_at", "groups", "ndcg", "baseline_ndcg")}
+        logger.info(f"Ranking modeli yüklendi: {self.model_info}")
+        return True
+
+    async def retrain(self, backend: str = "auto") -> Dict[str, Any]:
+        """Log'u ayrı süreçte eğit; model kabul edilirse sıcak tak"""
+        target = _ml_ranking()
+        if target is None:
+            return {"status": "unavailable"}
+        if self._running:
+            return {"status": "running"}
+        self._running = True
+        try:
+            self.log.flush()
+            loop = asyncio.get_running_loop()
+            try:
+                # spawn: çok thread'li süreçten fork edilmez; çocuk yalnızca bu modülü yükler
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    result = await loop.run_in_executor(
+                        pool, train_from_log, self.log.paths(), self.model_path, len(target.feature_names),
+                        tuple(target.HEURISTIC_WEIGHTS), self.window_s, self.min_groups, 200000, backend,
+                    )
+            except Exception as e:
+                logger.error(f"Ranking modeli eğitim hatası: {e}")
+                result = {"status": "error", "error": str(e)}
+            self.trainings += 1
+            if result.get("status") == "trained":
+                self.load()
+            self.last_result = result
+            logger.info(f"Ranking modeli eğitimi: {result}")
+            return result
+        finally:
+            self._running = False
+
+    async def _periodic(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                age = time.time() - os.path.getmtime(self.model_path) if os.path.exists(self.model_path) else None
+                if age is None or age >= self.interval_s:
+                    await self.retrain()
+                else:
+                    self.load()  # başka worker yeni model yazmış olabilir
+            except Exception as e:
+                logger.error(f"Periyodik ranking eğitimi hatası: {e}")
+
+    def start(self) -> None:
+        """Kayıtlı modeli yükle; RANKER_RETRAIN_INTERVAL_S > 0 ise periyodik eğitimi başlat"""
+        self.load()
+        if self.interval_s > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._periodic())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.log.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_info,
+            "trainings": self.trainings,
+            "swaps": self.swaps,
+            "running": self._running,
+            "last_result": self.last_result,
+            "log": self.log.snapshot(),
+        }
+
+
+def _build_trainer() -> RankerTrainer:
+    from app.core.config import settings
+
+    return RankerTrainer(
+        ranking_log,
+        settings.RANKER_MODEL_PATH,
+        interval_s=settings.RANKER_RETRAIN_INTERVAL_S,
+        min_groups=settings.RANKER_MIN_GROUPS,
+        window_s=settings.RANKER_MATCH_WINDOW_S,
+    )
+
+
+ranker_trainer = _build_trainer()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Gösterim / seçim logundan LambdaRank eğit")
+    parser.add_argument("--log", nargs="+", default=None, help="olay log dosyaları (varsayılan RANKING_LOG_PATH)")
+    parser.add_argument("--output", default=settings.RANKER_MODEL_PATH)
+    parser.add_argument("--backend", choices=["auto", "lightgbm", "xgboost", "linear"], default="auto")
+    parser.add_argument("--min-groups", type=int, default=settings.RANKER_MIN_GROUPS)
+    parser.add_argument("--window-s", type=float, default=settings.RANKER_MATCH_WINDOW_S)
+    args = parser.parse_args(argv)
+
+    target = _ml_ranking()
+    if target is None:
+        raise SystemExit("ML ranking kullanılamıyor")
+    result = train_from_log(
+        args.log or ranking_log.paths(), args.output, len(target.feature_names),
+        target.HEURISTIC_WEIGHTS, args.window_s, args.min_groups, backend=args.backend,
+    )
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import os
 import asyncio
 from typing import List, Optional
-from app.models.schemas import Suggestion
+from app.models.candidate import Candidate
 from app.core.config import settings
 from app.core.logs import logger
 
@@ -33,6 +33,14 @@ class ElasticsearchPredictor:
         """Yerel sözlük yükle (Elasticsearch yoksa)"""
         if self._dictionary_loaded:
             return self.local_dictionary
+
+        # Ortak lexicon: TXT sözlük large_dictionary tarafından lexicon'a yüklenir,
+        # burada ayrı bir kopya tutulmaz
+        if LARGE_DICT_AVAILABLE and large_dictionary:
+            words = large_dictionary.words
+            if words:
+                self._dictionary_loaded = True
+                return words
             
         # Büyük Türkçe sözlük path
         dictionary_file = os.path.join(settings.BASE_DIR, "turkish_dictionary.txt")
@@ -110,19 +118,19 @@ class ElasticsearchPredictor:
             logger.info("Elasticsearch kullanilamiyor, yerel sozluk kullanilacak (normal)")
             self.es_client = None
     
-    async def search(self, prefix: str, max_results: int = 50) -> List[Suggestion]:
+    async def search(self, prefix: str, max_results: int = 50) -> List[Candidate]:
         if self.es_client:
             return await self._elasticsearch_search(prefix, max_results)
         else:
             return await self._local_search(prefix, max_results)
     
-    async def _elasticsearch_search(self, prefix: str, max_results: int) -> List[Suggestion]:
+    async def _elasticsearch_search(self, prefix: str, max_results: int) -> List[Candidate]:
         if ES_MANAGER_AVAILABLE and es_manager and hasattr(es_manager, 'available') and es_manager.available:
             try:
                 if hasattr(es_manager, 'search'):
                     results = await es_manager.search(prefix, max_results)
                     if results and isinstance(results, list):
-                        return [Suggestion(**r) for r in results if isinstance(r, dict)]
+                        return [Candidate.from_dict(r) for r in results if isinstance(r, dict)]
             except Exception as e:
                 logger.warning(f"ES manager search hatasi: {e}")
         
@@ -146,7 +154,7 @@ class ElasticsearchPredictor:
             suggestions = []
             
             for option in response.get('suggest', {}).get('word-suggest', [{}])[0].get('options', []):
-                suggestions.append(Suggestion(
+                suggestions.append(Candidate(
                     text=option['text'],
                     type="dictionary",
                     score=8.0 + (option.get('score', 0) / 100),
@@ -159,7 +167,7 @@ class ElasticsearchPredictor:
             logger.error(f"Elasticsearch arama hatası: {e}")
             return await self._local_search(prefix, max_results)
     
-    async def _local_search(self, prefix: str, max_results: int) -> List[Suggestion]:
+    async def _local_search(self, prefix: str, max_results: int) -> List[Candidate]:
         suggestions = []
         prefix_lower = prefix.lower().strip()
         
@@ -174,7 +182,7 @@ class ElasticsearchPredictor:
                 results = large_dictionary.search(prefix_lower, max_results)
                 if results:
                     for result in results:
-                        suggestions.append(Suggestion(
+                        suggestions.append(Candidate(
                             text=result['word'],
                             type="dictionary",
                             score=result.get('score', 8.0),
@@ -196,7 +204,7 @@ class ElasticsearchPredictor:
                 else:
                     score = (len(prefix_lower) / len(word_lower)) * 8.5
                 
-                suggestions.append(Suggestion(
+                suggestions.append(Candidate(
                     text=word,
                     type="dictionary",
                     score=score,
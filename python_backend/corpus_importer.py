@@ -9,10 +9,11 @@ Kullanım:
 
 import sys
 import os
-import json
 import re
 from collections import Counter
 
+from app.core.dictfile import append_dictionary, iter_source_entries, thd_path_for, write_dictionary
+
 def clean_text(text):
     # Sadece Türkçe karakterler ve harfler kalsın
     text = text.lower()
@@ -50,40 +51,29 @@ def import_corpus(file_path):
     word_counts = Counter(words)
     print(f"🔍 Benzersiz kelime sayısı: {len(word_counts)}")
 
-    # 4. Mevcut Sözlüğü Yükle
+    # 4. Mevcut Sözlük (.thd - binary, sadece sonuna eklenir)
     current_dict_path = os.path.join("improvements", "turkish_dictionary.json")
-    if not os.path.exists(current_dict_path):
-        # Eğer yoksa yeni oluştur
-        current_data = {"words": []}
-    else:
+    binary_dict_path = thd_path_for(current_dict_path)
+    if not os.path.exists(binary_dict_path) and os.path.exists(current_dict_path):
+        # İlk kullanımda eski JSON sözlüğü bir kez binary formata çevir
         try:
-            with open(current_dict_path, 'r', encoding='utf-8') as f:
-                current_data = json.load(f)
-        except:
-            current_data = {"words": []}
+            migrated = write_dictionary(binary_dict_path, iter_source_entries(current_dict_path))
+            print(f"📦 JSON sözlük binary formata çevrildi: {migrated} kelime")
+        except Exception as e:
+            print(f"⚠️ JSON sözlük çevrilemedi, yeni sözlük oluşturulacak: {e}")
 
-    existing_words = set(current_data.get("words", []))
-    print(f"📚 Mevcut sözlük boyutu: {len(existing_words)} kelime")
+    # 5. Yeni Kelimeleri Ekle (1'den fazla geçenler - gürültüyü azaltmak için)
+    candidates = [
+        (word, count) for word, count in word_counts.most_common()
+        if len(word) > 1 and count > 1
+    ]
 
-    # 5. Yeni Kelimeleri Ekle
-    new_words_count = 0
-    for word, count in word_counts.items():
-        if word not in existing_words and len(word) > 1:
-            if count > 1: # Sadece 1'den fazla geçenleri ekle (gürüntüyü azaltmak için)
-                existing_words.add(word)
-                new_words_count += 1
-    
-    # 6. Kaydet
-    print(f"💾 Kaydediliyor... ({new_words_count} yeni kelime eklendi)")
-    
-    # Listeye çevir ve sırala
-    sorted_words = sorted(list(existing_words))
-    
-    with open(current_dict_path, 'w', encoding='utf-8') as f:
-        json.dump({"words": sorted_words}, f, ensure_ascii=False) # indent=0 for smaller size
+    # 6. Kaydet (mevcut kelimeler atlanır, dosyanın tamamı yeniden yazılmaz)
+    print("💾 Kaydediliyor...")
+    new_words_count = append_dictionary(binary_dict_path, candidates)
 
     print("✅ İŞLEM TAMAMLANDI!")
-    print(f"🚀 Yeni Sözlük Boyutu: {len(sorted_words)} kelime")
+    print(f"🚀 Yeni eklenen: {new_words_count} kelime -> {binary_dict_path}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -0,0 +1,132 @@
+"""
+Transformer mikro-batch benchmark'ı: istek başına generate vs MicroBatcher.
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_batching                       # küçük rastgele GPT-2 (indirme yok)
+  python -m scripts.bench_batching --model gorkemgoknar/gpt2-small-turkish
+  python -m scripts.bench_batching --clients 50 --batch-size 16 --wait-ms 5
+
+Aynı anda --clients kadar istek gönderilir; ilk yol her isteği ayrı generate
+çağrısıyla (eski davranış), ikinci yol MicroBatcher ile çalıştırır.
+--mode score ile MicroBatcher tek forward pass'li skorlama modunu
+(TRANSFORMER_MODE=score) kullanır.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import torch  # noqa: E402
+
+from app.core.batching import MicroBatcher, generate_batch  # noqa: E402
+from app.core.next_word import score_next_words  # noqa: E402
+
+PROMPTS = [
+    "merhaba size nasıl",
+    "siparişiniz kargoya",
+    "teşekkür ederim iyi",
+    "fatura ödemesi için",
+    "müşteri hizmetlerine bağlanmak",
+    "iade talebiniz",
+    "kampanya detayları için",
+    "yardımcı olabileceğim başka",
+]
+
+
+def tiny_model() -> Tuple[object, object]:
+    """Ağırlıkları rastgele küçük GPT-2 + örnek cümlelerle eğitilmiş byte-level BPE tokenizer (ağ erişimi gerekmez)"""
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    backend = ByteLevelBPETokenizer()
+    backend.train_from_iterator(PROMPTS * 20, vocab_size=400, min_frequency=1, special_tokens=["<|endoftext|>"])
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend._tokenizer, eos_token="<|endoftext|>", pad_token="<|endoftext|>")
+
+    config = GPT2Config(vocab_size=tokenizer.vocab_size, n_positions=256, n_embd=256, n_layer=4, n_head=4)
+    model = GPT2LMHeadModel(config)
+    model.eval()
+    return model, tokenizer
+
+
+def load_model(name: Optional[str]):
+    if not name:
+        return tiny_model()
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = AutoModelForCausalLM.from_pretrained(name)
+    model.eval()
+    return model, tokenizer
+
+
+async def run_unbatched(model, tokenizer, requests: List[Tuple[str, int]]) -> float:
+    """Eski yol: her istek kendi generate çağrısı (aynı model, sırayla)"""
+    lock = asyncio.Lock()
+
+    async def one(request):
+        async with lock:
+            return await asyncio.to_thread(generate_batch, model, tokenizer, [request], do_sample=True, temperature=0.7)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in requests))
+    return time.perf_counter() - start
+
+
+async def run_batched(model, tokenizer, requests, batch_size: int, wait_ms: float, mode: str) -> Tuple[float, dict]:
+    if mode == "score":
+        run_batch = lambda items: score_next_words(model, tokenizer, items)  # noqa: E731
+    else:
+        run_batch = lambda items: generate_batch(model, tokenizer, items, do_sample=True, temperature=0.7)  # noqa: E731
+    batcher = MicroBatcher(
+        run_batch,
+        max_batch_size=batch_size,
+        max_wait_ms=wait_ms,
+        name="bench-batch",
+    )
+    start = time.perf_counter()
+    await asyncio.gather(*(batcher.submit(r) for r in requests))
+    return time.perf_counter() - start, batcher.get_stats()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Transformer mikro-batch benchmark'ı")
+    parser.add_argument("--model", default=None, help="HF model adı (varsayılan: küçük rastgele GPT-2)")
+    parser.add_argument("--clients", type=int, default=50, help="Eş zamanlı istek sayısı")
+    parser.add_argument("--suggestions", type=int, default=5, help="İstek başına öneri (num_return_sequences)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=0, help="torch thread sayısı (0: varsayılan)")
+    parser.add_argument("--mode", choices=["generate", "score"], default="generate", help="MicroBatcher yolu")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    model, tokenizer = load_model(args.model)
+    requests = [(PROMPTS[i % len(PROMPTS)], args.suggestions) for i in range(args.clients)]
+
+    # Isınma
+    generate_batch(model, tokenizer, requests[:2], do_sample=True, temperature=0.7)
+
+    unbatched = asyncio.run(run_unbatched(model, tokenizer, requests))
+    batched, stats = asyncio.run(run_batched(model, tokenizer, requests, args.batch_size, args.wait_ms, args.mode))
+
+    print(f"model: {args.model or 'tiny-random-gpt2'}  clients: {args.clients}  threads: {torch.get_num_threads()}")
+    print(f"istek başına generate : {unbatched:.2f}s  ({args.clients / unbatched:.1f} istek/s)")
+    print(f"MicroBatcher ({args.mode:8s}): {batched:.2f}s  ({args.clients / batched:.1f} istek/s)  "
+          f"batch={args.batch_size} wait={args.wait_ms}ms ort. batch={stats['avg_batch_size']}")
+    print(f"hızlanma              : x{unbatched / batched:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Tuş vuruşu başına aday (öneri) tahsis benchmark'ı.
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_candidates
+  python -m scripts.bench_candidates --max-suggestions 80 --repeat 5
+
+MESSAGES içindeki mesajlar harf harf yazılıyormuş gibi orchestrator.predict
+çağrılır. Tuş başına ortalama gecikme, tepe tracemalloc belleği, Pydantic
+Suggestion doğrulaması ve Candidate oluşturma sayısı raporlanır.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models.candidate import Candidate  # noqa: E402
+from app.models.schemas import Suggestion  # noqa: E402
+from app.services.orchestrator import orchestrator  # noqa: E402
+
+MESSAGES = [
+    "merhaba nasılsınız",
+    "siparişiniz kargoya verildi",
+    "teşekkür ederim iyi günler",
+    "size nasıl yardımcı olabilirim",
+]
+
+
+def count_calls(cls, counter: dict, key: str) -> None:
+    original = cls.__init__
+
+    def wrapper(self, *args, **kwargs):
+        counter[key] += 1
+        original(self, *args, **kwargs)
+
+    cls.__init__ = wrapper
+
+
+def keystrokes() -> List[str]:
+    return [message[:i] for message in MESSAGES for i in range(1, len(message) + 1)]
+
+
+async def run(texts: List[str], max_suggestions: int, repeat: int) -> None:
+    counter = {"suggestion": 0, "candidate": 0}
+    count_calls(Suggestion, counter, "suggestion")
+    count_calls(Candidate, counter, "candidate")
+
+    for text in texts:  # ısınma: sözlükler, cache'ler, cost model
+        await orchestrator.predict(text, max_suggestions=max_suggestions, latency_budget_ms=1000)
+    counter.update(suggestion=0, candidate=0)
+
+    peaks = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            await orchestrator.predict(text, max_suggestions=max_suggestions, latency_budget_ms=1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    n = repeat * len(texts)
+    print(f"tuş vuruşu            : {n}")
+    print(f"gecikme (tracemalloc) : {elapsed / n * 1000:.2f} ms/tuş")
+    print(f"tepe bellek           : {sum(peaks) / n / 1024:.1f} KB/tuş")
+    print(f"Suggestion doğrulaması: {counter['suggestion'] / n:.1f} /tuş")
+    print(f"Candidate             : {counter['candidate'] / n:.1f} /tuş")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Tuş başına aday tahsis benchmark'ı")
+    parser.add_argument("--max-suggestions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    asyncio.run(run(keystrokes(), args.max_suggestions, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Oturum KV cache benchmark'ı: uzun mesajda tuş başına skorlama gecikmesi.
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_kv_cache                      # küçük rastgele GPT-2 (indirme yok)
+  python -m scripts.bench_kv_cache --model gorkemgoknar/gpt2-small-turkish --chars 2000
+
+Mesaj karakter karakter "yazılır"; her adımda score_next_words önce cache'siz
+(tüm bağlam encode edilir), sonra aynı oturum id'siyle SessionKVCache üzerinden
+çalıştırılır. Son --tail tuş vuruşunun ortalaması raporlanır.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import torch  # noqa: E402
+
+from app.core.kv_cache import SessionKVCache  # noqa: E402
+from app.core.next_word import score_next_words  # noqa: E402
+from scripts.bench_batching import PROMPTS, load_model  # noqa: E402
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Oturum KV cache benchmark'ı")
+    parser.add_argument("--model", default=None, help="HF model adı (varsayılan: küçük rastgele GPT-2)")
+    parser.add_argument("--chars", type=int, default=600, help="Mesaj uzunluğu (karakter)")
+    parser.add_argument("--tail", type=int, default=40, help="Ölçülen son tuş vuruşu sayısı")
+    parser.add_argument("--max-tokens", type=int, default=240, help="KV cache bağlam penceresi")
+    parser.add_argument("--threads", type=int, default=0, help="torch thread sayısı (0: varsayılan)")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    model, tokenizer = load_model(args.model)
+    message = (" ".join(PROMPTS) + " ") * (args.chars // len(" ".join(PROMPTS)) + 1)
+    message = message[:args.chars]
+
+    cache = SessionKVCache(max_tokens=args.max_tokens, name="bench-kv")
+    start_at = max(1, len(message) - args.tail)
+    # Cache'i mesajın başıyla ısıt (kullanıcı buraya kadar yazmış)
+    score_next_words(model, tokenizer, [(message[:start_at], 5, "bench")], kv_cache=cache)
+
+    full_times, cached_times = [], []
+    for end in range(start_at + 1, len(message) + 1):
+        text = message[:end]
+        ids = cache.window(tokenizer(text)["input_ids"])
+        t0 = time.perf_counter()
+        # Cache'siz: aynı pencere her tuşta baştan encode edilir
+        with torch.no_grad():
+            model(input_ids=torch.tensor([ids]), use_cache=True)
+        full_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        cache.encode(model, "bench", ids)
+        cached_times.append(time.perf_counter() - t0)
+
+    full_ms = sum(full_times) / len(full_times) * 1000
+    cached_ms = sum(cached_times) / len(cached_times) * 1000
+    print(f"model: {args.model or 'tiny-random-gpt2'}  mesaj: {len(message)} karakter / {len(ids)} token (pencere)")
+    print(f"tam encode   : {full_ms:.2f} ms/tuş")
+    print(f"KV cache     : {cached_ms:.2f} ms/tuş")
+    print(f"hızlanma     : x{full_ms / cached_ms:.2f}  cache: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+ML ranking benchmark'ı: öneri başına feature + predict vs tek matris.
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_ml_ranking
+  python -m scripts.bench_ml_ranking --sizes 100 500 2000 --repeat 20
+
+Her aday sayısı için eski yol (öneri başına extract_features + predict /
+heuristik, Python'da skor birleştirme) ile MLRankingSystem.rank_suggestions
+(tek feature matrisi, tek predict, vektörel birleştirme) karşılaştırılır.
+İki yolun çıktısı bit düzeyinde karşılaştırılır (skor, ml_score, features).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np  # noqa: E402
+
+from app.features.ml_ranking import MLRankingSystem  # noqa: E402
+
+WORDS = ["merhaba", "teşekkür", "sipariş", "kargo", "iade", "fatura", "yardım", "kampanya", "ödeme", "teslimat"]
+
+
+def candidates(n: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "text": " ".join(rng.sample(WORDS, rng.randint(1, 3))),
+            "score": rng.uniform(0.0, 100.0),
+            "frequency": rng.randint(1, 300),
+            "context_match": rng.random() < 0.3,
+            "domain_match": rng.random() < 0.5,
+            "grammar_match": rng.random() < 0.5,
+            "semantic_score": rng.uniform(0.0, 15.0),
+        }
+        for _ in range(n)
+    ]
+
+
+def rank_per_item(ranker: MLRankingSystem, suggestions: List[Dict], context: Dict, user_id: str = "default") -> List[Dict]:
+    """Eski (öneri başına) yol: referans çıktı"""
+    scored = []
+    for suggestion in suggestions:
+        features = ranker.extract_features(suggestion, context, user_id)
+        if ranker.model_trained and ranker.model is not None:
+            try:
+                ml_score = ranker.model.predict([features])[0]
+            except Exception:
+                ml_score = 0.0
+        else:
+            ml_score = ranker._heuristic_score(features)
+        combined_score = (suggestion.get("score", 0.0) * 0.4) + (ml_score * 10.0 * 0.6)
+        scored.append({**suggestion, "score": combined_score, "ml_score": ml_score, "features": features})
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored
+
+
+class LinearModel:
+    """Sabit ağırlıklı float32 model (predict arayüzü; xgboost/lightgbm gerekmez).
+
+    Ağaç modelleri gibi her satırı bağımsız skorlar: kolonlar sırayla toplanır
+    (BLAS matmul'un toplama sırası batch boyutuna göre değişir).
+    """
+
+    def __init__(self, n_features: int):
+        self.weights = np.linspace(0.1, 0.8, n_features, dtype=np.float32)
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        scores = np.zeros(X.shape[0], dtype=np.float32)
+        for column, weight in enumerate(self.weights):
+            scores += X[:, column] * weight
+        return scores
+
+
+def same(a: List[Dict], b: List[Dict]) -> bool:
+    return len(a) == len(b) and all(
+        x.get("text") == y.get("text") and x.get("word") == y.get("word")
+        and x["score"] == y["score"] and x["ml_score"] == y["ml_score"]
+        and list(x["features"]) == list(y["features"])
+        for x, y in zip(a, b)
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    ranker = MLRankingSystem()
+    ranker.user_selections["bench"].update({w: i for i, w in enumerate(WORDS)})
+    context = {"domain": "customer_service"}
+    for label, model in (("heuristik", None), ("model", LinearModel(len(ranker.feature_names)))):
+        ranker.model, ranker.model_trained = model, model is not None
+        print(f"--- {label}")
+        for n in sizes:
+            suggestions = candidates(n)
+            old = timed(lambda: rank_per_item(ranker, suggestions, context, "bench"), repeat)
+            new = timed(lambda: ranker.rank_suggestions(suggestions, context, "bench"), repeat)
+            exact = same(rank_per_item(ranker, suggestions, context, "bench"),
+                         ranker.rank_suggestions(suggestions, context, "bench"))
+            print(f"{n:>5} aday: öneri başına {old:7.2f} ms | matris {new:6.2f} ms | "
+                  f"x{old / new:4.1f} | bit düzeyinde aynı: {exact}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="ML ranking: öneri başına vs tek matris")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
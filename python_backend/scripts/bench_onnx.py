@@ -0,0 +1,110 @@
+"""
+ONNX Runtime vs torch benchmark'ı (aynı istemler, skorlama modu).
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_onnx                                   # küçük rastgele GPT-2 (indirme yok)
+  python -m scripts.bench_onnx --model gorkemgoknar/gpt2-small-turkish --threads 4
+  python -m scripts.bench_onnx --bert dbmdz/distilbert-base-turkish-cased
+
+Her backend için bench_batching.PROMPTS üzerinde score_next_words (GPT-2) ve
+--bert verilirse fill-mask çalıştırılır; istek başına ortalama gecikme ve
+torch'a göre en olası kelimenin aynı kalma oranı raporlanır. Export edilen
+dosyalar --onnx-dir altına yazılır (varsayılan geçici dizin).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import torch  # noqa: E402
+
+from app.core import onnx_backend  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.next_word import score_next_words  # noqa: E402
+from scripts.bench_batching import PROMPTS, load_model  # noqa: E402
+
+
+def timed(fn: Callable, items: List, repeat: int) -> tuple:
+    fn(items[0])  # ısınma
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(item) for item in items]
+    elapsed = (time.perf_counter() - start) / (repeat * len(items))
+    return elapsed * 1000, results
+
+
+def top1(results) -> List[str]:
+    return [r[0][0] if r else "" for r in results]
+
+
+def report(name: str, ms: float, base_ms: float, agreement: Optional[float]) -> None:
+    same = f"  top-1 aynı: %{agreement * 100:.0f}" if agreement is not None else ""
+    print(f"{name:22s}: {ms:7.2f} ms/istek  x{base_ms / ms:.2f}{same}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="ONNX Runtime vs torch benchmark'ı")
+    parser.add_argument("--model", default=None, help="GPT-2 HF model adı (varsayılan: küçük rastgele GPT-2)")
+    parser.add_argument("--bert", default=None, help="Fill-mask için BERT HF model adı (opsiyonel)")
+    parser.add_argument("--threads", type=int, default=0, help="torch ve ORT intra-op thread sayısı (0: varsayılan)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--onnx-dir", default=None, help="Export dizini (varsayılan: geçici dizin)")
+    args = parser.parse_args(argv)
+
+    if not onnx_backend.ORT_AVAILABLE:
+        print("onnxruntime kurulu degil: pip install onnxruntime onnx")
+        return
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    settings.ONNX_DIR = args.onnx_dir or tempfile.mkdtemp(prefix="texthelper-onnx-")
+    threads = args.threads or onnx_backend.intra_op_threads()
+    torch.manual_seed(0)
+
+    model, tokenizer = load_model(args.model)
+    name = args.model or "tiny-random-gpt2"
+    requests = [(prompt + " ", 5) for prompt in PROMPTS]
+    score = lambda lm: (lambda request: score_next_words(lm, tokenizer, [request])[0])  # noqa: E731
+
+    print(f"model: {name}  istem: {len(requests)}  torch thread: {torch.get_num_threads()}  ORT thread: {threads}")
+    base_ms, base = timed(score(model), requests, args.repeat)
+    report("torch eager", base_ms, base_ms, None)
+    for quantize in (False, True):
+        settings.ORT_QUANTIZE = quantize
+        path = onnx_backend.ensure_model(model, name, "causal")
+        lm = onnx_backend.OrtCausalLM(onnx_backend.create_session(path, threads), model.config)
+        ms, results = timed(score(lm), requests, args.repeat)
+        agreement = sum(a == b for a, b in zip(top1(base), top1(results))) / len(requests)
+        report(f"onnxruntime {'int8' if quantize else 'fp32'}", ms, base_ms, agreement)
+
+    if args.bert:
+        from transformers import AutoModelForMaskedLM, AutoTokenizer, pipeline
+
+        bert_tokenizer = AutoTokenizer.from_pretrained(args.bert)
+        bert = AutoModelForMaskedLM.from_pretrained(args.bert).eval()
+        masked = [f"{prompt} {bert_tokenizer.mask_token}" for prompt in PROMPTS]
+        fill = pipeline("fill-mask", model=bert, tokenizer=bert_tokenizer, device=-1)
+        bert_ms, bert_base = timed(fill, masked, args.repeat)
+        print(f"\nBERT: {args.bert}")
+        report("torch pipeline", bert_ms, bert_ms, None)
+        for quantize in (False, True):
+            settings.ORT_QUANTIZE = quantize
+            path = onnx_backend.ensure_model(bert, args.bert, "masked", bert_tokenizer)
+            ort_fill = onnx_backend.OrtFillMask(onnx_backend.create_session(path, threads), bert_tokenizer)
+            ms, results = timed(ort_fill, masked, args.repeat)
+            agreement = sum(
+                a[0]["token"] == b[0]["token"] for a, b in zip(bert_base, results)
+            ) / len(masked)
+            report(f"onnxruntime {'int8' if quantize else 'fp32'}", ms, bert_ms, agreement)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+/ws protokolleri için tuş başına bant genişliği benchmark'ı.
+
+Kullanım:
+  cd python_backend
+  python -m scripts.bench_ws_protocol
+  python -m scripts.bench_ws_protocol --max-suggestions 10
+
+bench_candidates'teki mesajlar harf harf orchestrator.predict_stream'den
+geçirilir; her aşama mesajı varsayılan JSON, delta JSON ve (msgpack kuruluysa)
+delta msgpack ile kodlanır. Tuş başına bayt ve kodlama süresi raporlanır.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.ws_protocol import MSGPACK_AVAILABLE, DeltaProtocol, JSONProtocol  # noqa: E402
+from app.services.orchestrator import orchestrator  # noqa: E402
+from scripts.bench_candidates import keystrokes  # noqa: E402
+
+
+async def run(texts: List[str], max_suggestions: int) -> None:
+    protocols = {"json": JSONProtocol(), "delta-json": DeltaProtocol(binary=False)}
+    if MSGPACK_AVAILABLE:
+        protocols["delta-msgpack"] = DeltaProtocol(binary=True)
+    else:
+        print("msgpack kurulu değil: delta-msgpack atlandı (pip install msgpack)")
+
+    sizes = {name: 0 for name in protocols}
+    encode_s = {name: 0.0 for name in protocols}
+    messages = 0
+    for text in texts:
+        async for phase, response, final in orchestrator.predict_stream(
+            text, max_suggestions=max_suggestions, latency_budget_ms=1000, session_id="bench"
+        ):
+            messages += 1
+            for name, protocol in protocols.items():
+                start = time.perf_counter()
+                frame = protocol.response(phase, response, final)
+                encode_s[name] += time.perf_counter() - start
+                sizes[name] += len(frame.encode() if isinstance(frame, str) else frame)
+
+    n = len(texts)
+    print(f"tuş vuruşu: {n}, mesaj: {messages}")
+    for name in protocols:
+        print(f"{name:14s}: {sizes[name] / n:8.0f} B/tuş  {encode_s[name] / messages * 1e6:7.1f} us/mesaj")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="/ws protokol bant genişliği benchmark'ı")
+    parser.add_argument("--max-suggestions", type=int, default=80)
+    args = parser.parse_args(argv)
+    asyncio.run(run(keystrokes(), args.max_suggestions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Kelime vektörü dosyası oluşturucu (relevance / advanced context anlamsal skoru).
+
+Kullanım:
+  cd python_backend
+  python -m scripts.build_embeddings cc.tr.300.vec
+  python -m scripts.build_embeddings cc.tr.300.vec --vocab turkish_dictionary.txt --limit 200000
+
+Girdi word2vec / fastText metin formatıdır ("kelime v1 v2 ...", ilk satır
+isteğe bağlı "sayı boyut" başlığı). Sadece harf içeren kelimeler alınır
+(küçük harfe çevrilir, ilk geçen kullanılır); --vocab verilirse yalnızca o
+listedeki kelimeler (ör. lexicon'un kaynak sözlüğü). Çıktı float16, birim
+uzunlukta snapshot dosyasıdır (varsayılan EMBEDDINGS_PATH).
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional, Set
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np  # noqa: E402
+
+from app.core.analysis import WORD_PATTERN  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.embeddings import write_embeddings  # noqa: E402
+
+
+def read_vocab(path: str) -> Set[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip().lower() for line in f if line.strip() and not line.startswith("#")}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Kelime vektörü dosyası oluştur (float16, mmap)")
+    parser.add_argument("vectors", help="word2vec / fastText metin formatı (.vec)")
+    parser.add_argument("--vocab", help="sadece bu listedeki kelimeler (satır başına bir kelime)")
+    parser.add_argument("--limit", type=int, default=200000, help="en fazla kelime (dosya sırasıyla)")
+    parser.add_argument("--output", default=settings.EMBEDDINGS_PATH)
+    args = parser.parse_args(argv)
+
+    vocab = read_vocab(args.vocab) if args.vocab else None
+    words: List[str] = []
+    rows: List[np.ndarray] = []
+    seen: Set[str] = set()
+    dim = None
+    with open(args.vectors, "r", encoding="utf-8", errors="ignore") as f:
+        for line_no, line in enumerate(f):
+            parts = line.rstrip().split(" ")
+            if line_no == 0 and len(parts) == 2:
+                continue  # başlık: sayı boyut
+            word = parts[0].lower()
+            if word in seen or not WORD_PATTERN.fullmatch(word) or (vocab is not None and word not in vocab):
+                continue
+            vector = np.asarray(parts[1:], dtype=np.float32)
+            if dim is None:
+                dim = len(vector)
+            if len(vector) != dim:
+                continue
+            seen.add(word)
+            words.append(word)
+            rows.append(vector)
+            if len(words) >= args.limit:
+                break
+
+    if not words:
+        sys.exit("Vektör bulunamadı")
+    write_embeddings(args.output, words, np.stack(rows))
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"[OK] {len(words)} kelime x {dim} boyut -> {args.output} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ Notlar:
   - Tüm dosyalar UTF-8 kabul edilir.
   - Sadece harf içeren token'lar (a–z, ç, ğ, ı, i, ö, ş, ü) sayılır.
   - Var olan `data/tr_frequencies.json` ile birleştirir (toplayarak).
+  - Sonuç ayrıca `data/tr_frequencies.thd` (binary) olarak yazılır; NLPEngine
+    varsa JSON yerine bunu okur.
 """
 
 import argparse
@@ -23,10 +25,15 @@ import sys
 from collections import Counter
 from typing import List
 
-
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.dictfile import thd_path_for, write_dictionary  # noqa: E402
+
 DATA_DIR = os.path.join(ROOT_DIR, "data")
 FREQ_PATH = os.path.join(DATA_DIR, "tr_frequencies.json")
+FREQ_THD_PATH = thd_path_for(FREQ_PATH)
 
 # Basit Türkçe kelime regex'i
 WORD_RE = re.compile(r"[a-zA-ZçğıİöşüÇĞİÖŞÜ]+", re.UNICODE)
@@ -79,6 +86,8 @@ def save(counter: Counter) -> None:
     with open(FREQ_PATH, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"[OK] {len(data):,} kelime yazıldı -> {FREQ_PATH}")
+    write_dictionary(FREQ_THD_PATH, data.items())
+    print(f"[OK] Binary sözlük yazıldı -> {FREQ_THD_PATH}")
 
 
 def main(argv: List[str] | None = None) -> None:
@@ -0,0 +1,97 @@
+"""
+.thd binary sözlük aracı (dönüştürme / ekleme / bilgi).
+
+Kullanım:
+  cd python_backend
+  # JSON/TXT sözlüğü .thd'ye çevir (varsayılan çıktı: aynı ad, .thd uzantısı)
+  python -m scripts.dictfile_tool convert app/features/turkish_dictionary.json
+  python -m scripts.dictfile_tool convert data/tr_frequencies.json --codec zlib
+
+  # Var olan .thd'ye kelime ekle (dosyanın tamamı yeniden yazılmaz)
+  python -m scripts.dictfile_tool append app/features/turkish_dictionary.thd yeni_kelimeler.txt
+
+  # Özet
+  python -m scripts.dictfile_tool info app/features/turkish_dictionary.thd
+
+Notlar:
+  - Dönüştürme kelime sırasını korur (büyük sözlük sıralamayı frekans olarak kullanır).
+  - zstd için 'zstandard' paketi gerekir; yoksa zlib kullanılır.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.dictfile import (  # noqa: E402
+    CODECS,
+    append_dictionary,
+    iter_blocks,
+    iter_source_entries,
+    thd_path_for,
+    write_dictionary,
+)
+
+
+def cmd_convert(args) -> None:
+    output = args.output or thd_path_for(args.source)
+    start = time.perf_counter()
+    count = write_dictionary(output, iter_source_entries(args.source), codec=args.codec)
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {count:,} kelime yazıldı -> {output} ({os.path.getsize(output):,} byte, {elapsed:.2f}s)")
+
+
+def cmd_append(args) -> None:
+    total = 0
+    for source in args.sources:
+        if not os.path.exists(source):
+            print(f"[WARN] Dosya bulunamadı, atlanıyor: {source}")
+            continue
+        added = append_dictionary(args.target, iter_source_entries(source), skip_existing=not args.allow_duplicates)
+        print(f"[INFO] {source}: +{added:,} kelime")
+        total += added
+    print(f"[OK] Toplam eklenen: {total:,} kelime -> {args.target}")
+
+
+def cmd_info(args) -> None:
+    start = time.perf_counter()
+    blocks = 0
+    words = 0
+    for block_words, _ in iter_blocks(args.path):
+        blocks += 1
+        words += len(block_words)
+    elapsed = time.perf_counter() - start
+    print(f"{args.path}: {words:,} kelime, {blocks} blok, {os.path.getsize(args.path):,} byte, okuma {elapsed:.3f}s")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=".thd binary sözlük dosyalarını oluşturur ve günceller.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="JSON/TXT sözlüğü .thd'ye çevir")
+    convert.add_argument("source", help="Kaynak sözlük (.json veya .txt)")
+    convert.add_argument("-o", "--output", help="Çıktı .thd yolu")
+    convert.add_argument("--codec", choices=sorted(CODECS), default=None, help="Sıkıştırma (varsayılan: zstd varsa zstd, yoksa zlib)")
+    convert.set_defaults(func=cmd_convert)
+
+    append = sub.add_parser("append", help="Var olan .thd'ye kelime ekle")
+    append.add_argument("target", help="Hedef .thd (yoksa oluşturulur)")
+    append.add_argument("sources", nargs="+", help="Eklenecek kelimeler (.json veya .txt)")
+    append.add_argument("--allow-duplicates", action="store_true", help="Var olan kelimeleri de ekle")
+    append.set_defaults(func=cmd_append)
+
+    info = sub.add_parser("info", help=".thd özeti")
+    info.add_argument("path")
+    info.set_defaults(func=cmd_info)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
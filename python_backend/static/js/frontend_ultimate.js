@@ -7,6 +7,7 @@ class TextHelperUltimate {
             apiUrl: config.apiUrl || 'http://localhost:8080',
             wsUrl: config.wsUrl || 'ws://localhost:8080/api/v1/ws',
             useWebSocket: false, // Stabilite icin kapali
+            useStreaming: true, // WebSocket yoksa HTTP akisi (NDJSON): once hizli yol, sonra zenginlestirme
             maxSuggestions: config.maxSuggestions || 80,
             ...config
         };
@@ -311,12 +312,68 @@ class TextHelperUltimate {
                 // REST API (Context desteği eklenmeli)
                 // Şimdilik sadece text varsa
                 if (text.trim().length > 0) {
-                    await this.fetchSuggestions(text);
+                    if (this.config.useStreaming) {
+                        await this.streamSuggestions(text, contextMsg);
+                    } else {
+                        await this.fetchSuggestions(text);
+                    }
                 }
             }
         }, 50);
     }
 
+    // HTTP akisi: /predict/stream NDJSON satirlarini geldikce uygula (fast -> enhanced)
+    async streamSuggestions(text, contextMsg) {
+        this._lastWsRequestText = text; // enhanced sadece ayni input icin uygulansin
+        if (this._streamAbort) {
+            this._streamAbort.abort(); // eski akis: sunucuda da iptal edilir
+        }
+        const controller = new AbortController();
+        this._streamAbort = controller;
+
+        try {
+            const response = await fetch(`${this.config.apiUrl}/api/v1/predict/stream?format=ndjson`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-API-Key': 'texthelper-secret-key-2024'
+                },
+                body: JSON.stringify({
+                    text: text,
+                    context_message: contextMsg || null,
+                    max_suggestions: this.config.maxSuggestions
+                }),
+                signal: controller.signal
+            });
+
+            if (!response.ok || !response.body) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let newline;
+                while ((newline = buffer.indexOf('\n')) >= 0) {
+                    const line = buffer.slice(0, newline).trim();
+                    buffer = buffer.slice(newline + 1);
+                    if (line) {
+                        this.handleSuggestions(JSON.parse(line));
+                    }
+                }
+            }
+        } catch (error) {
+            if (error.name === 'AbortError') return;
+            console.warn('Akis kullanilamadi, REST API kullaniliyor:', error);
+            this.config.useStreaming = false;
+            await this.fetchSuggestions(text);
+        }
+    }
+
     // API'den onerileri cek
     async fetchSuggestions(text) {
         try {
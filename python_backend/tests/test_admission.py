@@ -0,0 +1,46 @@
+import time
+
+from app.core.admission import AdmissionController
+
+
+def test_admission_sheds_expensive_sources_progressively():
+    """Yavas kaynak ve yuksek es zamanlilikta seviye artmali; hizli yol hep acik kalmali, baski bitince geri donmeli."""
+    controller = AdmissionController(max_inflight=4, window_s=0.2, cooldown_s=0.0, baselines={"transformer": 50.0})
+
+    with controller.track() as level:
+        assert level == 0
+        assert controller.allows("transformer", level) and controller.allows("emoji", level)
+
+    controller.record("transformer", 120.0)  # beklenen 50 ms x 2 = 100 ms'nin 1.2 kati -> seviye 1
+    with controller.track() as level:
+        assert level == 1
+        assert not controller.allows("transformer", level)
+        assert controller.allows("phrase", level)
+
+    controller.inflight = 8  # 8 + 1 istek / 4 -> seviye 3
+    with controller.track() as level:
+        assert level == 3
+        assert not any(controller.allows(s, level) for s in ("transformer", "phrase", "template", "emoji", "domain"))
+        assert controller.allows("lexicon", level) and controller.allows("search", level)
+    controller.inflight = 0
+
+    time.sleep(0.25)  # eski olcum pencereden duser, seviye kademeli iner
+    levels = []
+    for _ in range(4):
+        with controller.track() as level:
+            levels.append(level)
+    assert levels == [2, 1, 0, 0]
+    assert controller.snapshot()["shed"]["transformer"] == 2
+
+
+def test_source_latency_is_judged_against_its_own_expected_cost():
+    """Transformer'in normal suresi (beklenen 150 ms) bos bir sunucuda kaynak kapattirmamali."""
+    controller = AdmissionController(cooldown_s=0.0)
+    controller.record("transformer", 240.0)
+    with controller.track() as level:
+        assert level == 0
+        assert controller.allows("transformer", level) and controller.allows("phrase", level)
+
+    controller.record("phrase", 90.0)  # beklenen 30 ms x 2 = 60 ms'nin 1.5 kati -> seviye 2
+    with controller.track() as level:
+        assert level == 2
@@ -0,0 +1,21 @@
+from app.core.analysis import AnalyzedInput
+from app.features.advanced_context_completion import advanced_context_completer
+from app.features.domain_dictionaries import domain_manager
+from app.features.emoji_suggestions import emoji_suggester
+
+
+def test_analyzed_input_is_computed_once_and_shared():
+    """Girdi bir kez normalize edilmeli; kaynaklar str ya da AnalyzedInput ile ayni sonucu vermeli, analiz tekrar hesaplanmamali."""
+    analysis = AnalyzedInput("Siparişim  nerede ")
+    assert analysis.tokens == ["siparişim", "nerede"] and analysis.last_word == "nerede"
+    assert analysis.trailing_space and analysis.prefix == ""
+    assert AnalyzedInput("merhaba nas").prefix == "nas"
+    assert (analysis.domain, analysis.intent) == ("customer_service", "question")
+
+    text = "harika, kargo geldi"
+    assert emoji_suggester.suggest_emojis(AnalyzedInput(text)) == emoji_suggester.suggest_emojis(text)
+    assert domain_manager.detect_domain(text) == AnalyzedInput(text).domain == "ecommerce"
+
+    first = advanced_context_completer.analyze_full_context(analysis)
+    assert advanced_context_completer.analyze_full_context(analysis) is first
+    assert advanced_context_completer.analyze_full_context("Siparişim  nerede ") == first
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.core.batching import MicroBatcher
+
+
+def test_micro_batcher_coalesces_and_fans_out():
+    """Es zamanli istekler tek batch cagrisinda calismali, sonuclar dogru istege donmeli."""
+    calls = []
+
+    def run_batch(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+        return results, batcher.get_stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert calls == [[0, 1, 2, 3], [4, 5]]
+    assert stats["batches"] == 2 and stats["avg_batch_size"] == 3.0
+
+
+def test_micro_batcher_propagates_errors():
+    """Batch fonksiyonu hata verirse bekleyen tum istekler o hatayi almali."""
+    def run_batch(items):
+        raise RuntimeError("model hatasi")
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=1)
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
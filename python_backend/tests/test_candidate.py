@@ -0,0 +1,19 @@
+import asyncio
+
+from app.models.candidate import Candidate
+from app.models.schemas import Suggestion
+from app.services.orchestrator import orchestrator
+
+
+def test_sources_use_candidates_and_response_uses_suggestions():
+    """Kaynaklar hafif Candidate dondurmeli; Pydantic Suggestion yalnizca yanitta olusmali."""
+    internal = asyncio.run(orchestrator._get_lexicon_predictions("merh", 5, []))
+    assert internal and all(isinstance(c, Candidate) for c in internal)
+
+    response = asyncio.run(orchestrator.predict("merh", max_suggestions=5))
+    assert response.suggestions and all(isinstance(s, Suggestion) for s in response.suggestions)
+
+    original = Suggestion(text="merhaba", type="dictionary", score=9.0, description="Sozluk", source="lexicon")
+    candidate = Candidate.from_any(original)
+    assert candidate.to_suggestion() == original
+    assert Candidate.from_any({"text": ""}) is None and Candidate.from_any(42) is None
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+from app.core.conversation import ConversationCache, conversation_cache
+from app.services.orchestrator import orchestrator
+
+
+def test_conversation_is_analyzed_once_per_ttl():
+    """Ayni baglam mesaji TTL boyunca ayni analizi dondurmeli; sure dolunca ve LRU tasinca yeniden cozumlenmeli."""
+    cache = ConversationCache(ttl_s=0.05, max_entries=2)
+    first = cache.get("Siparişim nerede?")
+    assert cache.get("Siparişim nerede?") is first and cache.get("") is None
+    assert first.analysis.domain == "customer_service"
+    assert first.memo("replies", lambda: ["a"]) is cache.get("Siparişim nerede?").memo("replies", lambda: ["b"])
+
+    time.sleep(0.06)
+    assert cache.get("Siparişim nerede?") is not first
+    cache.get("merhaba")
+    cache.get("selam")
+    stats = cache.snapshot()
+    assert stats["hits"] == 2 and stats["expired"] == 1 and stats["evictions"] == 1 and stats["entries"] == 2
+
+
+def test_contextual_replies_come_from_the_cached_conversation():
+    """Temsilci yazmaya baslamadan once musterinin mesajina gore hazir yanitlar gelmeli; mesaj her tusta yeniden cozumlenmemeli."""
+    message = "Merhaba, siparişim hala gelmedi yardım eder misiniz?"
+
+    async def keystrokes():
+        responses = []
+        for text in ["", "Na", "Nasıl"]:
+            responses.append(await orchestrator.predict(text, context_message=message, max_suggestions=5))
+        return responses
+
+    before = conversation_cache.snapshot()
+    empty, short, _ = asyncio.run(keystrokes())
+    after = conversation_cache.snapshot()
+
+    assert [s.text for s in empty.suggestions] == ["Nasıl yardımcı olabilirim?", "Sorun nedir?", "Buyurun, dinliyorum"]
+    assert empty.sources_used == ["contextual_reply"]
+    assert any(s.source == "contextual_reply" for s in short.suggestions)
+    assert after["misses"] - before["misses"] <= 1 and after["hits"] - before["hits"] >= 2
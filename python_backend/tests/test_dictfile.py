@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from app.core.dictfile import (
+    DictionaryFormatError,
+    append_dictionary,
+    iter_source_entries,
+    read_dictionary,
+    read_frequency_dict,
+    write_dictionary,
+)
+
+
+def test_convert_and_read_keeps_order(tmp_path):
+    """JSON sozluk .thd'ye cevrilince kelime sirasi ve frekanslar korunmali."""
+    source = tmp_path / "turkish_dictionary.json"
+    source.write_text(json.dumps({
+        "words": ["merhaba", "selam", "çiçek", "ışık"],
+        "frequencies": {"merhaba": 100, "selam": 90, "çiçek": 5},
+    }, ensure_ascii=False), encoding="utf-8")
+    target = str(tmp_path / "turkish_dictionary.thd")
+
+    assert write_dictionary(target, iter_source_entries(str(source)), codec="zlib", block_words=2) == 4
+    words, frequencies = read_dictionary(target)
+    assert words == ["merhaba", "selam", "çiçek", "ışık"]
+    assert list(frequencies) == [100, 90, 5, 1]
+    assert read_dictionary(target, limit=3)[0] == ["merhaba", "selam", "çiçek"]
+
+
+def test_append_skips_existing_and_detects_corruption(tmp_path):
+    """Ekleme sadece yeni kelimeleri sona yazmali; bozuk blok reddedilmeli."""
+    target = tmp_path / "words.thd"
+    write_dictionary(str(target), [("merhaba", 10), ("selam", 5)], codec="none")
+
+    added = append_dictionary(str(target), [("Merhaba", 1), ("destek", 3), ("destek", 4)])
+    assert added == 1
+    assert read_frequency_dict(str(target)) == {"merhaba": 10, "selam": 5, "destek": 3}
+
+    data = bytearray(target.read_bytes())
+    data[-2] ^= 0xFF
+    target.write_bytes(bytes(data))
+    with pytest.raises(DictionaryFormatError):
+        read_dictionary(str(target))
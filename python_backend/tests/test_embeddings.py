@@ -0,0 +1,58 @@
+import numpy as np
+
+from app.core.analysis import AnalyzedInput
+from app.core.embeddings import EmbeddingScorer, write_embeddings
+from app.features import relevance_filter as relevance_module
+
+
+def _scorer(tmp_path):
+    words = ["kargo", "teslimat", "sipariş", "merhaba", "selam"]
+    vectors = np.array([
+        [1.0, 0.1, 0.0],
+        [0.9, 0.2, 0.0],
+        [0.7, 0.7, 0.0],
+        [0.0, 0.1, 1.0],
+        [0.0, 0.0, 1.0],
+    ])
+    path = str(tmp_path / "word_vectors.snap")
+    write_embeddings(path, words, vectors)
+    return EmbeddingScorer(path), dict(zip(words, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)))
+
+
+def test_candidates_are_scored_with_one_matrix_vector_product(tmp_path):
+    """Benzerlik float16 matristen (mmap) hesaplanmali: cok kelimeli aday kelime ortalamasi, vektoru olmayan aday None."""
+    scorer, unit = _scorer(tmp_path)
+    assert scorer.available and scorer.dim == 3 and scorer.vectors.dtype == np.float16
+
+    context = scorer.context_vector(["kargo", "bilinmeyen"])
+    sims = scorer.similarities(context, ["Teslimat", "merhaba selam", "xyz", "sipariş xyz"])
+    expected = [
+        unit["teslimat"] @ unit["kargo"],
+        (unit["merhaba"] @ unit["kargo"] + unit["selam"] @ unit["kargo"]) / 2,
+        None,
+        unit["sipariş"] @ unit["kargo"],
+    ]
+    assert sims[2] is None
+    for got, want in zip(sims, expected):
+        if want is not None:
+            assert abs(got - want) < 1e-2
+    assert scorer.context_vector(["bilinmeyen"]) is None
+    assert EmbeddingScorer(str(tmp_path / "yok.snap")).available is False
+
+
+def test_relevance_filter_uses_vectors_and_falls_back_to_heuristic(tmp_path, monkeypatch):
+    """Vektoru olan oneriler anlamsal skoru vektorden almali; vektoru olmayanlar eski sezgisel skoru korumali."""
+    scorer, _ = _scorer(tmp_path)
+    relevance = relevance_module.RelevanceFilter()
+    suggestions = [{"text": t, "score": 5.0} for t in ["teslimat", "selam", "kargocu"]]
+
+    monkeypatch.setattr(relevance_module, "embedding_scorer", scorer)
+    semantic = relevance._semantic_scores(AnalyzedInput("kargo"), suggestions)
+
+    assert semantic[0] > 0.9 and semantic[1] < 0.3 and semantic[2] is None
+    filtered = {s["text"]: s for s in relevance.filter_irrelevant(suggestions, AnalyzedInput("kargo"))}
+    monkeypatch.setattr(relevance_module, "embedding_scorer", None)
+    heuristic = {s["text"]: s for s in relevance.filter_irrelevant(suggestions, AnalyzedInput("kargo"))}
+    assert filtered["kargocu"] == heuristic["kargocu"]
+    assert relevance._calculate_relevance({"kargo"}, {"teslimat"}, "kargo", "teslimat", "kargo", None, semantic[0]) > \
+        relevance._calculate_relevance({"kargo"}, {"teslimat"}, "kargo", "teslimat", "kargo", None)
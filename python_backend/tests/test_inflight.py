@@ -0,0 +1,47 @@
+import asyncio
+
+from app.core.inflight import LatestWins
+
+
+def test_latest_request_cancels_stale_one():
+    """Ayni anahtarla gelen yeni istek eskisini iptal etmeli; farkli anahtarlar birbirini etkilememeli."""
+    tracker = LatestWins()
+    finished = []
+
+    async def work(text, delay):
+        await asyncio.sleep(delay)
+        finished.append(text)
+        return text
+
+    async def scenario():
+        stale = asyncio.ensure_future(tracker.run("u1", work("mer", 0.2)))
+        other = asyncio.ensure_future(tracker.run("u2", work("sel", 0.05)))
+        await asyncio.sleep(0.01)
+        latest = await tracker.run("u1", work("merhaba", 0.01))
+        return await stale, latest, await other
+
+    assert asyncio.run(scenario()) == (None, "merhaba", "sel")
+    assert "mer" not in finished
+    assert tracker.snapshot() == {"in_flight": 0, "started": 3, "completed": 2, "cancelled": 1}
+
+
+def test_anonymous_http_requests_are_not_superseded():
+    """user_id gondermeyen istemciler (ayni proxy / NAT arkasinda) birbirinin istegini iptal etmemeli."""
+    from types import SimpleNamespace
+
+    from app.routers.prediction import _latest_wins_key
+
+    req = SimpleNamespace(client=SimpleNamespace(host="10.0.0.1"))
+    assert _latest_wins_key(req, "default") is None and _latest_wins_key(req, "") is None
+    assert _latest_wins_key(req, "u1") == "http:10.0.0.1:u1"
+
+    tracker = LatestWins()
+
+    async def scenario():
+        first = asyncio.ensure_future(tracker.run(_latest_wins_key(req, "default"), asyncio.sleep(0.05, result="a")))
+        await asyncio.sleep(0.01)
+        second = await tracker.run(_latest_wins_key(req, "default"), asyncio.sleep(0.01, result="b"))
+        return await first, second
+
+    assert asyncio.run(scenario()) == ("a", "b")
+    assert tracker.snapshot()["cancelled"] == 0
@@ -0,0 +1,30 @@
+import random
+
+from app.core.analysis import AnalyzedInput
+from app.core.keywords import KeywordMatcher, keyword_matcher
+from app.features.context_analyzer import context_analyzer
+
+
+def test_matcher_finds_every_substring_hit_in_one_pass():
+    """Otomat, her anahtar kelime icin `keyword in text` ile ayni sonucu vermeli (ortusen ve ic ice eslesmeler dahil)."""
+    keywords = ["ne", "ne zaman", "neden", "zaman", "?", "mi?", "he", "she", "hers", "iyi günler", "gün"]
+    matcher = KeywordMatcher()
+    matcher.register(keywords)
+    random.seed(7)
+    for _ in range(2000):
+        text = "".join(random.choice("neds zamhrigü?") for _ in range(random.randint(0, 30)))
+        assert matcher.find(text) == {k for k in keywords if k in text}
+    assert matcher.find("iyi günler, ne zaman?") == {"iyi günler", "gün", "ne", "ne zaman", "zaman", "?"}
+
+
+def test_detectors_share_the_analysis_scan():
+    """Tespitler AnalyzedInput.keywords kumesinden okunmali; sonuc duz metinle ayni olmali."""
+    analysis = AnalyzedInput("Merhaba, siparişim ne zaman gelir?")
+    assert {"merhaba", "sipariş", "ne zaman", "?"} <= analysis.keywords
+    assert analysis.keywords is analysis.keywords
+    assert all(k in keyword_matcher.find(analysis.lower) for k in analysis.keywords)
+
+    context = context_analyzer.analyze(analysis)
+    assert context == context_analyzer.analyze(analysis.text)
+    assert {"greeting", "question", "order", "time"} <= set(context["intents"])
+    assert context["sentence_type"] == "question" and "order" in context["topics"]
@@ -0,0 +1,73 @@
+from app.core.lexicon import Lexicon
+from app.features.trie_index import TrieIndex
+
+
+def test_trie_index_shares_lexicon():
+    """Trie araması lexicon'un prefix index'ini kullanmali; kelimeler tek kez tutulur."""
+    lexicon = Lexicon()
+    trie = TrieIndex(lexicon)
+    trie.build_from_words(["merhaba", "Merhaba", "merak", "masa"])
+
+    assert trie.word_count == len(lexicon) == 3
+    assert {r["word"] for r in trie.search("mer")} == {"merak", "merhaba"}
+    assert [r["word"] for r in lexicon.search("me")] == ["merak", "merhaba"]
+
+
+def test_lexicon_search_early_termination_matches_full_scan():
+    """Skor sirali erken durdurma, araligin tamamini skorlamakla ayni ilk k'yi vermeli."""
+    lexicon = Lexicon()
+    words = [f"m{chr(97 + i % 26)}{'a' * (i % 7)}{i}" for i in range(3000)]
+    lexicon.add_words(words, {w.lower(): (i * 37) % 11 for i, w in enumerate(words)})
+    lexicon.add("merhaba", 500)
+
+    for prefix in ("m", "ma", "mab", "mb12"):
+        n = len(prefix)
+        lo, hi = lexicon.prefix_range(prefix)
+        full = sorted(
+            (lexicon._score(n, len(lexicon.word(i)), lexicon.frequencies[i])
+             for i in lexicon._sorted[lo:hi] if lexicon.word(i) != prefix),
+            reverse=True,
+        )
+        for k in (1, 10, 50):
+            assert [score for _, score in lexicon.search_ids(prefix, k)] == full[:k]
+    assert lexicon.search("m", 1)[0]["word"] == "merhaba"
+
+
+def test_lexicon_add_after_search_keeps_rank_trees():
+    """Agaclar kurulduktan sonra tek tek eklenen kelimeler yeniden kurulum olmadan aramada gorunmeli."""
+    lexicon = Lexicon()
+    words = [f"k{chr(97 + i % 26)}{i}" for i in range(2000)]
+    lexicon.add_words(words, {w: i % 13 for i, w in enumerate(words)})
+    lexicon.prepare_search()
+    levels = lexicon._rank_levels
+
+    lexicon.add("kelime", 900)
+    lexicon.add("kalem", 800)
+    lexicon.add(words[5], 700)  # agactaki kelimenin frekansi artar
+
+    assert lexicon._rank_levels is levels
+    assert [r["word"] for r in lexicon.search("k", 3)] == ["kelime", "kalem", words[5]]
+    for prefix in ("k", "ke", "ka"):
+        n = len(prefix)
+        lo, hi = lexicon.prefix_range(prefix)
+        full = sorted(
+            (lexicon._score(n, len(lexicon.word(i)), lexicon.frequencies[i]) for i in lexicon._sorted[lo:hi]),
+            reverse=True,
+        )
+        assert [score for _, score in lexicon.search_ids(prefix, 20)] == full[:20]
+
+
+def test_trie_engine_bulk_build_matches_single_inserts():
+    """Toplu kurulum, kelime kelime eklemeyle ayni kelimeleri ve (buyuk/kucuk harf birlesik, max) frekanslari vermeli."""
+    from app.core.trie_engine import TrieEngine
+
+    counts = {"Merhaba": 3, "merhaba": 9, "merak": 4, "masa": 2, "MASA": 1}
+    single = TrieEngine()
+    for word, count in counts.items():
+        single.insert(word, count)
+    bulk = TrieEngine()
+    bulk.build_from_frequency_dict(counts)
+
+    assert list(bulk.lexicon.words) == list(single.lexicon.words)
+    assert list(bulk.lexicon.frequencies) == list(single.lexicon.frequencies)
+    assert bulk.search("me") == single.search("me")
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+
+from app.features.ml_ranking import MLRankingSystem
+
+WORDS = ["merhaba", "teşekkür", "sipariş", "kargo", "iade", "fatura", "yardım", "kampanya", "ödeme", "teslimat"]
+
+
+def _candidates(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "text": " ".join(rng.sample(WORDS, rng.randint(1, 3))),
+            "score": rng.uniform(0.0, 100.0),
+            "frequency": rng.randint(1, 300),
+            "context_match": rng.random() < 0.3,
+            "domain_match": rng.random() < 0.5,
+            "grammar_match": rng.random() < 0.5,
+            "semantic_score": rng.uniform(0.0, 15.0),
+        }
+        for _ in range(n)
+    ]
+
+
+def _rank_per_item(ranker, suggestions, context, user_id):
+    """Eski (oneri basina) yol: referans cikti"""
+    scored = []
+    for suggestion in suggestions:
+        features = ranker.extract_features(suggestion, context, user_id)
+        if ranker.model_trained and ranker.model is not None:
+            ml_score = ranker.model.predict([features])[0]
+        else:
+            ml_score = ranker._heuristic_score(features)
+        combined_score = (suggestion.get("score", 0.0) * 0.4) + (ml_score * 10.0 * 0.6)
+        scored.append({**suggestion, "score": combined_score, "ml_score": ml_score, "features": features})
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored
+
+
+class _LinearModel:
+    """Sabit agirlikli float32 model; satirlar bagimsiz skorlanir (kolonlar sirayla toplanir)"""
+
+    def __init__(self, n_features):
+        self.weights = np.linspace(0.1, 0.8, n_features, dtype=np.float32)
+        self.calls = []
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        self.calls.append(len(X))
+        scores = np.zeros(X.shape[0], dtype=np.float32)
+        for column, weight in enumerate(self.weights):
+            scores += X[:, column] * weight
+        return scores
+
+
+def _same(a, b):
+    return len(a) == len(b) and all(
+        x.get("text") == y.get("text") and x.get("word") == y.get("word")
+        and x["score"] == y["score"] and x["ml_score"] == y["ml_score"]
+        and list(x["features"]) == list(y["features"])
+        for x, y in zip(a, b)
+    )
+
+
+def test_batched_ranking_matches_per_item_path_bit_for_bit():
+    """Tek matris + tek predict ile siralama, oneri basina yolla ayni skorlari (bit duzeyinde) ve ayni sirayi vermeli."""
+    ranker = MLRankingSystem()
+    ranker.user_selections["u1"].update({"kargo": 4, "sipariş": 12})
+    suggestions = _candidates(300, seed=7) + [{"word": "kargo", "score": 3.0}]
+    context = {"domain": "customer_service"}
+
+    assert _same(ranker.rank_suggestions(suggestions, context, "u1"), _rank_per_item(ranker, suggestions, context, "u1"))
+
+    model = _LinearModel(len(ranker.feature_names))
+    ranker.model, ranker.model_trained = model, True
+    ranked = ranker.rank_suggestions(suggestions, context, "u1")
+    assert model.calls == [len(suggestions)]
+    assert _same(ranked, _rank_per_item(ranker, suggestions, context, "u1"))
+    assert ranker.rank_suggestions([], context, "u1") == []
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.batching import MicroBatcher
+from app.models.schemas import Suggestion
+from app.services.model_server import ModelServer, ModelServerClient, unix_sockets_supported
+
+pytestmark = pytest.mark.skipif(not unix_sockets_supported(), reason="Unix socket yok")
+
+
+class FakePredictor:
+    model_loaded = True
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batcher = MicroBatcher(lambda items: items)
+        self.ended = []
+
+    @property
+    def active_batcher(self):
+        return self.batcher
+
+    async def predict(self, text, max_suggestions=5, session_id=None):
+        await asyncio.sleep(self.delay)
+        return [Suggestion(text=f"{text}-{i}", type="ai_prediction", score=9.5, description="AI", source="transformer") for i in range(max_suggestions)]
+
+    def end_session(self, session_id):
+        self.ended.append(session_id)
+
+
+def test_model_server_roundtrip_timeout_and_outage():
+    """Istemci sunucudan sonuc almali; timeout ve sunucu kapaninca None (fallback) donmeli."""
+    socket_path = os.path.join(tempfile.mkdtemp(), "model.sock")
+
+    async def scenario():
+        predictor = FakePredictor()
+        server = ModelServer(socket_path, predictor)
+        assert await server.start()
+        assert not await ModelServer(socket_path, predictor).start()  # ikinci kopya baslamaz
+
+        client = ModelServerClient(socket_path, timeout_ms=200, health_interval_s=60)
+        await client.start()
+        assert client.healthy
+        results = await asyncio.gather(*(client.predict(f"m{i}", 2, "s1") for i in range(5)))
+        assert [[r["text"] for r in result] for result in results] == [[f"m{i}-0", f"m{i}-1"] for i in range(5)]
+
+        predictor.delay = 0.5
+        assert await client.predict("yavas", 1) is None
+        predictor.delay = 0.0
+
+        await server.stop()
+        await asyncio.sleep(0.05)
+        assert await client.predict("kapali", 1) is None
+        assert not await client.check_health()
+        await client.close()
+        return client.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timeouts"] == 1 and not stats["healthy"]
+
+
+def test_health_reports_batcher_that_serves_requests(monkeypatch):
+    """Gercek model yukluyken health, isteklerin girdigi transformer_model batcher'ini raporlamali."""
+    from app.services import ai
+
+    predictor = ai.TransformerPredictor()
+    server = ModelServer("/tmp/kullanilmayan.sock", predictor)
+    monkeypatch.setattr(ai, "REAL_TRANSFORMER_AVAILABLE", True)
+    monkeypatch.setattr(ai, "transformer_model", SimpleNamespace(model_loaded=False, batcher=MicroBatcher(lambda items: items, name="real")))
+    assert predictor.active_batcher is predictor.batcher
+
+    ai.transformer_model.model_loaded = True
+    assert predictor.active_batcher is ai.transformer_model.batcher
+    assert server.health()["batching"] == ai.transformer_model.batcher.get_stats()
+
+
+def test_server_loads_dictionary_before_model_when_filter_enabled(monkeypatch):
+    """TRANSFORMER_DICT_FILTER acikken sunucu modelden once sozlugu kendi surecine yuklemeli."""
+    from app.core.config import settings
+    from app.services import model_server
+
+    order = []
+
+    class Loader:
+        async def load_model(self):
+            order.append("model")
+
+    monkeypatch.setattr(model_server, "_load_lexicon", lambda: order.append("lexicon"))
+    monkeypatch.setattr(settings, "TRANSFORMER_DICT_FILTER", True)
+    asyncio.run(model_server._load(Loader()))
+    monkeypatch.setattr(settings, "TRANSFORMER_DICT_FILTER", False)
+    asyncio.run(model_server._load(Loader()))
+
+    assert order == ["lexicon", "model", "model"]
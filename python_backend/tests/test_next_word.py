@@ -0,0 +1,107 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from tokenizers import ByteLevelBPETokenizer
+
+from app.core.kv_cache import SessionKVCache
+from app.core.next_word import score_next_words, split_partial
+
+SENTENCES = ["merhaba size nasıl yardımcı olabilirim", "siparişiniz kargoya verildi", "teşekkür ederim iyi günler"]
+
+
+@pytest.fixture(scope="module")
+def tiny_lm():
+    backend = ByteLevelBPETokenizer()
+    backend.train_from_iterator(SENTENCES * 10, vocab_size=300, min_frequency=1, special_tokens=["<|endoftext|>"])
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend._tokenizer, eos_token="<|endoftext|>", pad_token="<|endoftext|>"
+    )
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=tokenizer.vocab_size, n_positions=64, n_embd=32, n_layer=2, n_head=2)
+    model = transformers.GPT2LMHeadModel(config).eval()
+    return model, tokenizer
+
+
+def test_split_partial():
+    assert split_partial("merhaba na") == ("merhaba", "na")
+    assert split_partial("merhaba ") == ("merhaba", "")
+    assert split_partial("") == ("", "")
+
+
+def test_score_next_words_is_deterministic_and_ranked(tiny_lm):
+    """Skorlama modu ayni girdiye ayni sirali sonucu vermeli; yarim kelime devam ettirilmeli."""
+    model, tokenizer = tiny_lm
+    requests = [("merhaba size ", 5), ("siparişiniz kar", 5)]
+
+    first = score_next_words(model, tokenizer, requests)
+    assert first == score_next_words(model, tokenizer, requests)
+    for results in first:
+        probabilities = [p for _, p in results]
+        assert probabilities == sorted(probabilities, reverse=True)
+        assert len(results) <= 5
+    assert all(word.startswith("kar") and word != "kar" for word, _ in first[1])
+
+    allowed = {word for word, _ in first[0][:1]}
+    filtered = score_next_words(model, tokenizer, requests, is_word=allowed.__contains__)
+    assert [word for word, _ in filtered[0]] == list(allowed)
+    assert filtered[1] == []
+
+
+def test_candidate_chunks_share_context_past(tiny_lm, monkeypatch):
+    """Adaylar tek tek (butce 1 bayt) ya da birlikte uzatilsa da sonuc ayni olmali; aday sayisi sinirli kalmali."""
+    from app.core import next_word
+
+    model, tokenizer = tiny_lm
+    requests = [("merhaba size ", 5), ("siparişiniz kar", 3)]
+    together = score_next_words(model, tokenizer, requests, top_k=1000)
+
+    calls = []
+    original = next_word._extend
+    monkeypatch.setattr(next_word, "_extend", lambda *args: calls.append(len(args[6])) or original(*args))
+    monkeypatch.setattr(next_word, "EXTEND_KV_BUDGET_BYTES", 1)
+    one_by_one = score_next_words(model, tokenizer, requests, top_k=1000)
+
+    assert [[w for w, _ in r] for r in one_by_one] == [[w for w, _ in r] for r in together]
+    assert [[p for _, p in r] for r in one_by_one] == [pytest.approx([p for _, p in r], rel=1e-5) for r in together]
+    assert set(calls) == {1} and len(calls) <= 2 * next_word.MAX_CANDIDATES
+
+
+def test_session_kv_cache_matches_full_encode(tiny_lm):
+    """Oturum cache'i ile yazarken sonuclar cache'siz skorlamayla ayni olmali; LRU limiti uygulanmali."""
+    model, tokenizer = tiny_lm
+    cache = SessionKVCache(max_sessions=2, max_tokens=64)
+    text = "merhaba size nasıl yardımcı olabilirim siparişiniz kargoya "
+    for end in range(10, len(text) + 1, 7):
+        expected = score_next_words(model, tokenizer, [(text[:end], 5), ("teşekkür ederim ", 3)])
+        cached = score_next_words(model, tokenizer, [(text[:end], 5, "s1"), ("teşekkür ederim ", 3)], kv_cache=cache)
+        assert [w for w, _ in cached[0]] == [w for w, _ in expected[0]]
+        assert [p for _, p in cached[0]] == pytest.approx([p for _, p in expected[0]], rel=1e-4)
+        assert [w for w, _ in cached[1]] == [w for w, _ in expected[1]]
+    assert cache.get_stats()["hits"] > 0
+
+    for session in ("s2", "s3"):
+        score_next_words(model, tokenizer, [("merhaba ", 3, session)], kv_cache=cache)
+    stats = cache.get_stats()
+    assert stats["sessions"] == 2 and stats["evictions"] == 1
+
+
+def test_onnx_backend_matches_torch(tiny_lm, tmp_path, monkeypatch):
+    """ONNX Runtime (fp32) skorlamasi torch ile ayni kelimeleri ayni sirada vermeli."""
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from app.core import onnx_backend
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ONNX_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ORT_QUANTIZE", False)
+    model, tokenizer = tiny_lm
+    ort_model = onnx_backend.load_causal_lm(model, "tiny-gpt2")
+    requests = [("merhaba size ", 5), ("siparişiniz kar", 5)]
+
+    expected = score_next_words(model, tokenizer, requests)
+    actual = score_next_words(ort_model, tokenizer, requests)
+    for got, want in zip(actual, expected):
+        assert [w for w, _ in got] == [w for w, _ in want]
+        assert [p for _, p in got] == pytest.approx([p for _, p in want], rel=1e-3)
@@ -0,0 +1,118 @@
+import asyncio
+
+import numpy as np
+
+from app.core.ranking_log import RankingEventLog, build_groups, read_events
+from app.features.compiled_ranker import TreeEnsembleRanker, load_ranker
+from app.features.ml_ranking import MLRankingSystem
+from app.services import orchestrator as orchestrator_module
+from app.services.ranker_training import RankerTrainer, train_from_log
+
+
+def _synthetic_log(path, groups=120):
+    """Kullanicilar hep en kisa (length_score yuksek) ve daha az secilmis oneriyi seciyor."""
+    log = RankingEventLog(path, flush_every=1000)
+    rng = np.random.default_rng(0)
+    for g in range(groups):
+        X = rng.random((6, 8))
+        texts = [f"oneri{g}_{i}" for i in range(6)]
+        user = f"u{g % 5}"
+        log.log_impression(user, "ba", texts, X)
+        log.log_accept(user, "bas", texts[int(np.argmax(X[:, 6] - 0.5 * X[:, 2]))].upper())
+    log.log_impression("sessiz", "x", ["a", "b"], np.zeros((2, 8)))  # secimsiz: grup olmaz
+    log.flush()
+    return log
+
+
+def test_accepts_are_joined_to_impressions_per_user(tmp_path):
+    """Secim, ayni kullanicinin secilen metni iceren gosterimine baglanmali; secimsiz gosterim atilmali."""
+    log = RankingEventLog(str(tmp_path / "events.jsonl"))
+    log.log_impression("u1", "mer", ["merhaba", "merci"], [[0.1] * 8, [0.2] * 8])
+    log.log_impression("u2", "sip", ["sipariş", "sipariş no"], [[0.3] * 8, [0.4] * 8])
+    log.log_impression("u1", "merh", ["merhabalar", "merhaba"], [[0.5] * 8, [0.6] * 8])
+    log.log_accept("u1", "merh", "Merhaba")
+    log.flush()
+
+    groups = list(build_groups(read_events(log.paths())))
+    assert groups == [([[0.1] * 8, [0.2] * 8], [1, 0]), ([[0.5] * 8, [0.6] * 8], [0, 1])]
+    assert log.snapshot()["impressions"] == 3 and log.snapshot()["accepts"] == 1
+
+
+def test_lambdarank_beats_heuristic_and_hot_swaps_compiled_model(tmp_path):
+    """Log'dan egitilen model heuristikten iyi siralamali, dosyaya derlenmis yazilmali ve ml_ranking'e takilmali."""
+    log = _synthetic_log(str(tmp_path / "events.jsonl"))
+    model_path = str(tmp_path / "ranker_model.json")
+    result = train_from_log(log.paths(), model_path, 8, MLRankingSystem.HEURISTIC_WEIGHTS, min_groups=50, backend="linear")
+
+    assert result["status"] == "trained" and result["groups"] == 120 and result["kind"] == "linear"
+    assert result["holdout_groups"] == 24 and result["ndcg"] > result["baseline_ndcg"] + 0.2  # egitilmemis gruplarda
+    ranker, spec = load_ranker(model_path, n_features=8)
+    assert spec["groups"] == 120 and ranker.weights[6] > 0 > ranker.weights[2]
+
+    ranking = MLRankingSystem()
+    ranking.install_model(ranker)
+    ranked = ranking.rank_suggestions(
+        [{"text": "uzun bir öneri metni", "score": 5.0}, {"text": "kısa", "score": 5.0}], {}, "u1"
+    )
+    assert [s["text"] for s in ranked] == ["kısa", "uzun bir öneri metni"]
+    assert train_from_log(log.paths(), model_path, 8, MLRankingSystem.HEURISTIC_WEIGHTS, min_groups=500)["status"] == "skipped"
+
+
+def test_retrain_runs_in_worker_process_and_installs_model(tmp_path, monkeypatch):
+    """retrain ayri surecte egitmeli ve modeli ml_ranking'e sicak takmali."""
+    from app.features import ml_ranking as ml_ranking_module
+
+    log = _synthetic_log(str(tmp_path / "events.jsonl"))
+    target = MLRankingSystem()
+    monkeypatch.setattr(ml_ranking_module, "ml_ranking", target)
+    trainer = RankerTrainer(log, str(tmp_path / "ranker_model.json"), min_groups=50)
+
+    result = asyncio.run(trainer.retrain(backend="linear"))
+    assert result["status"] == "trained"
+    assert target.model_trained and target.model.kind == "linear"
+    assert trainer.snapshot()["swaps"] == 1 and trainer.load() is False  # dosya degismedi
+
+
+def test_tree_ensemble_evaluates_all_trees_at_once():
+    """Duz dizilere derlenmis agaclar, satir basina agac yurumesiyle ayni skoru vermeli (lightgbm <=, xgboost <)."""
+    tree = {"feature": [6, -1, 2, -1, -1], "threshold": [0.5, 0, 0.3, 0, 0],
+            "left": [1, -1, 3, -1, -1], "right": [2, -1, 4, -1, -1], "value": [0, 1.0, 0, 2.0, 3.0]}
+    stump = {"feature": [0, -1, -1], "threshold": [0.5, 0, 0], "left": [1, -1, -1], "right": [2, -1, -1], "value": [0, -1.0, 1.0]}
+    X = np.zeros((4, 8))
+    X[:, 6] = [0.2, 0.9, 0.9, 0.5]
+    X[:, 2] = [0.0, 0.1, 0.9, 0.3]
+    X[:, 0] = [0.5, 0.0, 1.0, 0.5]
+
+    assert TreeEnsembleRanker([tree, stump], 8).predict(X).tolist() == [0.0, 1.0, 4.0, 0.0]
+    assert TreeEnsembleRanker([tree, stump], 8, strict=True).predict(X).tolist() == [2.0, 1.0, 4.0, 4.0]
+
+
+def test_orchestrator_logs_final_impressions(tmp_path, monkeypatch):
+    """Gosterilen son liste hem olay loguna (feature'larla) hem advanced ranking CTR gosterimine yazilmali."""
+    log = RankingEventLog(str(tmp_path / "events.jsonl"), flush_every=1)
+    monkeypatch.setattr(orchestrator_module, "ranking_log", log)
+    orchestrator = orchestrator_module.orchestrator
+
+    response = asyncio.run(orchestrator.predict("merh", max_suggestions=5, user_id="u9"))
+    events = list(read_events(log.paths()))
+
+    assert len(events) == 1 and events[0]["u"] == "u9"
+    assert events[0]["c"] == [s.text for s in response.suggestions]
+    assert all(len(row) == 8 for row in events[0]["x"])
+    if orchestrator_module.ADVANCED_RANKING_AVAILABLE:
+        shown = response.suggestions[0].text
+        assert orchestrator_module.advanced_ranking.ctr_data[shown]["impressions"] >= 1
+
+
+def test_ctr_impressions_are_bounded(monkeypatch):
+    """Gosterim sayaci sinirsiz buyumemeli: en uzun suredir gosterilmeyen metin atilmali."""
+    from app.features import advanced_ranking as advanced_ranking_module
+
+    monkeypatch.setattr(advanced_ranking_module, "MAX_CTR_ENTRIES", 3)
+    ranking = advanced_ranking_module.AdvancedRanking()
+    for text in ("a", "b", "c", "a", "d"):
+        ranking.record_impression(text)
+    ranking.record_click("d")
+
+    assert list(ranking.ctr_data) == ["c", "a", "d"]
+    assert ranking.ctr_data["a"]["impressions"] == 2 and ranking._get_ctr("d") == 1.0
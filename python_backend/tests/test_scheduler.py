@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from app.core.scheduler import DeadlineScheduler, SourceSpec
+
+
+async def _source(value, delay=0.0, blocking_ms=0.0):
+    if blocking_ms:
+        time.sleep(blocking_ms / 1000.0)
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_scheduler_respects_budget_and_learns_costs():
+    """Butce asilmamali; yavas kaynak iptal edilip olculen maliyetiyle sonraki istekte atlanmali."""
+    specs = {
+        "fast": SourceSpec(cost_ms=1, value=10, required=True),
+        "slow": SourceSpec(cost_ms=5, value=6, blocking=False),
+        "heavy": SourceSpec(cost_ms=200, value=1),
+    }
+    observed = []
+    scheduler = DeadlineScheduler(specs, observers=[lambda source, ms: observed.append(source)])
+
+    async def scenario():
+        start = time.perf_counter()
+        first = await scheduler.run(
+            [("slow", _source("s", delay=0.5)), ("fast", _source("f")), ("heavy", _source("h", blocking_ms=200))],
+            budget_ms=50,
+        )
+        first_ms = (time.perf_counter() - start) * 1000
+        second = await scheduler.run([("slow", _source("s", delay=0.5)), ("fast", _source("f"))], budget_ms=15)
+        third = await scheduler.run([("fast", _source("f")), ("slow", _source("s", delay=0.01))], budget_ms=1000)
+        return first, first_ms, second, third
+
+    first, first_ms, second, third = asyncio.run(scenario())
+    assert first == {"fast": "f"} and first_ms < 150  # heavy hic baslamadi, slow iptal edildi
+    assert second == {"fast": "f"}  # slow'un ogrenilen maliyeti (5 ms -> 20 ms) butceye sigmiyor
+    assert list(third) == ["fast", "slow"]  # sonuclar is sirasiyla
+    stats = scheduler.snapshot()["sources"]
+    assert stats["heavy"]["skipped"] == 1 and stats["slow"] == {"run": 1, "skipped": 1, "timed_out": 1}
+    assert "slow" in observed and "heavy" not in observed
+
+
+def test_skipped_source_estimate_decays_back_into_budget():
+    """Butceyi asan tahmin yuzunden atlanan kaynak kalici olarak devre disi kalmamali."""
+    scheduler = DeadlineScheduler()
+    scheduler.cost_model.observe("transformer", 10, 260)
+    plans = [scheduler.plan(["lexicon", "transformer", "ngram"], 10, 250) for _ in range(3)]
+
+    assert plans[0] == ["lexicon", "ngram"]
+    assert "transformer" in plans[1]  # 260 -> 238 (bildirilen 150 ms'ye dogru)
+    assert scheduler.cost_model.estimate("transformer", 10) < 250
@@ -0,0 +1,23 @@
+import json
+
+import numpy as np
+
+from app.core.serialization import dumps, phase_message
+from app.models.candidate import Candidate
+from app.models.schemas import PredictionResponse, Suggestion
+
+
+def test_orjson_output_matches_model_dump():
+    """orjson yolu model_dump ile ayni JSON'u uretmeli; Candidate ve numpy skorlari da yazilabilmeli."""
+    response = PredictionResponse(
+        suggestions=[Suggestion(text="merhaba", type="dictionary", score=np.float64(9.5), description="Sözlük", source="lexicon")],
+        processing_time_ms=1.5,
+        sources_used=["lexicon"],
+    )
+    assert json.loads(dumps(response)) == json.loads(response.model_dump_json())
+
+    message = json.loads(phase_message("fast", response, False))
+    assert message["phase"] == "fast" and message["final"] is False and message["suggestions"][0]["score"] == 9.5
+
+    candidate = Candidate("selam", "ai", np.float32(0.5), source="transformer")
+    assert json.loads(dumps([candidate])) == [candidate.as_dict()]
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.core.singleflight import SingleFlight
+
+
+def test_identical_concurrent_calls_share_one_computation():
+    """Ayni anahtarli es zamanli cagrilar tek hesaplama paylasmali; bir bekleyicinin iptali digerini etkilememeli."""
+    flight = SingleFlight()
+    runs = []
+
+    async def compute(value):
+        runs.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("merhaba", lambda: compute("a")))
+        cancelled = asyncio.ensure_future(flight.do("merhaba", lambda: compute("b")))
+        other = asyncio.ensure_future(flight.do("selam", lambda: compute("c")))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        results = await asyncio.gather(first, other)
+        sequential = await flight.do("merhaba", lambda: compute("d"))  # bitmis hesaplama onbelleklenmez
+        return results, sequential, cancelled.cancelled()
+
+    results, sequential, was_cancelled = asyncio.run(scenario())
+    assert results == ["a", "c"] and sequential == "d" and was_cancelled
+    assert runs == ["a", "c", "d"]
+    stats = flight.snapshot()
+    assert stats["leaders"] == 3 and stats["coalesced"] == 1 and stats["in_flight"] == 0
+
+
+def test_coalesce_key_separates_transformer_sessions(monkeypatch):
+    """Transformer calisacaksa farkli KV oturumlari ayni hesaplamayi paylasmamali; calismayacaksa paylasmali."""
+    from app.core.config import settings
+    from app.services.orchestrator import HybridOrchestrator
+
+    monkeypatch.setattr(settings, "USE_TRANSFORMER", True)
+    key = HybridOrchestrator._coalesce_key
+    assert key("merhaba ", None, 5, True, True, 0, "s1") != key("merhaba ", None, 5, True, True, 0, "s2")
+    assert key("merhaba  ", None, 5, True, True, 0, "s1") == key("merhaba ", None, 5, True, True, 0, "s1")
+    assert key("merhaba ", None, 5, False, True, 0, "s1") == key("merhaba ", None, 5, False, True, 0, "s2")
+    assert key("merhaba ", None, 5, True, True, 0, "s1", 250.0) != key("merhaba ", None, 5, True, True, 0, "s1", 500.0)
@@ -0,0 +1,40 @@
+from app.core.lexicon import Lexicon
+from app.core.snapshot import source_digest
+
+
+def test_lexicon_snapshot_roundtrip(tmp_path):
+    """Snapshot'tan yuklenen lexicon, kurulan lexicon ile ayni sonuclari vermeli."""
+    source = tmp_path / "words.txt"
+    source.write_text("merhaba\nMerhabalar\nmerak\nmasa\n", encoding="utf-8")
+    source_hash = source_digest(str(source))
+    snapshot = str(tmp_path / "lexicon.snap")
+
+    built = Lexicon()
+    built.add_words(source.read_text(encoding="utf-8").split(), {"merak": 7})
+    built.save_snapshot(snapshot, source_hash)
+
+    loaded = Lexicon()
+    assert loaded.load_snapshot(snapshot, source_hash)
+    assert list(loaded.words) == list(built.words)
+    assert loaded.search("mer") == built.search("mer")
+    assert loaded.frequency_of("MERAK") == 7
+
+
+def test_lexicon_snapshot_invalidated(tmp_path):
+    """Kaynak hash'i degisince veya dosya bozulunca snapshot reddedilmeli."""
+    source = tmp_path / "words.txt"
+    source.write_text("merhaba\n", encoding="utf-8")
+    snapshot = tmp_path / "lexicon.snap"
+
+    built = Lexicon()
+    built.add_words(["merhaba"])
+    built.save_snapshot(str(snapshot), source_digest(str(source)))
+
+    source.write_text("merhaba\nselam\n", encoding="utf-8")
+    assert not Lexicon().load_snapshot(str(snapshot), source_digest(str(source)))
+
+    source.write_text("merhaba\n", encoding="utf-8")
+    data = bytearray(snapshot.read_bytes())
+    data[-3] ^= 0xFF
+    snapshot.write_bytes(bytes(data))
+    assert not Lexicon().load_snapshot(str(snapshot), source_digest(str(source)))
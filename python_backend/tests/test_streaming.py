@@ -0,0 +1,38 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_ws_streams_fast_phase_then_final():
+    """/ws once hizli yol sonucunu ("fast") gondermeli; son mesaj final olmali, suggestions anahtari korunmali."""
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"text": "merhaba nas", "max_suggestions": 5})
+            messages = [ws.receive_json()]
+            while not messages[-1]["final"]:
+                messages.append(ws.receive_json())
+
+    assert messages[0]["phase"] == "fast"
+    assert all(m["phase"] == "enhanced" for m in messages[1:])
+    assert all(isinstance(m["suggestions"], list) for m in messages)
+    assert messages[0]["suggestions"] and "lexicon" in messages[0]["sources_used"]
+
+
+def test_http_stream_emits_phases_as_ndjson_and_sse():
+    """/predict/stream ayni asamalari NDJSON (satir basina JSON) ve SSE olarak gondermeli."""
+    headers = {"X-API-Key": "texthelper-secret-key-2024"}
+    payload = {"text": "merhaba nas", "max_suggestions": 5}
+    with TestClient(app) as client:
+        ndjson = client.post("/api/v1/predict/stream?format=ndjson", json=payload, headers=headers)
+        sse = client.post("/api/v1/predict/stream", json=payload, headers=headers)
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    messages = [json.loads(line) for line in ndjson.text.splitlines() if line]
+    assert messages[0]["phase"] == "fast" and messages[0]["suggestions"]
+    assert messages[-1]["final"] and not any(m["final"] for m in messages[:-1])
+
+    assert sse.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in sse.text.strip().split("\n\n")]
+    assert events[0][0] == "event: fast" and json.loads(events[-1][1][len("data: "):])["final"]
@@ -0,0 +1,44 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.ws_protocol import DELTA_JSON, DeltaProtocol, apply_delta
+from app.main import app
+from app.models.schemas import PredictionResponse, Suggestion
+
+
+def _response(*items):
+    suggestions = [Suggestion(text=t, type=ty, score=sc, description="d", source=src) for t, ty, sc, src in items]
+    return PredictionResponse(suggestions=suggestions, processing_time_ms=1.0, sources_used=["lexicon"])
+
+
+def test_delta_messages_rebuild_the_full_list():
+    """Fark mesajlari onceki listeyle birlestirilince tam listeyi vermeli; degismeyen oge yalnizca indeksle gelmeli."""
+    protocol = DeltaProtocol(binary=False)
+    first = _response(("merhaba", "dictionary", 9.0, "lexicon"), ("merkez", "dictionary", 8.0, "lexicon"))
+    second = _response(("merkez", "dictionary", 8.0, "lexicon"), ("mersin", "keyword", 7.0, "custom"), ("merhaba", "dictionary", 9.5, "lexicon"))
+
+    state = []
+    for response in (first, second):
+        message = json.loads(protocol.response("fast", response, True))
+        state = apply_delta(state, message)
+        assert state == [s.model_dump() for s in response.suggestions]
+    assert message["l"][0] == 1 and message["l"][2] == [0, 9.5] and message["l"][1][4] == "custom"
+
+
+def test_ws_negotiates_delta_subprotocol():
+    """Istemci delta alt protokolunu isterse hello + fark mesajlari gelmeli; varsayilan JSON degismemeli."""
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws", subprotocols=[DELTA_JSON]) as ws:
+            assert ws.accepted_subprotocol == DELTA_JSON
+            hello = ws.receive_json()
+            ws.send_json({"text": "merhaba nas", "max_suggestions": 5})
+            messages = [ws.receive_json()]
+            while not messages[-1]["final"]:
+                messages.append(ws.receive_json())
+
+    assert "dictionary" in hello["types"] and "lexicon" in hello["sources"]
+    state = []
+    for message in messages:
+        state = apply_delta(state, message, hello["types"], hello["sources"])
+    assert state and all(set(s) == {"text", "type", "score", "description", "source"} for s in state)